@@ -0,0 +1,175 @@
+from decimal import Decimal
+from typing import List
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+
+from app.assemblies.expansion import AssemblyExpander, insert_line_items
+from app.core.metrics import IMPORT_ROWS
+from app.core.tracing import get_tracer
+from app.db.base import get_db
+from app.middleware.rbac import get_current_tenant_id, get_current_user_id, require_role
+from app.models.assembly import Assembly, AssemblyComponent
+from app.models.data_version import bump_data_version
+from app.models.project import BuildProject
+from app.models.user import UserRole
+from app.pricing.price_book import PriceBookResolver, normalize_sku
+from app.schemas.assembly import (
+    Assembly as AssemblySchema,
+)
+from app.schemas.assembly import (
+    AssemblyCreate,
+    AssemblyExpansionRequest,
+    AssemblyExpansionResponse,
+)
+from app.utils.audit import AuditLogger
+
+router = APIRouter()
+tracer = get_tracer(__name__)
+
+
+@router.post("/", response_model=AssemblySchema, status_code=status.HTTP_201_CREATED)
+def create_assembly(
+    assembly: AssemblyCreate,
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+    user_id: str = Depends(get_current_user_id),
+    _: UserRole = Depends(require_role(UserRole.PM)),
+):
+    """Define an assembly and the components one instance of it expands into"""
+    db_assembly = Assembly(
+        tenant_id=tenant_id, name=assembly.name, description=assembly.description
+    )
+    for position, component in enumerate(assembly.components):
+        values = component.model_dump()
+        if values["sku"]:
+            values["sku"] = normalize_sku(values["sku"])
+        db_assembly.components.append(AssemblyComponent(position=position, **values))
+    db.add(db_assembly)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="An assembly with this name already exists",
+        )
+    db.refresh(db_assembly)
+
+    audit = AuditLogger(db, tenant_id, user_id)
+    audit.log_create(
+        "Assembly",
+        db_assembly.id,
+        {"name": db_assembly.name, "component_count": len(assembly.components)},
+    )
+
+    return db_assembly
+
+
+@router.get("/", response_model=List[AssemblySchema])
+def list_assemblies(
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+):
+    """List the tenant's assemblies with their components"""
+    return (
+        db.query(Assembly)
+        .options(selectinload(Assembly.components))
+        .filter(Assembly.tenant_id == tenant_id)
+        .order_by(Assembly.name)
+        .all()
+    )
+
+
+@router.get("/{assembly_id}", response_model=AssemblySchema)
+def get_assembly(
+    assembly_id: UUID,
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+):
+    """Get an assembly"""
+    assembly = (
+        db.query(Assembly)
+        .filter(Assembly.id == assembly_id, Assembly.tenant_id == tenant_id)
+        .first()
+    )
+    if not assembly:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Assembly not found"
+        )
+    return assembly
+
+
+@router.post("/expand/{project_id}", response_model=AssemblyExpansionResponse)
+def expand_assemblies(
+    project_id: UUID,
+    expansion: AssemblyExpansionRequest,
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Expand assembly instances into the project's material line items
+
+    All instances expand or none do: with errors nothing is inserted and the
+    response lists them (status 400 unless dry_run).
+    """
+    project = (
+        db.query(BuildProject)
+        .filter(BuildProject.id == project_id, BuildProject.tenant_id == tenant_id)
+        .first()
+    )
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
+        )
+
+    prices = PriceBookResolver(db, tenant_id) if expansion.resolve_prices else None
+    expander = AssemblyExpander(db, tenant_id, prices=prices)
+    missing = expander.load(instance.assembly_id for instance in expansion.instances)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Assembly {missing[0]} not found",
+        )
+
+    with tracer.start_as_current_span("assemblies.expand") as span:
+        rows, errors = expander.expand_all(expansion.instances)
+        span.set_attribute("assemblies.instances", len(expansion.instances))
+        span.set_attribute("assemblies.expansions", expander.expansion_count)
+
+    response = AssemblyExpansionResponse(
+        instance_count=len(expansion.instances),
+        expansion_count=expander.expansion_count,
+        line_item_count=len(rows),
+        total_cost=sum((row["total_cost"] for row in rows), Decimal(0)),
+        errors=errors,
+        dry_run=expansion.dry_run,
+    )
+    if expansion.dry_run:
+        return response
+    if errors:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=errors)
+
+    with tracer.start_as_current_span("assemblies.persist") as span:
+        count = insert_line_items(db, project_id, rows)
+        span.set_attribute("import.rows", count)
+    # Bulk inserts bypass the unit of work, so bump the project's data version here
+    bump_data_version(db, [project_id])
+    db.commit()
+    IMPORT_ROWS.labels(kind="materials", outcome="imported").inc(count)
+
+    audit = AuditLogger(db, tenant_id, user_id)
+    audit.log_create(
+        "MaterialLineItem",
+        project_id,
+        {
+            "bulk_import_count": count,
+            "source": "assemblies",
+            "instance_count": len(expansion.instances),
+        },
+    )
+
+    return response
@@ -1,20 +1,127 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sqlalchemy.orm import Session
-from typing import List
-from uuid import UUID
+import logging
+import mimetypes
+import re
 import uuid
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from kombu.exceptions import OperationalError
+from sqlalchemy.orm import Session, joinedload
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
 from app.db.base import get_db
-from app.models.file import File
+from app.files.blobs import (
+    acquire_blob,
+    copy_hashed,
+    find_blob,
+    find_blob_by_key,
+    hash_object,
+    register_blob,
+    release_blob,
+)
+from app.files.bundles import BundleEntry, ZipBundle, entry_name, unique_names
+from app.files.previews import claim_previews, release_previews
+from app.files.tasks import backfill_crc32_task, derive_previews_task, extract_text_task
+from app.files.text import is_extractable, search_query
+from app.middleware.rbac import get_current_tenant_id, get_current_user_id
+from app.models.blob import Blob, PreviewStatus
+from app.models.file import File, FileType
 from app.models.project import BuildProject
 from app.schemas.file import (
     File as FileSchema,
+)
+from app.schemas.file import (
     FileCreate,
-    PresignedUploadUrlResponse,
+    FileSearchResult,
     PresignedDownloadUrlResponse,
+    PresignedUploadUrlResponse,
+    StoredBlob,
+    Thumbnail,
 )
-from app.middleware.rbac import get_current_tenant_id, get_current_user_id
+from app.storage import StorageError, get_storage
+from app.storage.responses import (
+    RangeNotSatisfiable,
+    content_disposition,
+    parse_range,
+    storage_response,
+)
+from app.storage.signing import signed_url, verify_signature
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+_UNSAFE_FILENAME = re.compile(r"[^A-Za-z0-9._ -]+")
+
+
+def _url_for(key: str, method: str) -> str:
+    """Presigned URL from the backend if it issues them, else one signed by this API"""
+    ttl = settings.STORAGE_URL_TTL_SECONDS
+    return get_storage().presigned_url(key, method, ttl) or signed_url(key, method, ttl)
+
+
+def _verify_blob_url(key: str, method: str, expires: int, signature: str) -> None:
+    if not verify_signature(key, method, expires, signature):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired signature"
+        )
+
+
+class _DuplicateContent(Exception):
+    pass
+
+
+def _file_response(file: File) -> FileSchema:
+    """File metadata, with signed thumbnail URLs once a photo's previews are ready"""
+    response = FileSchema.model_validate(file)
+    blob = file.blob
+    if file.file_type == FileType.PHOTO and blob is not None:
+        response.preview_status = blob.preview_status
+        if blob.preview_status == PreviewStatus.READY:
+            thumbnails = sorted(blob.previews["thumbnails"], key=lambda t: t["size"])
+            response.thumbnails = [
+                Thumbnail(
+                    width=t["width"], height=t["height"], url=_url_for(t["key"], "GET")
+                )
+                for t in thumbnails
+            ]
+            response.placeholder = blob.previews["placeholder"]
+    return response
+
+
+def _request_previews(db: Session, blob: Blob) -> None:
+    """Queue preview derivation for a blob that has never had it (or whose claim timed out)"""
+    if not claim_previews(db, blob.id):
+        return
+    # Rendered by a Celery worker (or inline with CELERY_TASK_ALWAYS_EAGER), which opens its own session
+    try:
+        derive_previews_task.delay(str(blob.id))
+    except OperationalError:
+        # The file itself is saved; leave the blob unclaimed so the next photo upload retries
+        logger.warning(
+            f"Preview queue unavailable, previews for blob {blob.id} not requested"
+        )
+        release_previews(db, blob.id)
+
+
+def _request_text(file: File) -> None:
+    """Queue text extraction for a newly saved document"""
+    try:
+        extract_text_task.delay(str(file.id))
+    except OperationalError:
+        # The file itself is saved; it just won't turn up in content search
+        logger.warning(f"Text extraction queue unavailable, file {file.id} not indexed")
 
 
 @router.post("/upload-url", response_model=PresignedUploadUrlResponse)
@@ -22,31 +129,40 @@ async def get_upload_url(
     filename: str,
     project_id: UUID,
     request: Request,
+    sha256: Optional[str] = Query(default=None, pattern=r"^[0-9a-fA-F]{64}$"),
     db: Session = Depends(get_db),
     tenant_id: str = Depends(get_current_tenant_id),
 ):
-    """Get presigned URL for file upload"""
+    """
+    Get presigned URL for file upload
+
+    Clients that hash the file first can pass sha256: if the tenant already
+    stores that content, blob_exists is true and the upload can be skipped.
+    """
     # Verify project
     project = (
         db.query(BuildProject)
         .filter(BuildProject.id == project_id, BuildProject.tenant_id == tenant_id)
         .first()
     )
-    
+
     if not project:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-    
-    # Generate storage key
-    storage_key = f"{tenant_id}/{project_id}/{uuid.uuid4()}/{filename}"
-    
-    # In production, generate presigned URL with boto3
-    # For MVP, return placeholder
-    upload_url = f"https://s3.example.com/upload?key={storage_key}"
-    
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
+        )
+
+    # Generate storage key; the filename is reduced to characters safe in any backend
+    safe_name = (
+        _UNSAFE_FILENAME.sub("_", filename.rsplit("/", 1)[-1]).strip(". ") or "file"
+    )
+    storage_key = f"{tenant_id}/{project_id}/{uuid.uuid4()}/{safe_name}"
+
+    # PUT the raw file body to upload_url
     return PresignedUploadUrlResponse(
-        upload_url=upload_url,
+        upload_url=_url_for(storage_key, "PUT"),
         storage_key=storage_key,
-        expires_in=3600,
+        expires_in=settings.STORAGE_URL_TTL_SECONDS,
+        blob_exists=sha256 is not None and find_blob(db, tenant_id, sha256) is not None,
     )
 
 
@@ -65,16 +181,67 @@ async def create_file(
         .filter(BuildProject.id == file.project_id, BuildProject.tenant_id == tenant_id)
         .first()
     )
-    
+
     if not project:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-    
-    db_file = File(**file.model_dump(), tenant_id=tenant_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
+        )
+
+    storage = get_storage()
+    if file.sha256:
+        # Content the tenant already stores, e.g. after upload-url reported blob_exists
+        blob = find_blob(db, tenant_id, file.sha256)
+    elif file.storage_key:
+        # Only keys issued to this project by upload-url, for objects that were uploaded
+        if not file.storage_key.startswith(f"{tenant_id}/{file.project_id}/"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid storage key"
+            )
+        blob = find_blob_by_key(db, tenant_id, file.storage_key)
+        if blob is None:
+            # Uploaded straight to the backend (e.g. an S3 presigned URL): hash it now
+            try:
+                digest, size_bytes, crc32 = await run_in_threadpool(
+                    hash_object, storage, file.storage_key
+                )
+            except StorageError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="File has not been uploaded",
+                )
+            blob, _ = register_blob(
+                db, storage, tenant_id, file.storage_key, digest, size_bytes, crc32
+            )
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="storage_key or sha256 is required",
+        )
+
+    if blob is None or not acquire_blob(db, blob):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="File has not been uploaded"
+        )
+
+    db_file = File(
+        **file.model_dump(exclude={"storage_key", "sha256", "size_bytes"}),
+        storage_key=blob.storage_key,
+        sha256=blob.sha256,
+        size_bytes=blob.size_bytes,
+        blob_id=blob.id,
+        tenant_id=tenant_id,
+    )
     db.add(db_file)
     db.commit()
+
+    if db_file.file_type == FileType.PHOTO:
+        _request_previews(db, blob)
+    elif is_extractable(db_file.filename):
+        _request_text(db_file)
     db.refresh(db_file)
-    
-    return db_file
+    db.refresh(blob)
+
+    return _file_response(db_file)
 
 
 @router.get("/", response_model=List[FileSchema])
@@ -87,10 +254,152 @@ async def list_files(
     """List files for a project"""
     files = (
         db.query(File)
+        .options(joinedload(File.blob))
         .filter(File.project_id == project_id, File.tenant_id == tenant_id)
         .all()
     )
-    return files
+    return [_file_response(file) for file in files]
+
+
+@router.get("/search", response_model=List[FileSearchResult])
+async def search_files(
+    request: Request,
+    q: str = Query(
+        ...,
+        min_length=2,
+        max_length=200,
+        description='Words, "quoted phrases", OR, -excluded',
+    ),
+    project_id: Optional[UUID] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+):
+    """Search the text of the tenant's documents, best matches first"""
+    rows = (
+        db.execute(search_query(tenant_id, q, project_id, skip, limit)).unique().all()
+    )
+    return [
+        FileSearchResult(file=_file_response(file), rank=rank, snippet=snippet)
+        for file, rank, snippet in rows
+    ]
+
+
+@router.get("/bundle")
+async def download_bundle(
+    request: Request,
+    project_id: UUID,
+    file_type: Optional[List[FileType]] = Query(default=None),
+    file_id: Optional[List[UUID]] = Query(default=None),
+    range_header: Optional[str] = Header(default=None, alias="Range"),
+    if_range: Optional[str] = Header(default=None),
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+):
+    """
+    Download a project's files as one ZIP, assembled while it streams
+
+    Narrow the selection with file_type and/or file_id (both repeatable).
+    Files are grouped in a folder per type. Unless some entry is deflated,
+    the response has a Content-Length and honours Range/If-Range, so an
+    interrupted download can be resumed.
+    """
+    project = (
+        db.query(BuildProject)
+        .filter(BuildProject.id == project_id, BuildProject.tenant_id == tenant_id)
+        .first()
+    )
+
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
+        )
+
+    query = (
+        db.query(File)
+        .options(joinedload(File.blob))
+        .filter(
+            File.project_id == project_id,
+            File.tenant_id == tenant_id,
+            File.blob_id != None,
+        )
+    )
+    if file_type:
+        query = query.filter(File.file_type.in_(file_type))
+    if file_id:
+        query = query.filter(File.id.in_(file_id))
+    # A fixed order keeps the archive byte-identical between requests
+    files = query.order_by(File.file_type, File.filename, File.id).all()
+    if not files:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="No files found"
+        )
+
+    storage = get_storage()
+    legacy = sorted({str(file.blob_id) for file in files if file.blob.crc32 is None})
+    if legacy:
+        # These stream with a CRC computed on the fly; record it for next time off the request path
+        try:
+            backfill_crc32_task.delay(legacy)
+        except OperationalError:
+            logger.warning(
+                f"Task queue unavailable, CRC-32 backfill of {len(legacy)} blobs not requested"
+            )
+    names = unique_names(
+        [entry_name(file.file_type.value, file.filename) for file in files]
+    )
+    bundle = ZipBundle(
+        [
+            BundleEntry(
+                name=name,
+                storage_key=file.blob.storage_key,
+                size=file.blob.size_bytes,
+                crc32=file.blob.crc32,
+                modified=file.created_at,
+            )
+            for name, file in zip(names, files, strict=True)
+        ],
+        storage,
+    )
+
+    archive_name = _UNSAFE_FILENAME.sub("_", project.title).strip(". ") or "files"
+    headers = {
+        "etag": bundle.etag,
+        "content-disposition": content_disposition(f"{archive_name}.zip"),
+    }
+    size = bundle.size
+    if size is None:
+        headers["accept-ranges"] = "none"
+        return StreamingResponse(
+            iter(bundle), headers=headers, media_type="application/zip"
+        )
+
+    headers["accept-ranges"] = "bytes"
+    # A stale If-Range means the client's partial copy is outdated: send it all
+    if if_range is not None and if_range != bundle.etag:
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        return Response(
+            status_code=416,
+            headers={"content-range": f"bytes */{size}", "accept-ranges": "bytes"},
+        )
+
+    if byte_range is None:
+        start, length, status_code = 0, size, 200
+    else:
+        start, end = byte_range
+        length, status_code = end - start + 1, 206
+        headers["content-range"] = f"bytes {start}-{end}/{size}"
+    headers["content-length"] = str(length)
+    return StreamingResponse(
+        bundle.iter_range(start, length),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/zip",
+    )
 
 
 @router.get("/{file_id}/download-url", response_model=PresignedDownloadUrlResponse)
@@ -102,18 +411,114 @@ async def get_download_url(
 ):
     """Get presigned download URL"""
     file = (
-        db.query(File)
-        .filter(File.id == file_id, File.tenant_id == tenant_id)
-        .first()
+        db.query(File).filter(File.id == file_id, File.tenant_id == tenant_id).first()
     )
-    
+
     if not file:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
-    
-    # In production, generate presigned URL with boto3
-    download_url = f"https://s3.example.com/download?key={file.storage_key}"
-    
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="File not found"
+        )
+
     return PresignedDownloadUrlResponse(
-        download_url=download_url,
-        expires_in=3600,
+        download_url=_url_for(file.storage_key, "GET"),
+        expires_in=settings.STORAGE_URL_TTL_SECONDS,
     )
+
+
+@router.delete("/{file_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_file(
+    file_id: UUID,
+    request: Request,
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+):
+    """Delete file metadata; the content goes once no file references it"""
+    file = (
+        db.query(File).filter(File.id == file_id, File.tenant_id == tenant_id).first()
+    )
+
+    if not file:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="File not found"
+        )
+
+    if file.blob_id:
+        release_blob(db, file.blob_id)
+    db.delete(file)
+    db.commit()
+
+    return None
+
+
+@router.put("/blob/{key:path}", response_model=StoredBlob)
+async def put_blob(
+    key: str,
+    request: Request,
+    expires: int = Query(...),
+    signature: str = Query(...),
+    db: Session = Depends(get_db),
+):
+    """
+    Upload target for signed URLs issued by upload-url (local storage)
+
+    The body is hashed and written to storage as it arrives, never held in
+    memory. If the tenant already stores the same content the new copy is
+    dropped; either way, pass the returned sha256 when saving the metadata.
+    The signature is the authorization, so no bearer token is needed.
+    """
+    _verify_blob_url(key, "PUT", expires, signature)
+    try:
+        # Keys are issued as {tenant_id}/{project_id}/...
+        tenant_id = uuid.UUID(key.split("/", 1)[0])
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid storage key"
+        )
+    stored = find_blob_by_key(db, tenant_id, key)
+
+    storage = get_storage()
+    try:
+        with storage.open_write(key) as out:
+            digest, size_bytes, crc32 = await copy_hashed(request.stream(), out)
+            # Leaving the block with an error discards what was written
+            existing = find_blob(db, tenant_id, digest)
+            if existing is not None:
+                raise _DuplicateContent()
+            if stored is not None:
+                # Never replace content that files already reference
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT, detail="Object already stored"
+                )
+    except _DuplicateContent:
+        return StoredBlob(
+            sha256=existing.sha256, size_bytes=existing.size_bytes, duplicate=True
+        )
+
+    blob, duplicate = register_blob(
+        db, storage, tenant_id, key, digest, size_bytes, crc32
+    )
+    return StoredBlob(
+        sha256=blob.sha256, size_bytes=blob.size_bytes, duplicate=duplicate
+    )
+
+
+@router.api_route("/blob/{key:path}", methods=["GET", "HEAD"])
+async def get_blob(
+    key: str,
+    expires: int = Query(...),
+    signature: str = Query(...),
+    range_header: Optional[str] = Header(default=None, alias="Range"),
+    if_range: Optional[str] = Header(default=None),
+):
+    """Download target for signed URLs issued by download-url, with Range support"""
+    _verify_blob_url(key, "GET", expires, signature)
+
+    try:
+        media_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+        return storage_response(
+            get_storage(), key, range_header, if_range, media_type=media_type
+        )
+    except StorageError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="File not found"
+        )
@@ -1,32 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
 from fastapi.responses import StreamingResponse
+from kombu.exceptions import OperationalError
+from sqlalchemy import Numeric, func, literal, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
-from uuid import UUID
-from datetime import datetime
-from decimal import Decimal
-import io
 
+from app.core.metrics import EXPORT_ROWS, IMPORT_ROWS
+from app.core.tracing import get_tracer
 from app.db.base import get_db
-from app.models.material import MaterialLineItem, MaterialCategory
+from app.imports.engine import FINAL_STATUSES, insert_material_records, release_input
+from app.imports.tasks import run_import_job as run_import_task
+from app.middleware.rbac import get_current_tenant_id, get_current_user_id, require_role
+from app.models.audit import AuditAction
+from app.models.data_version import bump_data_version
+from app.models.import_job import ImportFormat, ImportJob, ImportJobStatus
+from app.models.material import MaterialCategory, MaterialLineItem
 from app.models.project import BuildProject
+from app.models.upload import UploadSession, UploadStatus
+from app.models.user import UserRole
+from app.pricing.price_book import PriceBookResolver, normalize_sku, normalize_unit
+from app.schemas.import_job import ImportJob as ImportJobSchema
 from app.schemas.material import (
-    MaterialLineItem as MaterialSchema,
-    MaterialLineItemCreate,
-    MaterialLineItemUpdate,
+    MaterialCategorySummary,
     MaterialImportRequest,
     MaterialImportResponse,
+    MaterialLineItemCreate,
+    MaterialLineItemUpdate,
+    MaterialRepriceRequest,
+    MaterialRepriceResponse,
     MaterialsSummary,
-    MaterialCategorySummary,
 )
-from app.middleware.rbac import get_current_tenant_id, get_current_user_id, require_role
-from app.models.user import UserRole
-from app.utils.calculations import ConstructionCalculator, CalculationError
+from app.schemas.material import (
+    MaterialLineItem as MaterialSchema,
+)
+from app.storage import StorageError, get_storage
+from app.uploads.sessions import open_upload
 from app.utils.audit import AuditLogger, dict_from_model
-from app.utils.import_export import MaterialCsvImporter, export_materials_to_csv
+from app.utils.calculations import CalculationError, ConstructionCalculator
+from app.utils.import_export import (
+    IMPORT_BATCH_ROWS,
+    XLSX_CONTENT_TYPE,
+    MaterialCsvImporter,
+    MaterialXlsxImporter,
+    export_materials_to_xlsx,
+    iter_file,
+    write_materials_csv,
+)
+from app.utils.import_export import (
+    ImportError as FileImportError,
+)
+from app.utils.import_validation import MAX_TOTAL_COST, MAX_UNIT_COST
 
 router = APIRouter()
+tracer = get_tracer(__name__)
+
+# Rows per round trip, and in-memory size before exports spill to disk
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_SPOOL_MAX_MEMORY = 8 * 1024 * 1024
 
 
 def compute_material_totals(material: MaterialLineItem):
@@ -51,11 +98,12 @@ def compute_material_totals(material: MaterialLineItem):
 async def create_material(
     material: MaterialLineItemCreate,
     request: Request,
+    resolve_prices: bool = False,
     db: Session = Depends(get_db),
     tenant_id: str = Depends(get_current_tenant_id),
     user_id: str = Depends(get_current_user_id),
 ):
-    """Create a new material line item"""
+    """Create a new material line item (with resolve_prices=true, priced from the price book by sku)"""
     # Verify project belongs to tenant
     project = (
         db.query(BuildProject)
@@ -65,26 +113,41 @@ async def create_material(
         )
         .first()
     )
-    
+
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found",
         )
-    
-    db_material = MaterialLineItem(**material.model_dump())
-    
+
+    db_material = MaterialLineItem(**material.model_dump(exclude={"sku"}))
+    if resolve_prices:
+        if not material.sku:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="sku is required to resolve the price",
+            )
+        prices = PriceBookResolver(db, tenant_id)
+        price = prices.price(material.sku, material.unit)
+        if price is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=prices.mismatch_message(material.sku, material.unit)
+                or f"SKU {material.sku} has no current price in the price book",
+            )
+        db_material.unit_cost = price
+
     # Compute totals server-side
     compute_material_totals(db_material)
-    
+
     db.add(db_material)
     db.commit()
     db.refresh(db_material)
-    
+
     # Audit log
     audit = AuditLogger(db, tenant_id, user_id)
-    audit.log_create("MaterialLineItem", str(db_material.id), dict_from_model(db_material))
-    
+    audit.log_create("MaterialLineItem", db_material.id, dict_from_model(db_material))
+
     return db_material
 
 
@@ -108,21 +171,21 @@ async def list_materials(
         )
         .first()
     )
-    
+
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found",
         )
-    
+
     query = db.query(MaterialLineItem).filter(
         MaterialLineItem.project_id == project_id,
         MaterialLineItem.deleted_at == None,
     )
-    
+
     if category:
         query = query.filter(MaterialLineItem.category == category)
-    
+
     materials = query.offset(skip).limit(limit).all()
     return materials
 
@@ -145,13 +208,13 @@ async def get_material(
         )
         .first()
     )
-    
+
     if not material:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Material not found",
         )
-    
+
     return material
 
 
@@ -175,30 +238,32 @@ async def update_material(
         )
         .first()
     )
-    
+
     if not db_material:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Material not found",
         )
-    
+
     before = dict_from_model(db_material)
-    
+
     # Update fields
     update_data = material_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_material, field, value)
-    
+
     # Recompute totals
     compute_material_totals(db_material)
-    
+
     db.commit()
     db.refresh(db_material)
-    
+
     # Audit log
     audit = AuditLogger(db, tenant_id, user_id)
-    audit.log_update("MaterialLineItem", str(db_material.id), before, dict_from_model(db_material))
-    
+    audit.log_update(
+        "MaterialLineItem", str(db_material.id), before, dict_from_model(db_material)
+    )
+
     return db_material
 
 
@@ -221,20 +286,22 @@ async def delete_material(
         )
         .first()
     )
-    
+
     if not db_material:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Material not found",
         )
-    
+
     db_material.deleted_at = datetime.utcnow()
     db.commit()
-    
+
     # Audit log
     audit = AuditLogger(db, tenant_id, user_id)
-    audit.log_delete("MaterialLineItem", str(db_material.id), dict_from_model(db_material))
-    
+    audit.log_delete(
+        "MaterialLineItem", str(db_material.id), dict_from_model(db_material)
+    )
+
     return None
 
 
@@ -242,11 +309,12 @@ async def delete_material(
 async def import_materials(
     import_request: MaterialImportRequest,
     request: Request,
+    resolve_prices: bool = False,
     db: Session = Depends(get_db),
     tenant_id: str = Depends(get_current_tenant_id),
     user_id: str = Depends(get_current_user_id),
 ):
-    """Bulk import materials from CSV/XLSX"""
+    """Bulk import materials from parsed rows (files go through import-csv / import-xlsx)"""
     # Verify project
     project = (
         db.query(BuildProject)
@@ -256,20 +324,36 @@ async def import_materials(
         )
         .first()
     )
-    
+
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found",
         )
-    
+
     success_count = 0
     error_count = 0
     errors = []
     created_ids = []
-    
+
+    # One lookup for all the rows' SKUs; rows without a known SKU keep their unit_cost,
+    # rows whose SKU is only priced in units that don't convert to theirs fail
+    prices, mismatches = {}, {}
+    if resolve_prices:
+        resolver = PriceBookResolver(db, tenant_id)
+        items = [
+            (normalize_sku(row.sku), normalize_unit(row.unit))
+            for row in import_request.materials
+            if row.sku
+        ]
+        prices = resolver.prices(items)
+        mismatches = resolver.unit_mismatches(items)
+
     for idx, row in enumerate(import_request.materials):
         try:
+            item = (normalize_sku(row.sku or ""), normalize_unit(row.unit))
+            if item in mismatches:
+                raise ValueError(resolver.mismatch_message(*item))
             # Validate and create material
             material = MaterialLineItem(
                 project_id=import_request.project_id,
@@ -278,29 +362,34 @@ async def import_materials(
                 quantity=Decimal(str(row.quantity)),
                 unit=row.unit,
                 wastage_factor=Decimal(str(row.wastage_factor)),
-                unit_cost=Decimal(str(row.unit_cost)),
+                unit_cost=prices.get(item, Decimal(str(row.unit_cost))),
                 notes=row.notes,
             )
-            
+
             compute_material_totals(material)
-            
+
             db.add(material)
             db.flush()
-            
+
             created_ids.append(material.id)
             success_count += 1
-            
+
         except Exception as e:
             error_count += 1
-            errors.append({
-                "row": idx + 1,
-                "error": str(e),
-                "data": row.model_dump(),
-            })
-    
+            errors.append(
+                {
+                    "row": idx + 1,
+                    "error": str(e),
+                    "data": row.model_dump(),
+                }
+            )
+
     if success_count > 0:
         db.commit()
-    
+
+    IMPORT_ROWS.labels(kind="materials", outcome="imported").inc(success_count)
+    IMPORT_ROWS.labels(kind="materials", outcome="error").inc(error_count)
+
     return MaterialImportResponse(
         success_count=success_count,
         error_count=error_count,
@@ -309,6 +398,162 @@ async def import_materials(
     )
 
 
+def _money(value: Any) -> Decimal:
+    return Decimal(str(value or 0)).quantize(Decimal("0.01"))
+
+
+def _like_pattern(pattern: str) -> str:
+    escaped = pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped.replace("*", "%")
+
+
+def _reprice_expressions(reprice: MaterialRepriceRequest):
+    """New unit_cost and total_cost as SQL, rounded to the columns' scale like compute_material_totals"""
+    if reprice.unit_cost is not None:
+        unit_cost = literal(
+            reprice.unit_cost.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP),
+            Numeric(10, 2),
+        )
+    else:
+        factor = 1 + reprice.percent_change / 100
+        unit_cost = func.round(
+            MaterialLineItem.unit_cost * literal(factor, Numeric()),
+            2,
+            type_=Numeric(10, 2),
+        )
+    # Costs are never negative, where SQL round() (half away from zero) is ROUND_HALF_UP
+    total_cost = func.round(
+        MaterialLineItem.total_qty * unit_cost, 2, type_=Numeric(12, 2)
+    )
+    return unit_cost, total_cost
+
+
+@router.post("/reprice", response_model=MaterialRepriceResponse)
+async def reprice_materials(
+    reprice: MaterialRepriceRequest,
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+    user_id: str = Depends(get_current_user_id),
+    _: UserRole = Depends(require_role(UserRole.PM)),
+):
+    """
+    Set or scale unit_cost on every matching line item and recompute total_cost, in one UPDATE
+
+    With dry_run, only reports how many items match and how totals would change.
+    """
+    projects = select(BuildProject.id).where(BuildProject.tenant_id == tenant_id)
+    if reprice.project_ids:
+        project_ids = set(reprice.project_ids)
+        projects = projects.where(BuildProject.id.in_(project_ids))
+        if db.query(func.count()).select_from(projects.subquery()).scalar() != len(
+            project_ids
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
+            )
+    conditions = [
+        MaterialLineItem.project_id.in_(projects),
+        MaterialLineItem.deleted_at == None,
+    ]
+    if reprice.categories:
+        conditions.append(MaterialLineItem.category.in_(reprice.categories))
+    if reprice.description_pattern:
+        conditions.append(
+            MaterialLineItem.description.ilike(
+                _like_pattern(reprice.description_pattern), escape="\\"
+            )
+        )
+    new_unit_cost, new_total_cost = _reprice_expressions(reprice)
+
+    # Same expressions as the UPDATE: the preview per project, and a range
+    # check so an overflowing percentage is a 400 rather than a numeric overflow
+    preview = (
+        db.query(
+            MaterialLineItem.project_id,
+            func.count(MaterialLineItem.id).label("matched"),
+            func.sum(MaterialLineItem.total_cost).label("before"),
+            func.sum(new_total_cost).label("after"),
+            func.max(new_unit_cost).label("max_unit_cost"),
+            func.max(new_total_cost).label("max_total_cost"),
+        )
+        .filter(*conditions)
+        .group_by(MaterialLineItem.project_id)
+        .all()
+    )
+    if any(
+        _money(row.max_unit_cost) > MAX_UNIT_COST
+        or _money(row.max_total_cost) > MAX_TOTAL_COST
+        for row in preview
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Repricing would exceed the largest unit cost or total cost that can be stored",
+        )
+    matched = sum(row.matched for row in preview)
+    before_by_project = {row.project_id: _money(row.before) for row in preview}
+    before = _money(sum(before_by_project.values(), Decimal(0)))
+    if reprice.dry_run:
+        after = _money(sum((_money(row.after) for row in preview), Decimal(0)))
+        return MaterialRepriceResponse(
+            matched_count=matched,
+            updated_count=0,
+            total_cost_before=before,
+            total_cost_after=after,
+            cost_delta=after - before,
+            dry_run=True,
+        )
+
+    with tracer.start_as_current_span(
+        "materials.reprice", attributes={"materials.matched": matched}
+    ):
+        updated = db.execute(
+            update(MaterialLineItem)
+            .where(*conditions)
+            .values(unit_cost=new_unit_cost, total_cost=new_total_cost)
+            .returning(MaterialLineItem.project_id, MaterialLineItem.total_cost)
+            .execution_options(synchronize_session=False)
+        ).all()
+        updated_count: Dict[UUID, int] = {}
+        after_by_project: Dict[UUID, Decimal] = {}
+        for row in updated:
+            updated_count[row.project_id] = updated_count.get(row.project_id, 0) + 1
+            after_by_project[row.project_id] = (
+                after_by_project.get(row.project_id, Decimal(0)) + row.total_cost
+            )
+        project_ids = sorted(updated_count, key=str)
+        after = _money(sum(after_by_project.values(), Decimal(0)))
+        # Bulk UPDATE bypasses the unit of work, so bump the projects' data versions here
+        bump_data_version(db, project_ids)
+        db.commit()
+
+    # One entry per project, under the project's id like bulk imports
+    audit = AuditLogger(db, tenant_id, user_id)
+    bulk_reprice = reprice.model_dump(
+        mode="json", exclude={"dry_run"}, exclude_none=True
+    )
+    for project_id in project_ids:
+        audit.log(
+            action=AuditAction.UPDATE,
+            entity_type="MaterialLineItem",
+            entity_id=project_id,
+            changes={
+                "bulk_reprice": bulk_reprice,
+                "updated_count": updated_count[project_id],
+                "total_cost_before": str(before_by_project.get(project_id, 0)),
+                "total_cost_after": str(_money(after_by_project[project_id])),
+            },
+        )
+
+    return MaterialRepriceResponse(
+        matched_count=matched,
+        updated_count=len(updated),
+        total_cost_before=before,
+        total_cost_after=after,
+        cost_delta=after - before,
+        project_ids=project_ids,
+    )
+
+
 @router.get("/summary/{project_id}", response_model=MaterialsSummary)
 async def get_materials_summary(
     project_id: UUID,
@@ -326,13 +571,13 @@ async def get_materials_summary(
         )
         .first()
     )
-    
+
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found",
         )
-    
+
     # Get total cost
     total_cost_result = (
         db.query(func.sum(MaterialLineItem.total_cost))
@@ -342,8 +587,8 @@ async def get_materials_summary(
         )
         .scalar()
     )
-    total_cost = total_cost_result or Decimal('0')
-    
+    total_cost = total_cost_result or Decimal("0")
+
     # Get summary by category
     category_summary = (
         db.query(
@@ -358,112 +603,587 @@ async def get_materials_summary(
         .group_by(MaterialLineItem.category)
         .all()
     )
-    
+
     by_category = [
         MaterialCategorySummary(
             category=cat,
-            total_cost=cost or Decimal('0'),
+            total_cost=cost or Decimal("0"),
             item_count=count,
         )
         for cat, cost, count in category_summary
     ]
-    
+
     return MaterialsSummary(
         total_cost=total_cost,
         by_category=by_category,
     )
 
 
+def _get_project(db: Session, project_id: UUID, tenant_id: str) -> BuildProject:
+    project = (
+        db.query(BuildProject)
+        .filter(
+            BuildProject.id == project_id,
+            BuildProject.tenant_id == tenant_id,
+        )
+        .first()
+    )
+
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
+        )
+
+    return project
+
+
+def _dry_run_response(importer: MaterialCsvImporter) -> MaterialImportResponse:
+    return MaterialImportResponse(
+        success_count=importer.row_count - importer.error_count,
+        error_count=importer.error_count,
+        errors=importer.errors,
+        dry_run=True,
+    )
+
+
+def _finish_file_import(
+    db: Session, project_id: UUID, tenant_id: str, user_id: str, source: str, count: int
+) -> MaterialImportResponse:
+    # Bulk inserts bypass the unit of work, so bump the project's data version here
+    bump_data_version(db, [project_id])
+    db.commit()
+    IMPORT_ROWS.labels(kind="materials", outcome="imported").inc(count)
+
+    audit_logger = AuditLogger(db, tenant_id, user_id)
+    audit_logger.log_create(
+        "MaterialLineItem",
+        project_id,
+        {
+            "bulk_import_count": count,
+            "source": source,
+        },
+    )
+
+    return MaterialImportResponse(success_count=count, error_count=0)
+
+
+def _import_format(filename: str) -> ImportFormat:
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    if extension not in ("csv", "xlsx"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only .csv and .xlsx files can be imported",
+        )
+    return ImportFormat(extension.upper())
+
+
+def _price_resolver(
+    db: Session, tenant_id: str, resolve_prices: bool
+) -> Optional[PriceBookResolver]:
+    return PriceBookResolver(db, tenant_id) if resolve_prices else None
+
+
+def _import_csv(
+    db: Session,
+    project_id: UUID,
+    tenant_id: str,
+    user_id: str,
+    fileobj: BinaryIO,
+    dry_run: bool,
+    source: str = "csv",
+    resolve_prices: bool = False,
+) -> MaterialImportResponse:
+    importer = MaterialCsvImporter(
+        dry_run=dry_run, prices=_price_resolver(db, tenant_id, resolve_prices)
+    )
+    try:
+        records = importer.validate_csv(fileobj)
+        if dry_run:
+            return _dry_run_response(importer)
+        importer.raise_for_errors()
+    except FileImportError as e:
+        IMPORT_ROWS.labels(kind="materials", outcome="error").inc(importer.error_count)
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Create materials in database
+    with tracer.start_as_current_span("import.materials.persist") as span:
+        count = 0
+        for start in range(0, len(records), IMPORT_BATCH_ROWS):
+            count += insert_material_records(
+                db, project_id, records[start : start + IMPORT_BATCH_ROWS]
+            )
+        span.set_attribute("import.rows", count)
+
+    return _finish_file_import(db, project_id, tenant_id, user_id, source, count)
+
+
+def _import_xlsx(
+    db: Session,
+    project_id: UUID,
+    tenant_id: str,
+    user_id: str,
+    fileobj: BinaryIO,
+    dry_run: bool,
+    source: str = "xlsx",
+    resolve_prices: bool = False,
+) -> MaterialImportResponse:
+    importer = MaterialXlsxImporter(
+        dry_run=dry_run, prices=_price_resolver(db, tenant_id, resolve_prices)
+    )
+    with tracer.start_as_current_span("import.materials.persist") as span:
+        count = 0
+        try:
+            for batch in importer.iter_batches(fileobj):
+                if not dry_run:
+                    count += insert_material_records(db, project_id, batch)
+            if dry_run:
+                return _dry_run_response(importer)
+            importer.raise_for_errors()
+        except FileImportError as e:
+            db.rollback()
+            IMPORT_ROWS.labels(kind="materials", outcome="error").inc(
+                importer.error_count
+            )
+            raise HTTPException(status_code=400, detail=str(e))
+        span.set_attribute("import.rows", count)
+
+    return _finish_file_import(db, project_id, tenant_id, user_id, source, count)
+
+
 @router.post("/import-csv/{project_id}", response_model=MaterialImportResponse)
-async def import_materials_csv(
-    project_id: str,
+def import_materials_csv(
+    project_id: UUID,
+    dry_run: bool = False,
+    resolve_prices: bool = False,
     file: UploadFile = File(...),
-    request: Request = None,
     db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+    user_id: str = Depends(get_current_user_id),
 ):
     """
     Import materials from CSV file
-    
+
     CSV format:
     category,description,quantity,unit,wastage_factor,unit_cost,vendor,notes
     FRAMING,2x4 Lumber - 8ft,500,EA,0.10,8.50,ABC Lumber,Premium grade
+
+    With dry_run=true the file is only validated and every invalid cell is
+    returned in errors; nothing is written. With resolve_prices=true, rows
+    with a sku column value in the price book take its current price as
+    unit_cost (and unit_cost may be left out).
+    """
+    _get_project(db, project_id, tenant_id)
+
+    # Validate the whole file, read straight from the spooled upload
+    return _import_csv(
+        db,
+        project_id,
+        tenant_id,
+        user_id,
+        file.file,
+        dry_run,
+        resolve_prices=resolve_prices,
+    )
+
+
+@router.post("/import-xlsx/{project_id}", response_model=MaterialImportResponse)
+def import_materials_xlsx(
+    project_id: UUID,
+    dry_run: bool = False,
+    resolve_prices: bool = False,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Import materials from an XLSX workbook
+
+    Uses the CSV column headers; every sheet with them is imported. Rows are
+    read and inserted in batches, and nothing is committed if any row fails.
+    dry_run and resolve_prices as for import-csv.
+    """
+    _get_project(db, project_id, tenant_id)
+
+    # The upload is already spooled to disk; read-only mode seeks within it
+    return _import_xlsx(
+        db,
+        project_id,
+        tenant_id,
+        user_id,
+        file.file,
+        dry_run,
+        resolve_prices=resolve_prices,
+    )
+
+
+@router.post("/import-upload/{upload_id}", response_model=MaterialImportResponse)
+def import_materials_upload(
+    upload_id: UUID,
+    dry_run: bool = False,
+    resolve_prices: bool = False,
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Import materials from a completed resumable upload (see /uploads)
+
+    The file is read from storage as .csv or .xlsx by its extension, into the
+    project the upload was started for. dry_run and resolve_prices as for import-csv.
     """
-    tenant_id = request.state.tenant_id
-    user_id = request.state.user_id
-    
-    # Read file content
-    content = await file.read()
-    csv_content = content.decode("utf-8")
-    
-    # Parse CSV
-    importer = MaterialCsvImporter()
+    upload = (
+        db.query(UploadSession)
+        .filter(UploadSession.id == upload_id, UploadSession.tenant_id == tenant_id)
+        .first()
+    )
+
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found"
+        )
+
+    if upload.status != UploadStatus.COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload is {upload.status.value}",
+        )
+
+    import_format = _import_format(upload.filename)
+    _get_project(db, upload.project_id, tenant_id)
+
     try:
-        material_creates = importer.parse_csv(csv_content, project_id)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    
-    # Create materials in database
-    created_materials = []
-    for material_data in material_creates:
-        material = MaterialLineItem(
-            **material_data.dict(),
-            tenant_id=tenant_id,
-        )
-        
-        # Server-side calculation
-        compute_material_totals(material)
-        
-        db.add(material)
-        created_materials.append(material)
-    
-    db.commit()
-    
-    # Audit log
-    audit_logger = AuditLogger(db, tenant_id, user_id)
-    audit_logger.log_create("material", {
-        "project_id": project_id,
-        "bulk_import_count": len(created_materials),
-    })
-    
-    return MaterialImportResponse(
-        imported_count=len(created_materials),
-        skipped_count=0,
-        errors=[],
+        fileobj = open_upload(upload, get_storage())
+    except StorageError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Uploaded file not found"
+        )
+
+    with fileobj:
+        if import_format == ImportFormat.CSV:
+            return _import_csv(
+                db,
+                upload.project_id,
+                tenant_id,
+                user_id,
+                fileobj,
+                dry_run,
+                "upload",
+                resolve_prices,
+            )
+        return _import_xlsx(
+            db,
+            upload.project_id,
+            tenant_id,
+            user_id,
+            fileobj,
+            dry_run,
+            "upload",
+            resolve_prices,
+        )
+
+
+def _find_import_job(db: Session, tenant_id: str, idempotency_key: str) -> ImportJob:
+    return (
+        db.query(ImportJob)
+        .filter(
+            ImportJob.tenant_id == tenant_id,
+            ImportJob.idempotency_key == idempotency_key,
+        )
+        .first()
     )
 
 
-@router.get("/export-csv/{project_id}")
-async def export_materials_csv(
-    project_id: str,
-    request: Request,
+def _replay_import_job(
+    job: ImportJob, project_id: UUID, response: Response
+) -> ImportJob:
+    if job.project_id != project_id:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Idempotency-Key was already used for a different import",
+        )
+    response.status_code = status.HTTP_200_OK
+    return job
+
+
+def _enqueue_import_job(db: Session, job: ImportJob, response: Response) -> ImportJob:
+    storage = get_storage()
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A request with the same Idempotency-Key committed first; share its job
+        db.rollback()
+        release_input(job, storage)
+        existing = _find_import_job(db, job.tenant_id, job.idempotency_key)
+        if existing is None:
+            raise
+        return _replay_import_job(existing, job.project_id, response)
+
+    # Run by a Celery worker (or inline with CELERY_TASK_ALWAYS_EAGER), which opens its own session
+    try:
+        run_import_task.delay(str(job.id))
+    except OperationalError:
+        job.status = ImportJobStatus.FAILED
+        job.error_message = "Import queue unavailable"
+        # Free the key so the client can retry with it
+        job.idempotency_key = None
+        db.commit()
+        release_input(job, storage)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Import queue unavailable",
+        )
+
+    db.refresh(job)
+    return job
+
+
+@router.post(
+    "/import-jobs/{project_id}",
+    response_model=ImportJobSchema,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def create_import_job(
+    project_id: UUID,
+    response: Response,
+    dry_run: bool = False,
+    resolve_prices: bool = False,
+    file: UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(default=None, max_length=255),
     db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+    user_id: str = Depends(get_current_user_id),
 ):
-    """Export project materials to CSV"""
-    tenant_id = request.state.tenant_id
-    
-    materials = (
-        db.query(MaterialLineItem)
+    """
+    Queue a CSV or XLSX import as a background job
+
+    Poll GET /import-jobs/{id} for progress. Repeating a request with the same
+    Idempotency-Key header returns the original job instead of importing twice.
+    """
+    _get_project(db, project_id, tenant_id)
+    import_format = _import_format(file.filename)
+
+    if idempotency_key:
+        existing = _find_import_job(db, tenant_id, idempotency_key)
+        if existing:
+            return _replay_import_job(existing, project_id, response)
+
+    job_id = uuid.uuid4()
+    job = ImportJob(
+        id=job_id,
+        tenant_id=tenant_id,
+        project_id=project_id,
+        user_id=user_id,
+        format=import_format,
+        filename=file.filename,
+        storage_key=f"imports/{tenant_id}/{job_id}.{import_format.value.lower()}",
+        dry_run=dry_run,
+        resolve_prices=resolve_prices,
+        idempotency_key=idempotency_key,
+        status=ImportJobStatus.PENDING,
+    )
+    # The worker reads the file from storage
+    get_storage().save(job.storage_key, file.file)
+
+    return _enqueue_import_job(db, job, response)
+
+
+@router.post(
+    "/import-jobs/from-upload/{upload_id}",
+    response_model=ImportJobSchema,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def create_import_job_from_upload(
+    upload_id: UUID,
+    response: Response,
+    dry_run: bool = False,
+    resolve_prices: bool = False,
+    idempotency_key: Optional[str] = Header(default=None, max_length=255),
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+    user_id: str = Depends(get_current_user_id),
+):
+    """Queue an import of a completed resumable upload (see /uploads) as a background job"""
+    upload = (
+        db.query(UploadSession)
+        .filter(UploadSession.id == upload_id, UploadSession.tenant_id == tenant_id)
+        .first()
+    )
+
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found"
+        )
+
+    if upload.status != UploadStatus.COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload is {upload.status.value}",
+        )
+
+    import_format = _import_format(upload.filename)
+    _get_project(db, upload.project_id, tenant_id)
+
+    if idempotency_key:
+        existing = _find_import_job(db, tenant_id, idempotency_key)
+        if existing:
+            return _replay_import_job(existing, upload.project_id, response)
+
+    job = ImportJob(
+        tenant_id=tenant_id,
+        project_id=upload.project_id,
+        user_id=user_id,
+        format=import_format,
+        filename=upload.filename,
+        storage_key=upload.storage_key,
+        upload_id=upload.id,
+        dry_run=dry_run,
+        resolve_prices=resolve_prices,
+        idempotency_key=idempotency_key,
+        status=ImportJobStatus.PENDING,
+    )
+
+    return _enqueue_import_job(db, job, response)
+
+
+def _get_import_job(db: Session, job_id: UUID, tenant_id: str) -> ImportJob:
+    job = (
+        db.query(ImportJob)
+        .filter(ImportJob.id == job_id, ImportJob.tenant_id == tenant_id)
+        .first()
+    )
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found"
+        )
+
+    return job
+
+
+@router.get("/import-jobs/{job_id}", response_model=ImportJobSchema)
+async def get_import_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+):
+    """Get import job status and row counts"""
+    return _get_import_job(db, job_id, tenant_id)
+
+
+@router.post("/import-jobs/{job_id}/cancel", response_model=ImportJobSchema)
+async def cancel_import_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+):
+    """
+    Cancel an import job
+
+    A queued job is cancelled at once; a running job stops after its current
+    batch and removes the rows it had inserted.
+    """
+    job = _get_import_job(db, job_id, tenant_id)
+    if job.status in FINAL_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Import job is {job.status.value}",
+        )
+
+    job.cancel_requested = True
+    db.commit()
+    # Only a job no worker has picked up yet can be cancelled here
+    cancelled = (
+        db.query(ImportJob)
+        .filter(ImportJob.id == job.id, ImportJob.status == ImportJobStatus.PENDING)
+        .update(
+            {
+                ImportJob.status: ImportJobStatus.CANCELLED,
+                ImportJob.finished_at: datetime.now(timezone.utc),
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    db.refresh(job)
+    if cancelled:
+        release_input(job, get_storage())
+
+    return job
+
+
+def _material_export_rows(db: Session, project_id: UUID) -> Iterator[Dict[str, Any]]:
+    """Stream a project's materials as export dicts, ordered by category"""
+    columns = [
+        MaterialLineItem.id,
+        MaterialLineItem.category,
+        MaterialLineItem.description,
+        MaterialLineItem.quantity,
+        MaterialLineItem.unit,
+        MaterialLineItem.wastage_factor,
+        MaterialLineItem.total_qty,
+        MaterialLineItem.unit_cost,
+        MaterialLineItem.total_cost,
+        MaterialLineItem.notes,
+    ]
+    query = (
+        db.query(*columns)
         .filter(
-            MaterialLineItem.tenant_id == tenant_id,
             MaterialLineItem.project_id == project_id,
             MaterialLineItem.deleted_at.is_(None),
         )
-        .all()
+        .order_by(MaterialLineItem.category, MaterialLineItem.description)
     )
-    
-    # Convert to dicts
-    material_dicts = [
-        MaterialSchema.from_orm(m).dict() for m in materials
-    ]
-    
-    # Generate CSV
-    csv_content = export_materials_to_csv(material_dicts)
-    
+    for row in query.yield_per(EXPORT_CHUNK_SIZE):
+        yield row._asdict()
+
+
+@router.get("/export-csv/{project_id}")
+def export_materials_csv(
+    project_id: UUID,
+    request: Request,
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+):
+    """Export project materials to CSV"""
+    _get_project(db, project_id, tenant_id)
+
+    # Spooled to disk past EXPORT_SPOOL_MAX_MEMORY, then streamed in chunks
+    out = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_MEMORY)
+    count = write_materials_csv(_material_export_rows(db, project_id), out)
+    EXPORT_ROWS.labels(kind="materials", format="csv").inc(count)
+    out.seek(0)
+
     # Return as downloadable file
     return StreamingResponse(
-        iter([csv_content]),
+        iter_file(out),
         media_type="text/csv",
         headers={
             "Content-Disposition": f"attachment; filename=materials_{project_id}.csv"
         },
     )
+
+
+@router.get("/export-xlsx/{project_id}")
+def export_materials_xlsx(
+    project_id: UUID,
+    request: Request,
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+):
+    """Export project materials to XLSX, one sheet per category"""
+    _get_project(db, project_id, tenant_id)
+
+    out = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_MEMORY)
+    count = export_materials_to_xlsx(_material_export_rows(db, project_id), out)
+    EXPORT_ROWS.labels(kind="materials", format="xlsx").inc(count)
+    out.seek(0)
+
+    return StreamingResponse(
+        iter_file(out),
+        media_type=XLSX_CONTENT_TYPE,
+        headers={
+            "Content-Disposition": f"attachment; filename=materials_{project_id}.xlsx"
+        },
+    )
@@ -0,0 +1,99 @@
+import uuid
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.base import get_db
+from app.middleware.rbac import get_current_tenant_id, get_current_user_id, require_role
+from app.models.price_book import PriceBookItem
+from app.models.user import UserRole
+from app.pricing.price_book import autocomplete, normalize_sku
+from app.schemas.price_book import (
+    PriceBookImportResponse,
+    PriceBookItemCreate,
+)
+from app.schemas.price_book import (
+    PriceBookItem as PriceBookItemSchema,
+)
+from app.utils.audit import AuditLogger
+
+router = APIRouter()
+
+# Entries per bulk add request, and rows per INSERT
+MAX_ITEMS_PER_REQUEST = 10_000
+INSERT_BATCH_ROWS = 1000
+
+
+@router.post(
+    "/", response_model=PriceBookImportResponse, status_code=status.HTTP_201_CREATED
+)
+def add_price_book_items(
+    items: List[PriceBookItemCreate],
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+    user_id: str = Depends(get_current_user_id),
+    _: UserRole = Depends(require_role(UserRole.PM)),
+):
+    """
+    Add price book entries in bulk
+
+    A new price for an existing vendor and SKU is a new entry with a later
+    effective_from (end the old one with effective_to).
+    """
+    if len(items) > MAX_ITEMS_PER_REQUEST:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_ITEMS_PER_REQUEST} entries per request",
+        )
+    rows = [
+        {
+            **item.model_dump(),
+            "sku": normalize_sku(item.sku),
+            "id": uuid.uuid4(),
+            "tenant_id": tenant_id,
+        }
+        for item in items
+    ]
+    try:
+        for start in range(0, len(rows), INSERT_BATCH_ROWS):
+            db.execute(insert(PriceBookItem), rows[start : start + INSERT_BATCH_ROWS])
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="An entry for this vendor, SKU and effective_from already exists",
+        )
+
+    audit = AuditLogger(db, tenant_id, user_id)
+    audit.log_create(
+        "PriceBookItem", uuid.UUID(str(tenant_id)), {"bulk_import_count": len(rows)}
+    )
+
+    return PriceBookImportResponse(created_count=len(rows))
+
+
+@router.get("/autocomplete", response_model=List[PriceBookItemSchema])
+def autocomplete_price_book(
+    q: str = Query(
+        ..., min_length=1, max_length=100, description="SKU or description text"
+    ),
+    vendor: Optional[str] = None,
+    on: Optional[date] = Query(
+        None, description="Prices in effect on this date (default today)"
+    ),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+):
+    """Current price book entries matching a SKU prefix or description text, best matches first"""
+    if not q.strip():
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="q must not be blank",
+        )
+    return autocomplete(db, tenant_id, q, limit=limit, vendor=vendor, on=on)
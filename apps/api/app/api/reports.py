@@ -1,40 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status, BackgroundTasks
-from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from kombu.exceptions import OperationalError
+from sqlalchemy.orm import Session
+
 from app.db.base import get_db
-from app.models.report import Report, ReportStatus
+from app.middleware.rbac import get_current_tenant_id, get_current_user_id
 from app.models.project import BuildProject
+from app.models.report import Report, ReportStatus
+from app.reports.cache import get_or_create_report
+from app.reports.renderers import CONTENT_TYPES, EXTENSIONS
+from app.reports.tasks import generate_report as generate_report_task
 from app.schemas.report import (
-    Report as ReportSchema,
     GenerateReportRequest,
 )
-from app.middleware.rbac import get_current_tenant_id, get_current_user_id
+from app.schemas.report import (
+    Report as ReportSchema,
+)
+from app.storage import StorageError, get_storage
+from app.utils.import_export import iter_file
 
 router = APIRouter()
 
-
-async def generate_report_task(report_id: UUID, db: Session):
-    """Background task to generate report (placeholder for Celery)"""
-    # This would normally be a Celery task
-    # For MVP, we'll just mark as completed
-    report = db.query(Report).filter(Report.id == report_id).first()
-    if report:
-        report.status = ReportStatus.COMPLETED
-        report.download_url = f"/api/reports/{report_id}/download"
-        db.commit()
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
 
 
 @router.post("/generate", response_model=ReportSchema)
 async def generate_report(
     report_request: GenerateReportRequest,
-    background_tasks: BackgroundTasks,
     request: Request,
     db: Session = Depends(get_db),
     tenant_id: str = Depends(get_current_tenant_id),
     user_id: str = Depends(get_current_user_id),
 ):
-    """Generate a report (async)"""
+    """Generate a report (async), reusing an unchanged earlier one"""
     # Verify project
     project = (
         db.query(BuildProject)
@@ -44,25 +45,40 @@ async def generate_report(
         )
         .first()
     )
-    
+
     if not project:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-    
-    # Create report record
-    db_report = Report(
-        tenant_id=tenant_id,
-        project_id=report_request.project_id,
-        type=report_request.type,
-        format=report_request.format,
-        status=ReportStatus.PENDING,
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
+        )
+
+    # Reuse an identical report (same data version) or create one
+    db_report, created = get_or_create_report(
+        db,
+        tenant_id,
+        project,
+        report_request.type,
+        report_request.format,
+        report_request.model_dump(
+            include={"include_photos", "include_materials", "include_schedule"}
+        ),
     )
-    db.add(db_report)
-    db.commit()
-    db.refresh(db_report)
-    
-    # Add background task (in production, this would queue a Celery task)
-    background_tasks.add_task(generate_report_task, db_report.id, db)
-    
+
+    if created:
+        # Generated by a Celery worker, which opens its own session
+        try:
+            generate_report_task.delay(str(db_report.id))
+        except OperationalError:
+            # Don't leave a cached PENDING report that no worker will pick up
+            db_report.status = ReportStatus.FAILED
+            db_report.error_message = "Report queue unavailable"
+            db_report.cache_key = None
+            db.commit()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Report queue unavailable",
+            )
+        db.refresh(db_report)
+
     return db_report
 
 
@@ -79,13 +95,55 @@ async def get_report(
         .filter(Report.id == report_id, Report.tenant_id == tenant_id)
         .first()
     )
-    
+
     if not report:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
-    
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Report not found"
+        )
+
     return report
 
 
+@router.get("/{report_id}/download")
+async def download_report(
+    report_id: UUID,
+    request: Request,
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+):
+    """Stream a completed report from storage"""
+    report = (
+        db.query(Report)
+        .filter(Report.id == report_id, Report.tenant_id == tenant_id)
+        .first()
+    )
+
+    if not report:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Report not found"
+        )
+
+    if report.status != ReportStatus.COMPLETED or not report.storage_key:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Report is {report.status.value}",
+        )
+
+    try:
+        fileobj = get_storage().open(report.storage_key)
+    except StorageError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Report output not found"
+        )
+
+    filename = f"{report.type.value.lower()}_{report.id}.{EXTENSIONS[report.format]}"
+    return StreamingResponse(
+        iter_file(fileobj, DOWNLOAD_CHUNK_SIZE),
+        media_type=CONTENT_TYPES[report.format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/", response_model=List[ReportSchema])
 async def list_reports(
     request: Request,
@@ -95,9 +153,9 @@ async def list_reports(
 ):
     """List reports for tenant or project"""
     query = db.query(Report).filter(Report.tenant_id == tenant_id)
-    
+
     if project_id:
         query = query.filter(Report.project_id == project_id)
-    
+
     reports = query.order_by(Report.created_at.desc()).all()
     return reports
@@ -1,12 +1,27 @@
 from fastapi import APIRouter
-from app.api import projects, materials, schedule, reports, files, users, archive
+
+from app.api import (
+    archive,
+    assemblies,
+    files,
+    materials,
+    price_book,
+    projects,
+    reports,
+    schedule,
+    uploads,
+    users,
+)
 
 api_router = APIRouter()
 
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(projects.router, prefix="/projects", tags=["projects"])
 api_router.include_router(materials.router, prefix="/materials", tags=["materials"])
+api_router.include_router(price_book.router, prefix="/price-book", tags=["price-book"])
+api_router.include_router(assemblies.router, prefix="/assemblies", tags=["assemblies"])
 api_router.include_router(schedule.router, prefix="/milestones", tags=["schedule"])
 api_router.include_router(reports.router, prefix="/reports", tags=["reports"])
 api_router.include_router(files.router, prefix="/files", tags=["files"])
 api_router.include_router(archive.router, prefix="/archive", tags=["archive"])
+api_router.include_router(uploads.router, prefix="/uploads", tags=["uploads"])
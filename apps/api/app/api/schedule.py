@@ -1,24 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sqlalchemy.orm import Session
-from typing import List
+import io
+import tempfile
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List
 from uuid import UUID
-from datetime import datetime, date
-from app.db.base import get_db
-from app.models.schedule import ScheduleMilestone
+
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.metrics import EXPORT_ROWS, IMPORT_ROWS
+from app.core.tracing import get_tracer
+from app.db.base import dialect_insert, get_db
+from app.middleware.rbac import get_current_tenant_id, get_current_user_id
+from app.models.data_version import bump_data_version
 from app.models.project import BuildProject
+from app.models.schedule import ScheduleMilestone
 from app.schemas.schedule import (
-    ScheduleMilestone as MilestoneSchema,
+    ProjectScheduleSummary,
+    ScheduleImportResponse,
     ScheduleMilestoneCreate,
     ScheduleMilestoneUpdate,
     ScheduleVariance,
-    ProjectScheduleSummary,
 )
-from app.middleware.rbac import get_current_tenant_id, get_current_user_id
-from app.utils.calculations import ConstructionCalculator
+from app.schemas.schedule import (
+    ScheduleMilestone as MilestoneSchema,
+)
 from app.utils.audit import AuditLogger, dict_from_model
-from decimal import Decimal
+from app.utils.calculations import ConstructionCalculator
+from app.utils.import_export import (
+    IMPORT_BATCH_ROWS,
+    XLSX_CONTENT_TYPE,
+    ScheduleCsvImporter,
+    export_schedule_to_xlsx,
+    iter_file,
+    write_schedule_csv,
+)
+from app.utils.import_export import (
+    ImportError as FileImportError,
+)
 
 router = APIRouter()
+tracer = get_tracer(__name__)
+
+# Rows per round trip, and in-memory size before exports spill to disk
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+
+def _get_project(db: Session, project_id: UUID, tenant_id: str) -> BuildProject:
+    project = (
+        db.query(BuildProject)
+        .filter(BuildProject.id == project_id, BuildProject.tenant_id == tenant_id)
+        .first()
+    )
+
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
+        )
+
+    return project
+
+
+def _commit_milestones(db: Session, phase=None) -> None:
+    """Commit, turning a duplicate active phase into a 409"""
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        detail = (
+            f"Project already has a {phase.value} milestone"
+            if phase
+            else "Project already has milestones for these phases"
+        )
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
 
 
 @router.post("/", response_model=MilestoneSchema, status_code=status.HTTP_201_CREATED)
@@ -39,18 +97,22 @@ async def create_milestone(
         )
         .first()
     )
-    
+
     if not project:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-    
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
+        )
+
     db_milestone = ScheduleMilestone(**milestone.model_dump())
     db.add(db_milestone)
-    db.commit()
+    _commit_milestones(db, milestone.phase)
     db.refresh(db_milestone)
-    
+
     audit = AuditLogger(db, tenant_id, user_id)
-    audit.log_create("ScheduleMilestone", str(db_milestone.id), dict_from_model(db_milestone))
-    
+    audit.log_create(
+        "ScheduleMilestone", str(db_milestone.id), dict_from_model(db_milestone)
+    )
+
     return db_milestone
 
 
@@ -67,10 +129,12 @@ async def list_milestones(
         .filter(BuildProject.id == project_id, BuildProject.tenant_id == tenant_id)
         .first()
     )
-    
+
     if not project:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-    
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
+        )
+
     milestones = (
         db.query(ScheduleMilestone)
         .filter(
@@ -79,7 +143,7 @@ async def list_milestones(
         )
         .all()
     )
-    
+
     return milestones
 
 
@@ -103,21 +167,25 @@ async def update_milestone(
         )
         .first()
     )
-    
+
     if not db_milestone:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Milestone not found")
-    
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Milestone not found"
+        )
+
     before = dict_from_model(db_milestone)
     update_data = milestone_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_milestone, field, value)
-    
-    db.commit()
+
+    _commit_milestones(db, db_milestone.phase)
     db.refresh(db_milestone)
-    
+
     audit = AuditLogger(db, tenant_id, user_id)
-    audit.log_update("ScheduleMilestone", str(db_milestone.id), before, dict_from_model(db_milestone))
-    
+    audit.log_update(
+        "ScheduleMilestone", str(db_milestone.id), before, dict_from_model(db_milestone)
+    )
+
     return db_milestone
 
 
@@ -134,10 +202,12 @@ async def get_schedule_variance(
         .filter(BuildProject.id == project_id, BuildProject.tenant_id == tenant_id)
         .first()
     )
-    
+
     if not project:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-    
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
+        )
+
     milestones = (
         db.query(ScheduleMilestone)
         .filter(
@@ -146,24 +216,26 @@ async def get_schedule_variance(
         )
         .all()
     )
-    
+
     variances = []
     completed_count = 0
-    total_percent = Decimal('0')
-    
+    total_percent = Decimal("0")
+
     for milestone in milestones:
         if milestone.percent_complete == 100:
             completed_count += 1
-        
+
         total_percent += milestone.percent_complete
-        
+
         # Calculate variance
         actual_date = milestone.actual_end_date or date.today()
         variance_days = ConstructionCalculator.schedule_variance_days(
             milestone.baseline_end_date.isoformat(),
-            milestone.actual_end_date.isoformat() if milestone.actual_end_date else None,
+            milestone.actual_end_date.isoformat()
+            if milestone.actual_end_date
+            else None,
         )
-        
+
         variances.append(
             ScheduleVariance(
                 milestone_id=milestone.id,
@@ -174,9 +246,9 @@ async def get_schedule_variance(
                 actual_or_current_date=actual_date,
             )
         )
-    
-    avg_complete = total_percent / len(milestones) if milestones else Decimal('0')
-    
+
+    avg_complete = total_percent / len(milestones) if milestones else Decimal("0")
+
     return ProjectScheduleSummary(
         project_id=project_id,
         total_milestones=len(milestones),
@@ -184,3 +256,179 @@ async def get_schedule_variance(
         avg_percent_complete=avg_complete,
         variances=variances,
     )
+
+
+def _milestone_export_rows(db: Session, project_id: UUID) -> Iterator[Dict[str, Any]]:
+    """Stream a project's milestones as export dicts, ordered by baseline start"""
+    query = (
+        db.query(
+            ScheduleMilestone.id,
+            ScheduleMilestone.phase,
+            ScheduleMilestone.description,
+            ScheduleMilestone.baseline_start_date,
+            ScheduleMilestone.baseline_end_date,
+            ScheduleMilestone.actual_start_date,
+            ScheduleMilestone.actual_end_date,
+            ScheduleMilestone.percent_complete,
+        )
+        .filter(
+            ScheduleMilestone.project_id == project_id,
+            ScheduleMilestone.deleted_at == None,
+        )
+        .order_by(ScheduleMilestone.baseline_start_date)
+    )
+    for row in query.yield_per(EXPORT_CHUNK_SIZE):
+        yield row._asdict()
+
+
+@router.get("/export-csv/{project_id}")
+def export_schedule_csv(
+    project_id: UUID,
+    request: Request,
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+):
+    """Export project milestones to CSV (the import-csv format)"""
+    _get_project(db, project_id, tenant_id)
+
+    # Spooled to disk past EXPORT_SPOOL_MAX_MEMORY, then streamed in chunks
+    out = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_MEMORY)
+    count = write_schedule_csv(_milestone_export_rows(db, project_id), out)
+    EXPORT_ROWS.labels(kind="schedule", format="csv").inc(count)
+    out.seek(0)
+
+    return StreamingResponse(
+        iter_file(out),
+        media_type="text/csv",
+        headers={
+            "Content-Disposition": f"attachment; filename=schedule_{project_id}.csv"
+        },
+    )
+
+
+@router.get("/export-xlsx/{project_id}")
+def export_schedule_xlsx(
+    project_id: UUID,
+    request: Request,
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+):
+    """Export project milestones to XLSX"""
+    _get_project(db, project_id, tenant_id)
+
+    out = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_MEMORY)
+    count = export_schedule_to_xlsx(_milestone_export_rows(db, project_id), out)
+    EXPORT_ROWS.labels(kind="schedule", format="xlsx").inc(count)
+    out.seek(0)
+
+    return StreamingResponse(
+        iter_file(out),
+        media_type=XLSX_CONTENT_TYPE,
+        headers={
+            "Content-Disposition": f"attachment; filename=schedule_{project_id}.xlsx"
+        },
+    )
+
+
+@router.post("/import-csv/{project_id}", response_model=ScheduleImportResponse)
+def import_schedule_csv(
+    project_id: UUID,
+    upsert: bool = False,
+    dry_run: bool = False,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Import milestones from CSV (the export-csv format)
+
+    The file is validated as a whole and written with multi-row INSERTs in
+    one transaction. With upsert=true, a row whose phase already has an
+    active milestone updates it instead, touching only the columns present
+    in the file; otherwise an existing phase is a 409. dry_run=true only
+    validates the file and returns all row errors.
+    """
+    _get_project(db, project_id, tenant_id)
+
+    importer = ScheduleCsvImporter()
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        milestones = importer.parse_stream(stream, project_id)
+    except FileImportError as e:
+        # A dry run reports row errors instead of failing; header errors still fail
+        if not (dry_run and importer.errors):
+            IMPORT_ROWS.labels(kind="schedule", outcome="error").inc(
+                len(importer.errors)
+            )
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    finally:
+        # Leave the upload's file for Starlette to close
+        stream.detach()
+
+    if dry_run:
+        return ScheduleImportResponse(
+            success_count=importer.row_count - len(importer.errors),
+            error_count=len(importer.errors),
+            errors=importer.errors + importer.warnings,
+            dry_run=True,
+        )
+
+    milestone_ids = []
+    with tracer.start_as_current_span("import.schedule.persist") as span:
+        rows = [milestone.model_dump() for milestone in milestones]
+        for start in range(0, len(rows), IMPORT_BATCH_ROWS):
+            statement = dialect_insert(db, ScheduleMilestone).values(
+                rows[start : start + IMPORT_BATCH_ROWS]
+            )
+            if upsert:
+                statement = statement.on_conflict_do_update(
+                    index_elements=[
+                        ScheduleMilestone.project_id,
+                        ScheduleMilestone.phase,
+                    ],
+                    index_where=ScheduleMilestone.deleted_at.is_(None),
+                    set_={
+                        **{
+                            column: statement.excluded[column]
+                            for column in importer.columns
+                        },
+                        "updated_at": func.now(),
+                    },
+                )
+            try:
+                milestone_ids += (
+                    db.execute(statement.returning(ScheduleMilestone.id))
+                    .scalars()
+                    .all()
+                )
+            except IntegrityError:
+                db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Project already has milestones for some of these phases; import with upsert=true to update them",
+                )
+        span.set_attribute("import.rows", len(milestone_ids))
+
+    if milestone_ids:
+        # Multi-row statements bypass the unit of work, so bump the project's data version here
+        bump_data_version(db, [project_id])
+        db.commit()
+        IMPORT_ROWS.labels(kind="schedule", outcome="imported").inc(len(milestone_ids))
+
+        audit = AuditLogger(db, tenant_id, user_id)
+        audit.log_create(
+            "ScheduleMilestone",
+            project_id,
+            {
+                "bulk_import_count": len(milestone_ids),
+                "upsert": upsert,
+            },
+        )
+
+    return ScheduleImportResponse(
+        success_count=len(milestone_ids),
+        error_count=0,
+        errors=importer.warnings,
+        milestone_ids=milestone_ids,
+    )
@@ -0,0 +1,336 @@
+import hashlib
+import tempfile
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.base import get_db
+from app.middleware.rbac import get_current_tenant_id, get_current_user_id
+from app.models.project import BuildProject
+from app.models.upload import UploadSession, UploadStatus
+from app.schemas.upload import UploadSession as UploadSessionSchema
+from app.schemas.upload import UploadSessionCreate
+from app.storage import StorageError, get_storage
+from app.uploads.sessions import (
+    UploadChecksumError,
+    assemble_upload,
+    discard_upload,
+    is_expired,
+    part_key,
+    reading_job,
+)
+
+router = APIRouter()
+
+# Chunk bodies are hashed while being spooled; larger chunks spill to disk
+CHUNK_SPOOL_MAX_MEMORY = 1024 * 1024
+
+
+def _session_response(session: UploadSession) -> UploadSessionSchema:
+    return UploadSessionSchema(
+        id=session.id,
+        project_id=session.project_id,
+        filename=session.filename,
+        total_size=session.total_size,
+        received_size=session.received_size,
+        status=session.status,
+        chunk_size=settings.UPLOAD_CHUNK_SIZE,
+        expires_at=session.expires_at,
+        created_at=session.created_at,
+    )
+
+
+def _get_session(db: Session, upload_id: UUID, tenant_id: str) -> UploadSession:
+    session = (
+        db.query(UploadSession)
+        .filter(UploadSession.id == upload_id, UploadSession.tenant_id == tenant_id)
+        .first()
+    )
+
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found"
+        )
+
+    return session
+
+
+def _require_open(session: UploadSession) -> None:
+    if session.status != UploadStatus.OPEN:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload is {session.status.value}",
+        )
+    if is_expired(session):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE, detail="Upload session has expired"
+        )
+
+
+async def _spool_chunk(request: Request):
+    """Spool the request body, returning (file, size, sha256) and enforcing the chunk limit"""
+    spool = tempfile.SpooledTemporaryFile(max_size=CHUNK_SPOOL_MAX_MEMORY)
+    digest = hashlib.sha256()
+    size = 0
+    async for data in request.stream():
+        size += len(data)
+        if size > settings.UPLOAD_MAX_CHUNK_SIZE:
+            spool.close()
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Chunks are limited to {settings.UPLOAD_MAX_CHUNK_SIZE} bytes",
+            )
+        digest.update(data)
+        spool.write(data)
+    spool.seek(0)
+    return spool, size, digest.hexdigest()
+
+
+@router.post(
+    "/", response_model=UploadSessionSchema, status_code=status.HTTP_201_CREATED
+)
+async def create_upload(
+    upload: UploadSessionCreate,
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Start a resumable upload
+
+    Send the file as chunks with PUT /uploads/{id}?offset=N, each carrying an
+    X-Chunk-SHA256 header, then POST /uploads/{id}/complete. After a dropped
+    connection, GET /uploads/{id} returns received_size, the offset to resume from.
+    """
+    project = (
+        db.query(BuildProject)
+        .filter(
+            BuildProject.id == upload.project_id, BuildProject.tenant_id == tenant_id
+        )
+        .first()
+    )
+
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
+        )
+
+    if upload.total_size > settings.UPLOAD_MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Uploads are limited to {settings.UPLOAD_MAX_FILE_SIZE} bytes",
+        )
+
+    session = UploadSession(
+        tenant_id=tenant_id,
+        project_id=upload.project_id,
+        user_id=user_id,
+        filename=upload.filename,
+        total_size=upload.total_size,
+        received_size=0,
+        sha256=upload.sha256.lower() if upload.sha256 else None,
+        parts=[],
+        expires_at=datetime.now(timezone.utc)
+        + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS),
+    )
+    db.add(session)
+    db.commit()
+    db.refresh(session)
+
+    return _session_response(session)
+
+
+@router.get("/{upload_id}", response_model=UploadSessionSchema)
+async def get_upload(
+    upload_id: UUID,
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+):
+    """Get upload progress; received_size is where the next chunk starts"""
+    return _session_response(_get_session(db, upload_id, tenant_id))
+
+
+@router.put("/{upload_id}", response_model=UploadSessionSchema)
+async def upload_chunk(
+    upload_id: UUID,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    x_chunk_sha256: str = Header(..., pattern=r"^[0-9a-fA-F]{64}$"),
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+):
+    """
+    Upload one chunk (raw request body) at offset
+
+    Chunks must arrive in order. Re-sending a chunk that was already accepted
+    is a no-op, so a client that lost the response can simply retry it.
+    """
+    session = _get_session(db, upload_id, tenant_id)
+    _require_open(session)
+
+    content_length = request.headers.get("content-length")
+    if (
+        content_length
+        and content_length.isdigit()
+        and int(content_length) > settings.UPLOAD_MAX_CHUNK_SIZE
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Chunks are limited to {settings.UPLOAD_MAX_CHUNK_SIZE} bytes",
+        )
+
+    if offset > session.received_size:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Expected a chunk at offset {session.received_size}",
+        )
+
+    chunk, size, digest = await _spool_chunk(request)
+    with chunk:
+        if size == 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Empty chunk"
+            )
+        if digest != x_chunk_sha256.lower():
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Chunk checksum mismatch",
+            )
+
+        if offset < session.received_size:
+            # A retry of an accepted chunk succeeds; anything else overlaps received data
+            if any(
+                p["offset"] == offset and p["size"] == size and p["sha256"] == digest
+                for p in session.parts
+            ):
+                return _session_response(session)
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Expected a chunk at offset {session.received_size}",
+            )
+
+        if offset + size > session.total_size:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Chunk ends past the declared total_size of {session.total_size} bytes",
+            )
+
+        storage = get_storage()
+        key = part_key(session, offset, digest)
+        await run_in_threadpool(storage.save, key, chunk)
+
+    # Only advance from the offset this chunk was checked against, so a
+    # concurrent request for the same offset cannot record a second part
+    parts = session.parts + [
+        {"offset": offset, "size": size, "sha256": digest, "key": key}
+    ]
+    result = db.execute(
+        update(UploadSession)
+        .where(
+            UploadSession.id == session.id,
+            UploadSession.status == UploadStatus.OPEN,
+            UploadSession.received_size == offset,
+        )
+        .values(received_size=offset + size, parts=parts, updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.rollback()
+        db.refresh(session)
+        if not any(p["key"] == key for p in session.parts):
+            storage.delete(key)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Expected a chunk at offset {session.received_size}",
+        )
+    db.commit()
+    db.refresh(session)
+
+    return _session_response(session)
+
+
+@router.post("/{upload_id}/complete", response_model=UploadSessionSchema)
+def complete_upload(
+    upload_id: UUID,
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+):
+    """
+    Assemble the received chunks into the final file and verify its checksum
+
+    The file is kept for UPLOAD_SESSION_TTL_HOURS from now (a plain def: the
+    copy and hash run in the threadpool, off the event loop).
+    """
+    session = _get_session(db, upload_id, tenant_id)
+    if session.status == UploadStatus.COMPLETED:
+        return _session_response(session)
+    _require_open(session)
+
+    if session.received_size != session.total_size:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload incomplete: {session.received_size} of {session.total_size} bytes received",
+        )
+
+    storage = get_storage()
+    try:
+        storage_key = assemble_upload(session, storage)
+    except UploadChecksumError as e:
+        # Every byte offset is taken, so the session can't be corrected by re-sending chunks
+        discard_upload(session, storage)
+        session.status = UploadStatus.FAILED
+        session.parts = []
+        db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{e}; start a new upload",
+        )
+    except StorageError:
+        # Another request completed it first and removed the parts
+        db.refresh(session)
+        if session.status == UploadStatus.COMPLETED:
+            return _session_response(session)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Upload parts are missing"
+        )
+
+    session.storage_key = storage_key
+    session.status = UploadStatus.COMPLETED
+    session.parts = []
+    session.expires_at = datetime.now(timezone.utc) + timedelta(
+        hours=settings.UPLOAD_SESSION_TTL_HOURS
+    )
+    db.commit()
+    db.refresh(session)
+
+    return _session_response(session)
+
+
+@router.delete("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_upload(
+    upload_id: UUID,
+    db: Session = Depends(get_db),
+    tenant_id: str = Depends(get_current_tenant_id),
+):
+    """Abort an upload and delete its stored data (refused while an import job reads it)"""
+    session = _get_session(db, upload_id, tenant_id)
+    if session.status == UploadStatus.COMPLETED:
+        job_id = reading_job(db, session)
+        if job_id:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Upload is the input of import job {job_id}",
+            )
+
+    discard_upload(session, get_storage())
+    session.status = UploadStatus.ABORTED
+    session.parts = []
+    session.storage_key = None
+    db.commit()
+
+    return None
@@ -0,0 +1 @@
+# Assembly takeoff expansion package
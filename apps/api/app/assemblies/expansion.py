@@ -0,0 +1,195 @@
+"""
+Assembly takeoff expansion
+An assembly instance ("100 LF of 2x6 exterior wall at 9 ft") expands into one
+material line item per component. Takeoffs repeat the same few dimensions many
+times, so each distinct (assembly, dimensions) expansion is computed once per
+batch and reused, and the resulting rows are inserted in bulk.
+"""
+
+import math
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.assembly import Assembly, AssemblyBasis, AssemblyComponent
+from app.models.material import MaterialLineItem
+from app.pricing.price_book import PriceBookResolver, normalize_sku, normalize_unit
+from app.schemas.assembly import AssemblyInstance
+from app.utils.calculations import CalculationError, ConstructionCalculator
+from app.utils.import_export import IMPORT_BATCH_ROWS
+from app.utils.import_validation import MAX_QUANTITY, MAX_TOTAL_COST
+
+
+class ExpansionError(Exception):
+    """Raised when an instance's dimensions don't fit its assembly"""
+
+    pass
+
+
+def component_quantity(
+    component: AssemblyComponent,
+    length_ft: Decimal,
+    height_ft: Optional[Decimal],
+    width_ft: Optional[Decimal],
+) -> Decimal:
+    """Quantity of a component for one instance, before wastage"""
+    basis = component.basis
+    if basis == AssemblyBasis.LENGTH:
+        base = length_ft
+    elif basis == AssemblyBasis.AREA:
+        if height_ft is None:
+            raise ExpansionError(f"height_ft is required for {component.description}")
+        base = ConstructionCalculator.floor_area(length_ft, height_ft)
+    elif basis == AssemblyBasis.VOLUME:
+        if height_ft is None or width_ft is None:
+            raise ExpansionError(
+                f"height_ft and width_ft are required for {component.description}"
+            )
+        base = ConstructionCalculator.volume(length_ft, width_ft, height_ft)
+    elif basis == AssemblyBasis.SPACING:
+        # Members on center along the run, plus the one closing it
+        base = Decimal(math.ceil(length_ft * 12 / component.spacing_in) + 1)
+    else:
+        base = Decimal(1)
+    return ConstructionCalculator._round(base * component.factor, 3)
+
+
+class AssemblyExpander:
+    """
+    Expands assembly instances of a tenant into material line item rows
+
+    Assemblies are loaded with their components in one query, and with prices
+    set, component SKUs are priced from the price book in one lookup; a
+    component without a price book entry keeps its own unit_cost, and one
+    listed only in units that don't convert to its own fails to expand. Expansions
+    are cached per (assembly, dimensions) for the life of the expander.
+    """
+
+    def __init__(
+        self, db: Session, tenant_id, prices: Optional[PriceBookResolver] = None
+    ):
+        self.db = db
+        self.tenant_id = tenant_id
+        self.prices = prices
+        self.assemblies: Dict[Any, Assembly] = {}
+        self._unit_costs: Dict[Any, Decimal] = {}
+        self._price_errors: Dict[Any, str] = {}
+        self._expansions: Dict[Tuple, Tuple[Dict[str, Any], ...]] = {}
+
+    def load(self, assembly_ids: Iterable) -> List:
+        """Load the given assemblies; returns the ids that don't exist for the tenant"""
+        wanted = set(assembly_ids) - self.assemblies.keys()
+        if not wanted:
+            return []
+        assemblies = (
+            self.db.query(Assembly)
+            .options(selectinload(Assembly.components))
+            .filter(Assembly.tenant_id == self.tenant_id, Assembly.id.in_(wanted))
+            .all()
+        )
+        components = [c for assembly in assemblies for c in assembly.components]
+        items = {
+            component.id: (normalize_sku(component.sku), normalize_unit(component.unit))
+            for component in components
+            if component.sku
+        }
+        prices, mismatches = {}, {}
+        if self.prices is not None:
+            prices = self.prices.prices(items.values())
+            mismatches = self.prices.unit_mismatches(items.values())
+        for component in components:
+            item = items.get(component.id)
+            self._unit_costs[component.id] = prices.get(item, component.unit_cost)
+            if item in mismatches:
+                self._price_errors[component.id] = self.prices.mismatch_message(*item)
+        self.assemblies.update((assembly.id, assembly) for assembly in assemblies)
+        return sorted(wanted - self.assemblies.keys(), key=str)
+
+    @property
+    def expansion_count(self) -> int:
+        return len(self._expansions)
+
+    def expand(self, instance: AssemblyInstance) -> Tuple[Dict[str, Any], ...]:
+        """Line item values for one instance of a loaded assembly (shared, don't modify)"""
+        key = (
+            instance.assembly_id,
+            instance.length_ft,
+            instance.height_ft,
+            instance.width_ft,
+        )
+        rows = self._expansions.get(key)
+        if rows is None:
+            rows = self._expansions[key] = self._expand(
+                self.assemblies[instance.assembly_id], *key[1:]
+            )
+        return rows
+
+    def _expand(
+        self, assembly: Assembly, length_ft, height_ft, width_ft
+    ) -> Tuple[Dict[str, Any], ...]:
+        rows = []
+        for component in assembly.components:
+            if component.id in self._price_errors:
+                raise ExpansionError(
+                    f"{component.description}: {self._price_errors[component.id]}"
+                )
+            try:
+                quantity = component_quantity(component, length_ft, height_ft, width_ft)
+                total_qty = ConstructionCalculator.takeoff_total_qty(
+                    quantity, component.wastage_factor
+                )
+                unit_cost = self._unit_costs[component.id]
+                total_cost = ConstructionCalculator.total_cost(total_qty, unit_cost)
+            except CalculationError as e:
+                raise ExpansionError(f"{component.description}: {e}")
+            if total_qty > MAX_QUANTITY or total_cost > MAX_TOTAL_COST:
+                raise ExpansionError(
+                    f"{component.description}: quantity or total cost is too large"
+                )
+            rows.append(
+                {
+                    "category": component.category,
+                    "description": f"{assembly.name}: {component.description}",
+                    "quantity": quantity,
+                    "unit": component.unit,
+                    "wastage_factor": component.wastage_factor,
+                    "unit_cost": unit_cost,
+                    "total_qty": total_qty,
+                    "total_cost": total_cost,
+                }
+            )
+        return tuple(rows)
+
+    def expand_all(
+        self, instances: List[AssemblyInstance]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Expand instances of loaded assemblies into line item rows
+
+        Returns (rows, errors); errors name the 1-based instance and the
+        problem, and failed instances contribute no rows.
+        """
+        rows, errors = [], []
+        for idx, instance in enumerate(instances):
+            try:
+                expanded = self.expand(instance)
+            except ExpansionError as e:
+                errors.append({"instance": idx + 1, "error": str(e)})
+                continue
+            rows.extend({**row, "notes": instance.notes} for row in expanded)
+        return rows, errors
+
+
+def insert_line_items(db: Session, project_id, rows: List[Dict[str, Any]]) -> int:
+    """Insert expanded rows (totals already computed) in batches of executemany"""
+    for start in range(0, len(rows), IMPORT_BATCH_ROWS):
+        db.execute(
+            insert(MaterialLineItem),
+            [
+                {**row, "project_id": project_id}
+                for row in rows[start : start + IMPORT_BATCH_ROWS]
+            ],
+        )
+    return len(rows)
@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class JwksKeySet:
+    """
+    JWKS cache indexed by `kid`.
+
+    - Keys older than `ttl_seconds` are refreshed on a background thread while
+      the current keys keep being served, so TTL expiry never blocks a request.
+    - A lookup for an unknown `kid` (key rotation) refetches immediately, but at
+      most once per `min_refetch_seconds`. Lookups that find a fetch already
+      running don't wait for it: they miss, and the token is rejected rather
+      than a request thread sitting on the JWKS endpoint's latency.
+    - A failed fetch keeps the previous keys.
+
+    Fetches block the calling thread, so async callers should look keys up
+    in a threadpool (see TenantContextMiddleware).
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ttl_seconds: float = 3600,
+        min_refetch_seconds: float = 30,
+        timeout_seconds: float = 5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.url = url
+        self.ttl_seconds = ttl_seconds
+        self.min_refetch_seconds = min_refetch_seconds
+        self.timeout_seconds = timeout_seconds
+        self._clock = clock
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._jwks: Optional[Dict[str, Any]] = None
+        self._fetched_at: Optional[float] = None
+        self._last_attempt: Optional[float] = None
+        self._fetch_lock = threading.Lock()
+        self._background: Optional[threading.Thread] = None
+
+    @property
+    def jwks(self) -> Optional[Dict[str, Any]]:
+        """Raw JWKS document from the last successful fetch"""
+        return self._jwks
+
+    def get_key(self, kid: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return the JWK for `kid`, or None if the key set doesn't contain it"""
+        if self._fetched_at is None:
+            # Nothing to verify with yet, so wait for the first fetch (bounded by its timeout)
+            self.refresh()
+        elif self._clock() - self._fetched_at >= self.ttl_seconds:
+            self.refresh_in_background()
+
+        key = self._lookup(kid)
+        if key is None and self.refresh(wait=False):
+            key = self._lookup(kid)
+        return key
+
+    def _lookup(self, kid: Optional[str]) -> Optional[Dict[str, Any]]:
+        if kid is None:
+            # Tokens without a kid are only unambiguous against a single-key set
+            return next(iter(self._keys.values())) if len(self._keys) == 1 else None
+        return self._keys.get(kid)
+
+    def refresh(self, wait: bool = True) -> bool:
+        """
+        Fetch the key set unless another fetch happened within
+        min_refetch_seconds. Returns True if new keys were loaded.
+        With wait=False, returns False at once while another fetch runs.
+        """
+        if not self._fetch_lock.acquire(blocking=wait):
+            return False
+        try:
+            now = self._clock()
+            if (
+                self._last_attempt is not None
+                and now - self._last_attempt < self.min_refetch_seconds
+            ):
+                return False
+            self._last_attempt = now
+            try:
+                response = requests.get(self.url, timeout=self.timeout_seconds)
+                response.raise_for_status()
+                jwks = response.json()
+            except (requests.RequestException, ValueError) as e:
+                logger.warning(f"JWKS fetch from {self.url} failed: {str(e)}")
+                return False
+
+            self._keys = {
+                key["kid"]: key for key in jwks.get("keys", []) if "kid" in key
+            }
+            self._jwks = jwks
+            self._fetched_at = self._clock()
+            return True
+        finally:
+            self._fetch_lock.release()
+
+    def refresh_in_background(self) -> None:
+        """Start a refresh thread unless one is already running"""
+        if self._background is not None and self._background.is_alive():
+            return
+        self._background = threading.Thread(
+            target=self.refresh, name="jwks-refresh", daemon=True
+        )
+        self._background.start()
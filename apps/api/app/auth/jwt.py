@@ -1,42 +1,75 @@
-from fastapi import Request, HTTPException, status, Depends
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
-from typing import Optional, Dict, Any
+from typing import Any, Dict, Optional
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError, jwt
+
+from app.auth.jwks import JwksKeySet
+from app.auth.token_cache import VerifiedTokenCache
 from app.core.config import settings
-from app.models.user import UserRole
-import requests
 
 security = HTTPBearer()
 
 
 class ClerkAuth:
     """Clerk JWT validation"""
-    
-    def __init__(self):
-        self.jwks_url = settings.CLERK_JWKS_URL
-        self._jwks_cache: Optional[Dict[str, Any]] = None
-    
+
+    def __init__(self, jwks_url: Optional[str] = None):
+        self.jwks_url = jwks_url or settings.CLERK_JWKS_URL
+        self.jwks: Optional[JwksKeySet] = None
+        if self.jwks_url:
+            self.jwks = JwksKeySet(
+                self.jwks_url,
+                ttl_seconds=settings.CLERK_JWKS_TTL_SECONDS,
+                min_refetch_seconds=settings.CLERK_JWKS_MIN_REFETCH_SECONDS,
+            )
+        self.token_cache = VerifiedTokenCache(
+            max_size=settings.JWT_CACHE_MAX_SIZE,
+            ttl_seconds=settings.JWT_CACHE_TTL_SECONDS,
+        )
+
     def get_jwks(self) -> Dict[str, Any]:
-        """Fetch JWKS from Clerk"""
-        if not self._jwks_cache:
-            response = requests.get(self.jwks_url)
-            response.raise_for_status()
-            self._jwks_cache = response.json()
-        return self._jwks_cache
-    
+        """Return the cached JWKS from Clerk, fetching it if needed"""
+        if self.jwks is None:
+            raise ValueError("CLERK_JWKS_URL not configured")
+        if self.jwks.jwks is None:
+            self.jwks.refresh()
+        return self.jwks.jwks or {"keys": []}
+
+    def _signing_key(self, token: str) -> Any:
+        """Pick the verification key: the JWKS entry for the token's kid, else the PEM key"""
+        if self.jwks is not None:
+            kid = jwt.get_unverified_header(token).get("kid")
+            key = self.jwks.get_key(kid)
+            if key is None:
+                raise JWTError(f"Unknown signing key '{kid}'")
+            return key
+        if settings.CLERK_PEM_PUBLIC_KEY:
+            return settings.CLERK_PEM_PUBLIC_KEY
+        raise ValueError("Neither CLERK_JWKS_URL nor CLERK_PEM_PUBLIC_KEY configured")
+
+    def cached_claims(self, token: str) -> Optional[Dict[str, Any]]:
+        """Claims of a recently verified token, or None; never fetches keys"""
+        return self.token_cache.get(token)
+
     def verify_token(self, token: str) -> Dict[str, Any]:
-        """Verify Clerk JWT and return claims"""
+        """Verify Clerk JWT and return claims (may fetch the JWKS, so blocking)"""
+        # Skip the RS256 signature check for tokens verified recently. Callers
+        # try cached_claims first and that lookup is the one counted; this
+        # re-check only catches a token another request verified meanwhile
+        cached = self.token_cache.get(token, record=False)
+        if cached is not None:
+            return cached
+
         try:
-            # For MVP, we'll use the PEM key if provided
-            if settings.CLERK_PEM_PUBLIC_KEY:
-                payload = jwt.decode(
-                    token,
-                    settings.CLERK_PEM_PUBLIC_KEY,
-                    algorithms=["RS256"],
-                )
-                return payload
-            else:
-                raise ValueError("CLERK_PEM_PUBLIC_KEY not configured")
+            payload = jwt.decode(
+                token,
+                self._signing_key(token),
+                algorithms=["RS256"],
+            )
+            self.token_cache.put(token, payload)
+            return payload
         except JWTError as e:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -48,40 +81,47 @@ class ClerkAuth:
 clerk_auth = ClerkAuth()
 
 
+def auth_context_from_claims(claims: Dict[str, Any]) -> Dict[str, Any]:
+    """Map verified claims to the request.state fields used for tenant isolation"""
+    return {
+        "user_id": claims.get("sub"),  # Clerk user ID
+        # Custom claims (set in Clerk)
+        "tenant_id": claims.get("tenant_id"),
+        "user_role": claims.get("role", "SUB"),
+        "auth_claims": claims,
+    }
+
+
 async def get_current_user_from_token(
     request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ) -> Dict[str, Any]:
     """
-    Dependency to extract and validate JWT, then set user context on request.state
+    Dependency to extract and validate JWT, then set user context on request.state.
+    Reuses the claims verified by TenantContextMiddleware when present.
     """
     token = credentials.credentials
-    
+
     try:
-        # Verify token and get claims
-        claims = clerk_auth.verify_token(token)
-        
-        # Extract user info from claims
-        user_id = claims.get("sub")  # Clerk user ID
-        
-        # Extract custom claims (set in Clerk)
-        tenant_id = claims.get("tenant_id")
-        user_role = claims.get("role", "SUB")
-        
-        if not user_id:
+        claims = getattr(request.state, "auth_claims", None)
+        if claims is None:
+            # Verify token and get claims, off the event loop in case keys are fetched
+            claims = clerk_auth.cached_claims(token) or await run_in_threadpool(
+                clerk_auth.verify_token, token
+            )
+
+        if not claims.get("sub"):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User ID not found in token",
             )
-        
+
         # Set context on request state
-        request.state.user_id = user_id
-        request.state.tenant_id = tenant_id
-        request.state.user_role = user_role
-        request.state.auth_claims = claims
-        
+        for key, value in auth_context_from_claims(claims).items():
+            setattr(request.state, key, value)
+
         return claims
-    
+
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -93,10 +133,10 @@ async def get_current_user_from_token(
 # Optional: Supabase Auth alternative
 class SupabaseAuth:
     """Supabase JWT validation"""
-    
+
     def __init__(self):
         self.jwt_secret = settings.SUPABASE_JWT_SECRET
-    
+
     def verify_token(self, token: str) -> Dict[str, Any]:
         """Verify Supabase JWT and return claims"""
         try:
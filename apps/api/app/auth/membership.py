@@ -0,0 +1,221 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from itertools import chain
+from typing import Any, Callable, Optional, Tuple
+
+import redis
+from sqlalchemy import event, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+from app.models.user import Membership, User, UserRole
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "buildpro:membership-invalidations"
+
+# Session.info key collecting memberships written in the current transaction
+_PENDING_KEY = "membership_invalidations"
+
+_MISSING = object()
+
+
+class MembershipRoleResolver:
+    """
+    Resolves a user's role in a tenant from Membership, the source of truth.
+
+    The user is identified by the token subject: the auth provider's user ID,
+    matched against User.external_id (or User.id, for subjects that are one).
+    Lookups (including "no membership") are cached per process for
+    ttl_seconds. Committed membership writes publish an invalidation on Redis
+    so every worker drops the entry right away rather than at TTL expiry.
+
+    A lookup that races an invalidation (read before the write commits,
+    stored after the invalidation lands) must not cache its stale role: each
+    invalidation is numbered, and a lookup only stores its result if its key
+    was not invalidated since the lookup began.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 60,
+        max_size: int = 50_000,
+        redis_client: Optional[Any] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._redis = redis_client
+        self._clock = clock
+        # (tenant_id, user_id) -> (expires_at, role or None)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Optional[UserRole]]]" = (
+            OrderedDict()
+        )
+        # (tenant_id, user_id) -> generation of its latest invalidation, bounded like _entries;
+        # keys trimmed from it count as invalidated at _trimmed_generation
+        self._generation = 0
+        self._invalidations: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        self._trimmed_generation = 0
+        self._lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _cached(self, key: Tuple[str, str]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, role = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                return _MISSING
+            return role
+
+    def _current_generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def _store(
+        self, key: Tuple[str, str], role: Optional[UserRole], generation: int
+    ) -> None:
+        with self._lock:
+            if self._invalidations.get(key, self._trimmed_generation) > generation:
+                # Invalidated while the lookup ran: the role read may predate the write
+                return
+            self._entries[key] = (self._clock() + self.ttl_seconds, role)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def resolve(self, db: Session, tenant_id: str, user_id: str) -> Optional[UserRole]:
+        """Return the user's role in the tenant, or None if they have no membership"""
+        key = (str(tenant_id), str(user_id))
+        role = self._cached(key)
+        record_cache_lookup("membership_role", hit=role is not _MISSING)
+        if role is not _MISSING:
+            return role
+
+        generation = self._current_generation()
+        try:
+            tenant_uuid = uuid.UUID(key[0])
+        except ValueError:
+            # Tenant IDs that aren't UUIDs can't match a membership row
+            role = None
+        else:
+            user_match = User.external_id == key[1]
+            try:
+                user_match = or_(user_match, User.id == uuid.UUID(key[1]))
+            except ValueError:
+                pass
+            role = (
+                db.query(Membership.role)
+                .join(User, User.id == Membership.user_id)
+                .filter(Membership.tenant_id == tenant_uuid, user_match)
+                .scalar()
+            )
+        self._store(key, role, generation)
+        return role
+
+    def invalidate(self, tenant_id: str, user_id: str, publish: bool = True) -> None:
+        """Drop a cached role locally and, by default, in every other worker"""
+        key = (str(tenant_id), str(user_id))
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+            self._invalidations[key] = self._generation
+            self._invalidations.move_to_end(key)
+            while len(self._invalidations) > self.max_size:
+                _, self._trimmed_generation = self._invalidations.popitem(last=False)
+        if publish and self._redis is not None:
+            try:
+                self._redis.publish(INVALIDATION_CHANNEL, json.dumps(list(key)))
+            except redis.RedisError as e:
+                logger.warning(f"Membership invalidation publish failed: {str(e)}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            # Counts as invalidating every key, including lookups in flight
+            self._generation += 1
+            self._trimmed_generation = self._generation
+            self._invalidations.clear()
+
+    def handle_message(self, message: dict) -> None:
+        """Apply an invalidation received from Redis"""
+        if message.get("type") != "message":
+            return
+        try:
+            tenant_id, user_id = json.loads(message["data"])
+        except (ValueError, TypeError):
+            logger.warning(f"Ignoring malformed membership invalidation: {message!r}")
+            return
+        self.invalidate(tenant_id, user_id, publish=False)
+
+    def start_listener(self) -> None:
+        """Subscribe to invalidations on a background thread"""
+        if self._redis is None or (
+            self._listener is not None and self._listener.is_alive()
+        ):
+            return
+        self._stop.clear()
+        self._listener = threading.Thread(
+            target=self._listen, name="membership-invalidations", daemon=True
+        )
+        self._listener.start()
+
+    def stop_listener(self) -> None:
+        self._stop.set()
+
+    def _listen(self) -> None:
+        while not self._stop.is_set():
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Anything cached while disconnected may have missed invalidations
+                self.clear()
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message:
+                        self.handle_message(message)
+                pubsub.close()
+            except redis.RedisError as e:
+                logger.warning(f"Membership invalidation listener error: {str(e)}")
+                self._stop.wait(5)
+
+
+membership_resolver = MembershipRoleResolver(
+    ttl_seconds=settings.MEMBERSHIP_CACHE_TTL_SECONDS,
+    redis_client=redis.Redis.from_url(settings.REDIS_URL),
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_membership_writes(session: Session, flush_context) -> None:
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Membership):
+            pending = session.info.setdefault(_PENDING_KEY, set())
+            pending.add((str(obj.tenant_id), str(obj.user_id)))
+            # Roles are cached under the token subject, usually the external ID
+            external_id = (
+                session.connection()
+                .execute(select(User.external_id).where(User.id == obj.user_id))
+                .scalar()
+            )
+            if external_id:
+                pending.add((str(obj.tenant_id), external_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_memberships(session: Session) -> None:
+    for tenant_id, user_id in session.info.pop(_PENDING_KEY, ()):
+        membership_resolver.invalidate(tenant_id, user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_memberships(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,87 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.metrics import record_cache_lookup
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of verified JWT claims, keyed by the token's SHA-256 digest
+    so raw tokens are never held in memory.
+
+    An entry lives until the earlier of the token's `exp` and `ttl_seconds` after
+    it was cached, and is not served before the token's `nbf`.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10_000,
+        ttl_seconds: float = 300,
+        clock: Callable[[], float] = time.time,
+        name: str = "jwt_claims",
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self._clock = clock
+        # digest -> (not_before, expires_at, claims)
+        self._entries: "OrderedDict[bytes, Tuple[float, float, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str, record: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Return cached claims for a previously verified token, or None
+        record=False skips the hit/miss metric, for a re-check of a lookup
+        that was already counted.
+        """
+        digest = self._digest(token)
+        now = self._clock()
+        claims = None
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                not_before, expires_at, cached = entry
+                if now >= expires_at:
+                    del self._entries[digest]
+                elif now >= not_before:
+                    self._entries.move_to_end(digest)
+                    claims = cached
+        if record:
+            record_cache_lookup(self.name, hit=claims is not None)
+        # Shallow copy so callers can't mutate the shared entry
+        return dict(claims) if claims is not None else None
+
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        """Cache claims of a token that just passed signature verification"""
+        if self.max_size <= 0:
+            return
+        now = self._clock()
+        expires_at = now + self.ttl_seconds
+        if claims.get("exp") is not None:
+            expires_at = min(expires_at, float(claims["exp"]))
+        if expires_at <= now:
+            return
+        not_before = float(claims.get("nbf") or 0)
+
+        digest = self._digest(token)
+        with self._lock:
+            self._entries[digest] = (not_before, expires_at, dict(claims))
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
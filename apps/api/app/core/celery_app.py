@@ -0,0 +1,58 @@
+from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
+
+from app.core.config import settings
+
+celery_app = Celery(
+    "buildpro",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+    include=[
+        "app.reports.tasks",
+        "app.uploads.tasks",
+        "app.imports.tasks",
+        "app.files.tasks",
+    ],
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    timezone="UTC",
+    # Long report jobs: hand out one task at a time and only ack once done,
+    # so a killed worker's job is redelivered instead of lost
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    task_always_eager=settings.CELERY_TASK_ALWAYS_EAGER,
+    task_eager_propagates=True,
+)
+
+# Periodic jobs (run with `celery -A app.core.celery_app beat`)
+celery_app.conf.beat_schedule = {
+    "purge-expired-uploads": {"task": "uploads.purge_expired", "schedule": 3600.0},
+    "purge-orphan-blobs": {"task": "files.purge_orphan_blobs", "schedule": 3600.0},
+    "retry-stale-previews": {"task": "files.retry_stale_previews", "schedule": 600.0},
+}
+
+
+# Each worker process gets its own tracer provider (no-op unless OTEL_ENABLED);
+# set up after the fork so the exporter's thread lives in the child
+_tracer_provider = None
+
+
+@worker_process_init.connect
+def init_worker_tracing(**kwargs) -> None:
+    global _tracer_provider
+    from app.core.tracing import setup_tracing
+    from app.db.base import engine
+
+    _tracer_provider = setup_tracing(None, engine)
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_tracing(**kwargs) -> None:
+    # Flush spans still queued for export
+    if _tracer_provider:
+        _tracer_provider.shutdown()
@@ -1,6 +1,7 @@
-from pydantic_settings import BaseSettings
 from typing import List
 
+from pydantic_settings import BaseSettings
+
 
 class Settings(BaseSettings):
     # API
@@ -20,6 +21,12 @@ class Settings(BaseSettings):
     # Auth - Clerk
     CLERK_PEM_PUBLIC_KEY: str | None = None
     CLERK_JWKS_URL: str | None = None
+    CLERK_JWKS_TTL_SECONDS: int = 3600
+    CLERK_JWKS_MIN_REFETCH_SECONDS: int = 30  # rate limit for unknown-kid refetches
+    JWT_CACHE_MAX_SIZE: int = 10000  # verified-token cache entries (0 disables)
+    JWT_CACHE_TTL_SECONDS: int = 300
+    # upper bound on role staleness if Redis is down
+    MEMBERSHIP_CACHE_TTL_SECONDS: int = 60
 
     # Auth - Supabase (alternative)
     SUPABASE_URL: str | None = None
@@ -31,10 +38,28 @@ class Settings(BaseSettings):
     AWS_S3_BUCKET: str | None = None
     AWS_S3_REGION: str = "us-east-1"
     AWS_S3_ENDPOINT_URL: str | None = None
+    STORAGE_BACKEND: str = "local"  # local | s3
+    STORAGE_LOCAL_ROOT: str = "./storage"
+    STORAGE_URL_TTL_SECONDS: int = 3600  # lifetime of signed upload/download URLs
+    # nginx internal location mapped to STORAGE_LOCAL_ROOT
+    STORAGE_LOCAL_ACCEL_REDIRECT_PREFIX: str | None = None
+    # unreferenced file blobs are deleted after this long
+    BLOB_ORPHAN_TTL_HOURS: int = 24
+    # PENDING previews older than this are requested again
+    PREVIEW_CLAIM_TIMEOUT_MINUTES: int = 30
+    # extracted document text kept for search, per file
+    FILE_TEXT_MAX_CHARS: int = 500_000
+
+    # Resumable uploads
+    UPLOAD_CHUNK_SIZE: int = 8 * 1024 * 1024  # suggested to clients
+    UPLOAD_MAX_CHUNK_SIZE: int = 32 * 1024 * 1024
+    UPLOAD_MAX_FILE_SIZE: int = 2 * 1024 * 1024 * 1024
+    UPLOAD_SESSION_TTL_HOURS: int = 24
 
     # Celery
     CELERY_BROKER_URL: str
     CELERY_RESULT_BACKEND: str
+    CELERY_TASK_ALWAYS_EAGER: bool = False  # run tasks inline (tests/local dev)
 
     # Security
     SECRET_KEY: str
@@ -44,6 +69,10 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
     OTEL_ENABLED: bool = False
     OTEL_ENDPOINT: str | None = None
+    OTEL_SERVICE_NAME: str = "buildpro-api"
+    OTEL_EXPORTER: str = "otlp"  # otlp | console | file
+    OTEL_EXPORT_FILE: str = "traces.jsonl"
+    OTEL_SAMPLE_RATIO: float = 1.0
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,113 @@
+"""
+Prometheus metrics.
+
+For multi-worker deployments (uvicorn --workers / gunicorn) set the
+PROMETHEUS_MULTIPROC_DIR environment variable to an empty directory shared by
+all workers before they start; /metrics then aggregates every worker's samples.
+"""
+import os
+import time
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy.pool import QueuePool
+
+# HTTP
+REQUEST_LATENCY = Histogram(
+    "buildpro_http_request_duration_seconds",
+    "HTTP request latency by route template and status",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "buildpro_http_requests_in_flight",
+    "HTTP requests currently being served",
+    multiprocess_mode="livesum",
+)
+
+# Database connection pool
+DB_POOL_CHECKED_OUT = Gauge(
+    "buildpro_db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "buildpro_db_pool_overflow",
+    "Connections open beyond pool_size",
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+    "buildpro_db_pool_wait_seconds",
+    "Time spent waiting to obtain a pooled connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+
+# Import / export throughput
+IMPORT_ROWS = Counter(
+    "buildpro_import_rows_total",
+    "Rows processed by bulk imports",
+    ["kind", "outcome"],  # outcome: imported | error
+)
+EXPORT_ROWS = Counter(
+    "buildpro_export_rows_total",
+    "Rows written by exports",
+    ["kind", "format"],
+)
+
+# Caches (hit ratio = hit / (hit + miss))
+CACHE_REQUESTS = Counter(
+    "buildpro_cache_requests_total",
+    "Cache lookups by cache name and result",
+    ["cache", "result"],  # result: hit | miss
+)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Count a cache lookup for hit ratio reporting"""
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports checkout wait time and pool occupancy"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - start)
+            self._report_usage()
+
+    def _do_return_conn(self, record) -> None:
+        super()._do_return_conn(record)
+        self._report_usage()
+
+    def _report_usage(self) -> None:
+        DB_POOL_CHECKED_OUT.set(self.checkedout())
+        # overflow() counts up from -pool_size, only the excess is interesting
+        DB_POOL_OVERFLOW.set(max(self.overflow(), 0))
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Serialize metrics, aggregating across workers in multiprocess mode"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead(pid: int) -> None:
+    """Drop live gauges of an exited worker (call from gunicorn's child_exit hook)"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,109 @@
+"""
+OpenTelemetry tracing setup.
+Spans are exported via OTLP when enabled, or to the console / a local JSONL file
+for offline testing (OTEL_EXPORTER=console|file).
+"""
+import logging
+from typing import Optional
+
+from fastapi import FastAPI
+from opentelemetry import trace
+from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SpanExporter,
+)
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Paths that are never traced (probes and scrapes)
+EXCLUDED_URLS = "/health,/metrics"
+
+
+def build_sampler(ratio: float) -> ParentBased:
+    """Sample a fraction of new traces, follow the parent decision otherwise"""
+    return ParentBased(TraceIdRatioBased(ratio))
+
+
+class FileSpanExporter(ConsoleSpanExporter):
+    """Writes spans as JSON lines to a file it owns, closed on shutdown"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+        super().__init__(
+            service_name=settings.OTEL_SERVICE_NAME,
+            out=self._file,
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+
+    def shutdown(self) -> None:
+        super().shutdown()
+        self._file.close()
+
+
+def build_exporter(kind: str) -> SpanExporter:
+    """Create the span exporter selected by OTEL_EXPORTER"""
+    if kind == "console":
+        return ConsoleSpanExporter(service_name=settings.OTEL_SERVICE_NAME)
+    if kind == "file":
+        return FileSpanExporter(settings.OTEL_EXPORT_FILE)
+    if kind == "otlp":
+        # Imported lazily so offline setups don't need the OTLP exporter
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        endpoint = settings.OTEL_ENDPOINT
+        if endpoint and not endpoint.endswith("/v1/traces"):
+            endpoint = endpoint.rstrip("/") + "/v1/traces"
+        return OTLPSpanExporter(endpoint=endpoint)
+    raise ValueError(
+        f"Unknown OTEL_EXPORTER '{kind}'. Must be one of: otlp, console, file"
+    )
+
+
+def setup_tracing(app: Optional[FastAPI], engine: Engine) -> Optional[TracerProvider]:
+    """
+    Install the tracer provider and instrument FastAPI and SQLAlchemy.
+    app is None in Celery workers, which only get the provider and SQLAlchemy.
+    Returns None (and leaves the no-op tracer in place) when OTEL_ENABLED is false.
+    """
+    if not settings.OTEL_ENABLED:
+        return None
+
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+
+    provider = TracerProvider(
+        resource=Resource.create({SERVICE_NAME: settings.OTEL_SERVICE_NAME}),
+        sampler=build_sampler(settings.OTEL_SAMPLE_RATIO),
+    )
+    provider.add_span_processor(
+        BatchSpanProcessor(build_exporter(settings.OTEL_EXPORTER))
+    )
+    trace.set_tracer_provider(provider)
+
+    if app is not None:
+        FastAPIInstrumentor.instrument_app(
+            app,
+            tracer_provider=provider,
+            excluded_urls=EXCLUDED_URLS,
+        )
+    SQLAlchemyInstrumentor().instrument(engine=engine, tracer_provider=provider)
+
+    logger.info(
+        f"Tracing enabled (exporter={settings.OTEL_EXPORTER}, "
+        f"sample_ratio={settings.OTEL_SAMPLE_RATIO})"
+    )
+    return provider
+
+
+def get_tracer(name: str) -> trace.Tracer:
+    """Tracer for manual spans; a no-op until setup_tracing installs a provider"""
+    return trace.get_tracer(name)
@@ -0,0 +1 @@
+# Content-addressed file blobs package
@@ -0,0 +1,204 @@
+"""
+Content-addressed file blobs
+Uploaded bytes are hashed with SHA-256 as they stream in, and each distinct
+digest is stored once per tenant as a Blob. File rows reference a blob and
+bump its ref_count, so the same plan set attached to twenty projects takes
+the space of one. Unreferenced blobs are deleted by a periodic purge once
+they have been idle for BLOB_ORPHAN_TTL_HOURS.
+
+Blobs are never shared across tenants: a match would reveal that another
+tenant holds a given document.
+"""
+
+import hashlib
+import logging
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, BinaryIO, Callable, Iterable, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.blob import Blob
+from app.storage import StorageBackend, StorageError, get_storage
+from app.storage.base import COPY_BUFFER_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+def find_blob(db: Session, tenant_id, sha256: str) -> Optional[Blob]:
+    return (
+        db.query(Blob)
+        .filter(Blob.tenant_id == tenant_id, Blob.sha256 == sha256.lower())
+        .first()
+    )
+
+
+def find_blob_by_key(db: Session, tenant_id, storage_key: str) -> Optional[Blob]:
+    return (
+        db.query(Blob)
+        .filter(Blob.tenant_id == tenant_id, Blob.storage_key == storage_key)
+        .first()
+    )
+
+
+def hash_object(storage: StorageBackend, key: str) -> Tuple[str, int, int]:
+    """SHA-256, size and CRC-32 of a stored object, read as a stream"""
+    digest = hashlib.sha256()
+    size = crc = 0
+    with storage.open(key) as fileobj:
+        while chunk := fileobj.read(COPY_BUFFER_SIZE):
+            digest.update(chunk)
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+    return digest.hexdigest(), size, crc
+
+
+async def copy_hashed(
+    chunks: AsyncIterator[bytes], out: BinaryIO
+) -> Tuple[str, int, int]:
+    """Write an async byte stream to out, returning its SHA-256, size and CRC-32 (for ZIP bundles)"""
+    digest = hashlib.sha256()
+    size = crc = 0
+    async for chunk in chunks:
+        digest.update(chunk)
+        crc = zlib.crc32(chunk, crc)
+        out.write(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size, crc
+
+
+def backfill_crc32(
+    blob_ids: Iterable,
+    session_factory: Optional[Callable[[], Session]] = None,
+    storage: Optional[StorageBackend] = None,
+) -> int:
+    """Compute and save the CRC-32 of blobs stored before CRCs were recorded, returning the count"""
+    session_factory = session_factory or SessionLocal
+    storage = storage or get_storage()
+    blob_ids = [uuid.UUID(str(blob_id)) for blob_id in blob_ids]
+    db = session_factory()
+    filled = 0
+    try:
+        blobs = (
+            db.query(Blob.id, Blob.storage_key)
+            .filter(Blob.id.in_(blob_ids), Blob.crc32 == None)
+            .all()
+        )
+        for blob_id, storage_key in blobs:
+            try:
+                _, _, crc = hash_object(storage, storage_key)
+            except StorageError as e:
+                logger.warning(f"Could not read blob object {storage_key}: {e}")
+                continue
+            filled += (
+                db.query(Blob)
+                .filter(Blob.id == blob_id, Blob.crc32 == None)
+                .update({Blob.crc32: crc}, synchronize_session=False)
+            )
+            db.commit()
+    finally:
+        db.close()
+    return filled
+
+
+def register_blob(
+    db: Session,
+    storage: StorageBackend,
+    tenant_id,
+    storage_key: str,
+    sha256: str,
+    size_bytes: int,
+    crc32: Optional[int] = None,
+) -> Tuple[Blob, bool]:
+    """
+    Record the object at storage_key as the tenant's blob for sha256
+
+    If the tenant already stores that content, the new object is deleted and
+    the existing blob returned instead. Returns (blob, duplicate).
+    """
+    existing = find_blob(db, tenant_id, sha256)
+    if existing is None:
+        blob = Blob(
+            tenant_id=tenant_id,
+            sha256=sha256,
+            size_bytes=size_bytes,
+            crc32=crc32,
+            storage_key=storage_key,
+            ref_count=0,
+        )
+        db.add(blob)
+        try:
+            db.commit()
+            return blob, False
+        except IntegrityError:
+            # A concurrent upload of the same content won the insert
+            db.rollback()
+            existing = find_blob(db, tenant_id, sha256)
+    if existing.storage_key != storage_key:
+        storage.delete(storage_key)
+    return existing, True
+
+
+def acquire_blob(db: Session, blob: Blob) -> bool:
+    """
+    Count a new reference to blob, in the caller's transaction
+
+    Returns False if the blob was purged in the meantime.
+    """
+    updated = (
+        db.query(Blob)
+        .filter(Blob.id == blob.id)
+        .update({Blob.ref_count: Blob.ref_count + 1}, synchronize_session=False)
+    )
+    return updated == 1
+
+
+def release_blob(db: Session, blob_id) -> None:
+    """Drop a reference to a blob, in the caller's transaction"""
+    db.query(Blob).filter(Blob.id == blob_id, Blob.ref_count > 0).update(
+        {Blob.ref_count: Blob.ref_count - 1}, synchronize_session=False
+    )
+
+
+def purge_orphan_blobs(
+    session_factory: Optional[Callable[[], Session]] = None,
+    storage: Optional[StorageBackend] = None,
+) -> int:
+    """Delete blobs that have had no references for BLOB_ORPHAN_TTL_HOURS, returning the count"""
+    session_factory = session_factory or SessionLocal
+    storage = storage or get_storage()
+    cutoff = datetime.now(timezone.utc) - timedelta(
+        hours=settings.BLOB_ORPHAN_TTL_HOURS
+    )
+    db = session_factory()
+    purged = 0
+    try:
+        orphans = (
+            db.query(Blob.id, Blob.storage_key, Blob.previews)
+            .filter(Blob.ref_count == 0, Blob.updated_at <= cutoff)
+            .all()
+        )
+        for blob_id, storage_key, previews in orphans:
+            # Conditional on ref_count so a file created since the query keeps its blob
+            deleted = (
+                db.query(Blob)
+                .filter(Blob.id == blob_id, Blob.ref_count == 0)
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+            if not deleted:
+                continue
+            try:
+                for thumbnail in (previews or {}).get("thumbnails", []):
+                    storage.delete(thumbnail["key"])
+                storage.delete(storage_key)
+            except StorageError as e:
+                logger.warning(f"Could not delete blob object {storage_key}: {e}")
+            purged += 1
+    finally:
+        db.close()
+    return purged
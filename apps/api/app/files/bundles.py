@@ -0,0 +1,346 @@
+"""
+Streaming ZIP bundles of project files
+Archives are written on the fly straight from storage: no temp files, and
+memory bounded by one read buffer (plus the deflate window) whatever the
+bundle size. Already-compressed formats (PDF, JPEG, DWG, Office files...)
+are stored as-is; only plain formats are deflated.
+
+Blobs carry their CRC-32 and size, so an archive with only stored entries
+has a layout fixed in advance: headers, offsets and total size are known
+before any byte is read. That gives the response a Content-Length and an
+ETag, and lets an interrupted download resume with a Range request that
+jumps straight to the right entry. Entry order, names and timestamps come
+from the File rows, so the same selection always yields identical bytes.
+
+Blobs stored before CRCs were recorded have theirs computed as they stream
+and written after the data, like deflated entries; archives that hold
+either kind have no size known up front. Bundles over 4 GB or 65535
+entries use ZIP64.
+"""
+
+import hashlib
+import os
+import struct
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple, Union
+
+from app.storage import StorageBackend, StorageError
+
+# Extensions worth deflating; everything else is stored
+COMPRESSIBLE_EXTENSIONS = {
+    ".txt",
+    ".csv",
+    ".tsv",
+    ".json",
+    ".xml",
+    ".html",
+    ".htm",
+    ".md",
+    ".log",
+    ".svg",
+    ".dxf",
+    ".ifc",
+    ".rtf",
+    ".bmp",
+    ".tif",
+    ".tiff",
+}
+DEFLATE_LEVEL = 6
+
+# Values past these need ZIP64; the 32/16-bit field then holds the marker
+_ZIP64_LIMIT = 0xFFFFFFFF
+_ZIP64_COUNT_LIMIT = 0xFFFF
+_ZIP64_MARKER = 0xFFFFFFFF
+_ZIP64_COUNT_MARKER = 0xFFFF
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+_METHOD_STORED = 0
+_METHOD_DEFLATED = 8
+_VERSION_ZIP64 = 45
+_VERSION_DEFAULT = 20
+_MADE_BY_UNIX = 3 << 8
+_EXTERNAL_ATTR = 0o100644 << 16
+
+
+@dataclass
+class BundleEntry:
+    name: str  # path inside the archive
+    storage_key: str
+    size: int
+    crc32: Optional[int]  # None for legacy blobs: computed while streaming
+    modified: datetime
+
+    @property
+    def compress(self) -> bool:
+        return os.path.splitext(self.name)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+    @property
+    def descriptor(self) -> bool:
+        """Whether the CRC and sizes follow the data instead of leading it"""
+        return self.compress or self.crc32 is None
+
+
+def _dos_datetime(value: datetime) -> Tuple[int, int]:
+    value = max(value, datetime(1980, 1, 1, tzinfo=value.tzinfo))
+    time = (value.hour << 11) | (value.minute << 5) | (value.second // 2)
+    date = ((value.year - 1980) << 9) | (value.month << 5) | value.day
+    return time, date
+
+
+def _local_header(entry: BundleEntry) -> bytes:
+    name = entry.name.encode()
+    time, date = _dos_datetime(entry.modified)
+    zip64 = entry.size >= _ZIP64_LIMIT
+    if entry.descriptor:
+        # Compressed size or CRC is only known afterwards: they follow in a data descriptor
+        flags, crc = _FLAG_UTF8 | _FLAG_DATA_DESCRIPTOR, 0
+        method = _METHOD_DEFLATED if entry.compress else _METHOD_STORED
+        sizes = (0, 0)
+    else:
+        flags, method, crc = _FLAG_UTF8, _METHOD_STORED, entry.crc32
+        sizes = (entry.size, entry.size)
+    extra = b""
+    if zip64:
+        extra = struct.pack("<HHQQ", 0x0001, 16, sizes[1], sizes[0])
+        sizes = (_ZIP64_MARKER, _ZIP64_MARKER)
+    return (
+        struct.pack(
+            "<IHHHHHIIIHH",
+            0x04034B50,
+            _VERSION_ZIP64 if zip64 else _VERSION_DEFAULT,
+            flags,
+            method,
+            time,
+            date,
+            crc,
+            sizes[0],
+            sizes[1],
+            len(name),
+            len(extra),
+        )
+        + name
+        + extra
+    )
+
+
+def _data_descriptor(entry: BundleEntry, crc: int, compressed_size: int) -> bytes:
+    if entry.size >= _ZIP64_LIMIT:
+        return struct.pack("<IIQQ", 0x08074B50, crc, compressed_size, entry.size)
+    return struct.pack("<IIII", 0x08074B50, crc, compressed_size, entry.size)
+
+
+def _central_header(
+    entry: BundleEntry, crc: int, compressed_size: int, offset: int
+) -> bytes:
+    name = entry.name.encode()
+    time, date = _dos_datetime(entry.modified)
+    flags = _FLAG_UTF8 | (_FLAG_DATA_DESCRIPTOR if entry.descriptor else 0)
+    method = _METHOD_DEFLATED if entry.compress else _METHOD_STORED
+    # ZIP64 fields appear in this order, each only when its 32-bit slot overflows
+    fields = []
+    size, csize, header_offset = entry.size, compressed_size, offset
+    if size >= _ZIP64_LIMIT:
+        fields.append(size)
+        size = _ZIP64_MARKER
+    if csize >= _ZIP64_LIMIT:
+        fields.append(csize)
+        csize = _ZIP64_MARKER
+    if header_offset >= _ZIP64_LIMIT:
+        fields.append(header_offset)
+        header_offset = _ZIP64_MARKER
+    extra = (
+        struct.pack(f"<HH{len(fields)}Q", 0x0001, 8 * len(fields), *fields)
+        if fields
+        else b""
+    )
+    version = _VERSION_ZIP64 if fields else _VERSION_DEFAULT
+    return (
+        struct.pack(
+            "<IHHHHHHIIIHHHHHII",
+            0x02014B50,
+            _MADE_BY_UNIX | version,
+            version,
+            flags,
+            method,
+            time,
+            date,
+            crc,
+            csize,
+            size,
+            len(name),
+            len(extra),
+            0,
+            0,
+            0,
+            _EXTERNAL_ATTR,
+            header_offset,
+        )
+        + name
+        + extra
+    )
+
+
+def _end_records(count: int, directory_offset: int, directory_size: int) -> bytes:
+    records = b""
+    if (
+        count > _ZIP64_COUNT_LIMIT
+        or directory_offset >= _ZIP64_LIMIT
+        or directory_size >= _ZIP64_LIMIT
+    ):
+        zip64_offset = directory_offset + directory_size
+        records += struct.pack(
+            "<IQHHIIQQQQ",
+            0x06064B50,
+            44,
+            _MADE_BY_UNIX | _VERSION_ZIP64,
+            _VERSION_ZIP64,
+            0,
+            0,
+            count,
+            count,
+            directory_size,
+            directory_offset,
+        )
+        records += struct.pack("<IIQI", 0x07064B50, 0, zip64_offset, 1)
+        count = _ZIP64_COUNT_MARKER
+        directory_offset = directory_size = _ZIP64_MARKER
+    return records + struct.pack(
+        "<IHHHHIIH", 0x06054B50, 0, 0, count, count, directory_size, directory_offset, 0
+    )
+
+
+# Part of a planned archive: literal bytes, or an entry's stored data
+_Segment = Union[bytes, BundleEntry]
+
+
+class ZipBundle:
+    """A ZIP archive of stored objects, produced as a stream of chunks"""
+
+    def __init__(self, entries: List[BundleEntry], storage: StorageBackend):
+        self.entries = entries
+        self.storage = storage
+        self.etag = self._etag()
+        self._segments = (
+            None if any(entry.descriptor for entry in entries) else self._plan()
+        )
+
+    def _etag(self) -> str:
+        digest = hashlib.sha256()
+        for entry in self.entries:
+            digest.update(
+                f"{entry.name}\0{entry.storage_key}\0{entry.size}\0{entry.crc32}\0".encode()
+            )
+            digest.update(f"{entry.modified.isoformat()}\0{entry.compress}\n".encode())
+        return f'"{digest.hexdigest()[:32]}"'
+
+    def _plan(self) -> List[_Segment]:
+        segments: List[_Segment] = []
+        central = []
+        offset = 0
+        for entry in self.entries:
+            header = _local_header(entry)
+            central.append(_central_header(entry, entry.crc32, entry.size, offset))
+            segments += [header, entry]
+            offset += len(header) + entry.size
+        directory = b"".join(central)
+        segments.append(
+            directory + _end_records(len(self.entries), offset, len(directory))
+        )
+        return segments
+
+    @property
+    def size(self) -> Optional[int]:
+        """Total archive size, known up front unless some entry is deflated or lacks a CRC"""
+        if self._segments is None:
+            return None
+        return sum(len(s) if isinstance(s, bytes) else s.size for s in self._segments)
+
+    def _read(self, entry: BundleEntry, start: int, length: int) -> Iterator[bytes]:
+        remaining = length
+        for chunk in self.storage.iter_range(entry.storage_key, start, length):
+            remaining -= len(chunk)
+            yield chunk
+        if remaining:
+            raise StorageError(f"Object '{entry.storage_key}' is shorter than recorded")
+
+    def iter_range(self, start: int, length: int) -> Iterator[bytes]:
+        """Yield length bytes of the archive from offset start; needs a known size"""
+        end = start + length
+        position = 0
+        for segment in self._segments:
+            segment_size = len(segment) if isinstance(segment, bytes) else segment.size
+            if position + segment_size > start and position < end:
+                lo = max(start - position, 0)
+                hi = min(end - position, segment_size)
+                if isinstance(segment, bytes):
+                    yield segment[lo:hi]
+                else:
+                    yield from self._read(segment, lo, hi - lo)
+            position += segment_size
+            if position >= end:
+                break
+
+    def __iter__(self) -> Iterator[bytes]:
+        if self._segments is not None:
+            yield from self.iter_range(0, self.size)
+            return
+        central = []
+        offset = 0
+        for entry in self.entries:
+            header = _local_header(entry)
+            yield header
+            crc = entry.crc32
+            if entry.compress:
+                compressor = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, -15)
+                compressed_size = crc = 0
+                for chunk in self._read(entry, 0, entry.size):
+                    crc = zlib.crc32(chunk, crc)
+                    data = compressor.compress(chunk)
+                    if data:
+                        compressed_size += len(data)
+                        yield data
+                data = compressor.flush()
+                compressed_size += len(data)
+            elif crc is None:
+                crc = 0
+                for data in self._read(entry, 0, entry.size):
+                    crc = zlib.crc32(data, crc)
+                    yield data
+                data, compressed_size = b"", entry.size
+            else:
+                yield from self._read(entry, 0, entry.size)
+                compressed_size = entry.size
+            length = len(header) + compressed_size
+            if entry.descriptor:
+                descriptor = _data_descriptor(entry, crc, compressed_size)
+                yield data + descriptor
+                length += len(descriptor)
+            central.append(_central_header(entry, crc, compressed_size, offset))
+            offset += length
+        directory = b"".join(central)
+        yield directory + _end_records(len(self.entries), offset, len(directory))
+
+
+def entry_name(folder: str, filename: str) -> str:
+    """Archive path for a file: its base name only, so no entry escapes its folder"""
+    base = filename.replace("\\", "/").rsplit("/", 1)[-1].strip()
+    if base in ("", ".", ".."):
+        base = "file"
+    return f"{folder}/{base}"
+
+
+def unique_names(names: List[str]) -> List[str]:
+    """Make archive paths unique by suffixing repeats: plan.pdf, plan (2).pdf"""
+    seen = set()
+    result = []
+    for name in names:
+        candidate, n = name, 1
+        stem, ext = os.path.splitext(name)
+        while candidate.lower() in seen:
+            n += 1
+            candidate = f"{stem} ({n}){ext}"
+        seen.add(candidate.lower())
+        result.append(candidate)
+    return result
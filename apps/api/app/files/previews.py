@@ -0,0 +1,225 @@
+"""
+Photo preview derivation
+Each photo blob gets WebP thumbnails at a few sizes, stored next to the
+original, plus a tiny blurred placeholder kept inline as a data: URI so a
+gallery can paint before any thumbnail arrives. Derivation runs as a Celery
+task per blob, so the prefork worker pool renders photos in parallel
+processes; blobs are content-addressed, so a photo shared by many projects
+is only rendered once.
+
+A blob is claimed (PENDING) before its task is queued, so concurrent uploads
+of one photo queue it once. A claim whose task was lost, to a worker crash or
+a purged queue, would otherwise stay PENDING for good: after
+PREVIEW_CLAIM_TIMEOUT_MINUTES it can be claimed again.
+"""
+
+import base64
+import io
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.tracing import get_tracer
+from app.db.base import SessionLocal
+from app.models.blob import Blob, PreviewStatus
+from app.storage import StorageBackend, StorageError, get_storage
+from app.uploads.sessions import open_seekable
+
+logger = logging.getLogger(__name__)
+tracer = get_tracer(__name__)
+
+# Longest edge in pixels; photos are never upscaled
+THUMBNAIL_SIZES = (160, 480, 1280)
+THUMBNAIL_QUALITY = 80
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 40
+
+# EXIF orientations that swap width and height
+_TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def preview_key(blob: Blob, size: int) -> str:
+    return f"{blob.storage_key}.{size}.webp"
+
+
+def _encode(image: Image.Image, quality: int) -> bytes:
+    out = io.BytesIO()
+    image.save(out, "WEBP", quality=quality)
+    return out.getvalue()
+
+
+def render_previews(fileobj: BinaryIO) -> Tuple[Dict, List[Tuple[int, bytes]]]:
+    """
+    Decode an image once and render every thumbnail size and the placeholder
+
+    Returns (metadata, [(size, webp_bytes)]); metadata holds the oriented
+    original dimensions, each thumbnail's dimensions and the placeholder URI.
+    """
+    with Image.open(fileobj) as image:
+        width, height = image.size
+        if image.getexif().get(0x0112) in _TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+
+        # JPEG decodes straight to 1/2, 1/4 or 1/8 scale: ask for the smallest
+        # that still covers the largest thumbnail instead of decoding full size
+        image.draft("RGB", (max(THUMBNAIL_SIZES), max(THUMBNAIL_SIZES)))
+        current = ImageOps.exif_transpose(image)
+
+    if current.mode not in ("RGB", "RGBA"):
+        current = current.convert(
+            "RGBA"
+            if "A" in current.getbands() or "transparency" in current.info
+            else "RGB"
+        )
+
+    # Largest first, each size resized from the previous one
+    longest = max(width, height)
+    sizes = [size for size in THUMBNAIL_SIZES if size < longest] or [
+        min(THUMBNAIL_SIZES)
+    ]
+    thumbnails = []
+    rendered = []
+    for size in sorted(sizes, reverse=True):
+        current = current.copy()
+        current.thumbnail((size, size), Image.LANCZOS, reducing_gap=3.0)
+        data = _encode(current, THUMBNAIL_QUALITY)
+        thumbnails.append(
+            {
+                "size": size,
+                "width": current.width,
+                "height": current.height,
+                "size_bytes": len(data),
+            }
+        )
+        rendered.append((size, data))
+
+    current.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.BILINEAR)
+    placeholder = (
+        "data:image/webp;base64,"
+        + base64.b64encode(_encode(current, PLACEHOLDER_QUALITY)).decode()
+    )
+
+    metadata = {
+        "width": width,
+        "height": height,
+        "thumbnails": thumbnails,
+        "placeholder": placeholder,
+    }
+    return metadata, rendered
+
+
+def _claimable(now: datetime):
+    """Blobs that may be claimed: never requested, or PENDING past the claim timeout"""
+    cutoff = now - timedelta(minutes=settings.PREVIEW_CLAIM_TIMEOUT_MINUTES)
+    return or_(
+        Blob.preview_status == None,
+        and_(
+            Blob.preview_status == PreviewStatus.PENDING,
+            or_(Blob.preview_requested_at == None, Blob.preview_requested_at <= cutoff),
+        ),
+    )
+
+
+def claim_previews(db: Session, blob_id) -> bool:
+    """Mark a blob PENDING if nobody holds a live claim on it; the caller then queues its task"""
+    now = datetime.now(timezone.utc)
+    claimed = (
+        db.query(Blob)
+        .filter(Blob.id == blob_id, _claimable(now))
+        .update(
+            {
+                Blob.preview_status: PreviewStatus.PENDING,
+                Blob.preview_requested_at: now,
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return claimed == 1
+
+
+def release_previews(db: Session, blob_id) -> None:
+    """Drop a claim whose task could not be queued, so the next request retries"""
+    db.query(Blob).filter(
+        Blob.id == blob_id, Blob.preview_status == PreviewStatus.PENDING
+    ).update(
+        {Blob.preview_status: None, Blob.preview_requested_at: None},
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def claim_stale_previews(
+    session_factory: Optional[Callable[[], Session]] = None
+) -> List[str]:
+    """Re-claim blobs stuck PENDING past the claim timeout, returning their ids for requeueing"""
+    session_factory = session_factory or SessionLocal
+    now = datetime.now(timezone.utc)
+    db = session_factory()
+    try:
+        stale = (
+            db.query(Blob.id)
+            .filter(
+                Blob.preview_status == PreviewStatus.PENDING,
+                Blob.ref_count > 0,
+                _claimable(now),
+            )
+            .all()
+        )
+        return [str(blob_id) for (blob_id,) in stale if claim_previews(db, blob_id)]
+    finally:
+        db.close()
+
+
+def derive_previews(
+    blob_id: str,
+    session_factory: Optional[Callable[[], Session]] = None,
+    storage: Optional[StorageBackend] = None,
+) -> Optional[PreviewStatus]:
+    """Render and store a blob's previews, returning its preview status (None if it no longer exists)"""
+    storage = storage or get_storage()
+    session_factory = session_factory or SessionLocal
+    db = session_factory()
+    try:
+        blob = db.query(Blob).filter(Blob.id == uuid.UUID(str(blob_id))).first()
+        if not blob:
+            logger.warning(f"Blob {blob_id} not found, skipping previews")
+            return None
+        if blob.preview_status == PreviewStatus.READY:
+            # Redelivered after a crash between storing and acknowledging
+            return blob.preview_status
+
+        with tracer.start_as_current_span("previews.derive") as span:
+            span.set_attribute("blob.id", str(blob.id))
+            span.set_attribute("blob.size_bytes", blob.size_bytes)
+            try:
+                path = storage.local_path(blob.storage_key)
+                if path is not None:
+                    metadata, rendered = render_previews(path)
+                else:
+                    with open_seekable(storage, blob.storage_key) as fileobj:
+                        metadata, rendered = render_previews(fileobj)
+                for thumbnail, (size, data) in zip(
+                    metadata["thumbnails"], rendered, strict=True
+                ):
+                    thumbnail["key"] = preview_key(blob, size)
+                    storage.save(thumbnail["key"], io.BytesIO(data))
+            except (OSError, StorageError, Image.DecompressionBombError) as e:
+                # Not an image Pillow can read (or too large to decode safely)
+                logger.warning(f"Could not derive previews for blob {blob.id}: {e}")
+                blob.preview_status = PreviewStatus.FAILED
+                db.commit()
+                return blob.preview_status
+
+        blob.previews = metadata
+        blob.preview_status = PreviewStatus.READY
+        db.commit()
+        return blob.preview_status
+    finally:
+        db.close()
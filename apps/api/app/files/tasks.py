@@ -0,0 +1,38 @@
+from app.core.celery_app import celery_app
+from app.files.blobs import backfill_crc32, purge_orphan_blobs
+from app.files.previews import claim_stale_previews, derive_previews
+from app.files.text import extract_file_text
+
+
+@celery_app.task(name="files.purge_orphan_blobs")
+def purge_orphans() -> int:
+    """Celery task: delete file blobs no File row references any more"""
+    return purge_orphan_blobs()
+
+
+@celery_app.task(name="files.backfill_crc32")
+def backfill_crc32_task(blob_ids: list) -> int:
+    """Celery task: record the CRC-32 of legacy blobs so their bundles can be resumed"""
+    return backfill_crc32(blob_ids)
+
+
+@celery_app.task(name="files.derive_previews")
+def derive_previews_task(blob_id: str) -> str:
+    """Celery task: render a photo's thumbnails and placeholder in the worker pool"""
+    status = derive_previews(blob_id)
+    return status.value if status else "MISSING"
+
+
+@celery_app.task(name="files.retry_stale_previews")
+def retry_stale_previews() -> int:
+    """Celery task: requeue preview derivation for blobs whose claim timed out"""
+    blob_ids = claim_stale_previews()
+    for blob_id in blob_ids:
+        derive_previews_task.delay(blob_id)
+    return len(blob_ids)
+
+
+@celery_app.task(name="files.extract_text")
+def extract_text_task(file_id: str) -> int:
+    """Celery task: extract a document's text into the full-text search index"""
+    return extract_file_text(file_id) or 0
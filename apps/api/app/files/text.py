@@ -0,0 +1,190 @@
+"""
+Document text extraction and full-text search
+When a PDF or plain-text file is saved, a Celery task extracts its text into
+a FileText row. Postgres derives a tsvector from it (GIN-indexed), so search
+is an index lookup scoped by tenant and optionally project. Text is stored
+per file rather than per blob so the scope filters sit on the indexed table,
+but each distinct content is only parsed once: later files sharing a blob
+copy the text already extracted.
+"""
+
+import codecs
+import logging
+import uuid
+from typing import BinaryIO, Callable, Optional
+
+from pypdf import PdfReader
+from pypdf.errors import PyPdfError
+from sqlalchemy import Select, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
+from app.core.tracing import get_tracer
+from app.db.base import SessionLocal
+from app.models.file import File
+from app.models.file_text import SEARCH_CONFIG, FileText
+from app.storage import StorageBackend, StorageError, get_storage
+from app.uploads.sessions import open_seekable
+
+logger = logging.getLogger(__name__)
+tracer = get_tracer(__name__)
+
+TEXT_EXTENSIONS = {".txt", ".csv", ".tsv", ".md", ".log", ".json", ".xml"}
+
+# Matches are wrapped in <mark>; the document text around them is HTML-escaped
+HEADLINE_OPTIONS = (
+    "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2"
+)
+
+
+def _extension(filename: str) -> str:
+    return "." + filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+
+
+def is_extractable(filename: str) -> bool:
+    extension = _extension(filename)
+    return extension == ".pdf" or extension in TEXT_EXTENSIONS
+
+
+def _clean(text: str) -> str:
+    # Postgres text cannot hold NUL
+    return text.replace("\x00", "")
+
+
+def extract_pdf_text(fileobj: BinaryIO, max_chars: int) -> str:
+    """Text of a PDF's pages in order, up to max_chars"""
+    reader = PdfReader(fileobj)
+    if reader.is_encrypted and not reader.decrypt(""):
+        raise PyPdfError("PDF is password protected")
+    pages = []
+    length = 0
+    for page in reader.pages:
+        text = _clean(page.extract_text() or "")
+        pages.append(text)
+        length += len(text) + 1
+        if length >= max_chars:
+            break
+    return "\n".join(pages)[:max_chars]
+
+
+def extract_plain_text(fileobj: BinaryIO, max_chars: int) -> str:
+    """Decode a text file as UTF-8, falling back to Windows-1252, up to max_chars"""
+    # At most 4 bytes per character; reading no further keeps huge logs cheap
+    data = fileobj.read(max_chars * 4)
+    try:
+        # Incremental, so a character cut off at the end of the read is not an error
+        text = codecs.getincrementaldecoder("utf-8")().decode(data)
+    except UnicodeDecodeError:
+        text = data.decode("cp1252", errors="replace")
+    return _clean(text)[:max_chars]
+
+
+def extract_file_text(
+    file_id: str,
+    session_factory: Optional[Callable[[], Session]] = None,
+    storage: Optional[StorageBackend] = None,
+) -> Optional[int]:
+    """Extract and index a file's text, returning its length in characters (None if nothing was indexed)"""
+    storage = storage or get_storage()
+    session_factory = session_factory or SessionLocal
+    max_chars = settings.FILE_TEXT_MAX_CHARS
+    db = session_factory()
+    try:
+        file = db.query(File).filter(File.id == uuid.UUID(str(file_id))).first()
+        if not file:
+            logger.warning(f"File {file_id} not found, skipping text extraction")
+            return None
+        indexed = (
+            db.query(func.length(FileText.content))
+            .filter(FileText.file_id == file.id)
+            .scalar()
+        )
+        if indexed is not None:
+            # Redelivered after a crash between writing and acknowledging
+            return indexed
+
+        # The same content, already extracted for another of the tenant's files
+        # (files stored before blobs existed share nothing)
+        content = None
+        if file.blob_id is not None:
+            content = (
+                db.query(FileText.content)
+                .join(File, File.id == FileText.file_id)
+                .filter(
+                    FileText.tenant_id == file.tenant_id, File.blob_id == file.blob_id
+                )
+                .limit(1)
+                .scalar()
+            )
+        if content is None:
+            with tracer.start_as_current_span("files.extract_text") as span:
+                span.set_attribute("file.id", str(file.id))
+                span.set_attribute("file.size_bytes", file.size_bytes or 0)
+                try:
+                    if _extension(file.filename) == ".pdf":
+                        with open_seekable(storage, file.storage_key) as fileobj:
+                            content = extract_pdf_text(fileobj, max_chars)
+                    else:
+                        with storage.open(file.storage_key) as fileobj:
+                            content = extract_plain_text(fileobj, max_chars)
+                except (PyPdfError, ValueError, KeyError, OSError, StorageError) as e:
+                    # Damaged or encrypted documents are left unindexed; the file itself is fine
+                    logger.warning(f"Could not extract text from file {file.id}: {e}")
+                    return None
+                span.set_attribute("file.text_chars", len(content))
+
+        db.add(
+            FileText(
+                file_id=file.id,
+                tenant_id=file.tenant_id,
+                project_id=file.project_id,
+                content=content,
+            )
+        )
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent delivery of the same task got there first
+            db.rollback()
+        return len(content)
+    finally:
+        db.close()
+
+
+def search_query(
+    tenant_id, q: str, project_id=None, skip: int = 0, limit: int = 20
+) -> Select:
+    """
+    Files whose text matches a web-style query (quoted phrases, OR, -word), best first
+
+    Rows are (File, rank, snippet). Ranking and paging run on the GIN index
+    match; snippets are only generated for the returned page, since
+    ts_headline has to re-parse each document.
+    """
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank_cd(FileText.search_vector, query)
+    matches = select(FileText.file_id, FileText.content, rank.label("rank")).where(
+        FileText.tenant_id == tenant_id,
+        FileText.search_vector.op("@@")(query),
+    )
+    if project_id is not None:
+        matches = matches.where(FileText.project_id == project_id)
+    matches = (
+        matches.order_by(rank.desc(), FileText.file_id)
+        .offset(skip)
+        .limit(limit)
+        .subquery()
+    )
+
+    escaped = matches.c.content
+    for char, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;")):
+        escaped = func.replace(escaped, char, entity)
+    snippet = func.ts_headline(SEARCH_CONFIG, escaped, query, HEADLINE_OPTIONS)
+
+    return (
+        select(File, matches.c.rank, snippet.label("snippet"))
+        .join(matches, File.id == matches.c.file_id)
+        .options(joinedload(File.blob))
+        .order_by(matches.c.rank.desc(), File.id)
+    )
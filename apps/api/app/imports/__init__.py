@@ -0,0 +1 @@
+# Background imports package
@@ -0,0 +1,246 @@
+"""
+Background import engine
+Runs one import job end to end in its own database session. The file is
+streamed twice: a validation pass (fast, vectorized, nothing written) so an
+invalid file fails before any insert, then a write pass that commits each
+batch together with the job's counters, so progress is visible while it runs.
+Every inserted row is tagged with the job id; a cancelled, failed or
+redelivered job deletes its rows, keeping imports all-or-nothing.
+"""
+
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from app.core.metrics import IMPORT_ROWS
+from app.core.tracing import get_tracer
+from app.db.base import SessionLocal
+from app.models.data_version import bump_data_version
+from app.models.import_job import (
+    FINAL_STATUSES,
+    ImportFormat,
+    ImportJob,
+    ImportJobStatus,
+)
+from app.models.material import MaterialLineItem
+from app.pricing.price_book import PriceBookResolver
+from app.storage import StorageBackend, get_storage
+from app.uploads.sessions import open_seekable
+from app.utils.audit import AuditLogger
+from app.utils.calculations import ConstructionCalculator
+from app.utils.import_export import (
+    MAX_IMPORT_ERRORS,
+    ImportError,
+    MaterialCsvImporter,
+    MaterialXlsxImporter,
+)
+
+logger = logging.getLogger(__name__)
+tracer = get_tracer(__name__)
+
+IMPORTERS = {
+    ImportFormat.CSV: MaterialCsvImporter,
+    ImportFormat.XLSX: MaterialXlsxImporter,
+}
+
+# Progress (percent) once validation is done; the write pass fills the rest
+PROGRESS_VALIDATED = 10
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+def insert_material_records(
+    db: Session, project_id, records: List[Dict[str, Any]], import_job_id=None
+) -> int:
+    """Insert validated records in a single executemany, computing totals server-side"""
+    rows = []
+    for record in records:
+        total_qty = ConstructionCalculator.takeoff_total_qty(
+            float(record["quantity"]), float(record["wastage_factor"])
+        )
+        total_cost = ConstructionCalculator.total_cost(
+            float(total_qty), float(record["unit_cost"])
+        )
+        rows.append(
+            {
+                **record,
+                "project_id": project_id,
+                "total_qty": total_qty,
+                "total_cost": total_cost,
+                "import_job_id": import_job_id,
+            }
+        )
+
+    if rows:
+        db.execute(insert(MaterialLineItem), rows)
+    return len(rows)
+
+
+def _delete_job_rows(db: Session, job: ImportJob) -> None:
+    result = db.execute(
+        delete(MaterialLineItem).where(MaterialLineItem.import_job_id == job.id)
+    )
+    if result.rowcount:
+        bump_data_version(db, [job.project_id])
+    job.rows_imported = 0
+
+
+def _check_cancelled(db: Session, job: ImportJob) -> None:
+    # The job row was expired by the last commit, so this reads the current flag
+    if job.cancel_requested:
+        raise ImportCancelled()
+
+
+def _finish(
+    db: Session,
+    job: ImportJob,
+    storage: StorageBackend,
+    status: ImportJobStatus,
+    message: Optional[str] = None,
+) -> ImportJobStatus:
+    job.status = status
+    job.error_message = message
+    job.finished_at = datetime.now(timezone.utc)
+    if status == ImportJobStatus.COMPLETED:
+        job.progress = 100
+    db.commit()
+    release_input(job, storage)
+    return status
+
+
+def _prices(db: Session, job: ImportJob) -> Optional[PriceBookResolver]:
+    return PriceBookResolver(db, job.tenant_id) if job.resolve_prices else None
+
+
+def _validate(
+    db: Session, job: ImportJob, storage: StorageBackend
+) -> MaterialCsvImporter:
+    # Collect errors without building records; a real import keeps the usual cap
+    importer = IMPORTERS[job.format](dry_run=True, prices=_prices(db, job))
+    importer.max_errors = None if job.dry_run else MAX_IMPORT_ERRORS
+    with open_seekable(storage, job.storage_key) as fileobj:
+        for _ in importer.iter_batches(fileobj):
+            _check_cancelled(db, job)
+            job.rows_processed = importer.row_count
+            job.error_count = importer.error_count
+            db.commit()
+    job.rows_processed = job.rows_total = importer.row_count
+    job.error_count = importer.error_count
+    job.errors = importer.errors
+    job.progress = PROGRESS_VALIDATED
+    db.commit()
+    return importer
+
+
+def _write(db: Session, job: ImportJob, storage: StorageBackend) -> int:
+    importer = IMPORTERS[job.format](prices=_prices(db, job))
+    with open_seekable(storage, job.storage_key) as fileobj:
+        for batch in importer.iter_batches(fileobj):
+            _check_cancelled(db, job)
+            job.rows_imported += insert_material_records(
+                db, job.project_id, batch, job.id
+            )
+            job.progress = PROGRESS_VALIDATED + (
+                100 - PROGRESS_VALIDATED
+            ) * job.rows_imported // max(job.rows_total, 1)
+            # Bulk inserts bypass the unit of work, so bump the data version with each batch
+            bump_data_version(db, [job.project_id])
+            db.commit()
+    # The file was validated, so this only trips if it changed underneath us
+    importer.raise_for_errors()
+    return job.rows_imported
+
+
+def run_import(
+    job_id: str,
+    session_factory: Optional[Callable[[], Session]] = None,
+    storage: Optional[StorageBackend] = None,
+) -> Optional[ImportJobStatus]:
+    """Run an import job, returning its final status (None if it no longer exists)"""
+    storage = storage or get_storage()
+    session_factory = session_factory or SessionLocal
+    db = session_factory()
+    try:
+        job = db.query(ImportJob).filter(ImportJob.id == uuid.UUID(str(job_id))).first()
+        if not job:
+            logger.warning(f"Import job {job_id} not found, skipping")
+            return None
+        if job.status in FINAL_STATUSES:
+            # Redelivered after the worker finished it, or cancelled while queued
+            return job.status
+
+        with tracer.start_as_current_span(
+            "import.job",
+            attributes={
+                "import.job_id": str(job.id),
+                "import.format": job.format.value,
+                "import.dry_run": job.dry_run,
+            },
+        ) as span:
+            if job.status == ImportJobStatus.PROCESSING:
+                # A worker died mid-job; start over without its partial rows
+                _delete_job_rows(db, job)
+            job.status = ImportJobStatus.PROCESSING
+            job.started_at = datetime.now(timezone.utc)
+            db.commit()
+
+            try:
+                _check_cancelled(db, job)
+                importer = _validate(db, job, storage)
+                _check_cancelled(db, job)
+                if job.dry_run:
+                    return _finish(db, job, storage, ImportJobStatus.COMPLETED)
+                if importer.error_count:
+                    IMPORT_ROWS.labels(kind="materials", outcome="error").inc(
+                        importer.error_count
+                    )
+                    return _finish(
+                        db,
+                        job,
+                        storage,
+                        ImportJobStatus.FAILED,
+                        f"Validation failed with {importer.error_count} invalid rows",
+                    )
+
+                count = _write(db, job, storage)
+                span.set_attribute("import.rows", count)
+            except ImportCancelled:
+                db.rollback()
+                _delete_job_rows(db, job)
+                return _finish(db, job, storage, ImportJobStatus.CANCELLED)
+            except ImportError as e:
+                db.rollback()
+                _delete_job_rows(db, job)
+                return _finish(db, job, storage, ImportJobStatus.FAILED, str(e)[:1000])
+            except Exception as e:
+                logger.exception(f"Import job {job_id} failed")
+                db.rollback()
+                _delete_job_rows(db, job)
+                return _finish(db, job, storage, ImportJobStatus.FAILED, str(e)[:1000])
+
+            status = _finish(db, job, storage, ImportJobStatus.COMPLETED)
+            IMPORT_ROWS.labels(kind="materials", outcome="imported").inc(count)
+            AuditLogger(db, job.tenant_id, job.user_id).log_create(
+                "MaterialLineItem",
+                job.project_id,
+                {
+                    "bulk_import_count": count,
+                    "source": "import_job",
+                    "import_job_id": str(job.id),
+                },
+            )
+            return status
+    finally:
+        db.close()
+
+
+def release_input(job: ImportJob, storage: StorageBackend) -> None:
+    """Delete a finished job's input file, unless it belongs to a resumable upload"""
+    if job.upload_id is None:
+        storage.delete(job.storage_key)
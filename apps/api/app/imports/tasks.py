@@ -0,0 +1,9 @@
+from app.core.celery_app import celery_app
+from app.imports.engine import run_import
+
+
+@celery_app.task(name="imports.run")
+def run_import_job(job_id: str) -> str:
+    """Celery task: run an import job in the worker pool"""
+    status = run_import(job_id)
+    return status.value if status else "MISSING"
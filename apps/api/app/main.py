@@ -1,12 +1,19 @@
+import logging
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.exc import SQLAlchemyError
+
+from app.api.router import api_router
+from app.auth.jwt import clerk_auth
+from app.auth.membership import membership_resolver
 from app.core.config import settings
+from app.core.metrics import render_metrics
+from app.core.tracing import setup_tracing
+from app.db.base import engine
+from app.middleware.metrics import MetricsMiddleware
 from app.middleware.tenant import TenantContextMiddleware
-from app.api.router import api_router
-from app.db.base import engine, Base
-import logging
 
 # Setup logging
 logging.basicConfig(level=settings.LOG_LEVEL)
@@ -32,9 +39,15 @@ app.add_middleware(
 # Tenant context middleware
 app.add_middleware(TenantContextMiddleware)
 
+# Request metrics (outermost, so it times the whole stack)
+app.add_middleware(MetricsMiddleware)
+
 # Include API routes
 app.include_router(api_router, prefix="/api")
 
+# Tracing (no-op unless OTEL_ENABLED)
+tracer_provider = setup_tracing(app, engine)
+
 
 # Global exception handlers
 @app.exception_handler(SQLAlchemyError)
@@ -69,10 +82,23 @@ async def general_exception_handler(request: Request, exc: Exception):
 async def startup_event():
     """Initialize database on startup (for development)"""
     logger.info("Starting BuildPro API...")
+    # Warm the JWKS cache so the first authenticated request doesn't wait on it
+    if clerk_auth.jwks is not None:
+        clerk_auth.jwks.refresh_in_background()
+    # Drop cached membership roles when other workers change them
+    membership_resolver.start_listener()
     # In production, use Alembic migrations instead
     # Base.metadata.create_all(bind=engine)
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background listeners and flush pending spans before exit"""
+    membership_resolver.stop_listener()
+    if tracer_provider:
+        tracer_provider.shutdown()
+
+
 @app.get("/")
 async def root():
     return {
@@ -92,6 +118,13 @@ async def health():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    data, content_type = render_metrics()
+    return Response(content=data, media_type=content_type)
+
+
 if __name__ == "__main__":
     import uvicorn
 
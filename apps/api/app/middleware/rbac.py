@@ -1,10 +1,9 @@
-from fastapi import Request, HTTPException, status, Depends
+from fastapi import Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
-from functools import wraps
-from typing import Optional
-from app.models.user import UserRole
-from app.db.base import get_db
 
+from app.auth.membership import membership_resolver
+from app.db.base import get_db
+from app.models.user import UserRole
 
 # Role hierarchy (higher value = more permissions)
 ROLE_HIERARCHY = {
@@ -39,15 +38,23 @@ def get_current_user_id(request: Request) -> str:
     return user_id
 
 
-def get_current_user_role(request: Request) -> UserRole:
-    """Dependency to get current user role from request state"""
-    role = getattr(request.state, "user_role", None)
-    if not role:
+def get_current_user_role(request: Request, db: Session = Depends(get_db)) -> UserRole:
+    """
+    Dependency to get the current user's role from their tenant Membership.
+    The JWT role claim is not trusted; lookups go through the cached resolver.
+    """
+    tenant_id = get_current_tenant_id(request)
+    user_id = get_current_user_id(request)
+
+    role = membership_resolver.resolve(db, tenant_id, user_id)
+    if role is None:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User role not found. Authentication required.",
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No membership in this tenant",
         )
-    return UserRole(role)
+
+    request.state.user_role = role.value
+    return role
 
 
 def require_role(min_role: UserRole):
@@ -55,6 +62,7 @@ def require_role(min_role: UserRole):
     Dependency factory to require a minimum role level
     Usage: Depends(require_role(UserRole.PM))
     """
+
     def check_role(current_role: UserRole = Depends(get_current_user_role)) -> UserRole:
         if ROLE_HIERARCHY.get(current_role, 0) < ROLE_HIERARCHY.get(min_role, 0):
             raise HTTPException(
@@ -62,6 +70,7 @@ def require_role(min_role: UserRole):
                 detail=f"Insufficient permissions. Required: {min_role.value}, Current: {current_role.value}",
             )
         return current_role
+
     return check_role
 
 
@@ -77,18 +86,18 @@ def enforce_tenant_isolation(query, model, tenant_id: str):
 
 class TenantContext:
     """Context manager for tenant-scoped queries"""
-    
+
     def __init__(self, db: Session, tenant_id: str):
         self.db = db
         self.tenant_id = tenant_id
-    
+
     def query(self, model):
         """Create a tenant-scoped query"""
         query = self.db.query(model)
         if hasattr(model, "tenant_id"):
             query = query.filter(model.tenant_id == self.tenant_id)
         return query
-    
+
     def get(self, model, id: str):
         """Get a single record by ID with tenant isolation"""
         query = self.query(model).filter(model.id == id)
@@ -1,33 +1,82 @@
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
-from typing import Callable
 import uuid
+from typing import Optional
 
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-class TenantContextMiddleware(BaseHTTPMiddleware):
+from app.auth.jwt import auth_context_from_claims, clerk_auth
+
+
+class TenantContextMiddleware:
     """
-    Middleware that extracts tenant_id and user_id from JWT claims
-    and sets them on request.state for tenant isolation
+    Pure ASGI middleware that validates the bearer token once per request and
+    sets tenant_id, user_id and user_role on request.state for tenant isolation.
+
+    Unlike BaseHTTPMiddleware it does not wrap the downstream app in a task and
+    memory stream, so streaming responses keep their backpressure.
     """
 
-    async def dispatch(self, request: Request, call_next: Callable):
+    PUBLIC_PATHS = frozenset(
+        {"/", "/health", "/docs", "/redoc", "/openapi.json", "/metrics"}
+    )
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         # Skip tenant context for public endpoints
-        public_paths = ["/", "/health", "/docs", "/redoc", "/openapi.json"]
-        if request.url.path in public_paths:
-            return await call_next(request)
+        if scope["type"] != "http" or scope["path"] in self.PUBLIC_PATHS:
+            await self.app(scope, receive, send)
+            return
 
-        # Extract from JWT claims (set by auth middleware)
-        # For now, we'll set defaults - auth will be added in next step
-        request.state.tenant_id = getattr(request.state, "tenant_id", None)
-        request.state.user_id = getattr(request.state, "user_id", None)
-        request.state.user_role = getattr(request.state, "user_role", None)
+        # scope["state"] backs request.state
+        state = scope.setdefault("state", {})
+        state.setdefault("tenant_id", None)
+        state.setdefault("user_id", None)
+        state.setdefault("user_role", None)
+
+        claims = None
+        token = self._bearer_token(Headers(scope=scope).get("authorization"))
+        if token:
+            # A token verified recently is a cache hit; any other may need the
+            # JWKS fetched (first use, key rotation), so verify it off the loop
+            claims = clerk_auth.cached_claims(token)
+            if claims is None:
+                claims = await run_in_threadpool(self._verify, token)
+        if claims is not None and claims.get("sub"):
+            state.update(auth_context_from_claims(claims))
 
         # Generate request ID for tracing
-        request.state.request_id = str(uuid.uuid4())
-
-        response = await call_next(request)
-        
-        # Add request ID to response headers
-        response.headers["X-Request-ID"] = request.state.request_id
-        
-        return response
+        request_id = str(uuid.uuid4())
+        state["request_id"] = request_id
+
+        async def send_with_request_id(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Request-ID", request_id)
+            await send(message)
+
+        await self.app(scope, receive, send_with_request_id)
+
+    @staticmethod
+    def _bearer_token(authorization: Optional[str]) -> Optional[str]:
+        if not authorization:
+            return None
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        return token
+
+    @staticmethod
+    def _verify(token: str) -> Optional[dict]:
+        """
+        Return verified claims for a bearer token, or None.
+        Rejection is left to the route dependencies, so a bad token surfaces
+        as the usual 401 rather than a middleware-specific error. Claims
+        without a subject are ignored by the caller.
+        """
+        try:
+            return clerk_auth.verify_token(token)
+        except (HTTPException, ValueError):
+            return None
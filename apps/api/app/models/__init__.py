@@ -1,11 +1,18 @@
-from app.models.tenant import Tenant
-from app.models.user import User, Membership
-from app.models.project import BuildProject, Lot
+from app.models import data_version  # noqa: F401  (registers write tracking)
+from app.models.assembly import Assembly, AssemblyComponent
+from app.models.audit import AuditLog
+from app.models.blob import Blob
+from app.models.file import File
+from app.models.file_text import FileText
+from app.models.import_job import ImportJob
 from app.models.material import MaterialLineItem
-from app.models.schedule import ScheduleMilestone
+from app.models.price_book import PriceBookItem
+from app.models.project import BuildProject, Lot
 from app.models.report import Report
-from app.models.file import File
-from app.models.audit import AuditLog
+from app.models.schedule import ScheduleMilestone
+from app.models.tenant import Tenant
+from app.models.upload import UploadSession
+from app.models.user import Membership, User
 
 __all__ = [
     "Tenant",
@@ -14,8 +21,15 @@ __all__ = [
     "BuildProject",
     "Lot",
     "MaterialLineItem",
+    "PriceBookItem",
+    "Assembly",
+    "AssemblyComponent",
     "ScheduleMilestone",
     "Report",
     "File",
+    "Blob",
+    "FileText",
     "AuditLog",
+    "UploadSession",
+    "ImportJob",
 ]
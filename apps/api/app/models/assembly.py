@@ -0,0 +1,106 @@
+import enum
+import uuid
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    Text,
+    UniqueConstraint,
+)
+from sqlalchemy import Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+from app.models.material import MaterialCategory, UnitOfMeasure
+
+
+class AssemblyBasis(str, enum.Enum):
+    """What a component's quantity is measured against, per assembly instance"""
+
+    LENGTH = "LENGTH"  # factor per LF of run
+    AREA = "AREA"  # factor per SF of length x height
+    VOLUME = "VOLUME"  # factor per CF of length x width x height
+    # factor per member at spacing_in on center along the run, plus one
+    SPACING = "SPACING"
+    EACH = "EACH"  # factor per instance
+
+
+class Assembly(Base):
+    """A named group of components that expands into material line items, e.g. "2x6 exterior wall" """
+
+    __tablename__ = "assemblies"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(
+        UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False
+    )
+
+    name = Column(String(200), nullable=False)
+    description = Column(Text)
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    # Relationships
+    components = relationship(
+        "AssemblyComponent",
+        back_populates="assembly",
+        cascade="all, delete-orphan",
+        order_by="AssemblyComponent.position",
+    )
+
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "name", name="uq_assembly_tenant_name"),
+    )
+
+    def __repr__(self):
+        return f"<Assembly {self.name}>"
+
+
+class AssemblyComponent(Base):
+    __tablename__ = "assembly_components"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    assembly_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("assemblies.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    position = Column(Integer, nullable=False, default=0)
+
+    category = Column(SQLEnum(MaterialCategory), nullable=False)
+    description = Column(String(500), nullable=False)
+    unit = Column(SQLEnum(UnitOfMeasure), nullable=False)
+
+    basis = Column(SQLEnum(AssemblyBasis), nullable=False)
+    factor = Column(Numeric(12, 4), nullable=False, default=1)
+    spacing_in = Column(Numeric(6, 2))  # SPACING basis only
+
+    wastage_factor = Column(Numeric(5, 4), nullable=False, default=0)
+    unit_cost = Column(Numeric(10, 2), nullable=False, default=0)
+    sku = Column(String(100))  # Price book SKU, stored upper-cased
+
+    # Relationships
+    assembly = relationship("Assembly", back_populates="components")
+
+    # Indexes
+    __table_args__ = (
+        Index("ix_assembly_component_assembly", "assembly_id", "position"),
+    )
+
+    def __repr__(self):
+        return f"<AssemblyComponent {self.description}>"
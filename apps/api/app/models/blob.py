@@ -0,0 +1,60 @@
+import enum
+import uuid
+
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy import Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class PreviewStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    READY = "READY"
+    FAILED = "FAILED"
+
+
+class Blob(Base):
+    """Stored file content, shared by every File row in the tenant with the same SHA-256"""
+
+    __tablename__ = "blobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(
+        UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False
+    )
+
+    sha256 = Column(String(64), nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    # unsigned; lets ZIP bundles lay out entries without reading them
+    crc32 = Column(BigInteger)
+    storage_key = Column(String(500), nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)  # File rows pointing here
+
+    # Thumbnails and placeholder derived from photos (null until a photo references the blob)
+    preview_status = Column(SQLEnum(PreviewStatus))
+    # when the PENDING claim was taken
+    preview_requested_at = Column(DateTime(timezone=True))
+    # {"width", "height", "thumbnails": [{"size", "width", "height", "key", "size_bytes"}], "placeholder"}
+    previews = Column(JSONB)
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    # Indexes
+    __table_args__ = (
+        Index("uq_blob_tenant_sha256", "tenant_id", "sha256", unique=True),
+        Index("ix_blob_tenant_storage_key", "tenant_id", "storage_key"),
+        Index("ix_blob_ref_count_updated", "ref_count", "updated_at"),
+    )
+
+    def __repr__(self):
+        return f"<Blob {self.sha256[:12]} x{self.ref_count}>"
@@ -0,0 +1,81 @@
+"""
+Project data versions
+BuildProject.data_version is bumped whenever the project or one of its
+materials, milestones or files is written, so anything derived from project
+data (report outputs) can be cached against it.
+"""
+
+from itertools import chain
+from typing import Iterable
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+
+from app.models.file import File
+from app.models.material import MaterialLineItem
+from app.models.project import BuildProject
+from app.models.schedule import ScheduleMilestone
+
+VERSIONED_CHILDREN = (MaterialLineItem, ScheduleMilestone, File)
+
+# Session.info key for project ids to bump in SQL after the flush
+_PENDING_KEY = "data_version_bumps"
+
+
+def _bump_statement(project_ids: Iterable):
+    return (
+        update(BuildProject)
+        .where(BuildProject.id.in_(list(project_ids)))
+        .values(data_version=BuildProject.data_version + 1)
+    )
+
+
+def bump_data_version(db: Session, project_ids: Iterable) -> None:
+    """Bump data versions for writes that bypass the ORM unit of work (bulk UPDATE/INSERT)"""
+    project_ids = set(project_ids)
+    if project_ids:
+        db.execute(
+            _bump_statement(project_ids).execution_options(synchronize_session="fetch")
+        )
+
+
+def _bump(project: BuildProject) -> None:
+    # SQL expression, so concurrent writers can't lose an increment
+    project.data_version = BuildProject.data_version + 1
+
+
+@event.listens_for(Session, "before_flush")
+def _track_project_writes(session: Session, flush_context, instances) -> None:
+    project_ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, VERSIONED_CHILDREN):
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            if obj.project_id is not None:
+                project_ids.add(obj.project_id)
+        elif (
+            isinstance(obj, BuildProject)
+            and obj in session.dirty
+            and session.is_modified(obj)
+        ):
+            _bump(obj)
+
+    for project_id in project_ids:
+        project = session.identity_map.get(identity_key(BuildProject, project_id))
+        if project is None:
+            session.info.setdefault(_PENDING_KEY, set()).add(project_id)
+        elif project not in session.new and not session.is_modified(project):
+            _bump(project)
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_unloaded_projects(session: Session, flush_context) -> None:
+    project_ids = session.info.pop(_PENDING_KEY, None)
+    if project_ids:
+        session.connection().execute(_bump_statement(project_ids))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_bumps(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
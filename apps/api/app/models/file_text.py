@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Computed, DateTime, ForeignKey, Index, Text
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+# Text search configuration the index is built with; queries must use the same
+SEARCH_CONFIG = "english"
+
+
+class FileText(Base):
+    """Text extracted from an uploaded document, indexed for full-text search"""
+
+    __tablename__ = "file_texts"
+
+    file_id = Column(
+        UUID(as_uuid=True), ForeignKey("files.id", ondelete="CASCADE"), primary_key=True
+    )
+    tenant_id = Column(
+        UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False
+    )
+    project_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("build_projects.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    content = Column(Text, nullable=False)
+    # Maintained by Postgres from content, so rows are searchable as soon as they are written
+    search_vector = Column(
+        TSVECTOR, Computed(f"to_tsvector('{SEARCH_CONFIG}', content)", persisted=True)
+    )
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    # Indexes
+    __table_args__ = (
+        Index("ix_file_text_search", "search_vector", postgresql_using="gin"),
+        Index("ix_file_text_tenant_project", "tenant_id", "project_id"),
+    )
+
+    def __repr__(self):
+        return f"<FileText {self.file_id}>"
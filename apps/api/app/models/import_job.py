@@ -0,0 +1,108 @@
+import enum
+import uuid
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
+from sqlalchemy import Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class ImportJobStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    PROCESSING = "PROCESSING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+
+# A job in one of these states no longer reads its input
+FINAL_STATUSES = (
+    ImportJobStatus.COMPLETED,
+    ImportJobStatus.FAILED,
+    ImportJobStatus.CANCELLED,
+)
+
+
+class ImportFormat(str, enum.Enum):
+    CSV = "CSV"
+    XLSX = "XLSX"
+
+
+class ImportJob(Base):
+    """A material import run by a worker; rows it inserts carry its id"""
+
+    __tablename__ = "import_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(
+        UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False
+    )
+    project_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("build_projects.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    user_id = Column(UUID(as_uuid=True))
+
+    format = Column(SQLEnum(ImportFormat), nullable=False)
+    filename = Column(String(255), nullable=False)
+    storage_key = Column(String(500), nullable=False)  # Input file in storage
+    # Set when the input is a resumable upload (not owned by the job)
+    upload_id = Column(UUID(as_uuid=True))
+    dry_run = Column(Boolean, nullable=False, default=False)
+    # unit_cost from the price book by sku
+    resolve_prices = Column(Boolean, nullable=False, default=False)
+    # Client-provided; repeats return the same job
+    idempotency_key = Column(String(255))
+
+    status = Column(
+        SQLEnum(ImportJobStatus), nullable=False, default=ImportJobStatus.PENDING
+    )
+    progress = Column(Integer, nullable=False, default=0)  # 0 to 100
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    rows_total = Column(Integer)  # Known once the file is validated
+    rows_processed = Column(Integer, nullable=False, default=0)  # Rows validated so far
+    rows_imported = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)  # Invalid rows
+    # Cell errors, as returned by file imports
+    errors = Column(JSONB, nullable=False, default=list)
+    error_message = Column(Text)
+
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    # Indexes
+    __table_args__ = (
+        Index("ix_import_job_tenant", "tenant_id"),
+        Index("ix_import_job_tenant_project", "tenant_id", "project_id"),
+        Index("ix_import_job_status", "status"),
+        Index(
+            "uq_import_job_tenant_idempotency_key",
+            "tenant_id",
+            "idempotency_key",
+            unique=True,
+        ),
+    )
+
+    def __repr__(self):
+        return f"<ImportJob {self.filename} - {self.status}>"
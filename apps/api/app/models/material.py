@@ -1,9 +1,12 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Numeric, Enum as SQLEnum, Index, Text
+import enum
+import uuid
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Numeric, String, Text
+from sqlalchemy import Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-import uuid
-import enum
+from sqlalchemy.sql import func
+
 from app.db.base import Base
 
 
@@ -36,24 +39,38 @@ class MaterialLineItem(Base):
     __tablename__ = "material_line_items"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    project_id = Column(UUID(as_uuid=True), ForeignKey("build_projects.id", ondelete="CASCADE"), nullable=False)
-    
+    project_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("build_projects.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
     category = Column(SQLEnum(MaterialCategory), nullable=False)
     description = Column(String(500), nullable=False)
-    
+
     quantity = Column(Numeric(12, 3), nullable=False, default=0)
     unit = Column(SQLEnum(UnitOfMeasure), nullable=False)
-    wastage_factor = Column(Numeric(5, 4), nullable=False, default=0)  # 0.0000 to 1.0000
-    
+    # 0.0000 to 1.0000
+    wastage_factor = Column(Numeric(5, 4), nullable=False, default=0)
+
     # Computed fields (server-side)
     total_qty = Column(Numeric(12, 3), nullable=False, default=0)
     unit_cost = Column(Numeric(10, 2), nullable=False, default=0)
     total_cost = Column(Numeric(12, 2), nullable=False, default=0)
-    
+
     notes = Column(Text)
-    
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    # Import job that created the row, if any
+    import_job_id = Column(UUID(as_uuid=True))
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
     deleted_at = Column(DateTime(timezone=True), nullable=True)
 
     # Relationships
@@ -64,6 +81,7 @@ class MaterialLineItem(Base):
         Index("ix_material_project", "project_id"),
         Index("ix_material_project_deleted", "project_id", "deleted_at"),
         Index("ix_material_category", "category"),
+        Index("ix_material_import_job", "import_job_id"),
     )
 
     def __repr__(self):
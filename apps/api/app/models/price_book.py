@@ -0,0 +1,92 @@
+import uuid
+
+from sqlalchemy import (
+    DDL,
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Numeric,
+    String,
+    UniqueConstraint,
+    event,
+)
+from sqlalchemy import Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+from app.models.material import UnitOfMeasure
+
+
+class PriceBookItem(Base):
+    """A vendor's price for a SKU, in effect from effective_from until (not including) effective_to"""
+
+    __tablename__ = "price_book_items"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(
+        UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False
+    )
+
+    vendor = Column(String(200), nullable=False)
+    sku = Column(String(100), nullable=False)  # Stored trimmed and upper-cased
+    description = Column(String(500), nullable=False)
+    unit = Column(SQLEnum(UnitOfMeasure), nullable=False)
+    # Same precision as MaterialLineItem.unit_cost
+    price = Column(Numeric(10, 2), nullable=False)
+
+    effective_from = Column(Date, nullable=False)
+    effective_to = Column(Date, nullable=True)  # Open-ended when null
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    # Indexes: text_pattern_ops so LIKE 'abc%' prefix matches use the b-trees
+    # under any collation, and a trigram index for matches inside descriptions
+    __table_args__ = (
+        UniqueConstraint(
+            "tenant_id",
+            "vendor",
+            "sku",
+            "effective_from",
+            name="uq_price_book_vendor_sku_from",
+        ),
+        Index(
+            "ix_price_book_sku_prefix",
+            "tenant_id",
+            "sku",
+            postgresql_ops={"sku": "text_pattern_ops"},
+        ),
+        Index(
+            "ix_price_book_description_prefix",
+            "tenant_id",
+            func.lower(description).label("description_lower"),
+            postgresql_ops={"description_lower": "text_pattern_ops"},
+        ),
+        Index(
+            "ix_price_book_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+    )
+
+    def __repr__(self):
+        return f"<PriceBookItem {self.vendor} {self.sku}>"
+
+
+# The trigram operator class lives in the pg_trgm extension
+event.listen(
+    PriceBookItem.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
@@ -1,9 +1,12 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Enum as SQLEnum, Index, Text
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
-import uuid
 import enum
+import uuid
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy import Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
 from app.db.base import Base
 
 
@@ -31,18 +34,35 @@ class Report(Base):
     __tablename__ = "reports"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False)
-    project_id = Column(UUID(as_uuid=True), ForeignKey("build_projects.id", ondelete="CASCADE"), nullable=False)
-    
+    tenant_id = Column(
+        UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False
+    )
+    project_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("build_projects.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
     type = Column(SQLEnum(ReportType), nullable=False)
     format = Column(SQLEnum(ReportFormat), nullable=False)
     status = Column(SQLEnum(ReportStatus), nullable=False, default=ReportStatus.PENDING)
-    
+    progress = Column(Integer, nullable=False, default=0)  # 0 to 100
+    options = Column(JSONB)  # include_photos, include_materials, include_schedule
+
+    storage_key = Column(String(500))  # Rendered output in storage
+    cache_key = Column(String(64))  # sha256 of type/format/options/project data version
     download_url = Column(String(1000))
     error_message = Column(Text)
-    
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
 
     # Relationships
     project = relationship("BuildProject", back_populates="reports")
@@ -52,6 +72,7 @@ class Report(Base):
         Index("ix_report_tenant", "tenant_id"),
         Index("ix_report_tenant_project", "tenant_id", "project_id"),
         Index("ix_report_status", "status"),
+        Index("uq_report_tenant_cache_key", "tenant_id", "cache_key", unique=True),
     )
 
     def __repr__(self):
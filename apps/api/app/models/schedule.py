@@ -1,9 +1,12 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Date, Numeric, Enum as SQLEnum, Index
+import enum
+import uuid
+
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Index, Numeric, String
+from sqlalchemy import Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-import uuid
-import enum
+from sqlalchemy.sql import func
+
 from app.db.base import Base
 
 
@@ -23,20 +26,32 @@ class ScheduleMilestone(Base):
     __tablename__ = "schedule_milestones"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    project_id = Column(UUID(as_uuid=True), ForeignKey("build_projects.id", ondelete="CASCADE"), nullable=False)
-    
+    project_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("build_projects.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
     phase = Column(SQLEnum(MilestonePhase), nullable=False)
     description = Column(String(500))
-    
+
     baseline_start_date = Column(Date, nullable=False)
     baseline_end_date = Column(Date, nullable=False)
     actual_start_date = Column(Date)
     actual_end_date = Column(Date)
-    
-    percent_complete = Column(Numeric(5, 2), nullable=False, default=0)  # 0.00 to 100.00
-    
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    # 0.00 to 100.00
+    percent_complete = Column(Numeric(5, 2), nullable=False, default=0)
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
     deleted_at = Column(DateTime(timezone=True), nullable=True)
 
     # Relationships
@@ -47,6 +62,15 @@ class ScheduleMilestone(Base):
         Index("ix_milestone_project", "project_id"),
         Index("ix_milestone_project_deleted", "project_id", "deleted_at"),
         Index("ix_milestone_phase", "phase"),
+        # One active milestone per phase; bulk imports upsert on this
+        Index(
+            "uq_milestone_project_phase",
+            "project_id",
+            "phase",
+            unique=True,
+            postgresql_where=deleted_at.is_(None),
+            sqlite_where=deleted_at.is_(None),
+        ),
     )
 
     def __repr__(self):
@@ -0,0 +1,66 @@
+import enum
+import uuid
+
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, String
+from sqlalchemy import Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class UploadStatus(str, enum.Enum):
+    OPEN = "OPEN"
+    COMPLETED = "COMPLETED"
+    ABORTED = "ABORTED"
+    # Assembled bytes didn't match the declared checksum; parts discarded
+    FAILED = "FAILED"
+
+
+class UploadSession(Base):
+    """A resumable upload: chunks are stored as parts and assembled on completion"""
+
+    __tablename__ = "upload_sessions"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(
+        UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False
+    )
+    project_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("build_projects.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    user_id = Column(UUID(as_uuid=True))
+
+    filename = Column(String(255), nullable=False)
+    total_size = Column(BigInteger, nullable=False)
+    # next expected offset
+    received_size = Column(BigInteger, nullable=False, default=0)
+    # expected digest of the whole file, if the client sent one
+    sha256 = Column(String(64))
+    # [{"offset", "size", "sha256", "key"}] in order
+    parts = Column(JSONB, nullable=False, default=list)
+    status = Column(SQLEnum(UploadStatus), nullable=False, default=UploadStatus.OPEN)
+
+    storage_key = Column(String(500))  # Assembled file, once completed
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    # Indexes
+    __table_args__ = (
+        Index("ix_upload_tenant", "tenant_id"),
+        Index("ix_upload_status_expires", "status", "expires_at"),
+    )
+
+    def __repr__(self):
+        return f"<UploadSession {self.filename} - {self.status}>"
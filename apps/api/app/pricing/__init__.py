@@ -0,0 +1 @@
+# Vendor price book package
@@ -0,0 +1,252 @@
+"""
+Vendor price book lookups
+Autocomplete matches SKU and description prefixes through b-tree indexes, and
+text inside descriptions through the trigram index once the query is long
+enough to form trigrams. Price resolution for takeoff rows looks SKUs up in
+batches of distinct values, so an import costs one query per batch of new
+SKUs rather than one per row.
+
+Prices are per unit of measure: a row is priced from an entry in its own
+unit, or else from one whose unit converts to it (a per-SQ price for an SF
+row). A SKU listed only in units that don't convert leaves the row unpriced
+and is reported, rather than applying a per-EA price to LF.
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import Query, Session
+
+from app.models.material import UnitOfMeasure
+from app.models.price_book import PriceBookItem
+from app.utils.calculations import (
+    CalculationError,
+    ConstructionCalculator,
+    UnitConverter,
+)
+
+# Shortest query that can use the trigram index; shorter ones only match prefixes
+TRIGRAM_MIN_LENGTH = 3
+
+# SKUs per IN list when resolving prices
+LOOKUP_BATCH_SIZE = 1000
+
+
+def normalize_sku(sku: str) -> str:
+    return sku.strip().upper()
+
+
+def normalize_unit(unit) -> str:
+    return unit.value if isinstance(unit, UnitOfMeasure) else str(unit).strip().upper()
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def current_items(
+    db: Session, tenant_id, on: Optional[date] = None, vendor: Optional[str] = None
+) -> Query:
+    """Price book entries of a tenant in effect on a date (today by default)"""
+    on = on or date.today()
+    query = db.query(PriceBookItem).filter(
+        PriceBookItem.tenant_id == tenant_id,
+        PriceBookItem.effective_from <= on,
+        or_(PriceBookItem.effective_to == None, PriceBookItem.effective_to > on),
+    )
+    if vendor:
+        query = query.filter(PriceBookItem.vendor == vendor)
+    return query
+
+
+def autocomplete(
+    db: Session,
+    tenant_id,
+    q: str,
+    limit: int = 10,
+    vendor: Optional[str] = None,
+    on: Optional[date] = None,
+) -> List[PriceBookItem]:
+    """
+    Current entries matching q, best matches first
+
+    SKU prefix matches rank above description prefix matches, which rank above
+    matches inside a description; then by SKU and vendor.
+    """
+    q = q.strip()
+    sku_match = PriceBookItem.sku.like(
+        _escape_like(normalize_sku(q)) + "%", escape="\\"
+    )
+    prefix_match = func.lower(PriceBookItem.description).like(
+        _escape_like(q.lower()) + "%", escape="\\"
+    )
+    matches = [sku_match, prefix_match]
+    if len(q) >= TRIGRAM_MIN_LENGTH:
+        matches.append(
+            PriceBookItem.description.ilike("%" + _escape_like(q) + "%", escape="\\")
+        )
+    return (
+        current_items(db, tenant_id, on, vendor)
+        .filter(or_(*matches))
+        .order_by(
+            case((sku_match, 0), (prefix_match, 1), else_=2),
+            PriceBookItem.sku,
+            PriceBookItem.vendor,
+        )
+        .limit(limit)
+        .all()
+    )
+
+
+def _mismatch_message(sku: str, unit: str, listed: List[str]) -> str:
+    return (
+        f"SKU {sku} is priced per {', '.join(listed)}, which doesn't convert to {unit}"
+    )
+
+
+class PriceBookResolver:
+    """
+    Resolves unit costs from a tenant's price book by SKU and unit
+
+    When several vendors list a SKU, the most recently effective price wins,
+    then the lowest; an entry in the row's own unit is preferred over one
+    that has to be converted. Pass vendor to use one vendor's prices only.
+    Entries are cached per SKU (including misses) for the life of the resolver.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        tenant_id,
+        vendor: Optional[str] = None,
+        on: Optional[date] = None,
+    ):
+        self.db = db
+        self.tenant_id = tenant_id
+        self.vendor = vendor
+        self.on = on or date.today()
+        # sku -> [(unit, price)], best first
+        self._entries: Dict[str, List[Tuple[str, Decimal]]] = {}
+
+    def _load(self, skus: Iterable[str]) -> None:
+        missing = sorted(set(skus) - self._entries.keys())
+        for start in range(0, len(missing), LOOKUP_BATCH_SIZE):
+            batch = missing[start : start + LOOKUP_BATCH_SIZE]
+            self._entries.update((sku, []) for sku in batch)
+            rows = (
+                current_items(self.db, self.tenant_id, self.on, self.vendor)
+                .with_entities(
+                    PriceBookItem.sku, PriceBookItem.unit, PriceBookItem.price
+                )
+                .filter(PriceBookItem.sku.in_(batch))
+                .order_by(
+                    PriceBookItem.sku,
+                    PriceBookItem.effective_from.desc(),
+                    PriceBookItem.price,
+                )
+            )
+            for sku, unit, price in rows:
+                self._entries[sku].append((normalize_unit(unit), price))
+
+    def _resolve(self, sku: str, unit: str) -> Optional[Decimal]:
+        entries = self._entries[sku]
+        for entry_unit, price in entries:
+            if entry_unit == unit:
+                return price
+        for entry_unit, price in entries:
+            try:
+                # Price per row unit = price per entry unit x entry units in one row unit
+                factor = UnitConverter.factor(unit, entry_unit)
+            except CalculationError:
+                continue
+            return ConstructionCalculator._round(price * factor, 2)
+        return None
+
+    def prices(
+        self, items: Iterable[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], Decimal]:
+        """
+        Unit costs of (normalized SKU, unit) pairs that can be priced
+
+        Pairs whose SKU isn't in the price book, or is listed only in units
+        that don't convert to theirs, are left out (see unit_mismatches).
+        """
+        items = {(sku, normalize_unit(unit)) for sku, unit in items}
+        self._load(sku for sku, _ in items)
+        prices = {item: self._resolve(*item) for item in items}
+        return {item: price for item, price in prices.items() if price is not None}
+
+    def price(self, sku: str, unit) -> Optional[Decimal]:
+        item = (normalize_sku(sku), normalize_unit(unit))
+        return self.prices([item]).get(item)
+
+    def mismatch_message(self, sku: str, unit) -> Optional[str]:
+        """Why a (sku, unit) pair can't be priced though the SKU is listed; None otherwise"""
+        sku, unit = normalize_sku(sku), normalize_unit(unit)
+        mismatches = self.unit_mismatches([(sku, unit)])
+        if not mismatches:
+            return None
+        return _mismatch_message(sku, unit, mismatches[(sku, unit)])
+
+    def listed_units(self, sku: str) -> List[str]:
+        """Units the price book lists a (normalized) SKU in, best entry first"""
+        self._load([sku])
+        return list(dict.fromkeys(unit for unit, _ in self._entries[sku]))
+
+    def unit_mismatches(
+        self, items: Iterable[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], List[str]]:
+        """(SKU, unit) pairs listed in the price book only in units that don't convert, with those units"""
+        items = {(sku, normalize_unit(unit)) for sku, unit in items}
+        priced = self.prices(items)
+        return {
+            item: self.listed_units(item[0])
+            for item in items
+            if item not in priced and self._entries[item[0]]
+        }
+
+    def fill_unit_costs(self, frame: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+        """
+        Set unit_cost from the price book on import rows with a known sku
+
+        Rows without a sku, or whose sku isn't in the price book, keep the
+        unit_cost they were given. Returns the frame and, per row, an error
+        message for skus listed only in units that don't convert to the
+        row's ("" for the others).
+        """
+        no_errors = pd.Series("", index=frame.index, dtype=object)
+        if "sku" not in frame:
+            return frame, no_errors
+        skus = frame["sku"].fillna("").astype(str).str.strip().str.upper()
+        units = (
+            frame["unit"].fillna("").astype(str).str.strip().str.upper()
+            if "unit" in frame
+            else pd.Series("", index=frame.index, dtype=object)
+        )
+        # One lookup per distinct (sku, unit), mapped back through a string key
+        keys = skus + "\x1f" + units
+        items = set(zip(skus[skus != ""], units[skus != ""], strict=True))
+        prices = self.prices(items)
+        mismatches = self.unit_mismatches(items)
+        errors = keys.map(
+            {
+                f"{sku}\x1f{unit}": _mismatch_message(sku, unit, listed)
+                for (sku, unit), listed in mismatches.items()
+            }
+        ).fillna("")
+        if not prices:
+            return frame, errors
+        resolved = keys.map(
+            {f"{sku}\x1f{unit}": str(price) for (sku, unit), price in prices.items()}
+        )
+        frame = frame.copy()
+        current = (
+            frame["unit_cost"]
+            if "unit_cost" in frame
+            else pd.Series("", index=frame.index, dtype=object)
+        )
+        frame["unit_cost"] = resolved.fillna(current)
+        return frame, errors
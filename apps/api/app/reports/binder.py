@@ -0,0 +1,319 @@
+"""
+O&M binder assembly
+A binder is one PDF: a cover with the project summary, a table of contents,
+the project's stored documents grouped by section, then the generated report
+tables. Everything goes through StreamingPdfWriter, so a binder of thousands
+of pages is written with memory bounded by the largest single page:
+
+- Source PDFs are copied page by page. Each page's objects (content streams,
+  fonts, images) are written as they are resolved, with their references
+  renumbered; objects shared between pages of a document are written once,
+  and the reader's object cache is emptied after every page.
+- JPEG photos become one page each, their bytes copied into the PDF as-is.
+- Table of contents pages are reserved up front (one row per entry, so their
+  count is known) and filled in at the end, once every page number is known.
+
+Files that cannot be merged (other formats, damaged or encrypted PDFs) are
+listed in the table of contents with the reason instead of failing the job.
+"""
+
+import io
+import logging
+import math
+from dataclasses import dataclass
+from itertools import groupby
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from PIL import Image
+from pypdf import PdfReader
+from pypdf.errors import PyPdfError
+from pypdf.generic import (
+    ArrayObject,
+    DictionaryObject,
+    IndirectObject,
+    PdfObject,
+    StreamObject,
+)
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from app.reports.datasets import Attachment, ReportDataset
+from app.reports.pdf import FONTS, PageCanvas, PdfTableLayout, StreamingPdfWriter
+from app.storage import StorageBackend, StorageError
+from app.uploads.sessions import open_seekable
+
+logger = logging.getLogger(__name__)
+
+# Called with (steps_done, steps_total): one step per attachment and per table
+ProgressCallback = Optional[Callable[[int, int], None]]
+
+TOC_ROWS_PER_PAGE = 32
+TOC_ROW_HEIGHT = 15
+PHOTO_MARGIN = 36
+
+# Page entries copied from source pages (after pypdf applies inherited values)
+_PAGE_KEYS = (
+    "/MediaBox",
+    "/CropBox",
+    "/Rotate",
+    "/Resources",
+    "/Contents",
+    "/Group",
+    "/UserUnit",
+)
+# Back-references to the page tree or to pages; following them would pull in the whole source document
+_SKIPPED_KEYS = {"/Parent", "/P"}
+
+_JPEG_COLOR_SPACES = {"L": "/DeviceGray", "RGB": "/DeviceRGB"}
+
+
+class _PageImporter:
+    """Copies the pages of one source PDF into a StreamingPdfWriter"""
+
+    def __init__(self, writer: StreamingPdfWriter, reader: PdfReader):
+        self.writer = writer
+        self.reader = reader
+        # Source (idnum, generation) -> object id in the binder
+        self._ids: Dict[Tuple[int, int], int] = {}
+        self._pending: List[IndirectObject] = []
+
+    def _translate(self, obj: PdfObject) -> PdfObject:
+        if isinstance(obj, IndirectObject):
+            key = (obj.idnum, obj.generation)
+            if key not in self._ids:
+                self._ids[key] = self.writer.reserve()
+                self._pending.append(obj)
+            return IndirectObject(self._ids[key], 0, None)
+        if isinstance(obj, StreamObject):
+            copy = StreamObject()
+            # Still encoded: copied without decompressing; write_to_stream sets /Length
+            copy._data = obj._data
+            copy.update(
+                {
+                    k: self._translate(v)
+                    for k, v in obj.items()
+                    if k != "/Length" and k not in _SKIPPED_KEYS
+                }
+            )
+            return copy
+        if isinstance(obj, DictionaryObject):
+            return DictionaryObject(
+                {
+                    k: self._translate(v)
+                    for k, v in obj.items()
+                    if k not in _SKIPPED_KEYS
+                }
+            )
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self._translate(v) for v in obj)
+        return obj
+
+    @staticmethod
+    def _serialize(obj: PdfObject) -> bytes:
+        buffer = io.BytesIO()
+        obj.write_to_stream(buffer)
+        return buffer.getvalue()
+
+    def import_page(self, page: DictionaryObject) -> int:
+        entries = []
+        for key in _PAGE_KEYS:
+            if key in page:
+                entries.append(
+                    key.encode()
+                    + b" "
+                    + self._serialize(self._translate(page.raw_get(key)))
+                )
+        if "/MediaBox" not in page:
+            entries.append(b"/MediaBox [0 0 %g %g]" % letter)
+        while self._pending:
+            ref = self._pending.pop()
+            self.writer.write_object(
+                self._ids[(ref.idnum, ref.generation)],
+                self._serialize(self._translate(ref.get_object())),
+            )
+        # Objects are written; drop the parsed copies before the next page
+        self.reader.resolved_objects.clear()
+        return self.writer.add_page_object(b" ".join(entries))
+
+
+def _append_pdf(writer: StreamingPdfWriter, fileobj: BinaryIO) -> None:
+    reader = PdfReader(fileobj)
+    if reader.is_encrypted:
+        raise PyPdfError("password protected")
+    importer = _PageImporter(writer, reader)
+    for page in reader.pages:
+        importer.import_page(page)
+
+
+def _append_jpeg(writer: StreamingPdfWriter, fileobj: BinaryIO, size: int) -> None:
+    with Image.open(fileobj) as image:
+        if image.format != "JPEG" or image.mode not in _JPEG_COLOR_SPACES:
+            raise ValueError(f"unsupported image ({image.format} {image.mode})")
+        width, height = image.size
+        color_space = _JPEG_COLOR_SPACES[image.mode]
+    fileobj.seek(0)
+    image_id = writer.add_raw_stream(
+        fileobj,
+        size,
+        f" /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace {color_space}"
+        f" /BitsPerComponent 8 /Filter /DCTDecode".encode(),
+    )
+    # Portrait or landscape letter, whichever suits the photo; scaled to fit
+    page_width, page_height = letter if height > width else letter[::-1]
+    scale = min(
+        (page_width - 2 * PHOTO_MARGIN) / width,
+        (page_height - 2 * PHOTO_MARGIN) / height,
+    )
+    w, h = width * scale, height * scale
+    x, y = (page_width - w) / 2, (page_height - h) / 2
+    content_id = writer.add_stream(
+        f"q {w:.2f} 0 0 {h:.2f} {x:.2f} {y:.2f} cm /Im0 Do Q".encode()
+    )
+    writer.add_page_object(
+        f"/MediaBox [0 0 {page_width:g} {page_height:g}] /Resources << /XObject << /Im0 {image_id} 0 R >> >> "
+        f"/Contents {content_id} 0 R".encode()
+    )
+
+
+def _append_attachment(
+    writer: StreamingPdfWriter, storage: StorageBackend, attachment: Attachment
+) -> None:
+    extension = (
+        attachment.filename.rsplit(".", 1)[-1].lower()
+        if "." in attachment.filename
+        else ""
+    )
+    if extension == "pdf":
+        with open_seekable(storage, attachment.storage_key) as fileobj:
+            _append_pdf(writer, fileobj)
+    elif extension in ("jpg", "jpeg"):
+        with open_seekable(storage, attachment.storage_key) as fileobj:
+            fileobj.seek(0, io.SEEK_END)
+            size = fileobj.tell()
+            fileobj.seek(0)
+            _append_jpeg(writer, fileobj, size)
+    else:
+        raise ValueError(
+            f"unsupported format (.{extension})" if extension else "unsupported format"
+        )
+
+
+@dataclass
+class _TocEntry:
+    title: str
+    level: int
+    page: Optional[int] = None
+    note: str = ""
+
+
+def _write_toc(
+    writer: StreamingPdfWriter, pages: List[int], entries: List[_TocEntry]
+) -> None:
+    width, height = writer.pagesize
+    margin = PdfTableLayout.MARGIN
+    size = 9
+    for n, page_number in enumerate(pages):
+        canvas = PageCanvas()
+        links = []
+        y = height - margin - 14
+        canvas.text(
+            margin,
+            y,
+            "Contents" if n == 0 else "Contents (continued)",
+            font="F2",
+            size=14,
+        )
+        y -= 12
+        for entry in entries[n * TOC_ROWS_PER_PAGE : (n + 1) * TOC_ROWS_PER_PAGE]:
+            y -= TOC_ROW_HEIGHT
+            font = "F2" if entry.level == 0 else "F1"
+            x = margin + 18 * entry.level
+            label = f"{entry.title}  ({entry.note})" if entry.note else entry.title
+            limit = width - margin - 60 - x
+            while label and stringWidth(label, FONTS[font], size) > limit:
+                label = label[:-2] + "…"
+            canvas.text(x, y, label, font=font, size=size)
+            if entry.page is not None:
+                number = str(entry.page + 1)
+                canvas.text(
+                    width - margin - stringWidth(number, FONTS[font], size),
+                    y,
+                    number,
+                    font=font,
+                    size=size,
+                )
+                links.append((x, y - 3, width - margin, y + size, entry.page))
+        canvas.text(width - margin - 40, margin / 2, f"Page {page_number + 1}", size=7)
+        writer.add_page(canvas.content(), page_number=page_number, links=links)
+
+
+def render_binder(
+    dataset: ReportDataset,
+    out: BinaryIO,
+    storage: StorageBackend,
+    progress: ProgressCallback = None,
+) -> None:
+    """Write a binder PDF of the dataset's summary, attachments and tables to out"""
+    writer = StreamingPdfWriter(out, title=dataset.title, version="1.7")
+    layout = PdfTableLayout(writer)
+    layout.heading(dataset.title)
+    layout.key_values(dataset.summary)
+    layout.finish()
+
+    # Every attachment gets a row, included or not, so the contents' length is known now
+    sections = [
+        (name, list(items))
+        for name, items in groupby(dataset.attachments, key=lambda a: a.section)
+    ]
+    entries: List[_TocEntry] = []
+    for name, items in sections:
+        entries.append(_TocEntry(name, 0))
+        entries.extend(_TocEntry(item.title, 1) for item in items)
+    entries.extend(_TocEntry(table.title, 0) for table in dataset.tables)
+    toc_pages = writer.reserve_pages(
+        max(1, math.ceil(len(entries) / TOC_ROWS_PER_PAGE))
+    )
+    writer.add_outline("Contents", toc_pages[0])
+
+    steps = len(dataset.attachments) + len(dataset.tables)
+    done = 0
+    rows = iter(entries)
+    for name, items in sections:
+        section_entry = next(rows)
+        section_outline = None
+        for item in items:
+            entry = next(rows)
+            first_page = writer.page_count
+            try:
+                _append_attachment(writer, storage, item)
+            except (PyPdfError, ValueError, KeyError, OSError, StorageError) as e:
+                logger.warning(
+                    f"Binder attachment {item.filename} not fully included: {e}"
+                )
+                entry.note = (
+                    f"incomplete: {e}"
+                    if writer.page_count > first_page
+                    else f"not included: {e}"
+                )
+            if writer.page_count > first_page:
+                entry.page = first_page
+                if section_outline is None:
+                    section_entry.page = first_page
+                    section_outline = writer.add_outline(name, first_page)
+                writer.add_outline(item.title, first_page, parent=section_outline)
+            done += 1
+            if progress:
+                progress(done, steps)
+
+    for table in dataset.tables:
+        entry = next(rows)
+        entry.page = writer.page_count
+        layout.table(table.title, table.headers, table.rows)
+        layout.finish()
+        writer.add_outline(table.title, entry.page)
+        done += 1
+        if progress:
+            progress(done, steps)
+
+    _write_toc(writer, toc_pages, entries)
+    writer.close()
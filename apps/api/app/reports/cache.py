@@ -0,0 +1,89 @@
+"""
+Report output cache
+Reports are keyed by a hash of what determines their content: project, type,
+format, options and the project's data version. Types whose content depends
+on the day (schedule status, variance) also get the as-of date in their
+options, which the dataset builders then compute for. A request whose key matches an
+existing report (pending, in progress or completed) gets that report back
+instead of a new job; the unique (tenant_id, cache_key) index makes concurrent
+identical requests coalesce onto a single row.
+"""
+
+import hashlib
+import json
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.metrics import record_cache_lookup
+from app.models.project import BuildProject
+from app.models.report import Report, ReportFormat, ReportStatus, ReportType
+
+# Report types computed as of a date (today, unless the options say otherwise)
+DATE_DEPENDENT_TYPES = {ReportType.PROGRESS, ReportType.OM_BINDER}
+
+
+def report_cache_key(
+    project: BuildProject,
+    report_type: ReportType,
+    report_format: ReportFormat,
+    options: Dict[str, Any],
+) -> str:
+    payload = {
+        "project_id": str(project.id),
+        "data_version": project.data_version,
+        "type": report_type.value,
+        "format": report_format.value,
+        "options": options,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _find(db: Session, tenant_id, cache_key: str) -> Report:
+    return (
+        db.query(Report)
+        .filter(Report.tenant_id == tenant_id, Report.cache_key == cache_key)
+        .first()
+    )
+
+
+def get_or_create_report(
+    db: Session,
+    tenant_id,
+    project: BuildProject,
+    report_type: ReportType,
+    report_format: ReportFormat,
+    options: Dict[str, Any],
+    as_of: Optional[date] = None,
+) -> Tuple[Report, bool]:
+    """Return (report, created); only a created report needs a generation job"""
+    if report_type in DATE_DEPENDENT_TYPES:
+        options = {**options, "as_of": (as_of or date.today()).isoformat()}
+    cache_key = report_cache_key(project, report_type, report_format, options)
+    existing = _find(db, tenant_id, cache_key)
+    record_cache_lookup("report_output", hit=existing is not None)
+    if existing:
+        return existing, False
+
+    report = Report(
+        tenant_id=tenant_id,
+        project_id=project.id,
+        type=report_type,
+        format=report_format,
+        status=ReportStatus.PENDING,
+        options=options,
+        cache_key=cache_key,
+    )
+    db.add(report)
+    try:
+        db.commit()
+    except IntegrityError:
+        # An identical request committed first; share its report
+        db.rollback()
+        existing = _find(db, tenant_id, cache_key)
+        if existing is None:
+            raise
+        return existing, False
+    return report, True
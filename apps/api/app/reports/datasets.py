@@ -0,0 +1,386 @@
+"""
+Report datasets
+Each report type is built as a summary block plus a list of tables whose rows
+are streamed from the database while the output is rendered. The O&M binder
+also lists the stored files to merge into its PDF.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.file import File, FileType
+from app.models.material import MaterialLineItem
+from app.models.project import BuildProject
+from app.models.report import Report, ReportType
+from app.models.schedule import ScheduleMilestone
+from app.utils.calculations import ConstructionCalculator
+
+# Rows fetched per round trip when streaming large tables
+ROW_CHUNK_SIZE = 1000
+
+
+@dataclass
+class ReportTable:
+    title: str
+    headers: List[str]
+    rows: Iterable[Sequence[Any]]
+
+
+@dataclass
+class Attachment:
+    """A stored file included in the output, under a section heading"""
+
+    title: str
+    section: str
+    storage_key: str
+    filename: str
+
+
+@dataclass
+class ReportDataset:
+    title: str
+    summary: List[Tuple[str, Any]] = field(default_factory=list)
+    tables: List[ReportTable] = field(default_factory=list)
+    attachments: List[Attachment] = field(default_factory=list)
+
+
+def _value(enum_value: Any) -> Any:
+    return enum_value.value if hasattr(enum_value, "value") else enum_value
+
+
+def _project_summary(project: BuildProject) -> List[Tuple[str, Any]]:
+    location = ", ".join(part for part in (project.city, project.state) if part)
+    return [
+        ("Project", project.title),
+        ("Address", project.address or ""),
+        ("Location", location),
+        ("Status", _value(project.status)),
+        ("Area (sqft)", project.home_area_sqft),
+        ("Budget", project.budget),
+    ]
+
+
+def _milestones(db: Session, project_id) -> Any:
+    return (
+        db.query(ScheduleMilestone)
+        .filter(
+            ScheduleMilestone.project_id == project_id,
+            ScheduleMilestone.deleted_at.is_(None),
+        )
+        .order_by(ScheduleMilestone.baseline_start_date)
+    )
+
+
+def _average_percent_complete(db: Session, project_id) -> Decimal:
+    average = (
+        db.query(func.avg(ScheduleMilestone.percent_complete))
+        .filter(
+            ScheduleMilestone.project_id == project_id,
+            ScheduleMilestone.deleted_at.is_(None),
+        )
+        .scalar()
+    )
+    return Decimal(str(average or 0)).quantize(Decimal("0.01"))
+
+
+def _category_totals(db: Session, project_id) -> List[Tuple[Any, int, Decimal]]:
+    return (
+        db.query(
+            MaterialLineItem.category,
+            func.count(MaterialLineItem.id),
+            func.coalesce(func.sum(MaterialLineItem.total_cost), 0),
+        )
+        .filter(
+            MaterialLineItem.project_id == project_id,
+            MaterialLineItem.deleted_at.is_(None),
+        )
+        .group_by(MaterialLineItem.category)
+        .order_by(MaterialLineItem.category)
+        .all()
+    )
+
+
+def _schedule_table(db: Session, project_id, today: date) -> ReportTable:
+    def rows():
+        for m in _milestones(db, project_id).yield_per(ROW_CHUNK_SIZE):
+            variance = ConstructionCalculator.schedule_variance_days(
+                m.baseline_end_date.isoformat(),
+                m.actual_end_date.isoformat() if m.actual_end_date else None,
+                today.isoformat(),
+            )
+            yield (
+                _value(m.phase),
+                m.description or "",
+                m.baseline_start_date,
+                m.baseline_end_date,
+                m.actual_start_date,
+                m.actual_end_date,
+                m.percent_complete,
+                variance,
+            )
+
+    return ReportTable(
+        title="Schedule",
+        headers=[
+            "Phase",
+            "Description",
+            "Baseline Start",
+            "Baseline End",
+            "Actual Start",
+            "Actual End",
+            "% Complete",
+            "Variance (days)",
+        ],
+        rows=rows(),
+    )
+
+
+def _category_table(
+    totals: List[Tuple[Any, int, Decimal]], budget: Optional[Decimal]
+) -> ReportTable:
+    def rows():
+        for category, count, total in totals:
+            share = (
+                (Decimal(total) / budget * 100).quantize(Decimal("0.01"))
+                if budget
+                else None
+            )
+            yield (_value(category), count, Decimal(total), share)
+
+    return ReportTable(
+        title="Cost by Category",
+        headers=["Category", "Line Items", "Total Cost", "% of Budget"],
+        rows=rows(),
+    )
+
+
+def _as_of(options: Dict[str, Any]) -> date:
+    """The date a date-dependent report is computed for (set when it was requested)"""
+    as_of = options.get("as_of")
+    return date.fromisoformat(as_of) if as_of else date.today()
+
+
+def build_progress(
+    db: Session, report: Report, project: BuildProject, options: Dict[str, Any]
+) -> ReportDataset:
+    today = _as_of(options)
+    percent = _average_percent_complete(db, project.id)
+    summary = _project_summary(project) + [
+        ("Baseline Start", project.baseline_start_date),
+        ("Baseline End", project.baseline_end_date),
+        ("Actual Start", project.actual_start_date),
+        ("Overall % Complete", percent),
+    ]
+    if project.budget is not None:
+        summary.append(
+            (
+                "Earned Value",
+                ConstructionCalculator.earned_value(project.budget, percent),
+            )
+        )
+    if project.baseline_end_date:
+        summary.append(
+            (
+                "Schedule Variance (days)",
+                ConstructionCalculator.schedule_variance_days(
+                    project.baseline_end_date.isoformat(),
+                    project.actual_end_date.isoformat()
+                    if project.actual_end_date
+                    else None,
+                    today.isoformat(),
+                ),
+            )
+        )
+
+    dataset = ReportDataset(title=f"Progress Report - {project.title}", summary=summary)
+    if options.get("include_schedule", True):
+        dataset.tables.append(_schedule_table(db, project.id, today))
+    return dataset
+
+
+def build_budget_vs_actual(
+    db: Session, report: Report, project: BuildProject, options: Dict[str, Any]
+) -> ReportDataset:
+    totals = _category_totals(db, project.id)
+    actual = sum((Decimal(total) for _, _, total in totals), Decimal("0"))
+    budget = project.budget
+    percent = _average_percent_complete(db, project.id)
+
+    summary = _project_summary(project) + [("Actual Cost", actual)]
+    if budget is not None:
+        earned = ConstructionCalculator.earned_value(budget, percent)
+        summary += [
+            ("Remaining Budget", budget - actual),
+            ("Earned Value", earned),
+            ("Cost Variance", ConstructionCalculator.cost_variance(earned, actual)),
+        ]
+    if project.home_area_sqft:
+        summary.append(
+            (
+                "Cost per sqft",
+                ConstructionCalculator.cost_per_sqft(actual, project.home_area_sqft),
+            )
+        )
+
+    dataset = ReportDataset(
+        title=f"Budget vs Actual - {project.title}", summary=summary
+    )
+    if options.get("include_materials", True):
+        dataset.tables.append(_category_table(totals, budget))
+    return dataset
+
+
+def build_takeoff_summary(
+    db: Session, report: Report, project: BuildProject, options: Dict[str, Any]
+) -> ReportDataset:
+    totals = _category_totals(db, project.id)
+    summary = _project_summary(project) + [
+        ("Line Items", sum(count for _, count, _ in totals)),
+        ("Total Cost", sum((Decimal(total) for _, _, total in totals), Decimal("0"))),
+    ]
+
+    def rows():
+        # Plain column tuples: no ORM identity map or instance state per row
+        query = (
+            db.query(
+                MaterialLineItem.category,
+                MaterialLineItem.description,
+                MaterialLineItem.quantity,
+                MaterialLineItem.unit,
+                MaterialLineItem.wastage_factor,
+                MaterialLineItem.total_qty,
+                MaterialLineItem.unit_cost,
+                MaterialLineItem.total_cost,
+            )
+            .filter(
+                MaterialLineItem.project_id == project.id,
+                MaterialLineItem.deleted_at.is_(None),
+            )
+            .order_by(MaterialLineItem.category, MaterialLineItem.description)
+        )
+        for (
+            category,
+            description,
+            quantity,
+            unit,
+            wastage,
+            total_qty,
+            unit_cost,
+            total_cost,
+        ) in query.yield_per(ROW_CHUNK_SIZE):
+            yield (
+                _value(category),
+                description,
+                quantity,
+                _value(unit),
+                wastage,
+                total_qty,
+                unit_cost,
+                total_cost,
+            )
+
+    dataset = ReportDataset(title=f"Takeoff Summary - {project.title}", summary=summary)
+    dataset.tables.append(_category_table(totals, project.budget))
+    dataset.tables.append(
+        ReportTable(
+            title="Takeoff",
+            headers=[
+                "Category",
+                "Description",
+                "Quantity",
+                "Unit",
+                "Wastage",
+                "Total Qty",
+                "Unit Cost",
+                "Total Cost",
+            ],
+            rows=rows(),
+        )
+    )
+    return dataset
+
+
+BINDER_SECTIONS = {
+    FileType.DOCUMENT: "Documents",
+    FileType.DRAWING: "Drawings",
+    FileType.PHOTO: "Photos",
+}
+
+
+def build_om_binder(
+    db: Session, report: Report, project: BuildProject, options: Dict[str, Any]
+) -> ReportDataset:
+    file_types = [FileType.DOCUMENT, FileType.DRAWING]
+    if options.get("include_photos"):
+        file_types.append(FileType.PHOTO)
+
+    def rows():
+        query = (
+            db.query(File)
+            .filter(
+                File.project_id == project.id,
+                File.tenant_id == report.tenant_id,
+                File.file_type.in_(file_types),
+            )
+            .order_by(File.file_type, File.filename)
+        )
+        for f in query.yield_per(ROW_CHUNK_SIZE):
+            yield (
+                f.filename,
+                _value(f.file_type),
+                f.mime_type or "",
+                f.size_bytes,
+                f.created_at,
+            )
+
+    dataset = ReportDataset(
+        title=f"O&M Binder - {project.title}", summary=_project_summary(project)
+    )
+    stored = (
+        db.query(File.filename, File.file_type, File.storage_key)
+        .filter(
+            File.project_id == project.id,
+            File.tenant_id == report.tenant_id,
+            File.file_type.in_(file_types),
+        )
+        .all()
+    )
+    # Sections in a fixed order regardless of how the database sorts the enum
+    stored.sort(key=lambda f: (file_types.index(f.file_type), f.filename.lower()))
+    dataset.attachments = [
+        Attachment(
+            title=f.filename,
+            section=BINDER_SECTIONS[f.file_type],
+            storage_key=f.storage_key,
+            filename=f.filename,
+        )
+        for f in stored
+    ]
+    dataset.tables.append(
+        ReportTable(
+            title="Documents",
+            headers=["Filename", "Type", "MIME Type", "Size (bytes)", "Uploaded"],
+            rows=rows(),
+        )
+    )
+    if options.get("include_schedule", True):
+        dataset.tables.append(_schedule_table(db, project.id, _as_of(options)))
+    return dataset
+
+
+BUILDERS: Dict[ReportType, Callable[..., ReportDataset]] = {
+    ReportType.PROGRESS: build_progress,
+    ReportType.BUDGET_VS_ACTUAL: build_budget_vs_actual,
+    ReportType.TAKEOFF_SUMMARY: build_takeoff_summary,
+    ReportType.OM_BINDER: build_om_binder,
+}
+
+
+def build_dataset(db: Session, report: Report, project: BuildProject) -> ReportDataset:
+    """Build the dataset for a report's type"""
+    return BUILDERS[report.type](db, report, project, report.options or {})
@@ -0,0 +1,129 @@
+"""
+Report generation engine
+Runs one report job end to end in its own database session: marks it
+PROCESSING, builds and renders the dataset, and writes the output to storage.
+PDF datasets with attachments (the O&M binder) are assembled by the binder.
+"""
+
+import logging
+import tempfile
+import uuid
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.tracing import get_tracer
+from app.db.base import SessionLocal
+from app.models.project import BuildProject
+from app.models.report import Report, ReportFormat, ReportStatus
+from app.reports.binder import render_binder
+from app.reports.datasets import build_dataset
+from app.reports.renderers import EXTENSIONS, RENDERERS
+from app.storage import StorageBackend, get_storage
+
+logger = logging.getLogger(__name__)
+tracer = get_tracer(__name__)
+
+# Rendered output is kept in memory up to this size, then spilled to disk
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+# Progress milestones (percent) around the rendering phase
+PROGRESS_STARTED = 5
+PROGRESS_RENDERED = 90
+
+
+def report_storage_key(report: Report) -> str:
+    return f"reports/{report.tenant_id}/{report.id}.{EXTENSIONS[report.format]}"
+
+
+def _set_progress(
+    session_factory: Callable[[], Session], report_id, percent: int
+) -> None:
+    # Separate short session: committing the job's session would close the
+    # server-side cursors that are streaming rows into the output
+    progress_db = session_factory()
+    try:
+        progress_db.query(Report).filter(Report.id == report_id).update(
+            {Report.progress: percent}
+        )
+        progress_db.commit()
+    finally:
+        progress_db.close()
+
+
+def run_report(
+    report_id: str,
+    session_factory: Optional[Callable[[], Session]] = None,
+    storage: Optional[StorageBackend] = None,
+) -> Optional[ReportStatus]:
+    """Generate a report, returning its final status (None if it no longer exists)"""
+    storage = storage or get_storage()
+    session_factory = session_factory or SessionLocal
+    db = session_factory()
+    try:
+        report = db.query(Report).filter(Report.id == uuid.UUID(str(report_id))).first()
+        if not report:
+            logger.warning(f"Report {report_id} not found, skipping generation")
+            return None
+        if report.status == ReportStatus.COMPLETED:
+            # Redelivered after the worker finished it
+            return report.status
+
+        with tracer.start_as_current_span(
+            "report.generate",
+            attributes={
+                "report.id": str(report_id),
+                "report.type": report.type.value,
+                "report.format": report.format.value,
+            },
+        ):
+            report.status = ReportStatus.PROCESSING
+            report.progress = PROGRESS_STARTED
+            report.error_message = None
+            db.commit()
+
+            try:
+                project = (
+                    db.query(BuildProject)
+                    .filter(
+                        BuildProject.id == report.project_id,
+                        BuildProject.tenant_id == report.tenant_id,
+                    )
+                    .one()
+                )
+                dataset = build_dataset(db, report, project)
+
+                def on_table(done: int, total: int) -> None:
+                    span = PROGRESS_RENDERED - PROGRESS_STARTED
+                    _set_progress(
+                        session_factory,
+                        report.id,
+                        PROGRESS_STARTED + span * done // total,
+                    )
+
+                key = report_storage_key(report)
+                with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as out:
+                    if report.format == ReportFormat.PDF and dataset.attachments:
+                        render_binder(dataset, out, storage, progress=on_table)
+                    else:
+                        RENDERERS[report.format](dataset, out, progress=on_table)
+                    out.seek(0)
+                    storage.save(key, out)
+            except Exception as e:
+                logger.exception(f"Report {report_id} generation failed")
+                db.rollback()
+                report.status = ReportStatus.FAILED
+                report.error_message = str(e)[:1000]
+                # Let the next identical request retry instead of reusing the failure
+                report.cache_key = None
+                db.commit()
+                return report.status
+
+            report.storage_key = key
+            report.download_url = f"/api/reports/{report.id}/download"
+            report.status = ReportStatus.COMPLETED
+            report.progress = 100
+            db.commit()
+            return report.status
+    finally:
+        db.close()
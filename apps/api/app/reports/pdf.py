@@ -0,0 +1,476 @@
+"""
+Streaming PDF output
+ReportLab's canvas and platypus keep every page in memory until the document
+is saved, so a 200k-row takeoff costs hundreds of MB per worker. The writer
+here emits each page's objects as soon as the page is finished and only keeps
+object offsets; text is measured with ReportLab's font metrics. Pages can
+also be reserved and written later (a table of contents whose page numbers
+are only known at the end) and the document can carry an outline.
+"""
+
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import chain, islice
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from app.storage.base import COPY_BUFFER_SIZE
+
+FONTS = {"F1": "Helvetica", "F2": "Helvetica-Bold"}
+
+
+def _escape(text: str) -> str:
+    """Escape a PDF literal string"""
+    return (
+        text.replace("\\", "\\\\")
+        .replace("(", "\\(")
+        .replace(")", "\\)")
+        .replace("\r", " ")
+        .replace("\n", " ")
+    )
+
+
+def _pdf_string(text: str) -> bytes:
+    return b"(" + _escape(text).encode("cp1252", errors="replace") + b")"
+
+
+def _pdf_text(text: str) -> bytes:
+    """A PDF text string (e.g. an outline title) holding any Unicode, as UTF-16 hex"""
+    return b"<FEFF" + text.encode("utf-16-be").hex().upper().encode() + b">"
+
+
+class PageCanvas:
+    """Collects drawing operators for one page"""
+
+    def __init__(self):
+        self._ops: List[str] = []
+
+    def text(
+        self, x: float, y: float, text: str, font: str = "F1", size: float = 8
+    ) -> None:
+        self._ops.append(
+            f"BT /{font} {size:g} Tf {x:.2f} {y:.2f} Td ({_escape(text)}) Tj ET"
+        )
+
+    def fill_rect(
+        self, x: float, y: float, w: float, h: float, gray: float = 0.85
+    ) -> None:
+        self._ops.append(f"q {gray:g} g {x:.2f} {y:.2f} {w:.2f} {h:.2f} re f Q")
+
+    def content(self) -> bytes:
+        return "\n".join(self._ops).encode("cp1252", errors="replace")
+
+
+class StreamingPdfWriter:
+    """
+    Minimal PDF 1.4 writer that flushes each page to the output as it is added.
+
+    Only object offsets, page ids and outline entries are held in memory. The
+    page tree, outline, catalog, info dictionary and cross-reference table are
+    written on close(). The output only needs write(); offsets are counted,
+    not read back.
+    """
+
+    def __init__(
+        self,
+        out: BinaryIO,
+        pagesize: Tuple[float, float] = landscape(letter),
+        title: Optional[str] = None,
+        compress: bool = True,
+        version: str = "1.4",
+    ):
+        self.out = out
+        self.pagesize = pagesize
+        self.title = title
+        self.compress = compress
+        self._offsets: Dict[int, int] = {}
+        self._next_id = 1
+        self._pos = 0
+        self._page_ids: List[int] = []
+        self._reserved: set = set()
+        # (title, page number, parent entry index or None)
+        self._outline: List[Tuple[str, int, Optional[int]]] = []
+        self._closed = False
+
+        self._write(f"%PDF-{version}\n".encode() + b"%\xe2\xe3\xcf\xd3\n")
+        self._catalog_id = self._reserve()
+        self._pages_id = self._reserve()
+        font_refs = []
+        for name, base_font in FONTS.items():
+            font_id = self.add_object(
+                f"<< /Type /Font /Subtype /Type1 /BaseFont /{base_font} /Encoding /WinAnsiEncoding >>".encode()
+            )
+            font_refs.append(f"/{name} {font_id} 0 R")
+        self._resources_id = self.add_object(
+            f"<< /Font << {' '.join(font_refs)} >> >>".encode()
+        )
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_ids)
+
+    def _write(self, data: bytes) -> None:
+        self.out.write(data)
+        self._pos += len(data)
+
+    def _reserve(self) -> int:
+        obj_id = self._next_id
+        self._next_id += 1
+        return obj_id
+
+    def write_object(self, obj_id: int, body: bytes) -> None:
+        self._offsets[obj_id] = self._pos
+        self._write(f"{obj_id} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    def add_object(self, body: bytes) -> int:
+        obj_id = self._reserve()
+        self.write_object(obj_id, body)
+        return obj_id
+
+    def add_stream(self, data: bytes, extra: bytes = b"") -> int:
+        if self.compress:
+            data = zlib.compress(data, 6)
+            extra += b" /Filter /FlateDecode"
+        header = f"<< /Length {len(data)}".encode() + extra + b" >>\nstream\n"
+        return self.add_object(header + data + b"\nendstream")
+
+    def add_raw_stream(self, source: BinaryIO, length: int, extra: bytes = b"") -> int:
+        """Copy length already-encoded bytes (e.g. a JPEG as /DCTDecode) into a stream object, in chunks"""
+        obj_id = self._reserve()
+        self._offsets[obj_id] = self._pos
+        self._write(
+            f"{obj_id} 0 obj\n<< /Length {length}".encode() + extra + b" >>\nstream\n"
+        )
+        remaining = length
+        while remaining:
+            chunk = source.read(min(remaining, COPY_BUFFER_SIZE))
+            if not chunk:
+                raise ValueError(f"stream ended {remaining} bytes short")
+            self._write(chunk)
+            remaining -= len(chunk)
+        self._write(b"\nendstream\nendobj\n")
+        return obj_id
+
+    def reserve(self) -> int:
+        """Allocate an object id to be written later with write_object()"""
+        return self._reserve()
+
+    def page_id(self, page_number: int) -> int:
+        return self._page_ids[page_number]
+
+    def reserve_pages(self, count: int) -> List[int]:
+        """Hold the next count page numbers for pages written later; returns the page numbers"""
+        start = len(self._page_ids)
+        for _ in range(count):
+            page_id = self._reserve()
+            self._page_ids.append(page_id)
+            self._reserved.add(page_id)
+        return list(range(start, start + count))
+
+    def add_page_object(
+        self, attributes: bytes, page_number: Optional[int] = None
+    ) -> int:
+        """
+        Write a page object with the given entries (MediaBox, Resources, Contents...)
+
+        Appends a page, or fills the reserved page_number. Returns the page number.
+        """
+        if page_number is None:
+            page_id = self._reserve()
+            self._page_ids.append(page_id)
+            page_number = len(self._page_ids) - 1
+        else:
+            page_id = self._page_ids[page_number]
+            self._reserved.remove(page_id)
+        self.write_object(
+            page_id,
+            f"<< /Type /Page /Parent {self._pages_id} 0 R ".encode()
+            + attributes
+            + b" >>",
+        )
+        return page_number
+
+    def add_page(
+        self,
+        content: bytes,
+        page_number: Optional[int] = None,
+        links: Sequence[Tuple] = (),
+    ) -> int:
+        """
+        Write one page's content stream and page object, returning the page number (from 0)
+
+        links are (x0, y0, x1, y1, target page number) areas that jump to another page.
+        """
+        content_id = self.add_stream(content)
+        width, height = self.pagesize
+        attributes = (
+            f"/MediaBox [0 0 {width:g} {height:g}] "
+            f"/Resources {self._resources_id} 0 R /Contents {content_id} 0 R"
+        )
+        if links:
+            annots = " ".join(
+                f"<< /Type /Annot /Subtype /Link /Rect [{x0:.2f} {y0:.2f} {x1:.2f} {y1:.2f}] /Border [0 0 0] "
+                f"/Dest [{self._page_ids[target]} 0 R /Fit] >>"
+                for x0, y0, x1, y1, target in links
+            )
+            attributes += f" /Annots [{annots}]"
+        return self.add_page_object(attributes.encode(), page_number)
+
+    def add_outline(
+        self, title: str, page_number: int, parent: Optional[int] = None
+    ) -> int:
+        """Add a bookmark to a page, under the bookmark index parent; returns its index"""
+        self._outline.append((title, page_number, parent))
+        return len(self._outline) - 1
+
+    def _write_outline(self) -> Optional[int]:
+        if not self._outline:
+            return None
+        root_id = self._reserve()
+        ids = [self._reserve() for _ in self._outline]
+        children: Dict[Optional[int], List[int]] = {}
+        for index, (_, _, parent) in enumerate(self._outline):
+            children.setdefault(parent, []).append(index)
+        prev: Dict[int, int] = {}
+        following: Dict[int, int] = {}
+        for siblings in children.values():
+            for a, b in zip(siblings, siblings[1:], strict=False):
+                following[a], prev[b] = b, a
+
+        def first_last(kids: List[int]) -> str:
+            return f" /First {ids[kids[0]]} 0 R /Last {ids[kids[-1]]} 0 R"
+
+        top = children[None]
+        self.write_object(
+            root_id,
+            f"<< /Type /Outlines{first_last(top)} /Count {len(top)} >>".encode(),
+        )
+        for index, (title, page_number, parent) in enumerate(self._outline):
+            body = f" /Parent {root_id if parent is None else ids[parent]} 0 R"
+            body += f" /Dest [{self._page_ids[page_number]} 0 R /Fit]"
+            if index in prev:
+                body += f" /Prev {ids[prev[index]]} 0 R"
+            if index in following:
+                body += f" /Next {ids[following[index]]} 0 R"
+            kids = children.get(index)
+            if kids:
+                # Closed, since a binder section can hold thousands of documents
+                body += first_last(kids) + f" /Count -{len(kids)}"
+            self.write_object(
+                ids[index], b"<< /Title " + _pdf_text(title) + body.encode() + b" >>"
+            )
+        return root_id
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        if self._reserved:
+            raise ValueError(f"{len(self._reserved)} reserved pages were never written")
+        self._closed = True
+        kids = " ".join(f"{page_id} 0 R" for page_id in self._page_ids)
+        self.write_object(
+            self._pages_id,
+            f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>".encode(),
+        )
+        catalog = f"<< /Type /Catalog /Pages {self._pages_id} 0 R"
+        outline_id = self._write_outline()
+        if outline_id:
+            catalog += f" /Outlines {outline_id} 0 R /PageMode /UseOutlines"
+        self.write_object(self._catalog_id, (catalog + " >>").encode())
+        info = b"<< /Producer (BuildPro)"
+        if self.title:
+            info += b" /Title " + _pdf_string(self.title)
+        info_id = self.add_object(info + b" >>")
+
+        xref_pos = self._pos
+        lines = [f"xref\n0 {self._next_id}\n", "0000000000 65535 f \n"]
+        # Ids reserved for objects that were never written (a source page that failed to copy) are free
+        lines += [
+            f"{self._offsets[obj_id]:010d} 00000 n \n"
+            if obj_id in self._offsets
+            else "0000000000 65535 f \n"
+            for obj_id in range(1, self._next_id)
+        ]
+        lines.append(
+            f"trailer\n<< /Size {self._next_id} /Root {self._catalog_id} 0 R /Info {info_id} 0 R >>\n"
+            f"startxref\n{xref_pos}\n%%EOF\n"
+        )
+        self._write("".join(lines).encode())
+
+
+def format_pdf_cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, Decimal):
+        return f"{value:,.2f}"
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+class PdfTableLayout:
+    """
+    Lays out a title, a summary block and row-streamed tables onto pages.
+
+    Column widths come from the headers and the first SAMPLE_ROWS rows of each
+    table; longer cells are truncated. Headers repeat on every page.
+    """
+
+    MARGIN = 36
+    FONT_SIZE = 8
+    ROW_HEIGHT = 12
+    CELL_PADDING = 4
+    MAX_COLUMN_WIDTH = 260
+    SAMPLE_ROWS = 200
+    # Widest Helvetica glyph, as a fraction of the font size
+    MAX_GLYPH_WIDTH = 1.015
+
+    def __init__(self, writer: StreamingPdfWriter):
+        self.writer = writer
+        self.width, self.height = writer.pagesize
+        self.canvas: Optional[PageCanvas] = None
+        self.y = 0.0
+
+    # Page handling
+
+    def _new_page(self) -> None:
+        if self.canvas is not None:
+            self._finish_page()
+        self.canvas = PageCanvas()
+        self.y = self.height - self.MARGIN
+
+    def _finish_page(self) -> None:
+        page_number = self.writer.page_count + 1
+        self.canvas.text(
+            self.width - self.MARGIN - 40,
+            self.MARGIN / 2,
+            f"Page {page_number}",
+            size=7,
+        )
+        self.writer.add_page(self.canvas.content())
+        self.canvas = None
+
+    def _ensure_space(self, height: float) -> bool:
+        """Start a new page if height doesn't fit; returns True when a page was started"""
+        if self.canvas is None or self.y - height < self.MARGIN:
+            self._new_page()
+            return True
+        return False
+
+    def finish(self) -> None:
+        if self.canvas is None:
+            self._new_page()
+        self._finish_page()
+
+    # Content
+
+    def heading(self, text: str, size: float = 14) -> None:
+        self._ensure_space(size * 2 + self.ROW_HEIGHT)
+        self.y -= size
+        self.canvas.text(self.MARGIN, self.y, text, font="F2", size=size)
+        self.y -= size * 0.6
+
+    def key_values(self, items: Sequence[Tuple[str, Any]]) -> None:
+        for label, value in items:
+            self._ensure_space(self.ROW_HEIGHT)
+            self.y -= self.ROW_HEIGHT
+            self.canvas.text(self.MARGIN, self.y, label, font="F2", size=self.FONT_SIZE)
+            self.canvas.text(
+                self.MARGIN + 140, self.y, format_pdf_cell(value), size=self.FONT_SIZE
+            )
+
+    def _column_widths(
+        self, headers: Sequence[str], sample: List[Sequence[str]]
+    ) -> List[float]:
+        widths = [
+            stringWidth(h, FONTS["F2"], self.FONT_SIZE) + 2 * self.CELL_PADDING
+            for h in headers
+        ]
+        for row in sample:
+            for i, text in enumerate(row):
+                w = (
+                    stringWidth(text, FONTS["F1"], self.FONT_SIZE)
+                    + 2 * self.CELL_PADDING
+                )
+                if w > widths[i]:
+                    widths[i] = min(w, self.MAX_COLUMN_WIDTH)
+        available = self.width - 2 * self.MARGIN
+        total = sum(widths)
+        if total > available:
+            widths = [w * available / total for w in widths]
+        return widths
+
+    def _fit(self, text: str, width: float, font: str) -> str:
+        """Truncate text with an ellipsis so it fits the column"""
+        font = FONTS[font]
+        limit = width - 2 * self.CELL_PADDING
+        # Cheap upper bound first; most cells fit without measuring
+        if len(text) * self.FONT_SIZE * self.MAX_GLYPH_WIDTH <= limit:
+            return text
+        if stringWidth(text, font, self.FONT_SIZE) <= limit:
+            return text
+        while text and stringWidth(text + "…", font, self.FONT_SIZE) > limit:
+            text = text[:-1]
+        return text + "…"
+
+    def _draw_row(
+        self,
+        cells: Sequence[str],
+        numeric: Sequence[bool],
+        widths: List[float],
+        header: bool,
+    ) -> None:
+        font = "F2" if header else "F1"
+        self.y -= self.ROW_HEIGHT
+        if header:
+            self.canvas.fill_rect(self.MARGIN, self.y - 3, sum(widths), self.ROW_HEIGHT)
+        x = self.MARGIN
+        for text, is_number, width in zip(cells, numeric, widths, strict=True):
+            text = self._fit(text, width, font)
+            if is_number and not header:
+                tx = (
+                    x
+                    + width
+                    - self.CELL_PADDING
+                    - stringWidth(text, FONTS[font], self.FONT_SIZE)
+                )
+            else:
+                tx = x + self.CELL_PADDING
+            self.canvas.text(tx, self.y, text, font=font, size=self.FONT_SIZE)
+            x += width
+
+    def table(
+        self,
+        title: str,
+        headers: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+    ) -> int:
+        """Stream rows into the document, returning the number of rows written"""
+        rows = iter(rows)
+        head = list(islice(rows, self.SAMPLE_ROWS))
+        sample = [[format_pdf_cell(v) for v in row] for row in head]
+        widths = self._column_widths(headers, sample)
+        numeric = [False] * len(headers)
+        if head:
+            numeric = [
+                isinstance(v, (int, float, Decimal)) and not isinstance(v, bool)
+                for v in head[0]
+            ]
+
+        self.heading(title, size=11)
+        self._ensure_space(self.ROW_HEIGHT * 2)
+        self._draw_row(headers, numeric, widths, header=True)
+
+        count = 0
+        for row in chain(head, rows):
+            if self._ensure_space(self.ROW_HEIGHT):
+                self._draw_row(headers, numeric, widths, header=True)
+            self._draw_row(
+                [format_pdf_cell(v) for v in row], numeric, widths, header=False
+            )
+            count += 1
+        self.y -= self.ROW_HEIGHT / 2
+        return count
@@ -0,0 +1,93 @@
+"""
+Report renderers
+Write a ReportDataset to a binary file object as CSV, XLSX or PDF.
+"""
+
+import csv
+import io
+from typing import BinaryIO, Callable, Dict, Optional
+
+from app.models.report import ReportFormat
+from app.reports.datasets import ReportDataset
+from app.reports.pdf import PdfTableLayout, StreamingPdfWriter
+from app.utils.xlsx import XLSX_CONTENT_TYPE, XlsxStreamWriter
+
+# Called with (tables_done, tables_total) after each table is written
+ProgressCallback = Optional[Callable[[int, int], None]]
+
+CONTENT_TYPES = {
+    ReportFormat.CSV: "text/csv",
+    ReportFormat.XLSX: XLSX_CONTENT_TYPE,
+    ReportFormat.PDF: "application/pdf",
+}
+
+EXTENSIONS = {
+    ReportFormat.CSV: "csv",
+    ReportFormat.XLSX: "xlsx",
+    ReportFormat.PDF: "pdf",
+}
+
+
+def _report_progress(progress: ProgressCallback, done: int, total: int) -> None:
+    if progress:
+        progress(done, total)
+
+
+def render_csv(
+    dataset: ReportDataset, out: BinaryIO, progress: ProgressCallback = None
+) -> None:
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    writer = csv.writer(text)
+    writer.writerow([dataset.title])
+    for label, value in dataset.summary:
+        writer.writerow([label, "" if value is None else value])
+
+    for done, table in enumerate(dataset.tables, start=1):
+        writer.writerow([])
+        writer.writerow([table.title])
+        writer.writerow(table.headers)
+        for row in table.rows:
+            writer.writerow(["" if v is None else v for v in row])
+        _report_progress(progress, done, len(dataset.tables))
+    # Leave the underlying file open for the caller
+    text.detach()
+
+
+def render_xlsx(
+    dataset: ReportDataset, out: BinaryIO, progress: ProgressCallback = None
+) -> None:
+    # Rows are streamed into the zip entry, so memory does not grow with the row count
+    workbook = XlsxStreamWriter(out)
+    summary = workbook.add_sheet("Summary", [dataset.title])
+    for label, value in dataset.summary:
+        summary.append([label, value])
+
+    for done, table in enumerate(dataset.tables, start=1):
+        sheet = workbook.add_sheet(table.title, table.headers)
+        for row in table.rows:
+            sheet.append(row)
+        _report_progress(progress, done, len(dataset.tables))
+    workbook.close()
+
+
+def render_pdf(
+    dataset: ReportDataset, out: BinaryIO, progress: ProgressCallback = None
+) -> None:
+    # Pages are flushed to out as they fill, so memory stays flat for any row count
+    writer = StreamingPdfWriter(out, title=dataset.title)
+    layout = PdfTableLayout(writer)
+    layout.heading(dataset.title)
+    layout.key_values(dataset.summary)
+
+    for done, table in enumerate(dataset.tables, start=1):
+        layout.table(table.title, table.headers, table.rows)
+        _report_progress(progress, done, len(dataset.tables))
+    layout.finish()
+    writer.close()
+
+
+RENDERERS: Dict[ReportFormat, Callable[..., None]] = {
+    ReportFormat.CSV: render_csv,
+    ReportFormat.XLSX: render_xlsx,
+    ReportFormat.PDF: render_pdf,
+}
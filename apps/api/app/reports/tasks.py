@@ -0,0 +1,9 @@
+from app.core.celery_app import celery_app
+from app.reports.engine import run_report
+
+
+@celery_app.task(name="reports.generate")
+def generate_report(report_id: str) -> str:
+    """Celery task: generate a report in the worker pool"""
+    status = run_report(report_id)
+    return status.value if status else "MISSING"
@@ -0,0 +1,84 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field, model_validator
+
+from app.models.assembly import AssemblyBasis
+from app.models.material import MaterialCategory, UnitOfMeasure
+
+
+class AssemblyComponentBase(BaseModel):
+    category: MaterialCategory
+    description: str = Field(..., min_length=1, max_length=500)
+    unit: UnitOfMeasure
+    basis: AssemblyBasis
+    factor: Decimal = Field(default=Decimal("1"), gt=0, le=Decimal("99999999.9999"))
+    spacing_in: Optional[Decimal] = Field(None, gt=0, le=Decimal("9999.99"))
+    wastage_factor: Decimal = Field(default=Decimal("0"), ge=0, le=1)
+    unit_cost: Decimal = Field(default=Decimal("0"), ge=0, le=Decimal("99999999.99"))
+    sku: Optional[str] = Field(None, min_length=1, max_length=100)
+
+
+class AssemblyComponentCreate(AssemblyComponentBase):
+    @model_validator(mode="after")
+    def check_spacing(self):
+        if (self.basis == AssemblyBasis.SPACING) != (self.spacing_in is not None):
+            raise ValueError(
+                "spacing_in is required for the SPACING basis, and only for it"
+            )
+        return self
+
+
+class AssemblyComponent(AssemblyComponentBase):
+    id: UUID
+    position: int
+
+    class Config:
+        from_attributes = True
+
+
+class AssemblyCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=200)
+    description: Optional[str] = None
+    components: List[AssemblyComponentCreate] = Field(..., min_length=1, max_length=50)
+
+
+class Assembly(BaseModel):
+    id: UUID
+    tenant_id: UUID
+    name: str
+    description: Optional[str] = None
+    components: List[AssemblyComponent]
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+# Expansion schemas
+class AssemblyInstance(BaseModel):
+    """One use of an assembly, e.g. 100 LF of wall at 9 ft"""
+
+    assembly_id: UUID
+    length_ft: Decimal = Field(..., gt=0)
+    height_ft: Optional[Decimal] = Field(None, gt=0)
+    width_ft: Optional[Decimal] = Field(None, gt=0)
+    notes: Optional[str] = None
+
+
+class AssemblyExpansionRequest(BaseModel):
+    instances: List[AssemblyInstance] = Field(..., min_length=1, max_length=5000)
+    dry_run: bool = False
+    resolve_prices: bool = False  # Price components with a sku from the price book
+
+
+class AssemblyExpansionResponse(BaseModel):
+    instance_count: int
+    expansion_count: int  # Distinct (assembly, dimensions) combinations expanded
+    line_item_count: int
+    total_cost: Decimal
+    errors: list[dict] = []
+    dry_run: bool = False
@@ -1,7 +1,10 @@
-from pydantic import BaseModel
-from typing import Optional
 from datetime import datetime
+from typing import List, Optional
 from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+from app.models.blob import PreviewStatus
 from app.models.file import FileType
 
 
@@ -13,10 +16,18 @@ class FileBase(BaseModel):
 
 class FileCreate(FileBase):
     project_id: UUID
-    storage_key: str
+    # Either the key the file was uploaded to, or the digest of content already stored
+    storage_key: Optional[str] = None
+    sha256: Optional[str] = Field(default=None, pattern=r"^[0-9a-fA-F]{64}$")
     size_bytes: Optional[int] = None
 
 
+class Thumbnail(BaseModel):
+    width: int
+    height: int
+    url: str
+
+
 class File(FileBase):
     id: UUID
     tenant_id: UUID
@@ -24,18 +35,39 @@ class File(FileBase):
     storage_key: str
     storage_url: Optional[str] = None
     size_bytes: Optional[int] = None
+    sha256: Optional[str] = None
+    # Photos: thumbnails smallest first, and a tiny data: URI to show while they load
+    preview_status: Optional[PreviewStatus] = None
+    thumbnails: List[Thumbnail] = []
+    placeholder: Optional[str] = None
     created_at: datetime
     updated_at: datetime
-    
+
     class Config:
         from_attributes = True
 
 
+class FileSearchResult(BaseModel):
+    file: File
+    rank: float
+    snippet: str  # HTML-escaped document text with matches in <mark>
+
+
 # Presigned URL responses
 class PresignedUploadUrlResponse(BaseModel):
     upload_url: str
     storage_key: str
     expires_in: int  # seconds
+    # content with the given sha256 is already stored: skip the upload
+    blob_exists: bool = False
+
+
+class StoredBlob(BaseModel):
+    """Result of a PUT to a signed blob URL"""
+
+    sha256: str
+    size_bytes: int
+    duplicate: bool  # identical content was already stored, so these bytes were discarded
 
 
 class PresignedDownloadUrlResponse(BaseModel):
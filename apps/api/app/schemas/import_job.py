@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from app.models.import_job import ImportFormat, ImportJobStatus
+
+
+class ImportJob(BaseModel):
+    id: UUID
+    project_id: UUID
+    format: ImportFormat
+    filename: str
+    upload_id: Optional[UUID] = None
+    dry_run: bool
+    resolve_prices: bool = False
+    status: ImportJobStatus
+    progress: int = 0
+    cancel_requested: bool = False
+    rows_total: Optional[int] = None
+    rows_processed: int = 0
+    rows_imported: int = 0
+    error_count: int = 0
+    errors: list[dict] = []
+    error_message: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
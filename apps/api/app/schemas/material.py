@@ -1,8 +1,10 @@
-from pydantic import BaseModel, Field
-from typing import Optional
 from datetime import datetime
 from decimal import Decimal
+from typing import List, Optional
 from uuid import UUID
+
+from pydantic import BaseModel, Field, model_validator
+
 from app.models.material import MaterialCategory, UnitOfMeasure
 
 
@@ -18,6 +20,8 @@ class MaterialLineItemBase(BaseModel):
 
 class MaterialLineItemCreate(MaterialLineItemBase):
     project_id: UUID
+    # Price book SKU; with ?resolve_prices=true, unit_cost is its current price
+    sku: Optional[str] = Field(None, min_length=1, max_length=100)
 
 
 class MaterialLineItemUpdate(BaseModel):
@@ -38,7 +42,7 @@ class MaterialLineItem(MaterialLineItemBase):
     created_at: datetime
     updated_at: datetime
     deleted_at: Optional[datetime] = None
-    
+
     class Config:
         from_attributes = True
 
@@ -52,6 +56,7 @@ class MaterialImportRow(BaseModel):
     wastage_factor: float = 0
     unit_cost: float = 0
     notes: Optional[str] = None
+    sku: Optional[str] = None
 
 
 class MaterialImportRequest(BaseModel):
@@ -64,6 +69,7 @@ class MaterialImportResponse(BaseModel):
     error_count: int
     errors: list[dict] = []
     created_ids: list[UUID] = []
+    dry_run: bool = False
 
 
 # Summary by category
@@ -76,3 +82,36 @@ class MaterialCategorySummary(BaseModel):
 class MaterialsSummary(BaseModel):
     total_cost: Decimal
     by_category: list[MaterialCategorySummary]
+
+
+# Bulk repricing
+class MaterialRepriceRequest(BaseModel):
+    # Filters (at least one); projects default to all of the tenant's projects
+    project_ids: Optional[List[UUID]] = Field(None, min_length=1)
+    categories: Optional[List[MaterialCategory]] = Field(None, min_length=1)
+    # case-insensitive, * = anything
+    description_pattern: Optional[str] = Field(None, min_length=1, max_length=500)
+    # Change (exactly one)
+    unit_cost: Optional[Decimal] = Field(None, ge=0)
+    percent_change: Optional[Decimal] = Field(None, ge=-100, le=10000)
+    dry_run: bool = False
+
+    @model_validator(mode="after")
+    def check_filters_and_change(self):
+        if not (self.project_ids or self.categories or self.description_pattern):
+            raise ValueError(
+                "Give at least one of project_ids, categories or description_pattern"
+            )
+        if (self.unit_cost is None) == (self.percent_change is None):
+            raise ValueError("Give exactly one of unit_cost or percent_change")
+        return self
+
+
+class MaterialRepriceResponse(BaseModel):
+    matched_count: int
+    updated_count: int
+    total_cost_before: Decimal
+    total_cost_after: Decimal
+    cost_delta: Decimal
+    project_ids: list[UUID] = []
+    dry_run: bool = False
@@ -0,0 +1,40 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field, model_validator
+
+from app.models.material import UnitOfMeasure
+
+
+class PriceBookItemBase(BaseModel):
+    vendor: str = Field(..., min_length=1, max_length=200)
+    sku: str = Field(..., min_length=1, max_length=100)
+    description: str = Field(..., min_length=1, max_length=500)
+    unit: UnitOfMeasure
+    price: Decimal = Field(..., ge=0, le=Decimal("99999999.99"))
+    effective_from: date
+    effective_to: Optional[date] = None  # Exclusive; open-ended when omitted
+
+
+class PriceBookItemCreate(PriceBookItemBase):
+    @model_validator(mode="after")
+    def check_dates(self):
+        if self.effective_to is not None and self.effective_to <= self.effective_from:
+            raise ValueError("effective_to must be after effective_from")
+        return self
+
+
+class PriceBookItem(PriceBookItemBase):
+    id: UUID
+    tenant_id: UUID
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class PriceBookImportResponse(BaseModel):
+    created_count: int
@@ -1,8 +1,10 @@
-from pydantic import BaseModel
-from typing import Optional
 from datetime import datetime
+from typing import Optional
 from uuid import UUID
-from app.models.report import ReportType, ReportStatus, ReportFormat
+
+from pydantic import BaseModel
+
+from app.models.report import ReportFormat, ReportStatus, ReportType
 
 
 class ReportBase(BaseModel):
@@ -19,11 +21,12 @@ class Report(ReportBase):
     tenant_id: UUID
     project_id: UUID
     status: ReportStatus
+    progress: int = 0
     download_url: Optional[str] = None
     error_message: Optional[str] = None
     created_at: datetime
     updated_at: datetime
-    
+
     class Config:
         from_attributes = True
 
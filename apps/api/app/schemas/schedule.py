@@ -1,8 +1,10 @@
-from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime, date
+from datetime import date, datetime
 from decimal import Decimal
+from typing import Optional
 from uuid import UUID
+
+from pydantic import BaseModel, Field
+
 from app.models.schedule import MilestonePhase
 
 
@@ -36,11 +38,19 @@ class ScheduleMilestone(ScheduleMilestoneBase):
     created_at: datetime
     updated_at: datetime
     deleted_at: Optional[datetime] = None
-    
+
     class Config:
         from_attributes = True
 
 
+class ScheduleImportResponse(BaseModel):
+    success_count: int
+    error_count: int
+    errors: list[str] = []
+    milestone_ids: list[UUID] = []
+    dry_run: bool = False
+
+
 # Schedule variance calculation
 class ScheduleVariance(BaseModel):
     milestone_id: UUID
@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+from app.models.upload import UploadStatus
+
+
+class UploadSessionCreate(BaseModel):
+    project_id: UUID
+    filename: str = Field(..., min_length=1, max_length=255)
+    total_size: int = Field(..., gt=0)
+    sha256: Optional[str] = Field(default=None, pattern=r"^[0-9a-fA-F]{64}$")
+
+
+class UploadSession(BaseModel):
+    id: UUID
+    project_id: UUID
+    filename: str
+    total_size: int
+    received_size: int  # offset the next chunk must start at
+    status: UploadStatus
+    chunk_size: int  # suggested chunk size
+    expires_at: datetime
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,28 @@
+# Storage package
+from functools import lru_cache
+
+from app.core.config import settings
+from app.storage.base import StorageBackend, StorageError
+from app.storage.local import LocalStorage
+
+
+@lru_cache
+def get_storage() -> StorageBackend:
+    """Return the configured storage backend (one instance per process)"""
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(settings.STORAGE_LOCAL_ROOT)
+    if settings.STORAGE_BACKEND == "s3":
+        # boto3 is only imported when the S3 backend is configured
+        from app.storage.s3 import S3Storage
+
+        return S3Storage(
+            bucket=settings.AWS_S3_BUCKET,
+            region=settings.AWS_S3_REGION,
+            endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+            access_key_id=settings.AWS_ACCESS_KEY_ID,
+            secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        )
+    raise StorageError(f"Unknown STORAGE_BACKEND '{settings.STORAGE_BACKEND}'")
+
+
+__all__ = ["StorageBackend", "StorageError", "LocalStorage", "get_storage"]
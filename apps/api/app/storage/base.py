@@ -0,0 +1,104 @@
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional
+
+# Chunk size for streamed copies and ranged reads
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Writes through open_write are spooled in memory up to this size by default
+WRITE_SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+
+class StorageError(Exception):
+    """Raised when a storage operation fails"""
+
+    pass
+
+
+class StorageBackend:
+    """Interface for blob storage backends. Keys are '/'-separated paths."""
+
+    def save(self, key: str, fileobj: BinaryIO) -> int:
+        """Stream fileobj into storage under key, return bytes written"""
+        raise NotImplementedError
+
+    def open(self, key: str) -> BinaryIO:
+        """Open a stored object for binary reading"""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def size(self, key: str) -> int:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    @contextmanager
+    def open_write(self, key: str) -> Iterator[BinaryIO]:
+        """
+        Writable file for key; the object appears once the block exits cleanly
+
+        For producers that push bytes (e.g. a request body) rather than
+        offering a readable file. The default spools and then calls save().
+        """
+        with tempfile.SpooledTemporaryFile(max_size=WRITE_SPOOL_MAX_MEMORY) as spool:
+            yield spool
+            spool.seek(0)
+            self.save(key, spool)
+
+    def iter_range(
+        self, key: str, start: int, length: int, chunk_size: int = COPY_BUFFER_SIZE
+    ) -> Iterator[bytes]:
+        """Yield length bytes of an object starting at offset start"""
+        with self.open(key) as fileobj:
+            if start:
+                if fileobj.seekable():
+                    fileobj.seek(start)
+                else:
+                    shutil.copyfileobj(_Limited(fileobj, start), _Discard(), chunk_size)
+            remaining = length
+            while remaining > 0:
+                chunk = fileobj.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of an object, if the backend keeps objects on local disk"""
+        return None
+
+    def presigned_url(
+        self, key: str, method: str = "GET", expires_in: int = 3600
+    ) -> Optional[str]:
+        """
+        URL the client can use directly for GET or PUT, if the backend issues them
+
+        Backends that return None are served through the API's own signed URLs
+        (see app.storage.signing).
+        """
+        return None
+
+
+class _Limited:
+    def __init__(self, fileobj: BinaryIO, limit: int):
+        self._fileobj = fileobj
+        self._remaining = limit
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b""
+        size = (
+            self._remaining if size is None or size < 0 else min(size, self._remaining)
+        )
+        data = self._fileobj.read(size)
+        self._remaining -= len(data)
+        return data
+
+
+class _Discard:
+    def write(self, data: bytes) -> int:
+        return len(data)
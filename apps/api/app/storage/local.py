@@ -0,0 +1,85 @@
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional
+
+from app.storage.base import COPY_BUFFER_SIZE, StorageBackend, StorageError
+
+
+class LocalStorage(StorageBackend):
+    """Stores objects as files under a root directory"""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def path(self, key: str) -> str:
+        """Resolve a key to a filesystem path, refusing keys that escape the root"""
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise StorageError(f"Invalid storage key '{key}'")
+        return path
+
+    @contextmanager
+    def open_write(self, key: str) -> Iterator[BinaryIO]:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp name and rename so readers never see partial files
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as out:
+                yield out
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def save(self, key: str, fileobj: BinaryIO) -> int:
+        with self.open_write(key) as out:
+            shutil.copyfileobj(fileobj, out, COPY_BUFFER_SIZE)
+            written = out.tell()
+        return written
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            return open(self.path(key), "rb")
+        except FileNotFoundError:
+            raise StorageError(f"Object '{key}' not found")
+
+    def iter_range(
+        self, key: str, start: int, length: int, chunk_size: int = COPY_BUFFER_SIZE
+    ) -> Iterator[bytes]:
+        try:
+            fd = os.open(self.path(key), os.O_RDONLY)
+        except FileNotFoundError:
+            raise StorageError(f"Object '{key}' not found")
+        try:
+            # pread leaves no shared file position, so ranges can be read concurrently
+            offset, end = start, start + length
+            while offset < end:
+                chunk = os.pread(fd, min(chunk_size, end - offset), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                yield chunk
+        finally:
+            os.close(fd)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def size(self, key: str) -> int:
+        try:
+            return os.path.getsize(self.path(key))
+        except FileNotFoundError:
+            raise StorageError(f"Object '{key}' not found")
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self.path(key)
@@ -0,0 +1,125 @@
+from typing import BinaryIO, Iterator, Optional
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from app.storage.base import COPY_BUFFER_SIZE, StorageBackend, StorageError
+
+# Uploads are sent as multipart in parts of this size, a few at a time, so
+# memory stays bounded however large the object is
+MULTIPART_CHUNK_SIZE = 16 * 1024 * 1024
+MULTIPART_CONCURRENCY = 4
+
+
+class _CountingReader:
+    """Wraps a readable to count the bytes boto3 pulls from it"""
+
+    def __init__(self, fileobj: BinaryIO):
+        self._fileobj = fileobj
+        self.count = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._fileobj.read(size)
+        self.count += len(data)
+        return data
+
+
+class S3Storage(StorageBackend):
+    """Stores objects in an S3 bucket (or an S3-compatible service such as MinIO)"""
+
+    def __init__(
+        self,
+        bucket: str,
+        region: str = "us-east-1",
+        endpoint_url: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        client=None,
+    ):
+        if not bucket:
+            raise StorageError("AWS_S3_BUCKET is required for the s3 storage backend")
+        self.bucket = bucket
+        self.client = client or boto3.client(
+            "s3",
+            region_name=region,
+            endpoint_url=endpoint_url,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            # Path-style addressing works for MinIO and for AWS alike
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+        )
+        self.transfer_config = TransferConfig(
+            multipart_chunksize=MULTIPART_CHUNK_SIZE,
+            multipart_threshold=MULTIPART_CHUNK_SIZE,
+            max_concurrency=MULTIPART_CONCURRENCY,
+        )
+
+    def save(self, key: str, fileobj: BinaryIO) -> int:
+        reader = _CountingReader(fileobj)
+        try:
+            self.client.upload_fileobj(
+                reader, self.bucket, key, Config=self.transfer_config
+            )
+        except ClientError as e:
+            raise StorageError(f"Could not store '{key}': {e}")
+        return reader.count
+
+    def _get(self, key: str, **params):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key, **params)["Body"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                raise StorageError(f"Object '{key}' not found")
+            raise StorageError(f"Could not read '{key}': {e}")
+
+    def open(self, key: str) -> BinaryIO:
+        # A streaming body: read sequentially, no seeking
+        return self._get(key)
+
+    def iter_range(
+        self, key: str, start: int, length: int, chunk_size: int = COPY_BUFFER_SIZE
+    ) -> Iterator[bytes]:
+        if length <= 0:
+            return
+        body = self._get(key, Range=f"bytes={start}-{start + length - 1}")
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def _head(self, key: str) -> Optional[dict]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in (
+                "NoSuchKey",
+                "404",
+                "NotFound",
+            ):
+                return None
+            raise StorageError(f"Could not stat '{key}': {e}")
+
+    def exists(self, key: str) -> bool:
+        return self._head(key) is not None
+
+    def size(self, key: str) -> int:
+        head = self._head(key)
+        if head is None:
+            raise StorageError(f"Object '{key}' not found")
+        return head["ContentLength"]
+
+    def delete(self, key: str) -> None:
+        try:
+            self.client.delete_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            raise StorageError(f"Could not delete '{key}': {e}")
+
+    def presigned_url(
+        self, key: str, method: str = "GET", expires_in: int = 3600
+    ) -> Optional[str]:
+        operation = {"GET": "get_object", "PUT": "put_object"}[method]
+        return self.client.generate_presigned_url(
+            operation, Params={"Bucket": self.bucket, "Key": key}, ExpiresIn=expires_in
+        )
@@ -0,0 +1,41 @@
+"""
+Signed storage URLs
+For backends that cannot issue their own presigned URLs (local disk), the API
+serves objects itself at /api/files/blob/{key}. Access is granted by an
+HMAC-SHA256 signature over the method, key and expiry, made with SECRET_KEY
+and verified without any database lookup.
+"""
+
+import hashlib
+import hmac
+import time
+from typing import Optional
+from urllib.parse import quote, urlencode
+
+from app.core.config import settings
+
+BLOB_PATH = "/api/files/blob/"
+
+
+def _signature(method: str, key: str, expires: int) -> str:
+    message = f"{method.upper()}\n{key}\n{expires}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def signed_url(
+    key: str, method: str = "GET", expires_in: int = 3600, now: Optional[float] = None
+) -> str:
+    """Relative URL granting method on key until expires_in seconds from now"""
+    expires = int((now or time.time()) + expires_in)
+    query = urlencode(
+        {"expires": expires, "signature": _signature(method, key, expires)}
+    )
+    return f"{BLOB_PATH}{quote(key)}?{query}"
+
+
+def verify_signature(
+    key: str, method: str, expires: int, signature: str, now: Optional[float] = None
+) -> bool:
+    if expires < (now or time.time()):
+        return False
+    return hmac.compare_digest(_signature(method, key, expires), signature)
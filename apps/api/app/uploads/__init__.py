@@ -0,0 +1 @@
+# Resumable uploads package
@@ -0,0 +1,205 @@
+"""
+Resumable upload sessions
+Each chunk is verified and stored as its own part; completing the session
+streams the parts, in order, into a single object and checks the whole-file
+digest on the way through. Imports then read that object like any upload.
+A completed object is kept for UPLOAD_SESSION_TTL_HOURS after completion, so
+it can be imported more than once (a dry run, then the real import), and is
+then purged unless an import job is still reading it.
+"""
+
+import hashlib
+import logging
+import re
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from typing import BinaryIO, Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.db.base import SessionLocal
+from app.models.import_job import FINAL_STATUSES, ImportJob
+from app.models.upload import UploadSession, UploadStatus
+from app.storage import StorageBackend, StorageError, get_storage
+
+logger = logging.getLogger(__name__)
+
+# Non-seekable objects are copied to a temp file for readers that need to seek
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+READ_BUFFER_SIZE = 1024 * 1024
+
+_UNSAFE_FILENAME = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+class UploadChecksumError(Exception):
+    """Raised when assembled bytes do not match the digest the client declared"""
+
+    pass
+
+
+def upload_prefix(session: UploadSession) -> str:
+    return f"uploads/{session.tenant_id}/{session.id}"
+
+
+def part_key(session: UploadSession, offset: int, sha256: str) -> str:
+    # The digest is part of the key so a conflicting chunk never overwrites an accepted one
+    return f"{upload_prefix(session)}/parts/{offset:015d}-{sha256[:16]}"
+
+
+def assembled_key(session: UploadSession) -> str:
+    filename = (
+        _UNSAFE_FILENAME.sub("_", session.filename.rsplit("/", 1)[-1]).strip("._")
+        or "upload"
+    )
+    return f"{upload_prefix(session)}/{filename}"
+
+
+def is_expired(session: UploadSession, now: Optional[datetime] = None) -> bool:
+    now = now or datetime.now(timezone.utc)
+    expires_at = session.expires_at
+    if expires_at.tzinfo is None:
+        # SQLite hands back naive datetimes
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at <= now
+
+
+class PartsReader:
+    """File-like reader over stored parts, hashing the bytes as they are read"""
+
+    def __init__(self, storage: StorageBackend, keys: List[str]):
+        self._storage = storage
+        self._keys = list(keys)
+        self._current: Optional[BinaryIO] = None
+        self._hash = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = READ_BUFFER_SIZE
+        while True:
+            if self._current is None:
+                if not self._keys:
+                    return b""
+                self._current = self._storage.open(self._keys.pop(0))
+            data = self._current.read(size)
+            if data:
+                self._hash.update(data)
+                return data
+            self._current.close()
+            self._current = None
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+    def close(self) -> None:
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+
+
+def assemble_upload(session: UploadSession, storage: StorageBackend) -> str:
+    """
+    Concatenate the session's parts into its final object and return the key
+
+    The parts are deleted once the assembled object is verified; on a digest
+    mismatch the assembled object is removed and the parts are kept.
+    """
+    key = assembled_key(session)
+    reader = PartsReader(storage, [part["key"] for part in session.parts])
+    try:
+        written = storage.save(key, reader)
+    finally:
+        reader.close()
+
+    if written != session.total_size or (
+        session.sha256 and reader.hexdigest() != session.sha256.lower()
+    ):
+        storage.delete(key)
+        raise UploadChecksumError(
+            f"Assembled file does not match the declared size and checksum ({written} bytes, sha256 {reader.hexdigest()})"
+        )
+
+    for part in session.parts:
+        storage.delete(part["key"])
+    return key
+
+
+def reading_job(db: Session, session: UploadSession):
+    """Id of an unfinished import job reading the session's upload, if any"""
+    return (
+        db.query(ImportJob.id)
+        .filter(
+            ImportJob.upload_id == session.id,
+            ImportJob.status.notin_(FINAL_STATUSES),
+        )
+        .scalar()
+    )
+
+
+def discard_upload(session: UploadSession, storage: StorageBackend) -> None:
+    """Delete everything stored for a session"""
+    for part in session.parts or []:
+        storage.delete(part["key"])
+    if session.storage_key:
+        storage.delete(session.storage_key)
+
+
+def open_seekable(storage: StorageBackend, key: str) -> BinaryIO:
+    """Open a stored object for reading, spooling it locally if the backend streams"""
+    fileobj = storage.open(key)
+    if getattr(fileobj, "seekable", lambda: False)():
+        return fileobj
+    # XLSX readers need random access into the zip
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    try:
+        shutil.copyfileobj(fileobj, spool, READ_BUFFER_SIZE)
+    finally:
+        fileobj.close()
+    spool.seek(0)
+    return spool
+
+
+def open_upload(session: UploadSession, storage: StorageBackend) -> BinaryIO:
+    """Open a completed upload for reading; the result is always seekable"""
+    return open_seekable(storage, session.storage_key)
+
+
+def purge_expired_uploads(
+    session_factory: Optional[Callable[[], Session]] = None,
+    storage: Optional[StorageBackend] = None,
+) -> int:
+    """
+    Abort sessions past their expiry and delete their data, returning the count
+
+    Open sessions lose their parts; completed ones lose their assembled
+    object, unless an import job is still reading it.
+    """
+    session_factory = session_factory or SessionLocal
+    storage = storage or get_storage()
+    db = session_factory()
+    purged = 0
+    try:
+        expired = (
+            db.query(UploadSession)
+            .filter(
+                UploadSession.status.in_((UploadStatus.OPEN, UploadStatus.COMPLETED)),
+                UploadSession.expires_at <= datetime.now(timezone.utc),
+            )
+            .all()
+        )
+        for session in expired:
+            if session.status == UploadStatus.COMPLETED and reading_job(db, session):
+                continue
+            try:
+                discard_upload(session, storage)
+            except StorageError as e:
+                logger.warning(f"Could not delete data of upload {session.id}: {e}")
+                continue
+            session.status = UploadStatus.ABORTED
+            session.parts = []
+            session.storage_key = None
+            purged += 1
+        db.commit()
+    finally:
+        db.close()
+    return purged
@@ -0,0 +1,8 @@
+from app.core.celery_app import celery_app
+from app.uploads.sessions import purge_expired_uploads
+
+
+@celery_app.task(name="uploads.purge_expired")
+def purge_expired() -> int:
+    """Celery task: abort expired upload sessions and free their parts"""
+    return purge_expired_uploads()
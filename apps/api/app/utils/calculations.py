@@ -2,32 +2,37 @@
 Calculation engine for construction project calculations.
 All calculations enforce validation rules and use proper rounding.
 """
-from decimal import Decimal, ROUND_HALF_UP
-from typing import Optional
+from collections import defaultdict, deque
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
 from app.models.material import UnitOfMeasure
 
 
 class CalculationError(Exception):
     """Raised when a calculation fails validation"""
+
     pass
 
 
 class ConstructionCalculator:
     """Core calculation engine for construction metrics"""
-    
+
     @staticmethod
     def _to_decimal(value: float | Decimal | int) -> Decimal:
         """Convert value to Decimal with proper precision"""
         if isinstance(value, Decimal):
             return value
         return Decimal(str(value))
-    
+
     @staticmethod
     def _round(value: Decimal, places: int = 2) -> Decimal:
         """Round to specified decimal places using HALF_UP"""
         quantizer = Decimal(10) ** -places
         return value.quantize(quantizer, rounding=ROUND_HALF_UP)
-    
+
     # Area Calculations
     @classmethod
     def floor_area(cls, length_ft: float, width_ft: float) -> Decimal:
@@ -37,13 +42,13 @@ class ConstructionCalculator:
         """
         if length_ft <= 0 or width_ft <= 0:
             raise CalculationError("Length and width must be positive")
-        
+
         length = cls._to_decimal(length_ft)
         width = cls._to_decimal(width_ft)
         area = length * width
-        
+
         return cls._round(area, 2)
-    
+
     # Volume Calculations
     @classmethod
     def volume(cls, length_ft: float, width_ft: float, height_ft: float) -> Decimal:
@@ -53,14 +58,14 @@ class ConstructionCalculator:
         """
         if length_ft <= 0 or width_ft <= 0 or height_ft <= 0:
             raise CalculationError("Dimensions must be positive")
-        
+
         length = cls._to_decimal(length_ft)
         width = cls._to_decimal(width_ft)
         height = cls._to_decimal(height_ft)
         volume = length * width * height
-        
+
         return cls._round(volume, 2)
-    
+
     # Material Takeoff Calculations
     @classmethod
     def takeoff_total_qty(
@@ -71,7 +76,7 @@ class ConstructionCalculator:
         """
         Calculate total quantity including wastage
         Formula: quantity * (1 + wastage_factor)
-        
+
         Args:
             quantity: Base quantity
             wastage_factor: Wastage as decimal (0.10 = 10%)
@@ -80,13 +85,13 @@ class ConstructionCalculator:
             raise CalculationError("Quantity cannot be negative")
         if wastage_factor < 0 or wastage_factor > 1:
             raise CalculationError("Wastage factor must be between 0 and 1")
-        
+
         qty = cls._to_decimal(quantity)
         wastage = cls._to_decimal(wastage_factor)
-        total_qty = qty * (Decimal('1') + wastage)
-        
+        total_qty = qty * (Decimal("1") + wastage)
+
         return cls._round(total_qty, 3)
-    
+
     @classmethod
     def total_cost(cls, total_qty: float, unit_cost: float) -> Decimal:
         """
@@ -95,13 +100,13 @@ class ConstructionCalculator:
         """
         if total_qty < 0 or unit_cost < 0:
             raise CalculationError("Quantity and cost cannot be negative")
-        
+
         qty = cls._to_decimal(total_qty)
         cost = cls._to_decimal(unit_cost)
         total = qty * cost
-        
+
         return cls._round(total, 2)
-    
+
     # Cost Metrics
     @classmethod
     def cost_per_sqft(cls, total_cost: float, area_sqft: float) -> Decimal:
@@ -113,20 +118,20 @@ class ConstructionCalculator:
             raise CalculationError("Area must be positive")
         if total_cost < 0:
             raise CalculationError("Cost cannot be negative")
-        
+
         cost = cls._to_decimal(total_cost)
         area = cls._to_decimal(area_sqft)
         cost_per_sqft = cost / area
-        
+
         return cls._round(cost_per_sqft, 2)
-    
+
     # Earned Value Management
     @classmethod
     def earned_value(cls, budget: float, percent_complete: float) -> Decimal:
         """
         Calculate simple earned value
         Formula: budget * (percent_complete / 100)
-        
+
         Args:
             budget: Total budget
             percent_complete: Completion percentage (0-100)
@@ -135,13 +140,13 @@ class ConstructionCalculator:
             raise CalculationError("Budget cannot be negative")
         if percent_complete < 0 or percent_complete > 100:
             raise CalculationError("Percent complete must be between 0 and 100")
-        
+
         budget_dec = cls._to_decimal(budget)
-        percent = cls._to_decimal(percent_complete) / Decimal('100')
+        percent = cls._to_decimal(percent_complete) / Decimal("100")
         ev = budget_dec * percent
-        
+
         return cls._round(ev, 2)
-    
+
     @classmethod
     def cost_variance(cls, earned_value: float, actual_cost: float) -> Decimal:
         """
@@ -152,9 +157,9 @@ class ConstructionCalculator:
         ev = cls._to_decimal(earned_value)
         ac = cls._to_decimal(actual_cost)
         cv = ev - ac
-        
+
         return cls._round(cv, 2)
-    
+
     @classmethod
     def schedule_variance_days(
         cls,
@@ -167,53 +172,217 @@ class ConstructionCalculator:
         If actual_end is None, use current_date
         Positive = ahead of schedule, Negative = behind schedule
         """
-        from datetime import datetime, date
-        
+        from datetime import date, datetime
+
         baseline = datetime.fromisoformat(baseline_end).date()
-        
+
         if actual_end:
             actual = datetime.fromisoformat(actual_end).date()
         elif current_date:
             actual = datetime.fromisoformat(current_date).date()
         else:
             actual = date.today()
-        
+
         variance = (baseline - actual).days
         return variance
 
 
 # Unit conversion helpers
+# Units the converter knows besides UnitOfMeasure (line items can't be stored in them)
+CY = "CY"  # Cubic Yard
+SY = "SY"  # Square Yard
+BF = "BF"  # Board Foot (144 cubic inches)
+
+# Nominal lumber, board feet per linear foot: thickness x width (in) / 12
+_LUMBER_BF_PER_LF = {
+    "2X4": Decimal(8),
+    "2X6": Decimal(12),
+    "2X8": Decimal(16),
+    "2X10": Decimal(20),
+    "2X12": Decimal(24),
+}
+
+# Bulk materials, pounds per cubic foot
+_DENSITY_LB_PER_CF = {
+    "CONCRETE": Decimal(150),
+    "ASPHALT": Decimal(145),
+    "GRAVEL": Decimal(105),
+    "SAND": Decimal(100),
+    "TOPSOIL": Decimal(75),
+}
+
+
+def _unit_key(unit) -> str:
+    return unit.value if isinstance(unit, UnitOfMeasure) else str(unit).upper()
+
+
+def _conversion_table(
+    edges: Dict[Tuple[str, str], Decimal]
+) -> Dict[Tuple[str, str], Decimal]:
+    """
+    Factors between every pair of connected units in a conversion graph
+    Each edge can be followed in reverse (by its reciprocal). A pair's factor
+    is the product along the shortest path, so edges must agree around cycles.
+    """
+    graph: Dict[str, Dict[str, Decimal]] = defaultdict(dict)
+    for (from_unit, to_unit), factor in edges.items():
+        graph[from_unit][to_unit] = factor
+        graph[to_unit].setdefault(from_unit, Decimal(1) / factor)
+
+    table = {}
+    for source in graph:
+        factors = {source: Decimal(1)}
+        queue = deque([source])
+        while queue:
+            unit = queue.popleft()
+            for neighbor, factor in graph[unit].items():
+                if neighbor not in factors:
+                    factors[neighbor] = factors[unit] * factor
+                    queue.append(neighbor)
+        table.update(
+            ((source, target), factor)
+            for target, factor in factors.items()
+            if target != source
+        )
+    return table
+
+
 class UnitConverter:
-    """Convert between different units of measure"""
-    
+    """
+    Convert between different units of measure
+
+    CONVERSIONS holds the conversions that hold for any material, and
+    MATERIAL_CONVERSIONS adds those that depend on one (board feet per LF of
+    a lumber size, pounds per CF of a bulk material). Conversions work in both
+    directions and chain, e.g. CY -> CF -> LB -> TON for concrete.
+    DIRECT_CONVERSIONS are rules of thumb that apply only as written, in one
+    direction and never as a step in a chain. Factors for every pair of units
+    are computed once, when the module loads.
+    """
+
     CONVERSIONS = {
-        # To Square Feet
-        (UnitOfMeasure.SQ, UnitOfMeasure.SF): Decimal('100'),  # 1 SQ = 100 SF
-        
+        # Area
+        (UnitOfMeasure.SQ, UnitOfMeasure.SF): Decimal("100"),  # 1 SQ = 100 SF
+        (SY, UnitOfMeasure.SF): Decimal("9"),
+        # Volume
+        (CY, UnitOfMeasure.CF): Decimal("27"),
+        (UnitOfMeasure.CF, BF): Decimal("12"),
+        (UnitOfMeasure.GAL, UnitOfMeasure.CF): Decimal("231")
+        / Decimal("1728"),  # US gallon = 231 cubic inches
+        # Weight
+        (UnitOfMeasure.TON, UnitOfMeasure.LB): Decimal("2000"),  # Short ton
+    }
+
+    DIRECT_CONVERSIONS = {
         # Linear to Area (assuming 1 ft width)
-        (UnitOfMeasure.LF, UnitOfMeasure.SF): Decimal('1'),
+        (UnitOfMeasure.LF, UnitOfMeasure.SF): Decimal("1"),
     }
-    
+
+    MATERIAL_CONVERSIONS = {
+        **{
+            size: {(UnitOfMeasure.LF, BF): bf_per_lf / Decimal("12")}
+            for size, bf_per_lf in _LUMBER_BF_PER_LF.items()
+        },
+        **{
+            material: {(UnitOfMeasure.CF, UnitOfMeasure.LB): density}
+            for material, density in _DENSITY_LB_PER_CF.items()
+        },
+    }
+
+    # Precomputed factors: material (None for any) -> (from, to) -> factor
+    _tables: Dict[Optional[str], Dict[Tuple[str, str], Decimal]] = {}
+
     @classmethod
-    def convert(
+    def build_tables(cls) -> None:
+        """Recompute the factor tables (after changing any of the conversions)"""
+        base = {
+            (_unit_key(a), _unit_key(b)): factor
+            for (a, b), factor in cls.CONVERSIONS.items()
+        }
+        tables = {None: _conversion_table(base)}
+        for material, edges in cls.MATERIAL_CONVERSIONS.items():
+            tables[material] = _conversion_table(
+                {
+                    **base,
+                    **{
+                        (_unit_key(a), _unit_key(b)): factor
+                        for (a, b), factor in edges.items()
+                    },
+                }
+            )
+        direct = {
+            (_unit_key(a), _unit_key(b)): factor
+            for (a, b), factor in cls.DIRECT_CONVERSIONS.items()
+        }
+        for table in tables.values():
+            for pair, factor in direct.items():
+                table.setdefault(pair, factor)
+        cls._tables = tables
+
+    @classmethod
+    def factor(
         cls,
-        value: float,
-        from_unit: UnitOfMeasure,
-        to_unit: UnitOfMeasure,
+        from_unit: UnitOfMeasure | str,
+        to_unit: UnitOfMeasure | str,
+        material: Optional[str] = None,
     ) -> Decimal:
-        """Convert value from one unit to another"""
-        if from_unit == to_unit:
-            return Decimal(str(value))
-        
-        conversion_key = (from_unit, to_unit)
-        if conversion_key not in cls.CONVERSIONS:
+        """Factor to multiply a quantity in from_unit by to get it in to_unit"""
+        from_key, to_key = _unit_key(from_unit), _unit_key(to_unit)
+        if from_key == to_key:
+            return Decimal("1")
+
+        material_key = material.upper() if material else None
+        if material_key not in cls._tables:
+            raise CalculationError(f"No conversions known for material {material}")
+        factor = cls._tables[material_key].get((from_key, to_key))
+        if factor is None:
             raise CalculationError(
                 f"No conversion available from {from_unit} to {to_unit}"
+                + (f" for {material}" if material else "")
             )
-        
+        return factor
+
+    @classmethod
+    def convert(
+        cls,
+        value: float,
+        from_unit: UnitOfMeasure | str,
+        to_unit: UnitOfMeasure | str,
+        material: Optional[str] = None,
+    ) -> Decimal:
+        """Convert value from one unit to another"""
         val = Decimal(str(value))
-        factor = cls.CONVERSIONS[conversion_key]
-        return val * factor
+        if _unit_key(from_unit) == _unit_key(to_unit):
+            return val
+        return val * cls.factor(from_unit, to_unit, material)
+
+    @classmethod
+    def convert_many(
+        cls,
+        values: pd.Series,
+        from_units: pd.Series | UnitOfMeasure | str,
+        to_unit: UnitOfMeasure | str,
+        material: Optional[str] = None,
+    ) -> pd.Series:
+        """
+        Convert a column of values to to_unit, e.g. to roll up mixed units
+        from_units is each row's unit, or one unit for all rows. Factors are
+        looked up once per distinct unit, then applied with one vectorized
+        multiply; Decimal (object) columns stay Decimal.
+        """
+        if not isinstance(from_units, pd.Series):
+            factor = cls.factor(from_units, to_unit, material)
+            return values * (factor if values.dtype == object else float(factor))
+
+        factors = from_units.map(
+            {unit: cls.factor(unit, to_unit, material) for unit in from_units.unique()}
+        )
+        if values.dtype != object:
+            factors = factors.astype(float)
+        return values * factors
+
+
+UnitConverter.build_tables()
 
 
 # Validation helpers
@@ -5,290 +5,749 @@ Provides parsing and export functionality for materials and schedule data
 
 import csv
 import io
-from typing import List, Dict, Any, Optional, Tuple
+import zipfile
+from datetime import date, datetime
 from decimal import Decimal
-from datetime import datetime
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Union,
+)
 
-from app.schemas.material import MaterialLineItemCreate, MaterialCategory, UnitOfMeasure
-from app.schemas.schedule import ScheduleMilestoneCreate, MilestonePhase
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+from opentelemetry import trace
+
+from app.core.tracing import get_tracer
+from app.pricing.price_book import PriceBookResolver
+from app.schemas.schedule import MilestonePhase, ScheduleMilestoneCreate
+from app.utils.import_validation import FrameValidation, validate_material_frame
+from app.utils.xlsx import (
+    DATE_FORMAT,
+    MONEY_FORMAT,
+    PERCENT_FORMAT,
+    QUANTITY_FORMAT,
+    XLSX_CONTENT_TYPE,  # noqa: F401  re-exported for the export endpoints
+    XlsxStreamWriter,
+)
+
+tracer = get_tracer(__name__)
 
 
 class ImportError(Exception):
     """Raised when import validation fails"""
+
     pass
 
 
+# Rows validated and handed to the writer per batch by streaming imports
+IMPORT_BATCH_ROWS = 1000
+
+# Cell errors kept by a real import; dry runs keep the full error matrix
+MAX_IMPORT_ERRORS = 100
+
+
+def _cell_text(value: Any) -> str:
+    """Render a worksheet cell the way the CSV importers see values"""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        if value.hour == value.minute == value.second == value.microsecond == 0:
+            return value.date().isoformat()
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _header_key(value: Any) -> str:
+    return _cell_text(value).strip().lower().replace(" ", "_")
+
+
 class MaterialCsvImporter:
-    """Import material line items from CSV"""
-    
+    """
+    Import material line items from CSV
+
+    Rows are validated column by column over the whole file
+    (see app.utils.import_validation); errors holds one entry per invalid
+    cell and error_count the number of invalid rows. A dry run keeps every
+    error and skips building records. With a price book resolver, rows with
+    a known sku get their unit_cost from the price book, and files with a
+    sku column may leave unit_cost out.
+    """
+
     REQUIRED_HEADERS = ["category", "description", "quantity", "unit", "unit_cost"]
-    OPTIONAL_HEADERS = ["wastage_factor", "vendor", "notes", "csi_code"]
-    
-    def __init__(self):
-        self.errors: List[str] = []
+    OPTIONAL_HEADERS = ["wastage_factor", "vendor", "notes", "csi_code", "sku"]
+
+    def __init__(
+        self,
+        dry_run: bool = False,
+        batch_size: int = IMPORT_BATCH_ROWS,
+        prices: Optional[PriceBookResolver] = None,
+    ):
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.prices = prices
+        self.max_errors = None if dry_run else MAX_IMPORT_ERRORS
+        self.errors: List[Dict[str, Any]] = []
         self.warnings: List[str] = []
-    
-    def parse_csv(self, csv_content: str, project_id: str) -> List[MaterialLineItemCreate]:
+        self.row_count = 0
+        self.error_count = 0
+
+    def _reset(self) -> None:
+        self.errors = []
+        self.warnings = []
+        self.row_count = 0
+        self.error_count = 0
+
+    def _missing_headers(self, headers: Iterable[str]) -> List[str]:
+        headers = set(headers)
+        required = self.REQUIRED_HEADERS
+        if self.prices is not None and "sku" in headers:
+            required = [h for h in required if h != "unit_cost"]
+        return [h for h in required if h not in headers]
+
+    def _validate_frame(
+        self, frame: pd.DataFrame, row_numbers: Optional[Iterable[int]] = None
+    ) -> FrameValidation:
+        price_errors = None
+        if self.prices is not None:
+            frame, price_errors = self.prices.fill_unit_costs(frame)
+        return validate_material_frame(
+            frame,
+            row_numbers,
+            build_records=not self.dry_run,
+            price_errors=price_errors,
+        )
+
+    def _collect(self, result: FrameValidation, **context: Any) -> None:
+        self.row_count += result.row_count
+        self.error_count += result.error_rows
+        errors = result.errors
+        if self.max_errors is not None:
+            errors = errors[: max(self.max_errors - len(self.errors), 0)]
+        if context:
+            errors = [{**context, **error} for error in errors]
+        self.errors.extend(errors)
+
+    @tracer.start_as_current_span("import.materials.parse_csv")
+    def validate_csv(
+        self, source: Union[str, TextIO, BinaryIO], encoding: str = "utf-8-sig"
+    ) -> List[Dict[str, Any]]:
         """
-        Parse CSV content into MaterialLineItemCreate objects
-        
+        Validate a whole CSV file in one pass
+
         Args:
-            csv_content: Raw CSV string
-            project_id: Project to import materials to
-            
+            source: Path or file object (text, or binary in the given encoding)
+
         Returns:
-            List of validated MaterialLineItemCreate objects
-            
+            Typed records for the valid rows; invalid rows are in errors
+
         Raises:
-            ImportError: If validation fails
+            ImportError: If the file cannot be read or lacks required headers
         """
-        self.errors = []
-        self.warnings = []
-        materials = []
-        
+        self._reset()
         try:
-            csv_file = io.StringIO(csv_content)
-            reader = csv.DictReader(csv_file)
-            
-            # Validate headers
-            if not reader.fieldnames:
-                raise ImportError("No headers found in CSV")
-            
-            missing_headers = set(self.REQUIRED_HEADERS) - set(reader.fieldnames)
-            if missing_headers:
-                raise ImportError(f"Missing required headers: {', '.join(missing_headers)}")
-            
-            # Parse rows
-            for row_num, row in enumerate(reader, start=2):  # Start at 2 (1 is header)
-                try:
-                    material = self._parse_row(row, project_id, row_num)
-                    materials.append(material)
-                except ValueError as e:
-                    self.errors.append(f"Row {row_num}: {str(e)}")
-        
-        except csv.Error as e:
+            frame = pd.read_csv(
+                source, dtype=str, keep_default_na=False, encoding=encoding
+            )
+        except pd.errors.EmptyDataError:
+            raise ImportError("No headers found in CSV")
+        except (pd.errors.ParserError, UnicodeDecodeError) as e:
             raise ImportError(f"CSV parsing error: {str(e)}")
-        
-        if self.errors:
-            raise ImportError(f"Validation failed with {len(self.errors)} errors:\n" + "\n".join(self.errors[:10]))
-        
-        return materials
-    
-    def _parse_row(self, row: Dict[str, str], project_id: str, row_num: int) -> MaterialLineItemCreate:
-        """Parse single CSV row into MaterialLineItemCreate"""
-        
-        # Validate category
-        category = row.get("category", "").strip().upper()
-        try:
-            MaterialCategory(category)
-        except ValueError:
-            raise ValueError(f"Invalid category '{category}'. Must be one of: {', '.join([c.value for c in MaterialCategory])}")
-        
-        # Validate unit
-        unit = row.get("unit", "").strip().upper()
+
+        frame.columns = [_header_key(column) for column in frame.columns]
+        missing_headers = self._missing_headers(frame.columns)
+        if missing_headers:
+            raise ImportError(f"Missing required headers: {', '.join(missing_headers)}")
+
+        result = self._validate_frame(frame)
+        self._collect(result)
+
+        span = trace.get_current_span()
+        span.set_attribute("import.rows", self.row_count)
+        span.set_attribute("import.errors", self.error_count)
+        return result.records
+
+    def iter_batches(
+        self, source: Union[str, TextIO, BinaryIO], encoding: str = "utf-8-sig"
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield typed records of valid rows, reading batch_size rows at a time
+
+        The streaming counterpart of validate_csv for files too large to hold
+        as one frame. One list is yielded per batch read, empty when every row
+        failed or on a dry run, so callers can report progress. Invalid rows
+        are recorded in errors; call raise_for_errors() once the batches are
+        consumed.
+
+        Raises:
+            ImportError: If the file cannot be read or lacks required headers
+        """
+        self._reset()
         try:
-            UnitOfMeasure(unit)
-        except ValueError:
-            raise ValueError(f"Invalid unit '{unit}'. Must be one of: {', '.join([u.value for u in UnitOfMeasure])}")
-        
-        # Parse numeric fields
+            reader = pd.read_csv(
+                source,
+                dtype=str,
+                keep_default_na=False,
+                encoding=encoding,
+                chunksize=self.batch_size,
+            )
+            with reader:
+                for frame in reader:
+                    frame.columns = [_header_key(column) for column in frame.columns]
+                    if self.row_count == 0:
+                        missing_headers = self._missing_headers(frame.columns)
+                        if missing_headers:
+                            raise ImportError(
+                                f"Missing required headers: {', '.join(missing_headers)}"
+                            )
+                    start = self.row_count + 2
+                    result = self._validate_frame(
+                        frame, range(start, start + len(frame))
+                    )
+                    self._collect(result)
+                    yield result.records
+        except pd.errors.EmptyDataError:
+            raise ImportError("No headers found in CSV")
+        except (pd.errors.ParserError, UnicodeDecodeError) as e:
+            raise ImportError(f"CSV parsing error: {str(e)}")
+
+    def parse_csv(self, csv_content: str) -> List[Dict[str, Any]]:
+        """
+        Parse CSV content into typed material records
+
+        Raises:
+            ImportError: If validation fails
+        """
+        records = self.validate_csv(io.StringIO(csv_content))
+        self.raise_for_errors()
+        return records
+
+    def raise_for_errors(self) -> None:
+        """Raise ImportError if any row failed validation"""
+        if self.error_count:
+            raise ImportError(
+                f"Validation failed with {self.error_count} invalid rows:\n"
+                + "\n".join(self.format_error(error) for error in self.errors[:10])
+            )
+
+    @staticmethod
+    def format_error(error: Dict[str, Any]) -> str:
+        where = (
+            f"{error['sheet']} row {error['row']}"
+            if "sheet" in error
+            else f"Row {error['row']}"
+        )
+        return f"{where}: {error['column']} '{error['value']}': {error['error']}"
+
+
+class MaterialXlsxImporter(MaterialCsvImporter):
+    """
+    Import material line items from an XLSX workbook
+
+    The workbook is opened in read-only mode, so rows are parsed lazily from
+    the sheet XML and memory stays bounded however large the sheet is.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = IMPORT_BATCH_ROWS,
+        dry_run: bool = False,
+        prices: Optional[PriceBookResolver] = None,
+    ):
+        super().__init__(dry_run, batch_size, prices)
+
+    def iter_batches(self, fileobj: BinaryIO) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield typed records of valid rows, validated batch_size rows at a time
+
+        Every sheet whose first row has the required headers is imported, so
+        an export-xlsx workbook round-trips (its Summary sheet is skipped).
+        Invalid rows are left out of the batches (which may be empty, as on a
+        dry run) and recorded in errors; call raise_for_errors() once the
+        batches are consumed.
+
+        Raises:
+            ImportError: If the file is not a workbook or no sheet has the required headers
+        """
+        self._reset()
         try:
-            quantity = Decimal(row["quantity"])
-            if quantity <= 0:
-                raise ValueError("Quantity must be positive")
-        except (ValueError, KeyError):
-            raise ValueError("Invalid quantity value")
-        
+            workbook = load_workbook(fileobj, read_only=True, data_only=True)
+        except (InvalidFileException, zipfile.BadZipFile, KeyError) as e:
+            raise ImportError(f"Invalid XLSX file: {str(e)}")
+
         try:
-            unit_cost = Decimal(row["unit_cost"])
-            if unit_cost < 0:
-                raise ValueError("Unit cost cannot be negative")
-        except (ValueError, KeyError):
-            raise ValueError("Invalid unit_cost value")
-        
-        # Parse optional wastage factor
-        wastage_factor = Decimal("0.0")
-        if row.get("wastage_factor"):
-            try:
-                wastage_factor = Decimal(row["wastage_factor"])
-                if not (0 <= wastage_factor <= 1):
-                    raise ValueError("Wastage factor must be between 0 and 1")
-            except ValueError:
-                self.warnings.append(f"Row {row_num}: Invalid wastage_factor, using 0")
-        
-        return MaterialLineItemCreate(
-            project_id=project_id,
-            category=category,
-            description=row["description"].strip(),
-            quantity=quantity,
-            unit=unit,
-            wastage_factor=wastage_factor,
-            unit_cost=unit_cost,
-            vendor=row.get("vendor", "").strip() or None,
-            notes=row.get("notes", "").strip() or None,
-            csi_code=row.get("csi_code", "").strip() or None,
-        )
+            imported_sheets = 0
+            for sheet in workbook.worksheets:
+                rows = sheet.iter_rows(values_only=True)
+                headers = self._sheet_headers(next(rows, ()))
+                if self._missing_headers(headers):
+                    continue
+                imported_sheets += 1
+
+                chunk: List[List[str]] = []
+                row_numbers: List[int] = []
+                for row_num, values in enumerate(rows, start=2):
+                    if all(value is None or value == "" for value in values):
+                        continue
+                    cells = [_cell_text(value) for value in values[: len(headers)]]
+                    chunk.append(cells + [""] * (len(headers) - len(cells)))
+                    row_numbers.append(row_num)
+                    if len(chunk) >= self.batch_size:
+                        yield from self._validate_chunk(
+                            sheet.title, headers, chunk, row_numbers
+                        )
+                        chunk, row_numbers = [], []
+                if chunk:
+                    yield from self._validate_chunk(
+                        sheet.title, headers, chunk, row_numbers
+                    )
+
+            if not imported_sheets:
+                raise ImportError(
+                    f"No sheet has the required headers: {', '.join(self.REQUIRED_HEADERS)}"
+                )
+        finally:
+            workbook.close()
+
+        span = trace.get_current_span()
+        span.set_attribute("import.rows", self.row_count)
+        span.set_attribute("import.errors", self.error_count)
+
+    @staticmethod
+    def _sheet_headers(values: Iterable[Any]) -> List[str]:
+        # Unnamed and repeated columns are ignored
+        headers, seen = [], set()
+        for value in values:
+            key = _header_key(value)
+            headers.append(key if key not in seen else "")
+            seen.add(key)
+        return headers
+
+    def _validate_chunk(
+        self,
+        sheet: str,
+        headers: List[str],
+        chunk: List[List[str]],
+        row_numbers: List[int],
+    ) -> Iterator[List[Dict[str, Any]]]:
+        frame = pd.DataFrame(chunk, columns=headers)
+        result = self._validate_frame(frame, row_numbers)
+        self._collect(result, sheet=sheet)
+        yield result.records
 
 
 class ScheduleCsvImporter:
     """Import schedule milestones from CSV"""
-    
-    REQUIRED_HEADERS = ["phase", "description", "baseline_start_date", "baseline_end_date"]
-    OPTIONAL_HEADERS = ["actual_start_date", "actual_end_date", "notes"]
-    
+
+    REQUIRED_HEADERS = [
+        "phase",
+        "description",
+        "baseline_start_date",
+        "baseline_end_date",
+    ]
+    OPTIONAL_HEADERS = [
+        "actual_start_date",
+        "actual_end_date",
+        "percent_complete",
+        "notes",
+    ]
+
     def __init__(self):
         self.errors: List[str] = []
         self.warnings: List[str] = []
-    
-    def parse_csv(self, csv_content: str, project_id: str) -> List[ScheduleMilestoneCreate]:
+        self.columns: List[str] = []
+        self.row_count = 0
+
+    def parse_csv(
+        self, csv_content: str, project_id: str
+    ) -> List[ScheduleMilestoneCreate]:
         """Parse CSV content into ScheduleMilestoneCreate objects"""
+        return self.parse_stream(io.StringIO(csv_content), project_id)
+
+    @tracer.start_as_current_span("import.schedule.parse_csv")
+    def parse_stream(
+        self, stream: TextIO, project_id: str
+    ) -> List[ScheduleMilestoneCreate]:
+        """
+        Parse a CSV text stream into ScheduleMilestoneCreate objects
+
+        The whole file is validated before anything is returned, including
+        that each phase appears at most once (phases key upserts).
+        columns lists the milestone fields the file provides.
+        """
         self.errors = []
         self.warnings = []
+        self.row_count = 0
         milestones = []
-        
+        phase_rows: Dict[MilestonePhase, int] = {}
+
         try:
-            csv_file = io.StringIO(csv_content)
-            reader = csv.DictReader(csv_file)
-            
+            reader = csv.DictReader(stream)
+
             if not reader.fieldnames:
                 raise ImportError("No headers found in CSV")
-            
+
             missing_headers = set(self.REQUIRED_HEADERS) - set(reader.fieldnames)
             if missing_headers:
-                raise ImportError(f"Missing required headers: {', '.join(missing_headers)}")
-            
+                raise ImportError(
+                    f"Missing required headers: {', '.join(missing_headers)}"
+                )
+            self.columns = [
+                h
+                for h in self.REQUIRED_HEADERS + self.OPTIONAL_HEADERS
+                if h in reader.fieldnames and h in ScheduleMilestoneCreate.model_fields
+            ]
+
             for row_num, row in enumerate(reader, start=2):
+                self.row_count += 1
                 try:
                     milestone = self._parse_row(row, project_id, row_num)
-                    milestones.append(milestone)
                 except ValueError as e:
                     self.errors.append(f"Row {row_num}: {str(e)}")
-        
+                    continue
+                if milestone.phase in phase_rows:
+                    self.errors.append(
+                        f"Row {row_num}: Duplicate phase {milestone.phase.value} (first on row {phase_rows[milestone.phase]})"
+                    )
+                    continue
+                phase_rows[milestone.phase] = row_num
+                milestones.append(milestone)
+
         except csv.Error as e:
             raise ImportError(f"CSV parsing error: {str(e)}")
-        
+        except UnicodeDecodeError:
+            raise ImportError("CSV must be UTF-8 encoded")
+
+        span = trace.get_current_span()
+        span.set_attribute("import.rows", self.row_count)
+        span.set_attribute("import.errors", len(self.errors))
+
         if self.errors:
-            raise ImportError(f"Validation failed with {len(self.errors)} errors:\n" + "\n".join(self.errors[:10]))
-        
+            raise ImportError(
+                f"Validation failed with {len(self.errors)} errors:\n"
+                + "\n".join(self.errors[:10])
+            )
+
         return milestones
-    
-    def _parse_row(self, row: Dict[str, str], project_id: str, row_num: int) -> ScheduleMilestoneCreate:
+
+    def _parse_row(
+        self, row: Dict[str, str], project_id: str, row_num: int
+    ) -> ScheduleMilestoneCreate:
         """Parse single CSV row into ScheduleMilestoneCreate"""
-        
+
         # Validate phase
-        phase = row.get("phase", "").strip().upper()
+        phase = (row.get("phase") or "").strip().upper()
         try:
             MilestonePhase(phase)
         except ValueError:
-            raise ValueError(f"Invalid phase '{phase}'. Must be one of: {', '.join([p.value for p in MilestonePhase])}")
-        
+            raise ValueError(
+                f"Invalid phase '{phase}'. Must be one of: {', '.join([p.value for p in MilestonePhase])}"
+            )
+
         # Parse dates
         try:
-            baseline_start = datetime.fromisoformat(row["baseline_start_date"])
-            baseline_end = datetime.fromisoformat(row["baseline_end_date"])
-            
-            if baseline_end <= baseline_start:
-                raise ValueError("End date must be after start date")
-        except (ValueError, KeyError) as e:
-            raise ValueError(f"Invalid date format. Use ISO format (YYYY-MM-DD): {str(e)}")
-        
+            baseline_start = date.fromisoformat(row["baseline_start_date"].strip())
+            baseline_end = date.fromisoformat(row["baseline_end_date"].strip())
+        except (ValueError, KeyError, AttributeError) as e:
+            raise ValueError(
+                f"Invalid date format. Use ISO format (YYYY-MM-DD): {str(e)}"
+            )
+        if baseline_end <= baseline_start:
+            raise ValueError("End date must be after start date")
+
         # Parse optional actual dates
         actual_start = None
         actual_end = None
         if row.get("actual_start_date"):
             try:
-                actual_start = datetime.fromisoformat(row["actual_start_date"])
+                actual_start = date.fromisoformat(row["actual_start_date"].strip())
             except ValueError:
-                self.warnings.append(f"Row {row_num}: Invalid actual_start_date, ignoring")
-        
+                self.warnings.append(
+                    f"Row {row_num}: Invalid actual_start_date, ignoring"
+                )
+
         if row.get("actual_end_date"):
             try:
-                actual_end = datetime.fromisoformat(row["actual_end_date"])
+                actual_end = date.fromisoformat(row["actual_end_date"].strip())
             except ValueError:
-                self.warnings.append(f"Row {row_num}: Invalid actual_end_date, ignoring")
-        
+                self.warnings.append(
+                    f"Row {row_num}: Invalid actual_end_date, ignoring"
+                )
+
+        if actual_start and actual_end and actual_end < actual_start:
+            raise ValueError("Actual end date cannot be before actual start date")
+
+        percent_complete = Decimal("0")
+        if row.get("percent_complete"):
+            try:
+                percent_complete = Decimal(row["percent_complete"].strip().rstrip("%"))
+            except ArithmeticError:
+                raise ValueError("Invalid percent_complete value")
+            if not (0 <= percent_complete <= 100):
+                raise ValueError("percent_complete must be between 0 and 100")
+
         return ScheduleMilestoneCreate(
             project_id=project_id,
             phase=phase,
-            description=row["description"].strip(),
+            description=(row.get("description") or "").strip() or None,
             baseline_start_date=baseline_start,
             baseline_end_date=baseline_end,
             actual_start_date=actual_start,
             actual_end_date=actual_end,
-            notes=row.get("notes", "").strip() or None,
+            percent_complete=percent_complete,
         )
 
 
+MATERIAL_EXPORT_HEADERS = [
+    "id",
+    "category",
+    "description",
+    "quantity",
+    "unit",
+    "wastage_factor",
+    "total_qty",
+    "unit_cost",
+    "total_cost",
+    "vendor",
+    "csi_code",
+    "notes",
+]
+
+SCHEDULE_EXPORT_HEADERS = [
+    "id",
+    "phase",
+    "description",
+    "baseline_start_date",
+    "baseline_end_date",
+    "actual_start_date",
+    "actual_end_date",
+    "percent_complete",
+    "notes",
+]
+
+# Rows buffered per chunk when streaming CSV
+CSV_CHUNK_ROWS = 1000
+
+
+def iter_materials_csv(materials: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Yield CSV text in chunks of CSV_CHUNK_ROWS rows (nothing for no materials)"""
+    output = io.StringIO()
+    writer = csv.DictWriter(
+        output, fieldnames=MATERIAL_EXPORT_HEADERS, extrasaction="ignore"
+    )
+    count = 0
+
+    for material in materials:
+        if count == 0:
+            writer.writeheader()
+        # Convert Decimal to string for CSV
+        row = {**material}
+        for key in [
+            "quantity",
+            "wastage_factor",
+            "total_qty",
+            "unit_cost",
+            "total_cost",
+        ]:
+            if key in row and row[key] is not None:
+                row[key] = str(row[key])
+        writer.writerow(row)
+        count += 1
+        if count % CSV_CHUNK_ROWS == 0:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+
+    if output.tell():
+        yield output.getvalue()
+    trace.get_current_span().set_attribute("export.rows", count)
+
+
+@tracer.start_as_current_span("export.materials.csv")
 def export_materials_to_csv(materials: List[Dict[str, Any]]) -> str:
     """
     Export materials to CSV string
-    
+
     Args:
         materials: List of material dicts (from MaterialSchema.dict())
-        
+
     Returns:
         CSV string
     """
-    if not materials:
-        return ""
-    
-    output = io.StringIO()
-    headers = [
-        "id",
-        "category",
-        "description",
-        "quantity",
-        "unit",
-        "wastage_factor",
-        "total_qty",
-        "unit_cost",
-        "total_cost",
-        "vendor",
-        "csi_code",
-        "notes",
-    ]
-    
-    writer = csv.DictWriter(output, fieldnames=headers, extrasaction="ignore")
-    writer.writeheader()
-    
-    for material in materials:
-        # Convert Decimal to string for CSV
-        row = {**material}
-        for key in ["quantity", "wastage_factor", "total_qty", "unit_cost", "total_cost"]:
-            if key in row and row[key] is not None:
-                row[key] = str(row[key])
-        writer.writerow(row)
-    
-    return output.getvalue()
+    return "".join(iter_materials_csv(materials))
 
 
-def export_schedule_to_csv(milestones: List[Dict[str, Any]]) -> str:
-    """Export schedule milestones to CSV string"""
-    if not milestones:
-        return ""
-    
+@tracer.start_as_current_span("export.materials.csv")
+def write_materials_csv(materials: Iterable[Dict[str, Any]], out: BinaryIO) -> int:
+    """Stream materials as UTF-8 CSV into a binary file, returning the row count"""
+    count = 0
+
+    def counted():
+        nonlocal count
+        for material in materials:
+            count += 1
+            yield material
+
+    for chunk in iter_materials_csv(counted()):
+        out.write(chunk.encode("utf-8"))
+    return count
+
+
+def iter_schedule_csv(milestones: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Yield CSV text in chunks of CSV_CHUNK_ROWS rows (nothing for no milestones)"""
     output = io.StringIO()
-    headers = [
-        "id",
-        "phase",
-        "description",
-        "baseline_start_date",
-        "baseline_end_date",
-        "actual_start_date",
-        "actual_end_date",
-        "notes",
-    ]
-    
-    writer = csv.DictWriter(output, fieldnames=headers, extrasaction="ignore")
-    writer.writeheader()
-    
+    writer = csv.DictWriter(
+        output, fieldnames=SCHEDULE_EXPORT_HEADERS, extrasaction="ignore"
+    )
+    count = 0
+
     for milestone in milestones:
+        if count == 0:
+            writer.writeheader()
         # Convert datetime to ISO format
         row = {**milestone}
-        for key in ["baseline_start_date", "baseline_end_date", "actual_start_date", "actual_end_date"]:
+        for key in [
+            "baseline_start_date",
+            "baseline_end_date",
+            "actual_start_date",
+            "actual_end_date",
+        ]:
             if key in row and row[key] is not None:
                 if isinstance(row[key], datetime):
                     row[key] = row[key].date().isoformat()
         writer.writerow(row)
-    
-    return output.getvalue()
+        count += 1
+        if count % CSV_CHUNK_ROWS == 0:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+
+    if output.tell():
+        yield output.getvalue()
+    trace.get_current_span().set_attribute("export.rows", count)
+
+
+@tracer.start_as_current_span("export.schedule.csv")
+def export_schedule_to_csv(milestones: List[Dict[str, Any]]) -> str:
+    """Export schedule milestones to CSV string"""
+    return "".join(iter_schedule_csv(milestones))
+
+
+@tracer.start_as_current_span("export.schedule.csv")
+def write_schedule_csv(milestones: Iterable[Dict[str, Any]], out: BinaryIO) -> int:
+    """Stream milestones as UTF-8 CSV into a binary file, returning the row count"""
+    count = 0
+
+    def counted():
+        nonlocal count
+        for milestone in milestones:
+            count += 1
+            yield milestone
+
+    for chunk in iter_schedule_csv(counted()):
+        out.write(chunk.encode("utf-8"))
+    return count
+
+
+# XLSX export
+
+MATERIAL_NUMBER_FORMATS = {
+    "quantity": QUANTITY_FORMAT,
+    "wastage_factor": PERCENT_FORMAT,
+    "total_qty": QUANTITY_FORMAT,
+    "unit_cost": MONEY_FORMAT,
+    "total_cost": MONEY_FORMAT,
+}
+
+SCHEDULE_NUMBER_FORMATS = {
+    "baseline_start_date": DATE_FORMAT,
+    "baseline_end_date": DATE_FORMAT,
+    "actual_start_date": DATE_FORMAT,
+    "actual_end_date": DATE_FORMAT,
+}
+
+
+def _column_formats(
+    headers: List[str], number_formats: Dict[str, str]
+) -> List[Optional[str]]:
+    return [number_formats.get(header) for header in headers]
+
+
+@tracer.start_as_current_span("export.materials.xlsx")
+def export_materials_to_xlsx(materials: Iterable[Dict[str, Any]], out: BinaryIO) -> int:
+    """
+    Write materials as an XLSX workbook with a sheet per category
+
+    Materials should be ordered by category: rows are streamed into the
+    current category's sheet, so memory does not grow with the row count.
+    A Summary sheet with per-category totals is listed first.
+
+    Returns:
+        Number of material rows written
+    """
+    workbook = XlsxStreamWriter(out)
+    formats = _column_formats(MATERIAL_EXPORT_HEADERS, MATERIAL_NUMBER_FORMATS)
+    counts: Dict[str, int] = {}
+    totals: Dict[str, Decimal] = {}
+    sheet, current = None, None
+    count = 0
+
+    for material in materials:
+        category = material["category"]
+        category = getattr(category, "value", category)
+        if category != current:
+            sheet = workbook.add_sheet(category, MATERIAL_EXPORT_HEADERS, formats)
+            current = category
+        sheet.append([material.get(header) for header in MATERIAL_EXPORT_HEADERS])
+        counts[category] = counts.get(category, 0) + 1
+        totals[category] = totals.get(category, Decimal("0")) + Decimal(
+            material.get("total_cost") or 0
+        )
+        count += 1
+
+    summary = workbook.add_sheet(
+        "Summary",
+        ["category", "item_count", "total_cost"],
+        [None, None, MONEY_FORMAT],
+        first=True,
+    )
+    for category, total in totals.items():
+        summary.append([category, counts[category], total])
+    summary.append(["TOTAL", count, sum(totals.values(), Decimal("0"))])
+    workbook.close()
+
+    trace.get_current_span().set_attribute("export.rows", count)
+    return count
+
+
+@tracer.start_as_current_span("export.schedule.xlsx")
+def export_schedule_to_xlsx(milestones: Iterable[Dict[str, Any]], out: BinaryIO) -> int:
+    """Write schedule milestones as a single-sheet XLSX workbook with date cells"""
+    workbook = XlsxStreamWriter(out)
+    sheet = workbook.add_sheet(
+        "Schedule",
+        SCHEDULE_EXPORT_HEADERS,
+        _column_formats(SCHEDULE_EXPORT_HEADERS, SCHEDULE_NUMBER_FORMATS),
+    )
+    for milestone in milestones:
+        sheet.append([milestone.get(header) for header in SCHEDULE_EXPORT_HEADERS])
+    count = sheet.rows
+    workbook.close()
+    trace.get_current_span().set_attribute("export.rows", count)
+    return count
+
+
+def iter_file(fileobj: BinaryIO, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Yield a file's content in chunks and close it"""
+    with fileobj:
+        while chunk := fileobj.read(chunk_size):
+            yield chunk
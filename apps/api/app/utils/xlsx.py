@@ -0,0 +1,332 @@
+"""
+Streaming XLSX writer
+Writes SpreadsheetML rows as text straight into the workbook's zip entries.
+openpyxl's write-only mode also streams, but builds and serializes a cell
+object per value (~6k rows/s for a 10-column export); formatting rows
+directly is an order of magnitude faster with the same constant memory.
+"""
+
+import math
+import re
+import zipfile
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Sequence
+from xml.sax.saxutils import escape, quoteattr
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+MONEY_FORMAT = "#,##0.00"
+QUANTITY_FORMAT = "#,##0.000"
+PERCENT_FORMAT = "0.00%"
+DATE_FORMAT = "yyyy-mm-dd"
+DATETIME_FORMAT = "yyyy-mm-dd hh:mm:ss"
+
+# cellXfs index for each supported number format (see _STYLES)
+_FORMAT_STYLES = {
+    None: 0,
+    MONEY_FORMAT: 2,
+    QUANTITY_FORMAT: 3,
+    PERCENT_FORMAT: 4,
+    DATE_FORMAT: 5,
+    DATETIME_FORMAT: 6,
+}
+_BOLD_STYLE = 1
+
+_EPOCH = date(1899, 12, 30)
+_EPOCH_DATETIME = datetime(1899, 12, 30)
+
+# Characters XML 1.0 does not allow
+_ILLEGAL_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+# Rows buffered before each write to the zip entry
+_ROW_BUFFER = 500
+
+# Rows Excel allows per worksheet, the header row included
+MAX_SHEET_ROWS = 1_048_576
+
+_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+_STYLES = _XML_HEADER + (
+    f'<styleSheet xmlns="{_NS}">'
+    '<numFmts count="3">'
+    '<numFmt numFmtId="164" formatCode="#,##0.000"/>'
+    '<numFmt numFmtId="165" formatCode="yyyy-mm-dd"/>'
+    '<numFmt numFmtId="166" formatCode="yyyy-mm-dd hh:mm:ss"/>'
+    "</numFmts>"
+    '<fonts count="2">'
+    '<font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font>'
+    "</fonts>"
+    '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="7">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="10" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="166" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    "</cellXfs>"
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    "</styleSheet>"
+)
+
+
+def column_letter(index: int) -> str:
+    """0 -> A, 25 -> Z, 26 -> AA"""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _text(value: str) -> str:
+    value = escape(_ILLEGAL_XML.sub("", value))
+    if value[:1].isspace() or value[-1:].isspace():
+        return f'<is><t xml:space="preserve">{value}</t></is>'
+    return f"<is><t>{value}</t></is>"
+
+
+def _cell(ref: str, value: Any, style: int) -> str:
+    s = f' s="{style}"' if style else ""
+    # str-based enums go through the Enum branch below
+    if isinstance(value, str) and not isinstance(value, Enum):
+        return f'<c r="{ref}"{s} t="inlineStr">{_text(value)}</c>'
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{s} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        if isinstance(value, int) or math.isfinite(value):
+            return f'<c r="{ref}"{s}><v>{value}</v></c>'
+        value = str(value)
+    elif isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        delta = value - _EPOCH_DATETIME
+        serial = (
+            delta.days + delta.seconds / 86400 + delta.microseconds / 86_400_000_000
+        )
+        return f'<c r="{ref}" s="{style or _FORMAT_STYLES[DATETIME_FORMAT]}"><v>{serial}</v></c>'
+    elif isinstance(value, date):
+        serial = (value - _EPOCH).days
+        return f'<c r="{ref}" s="{style or _FORMAT_STYLES[DATE_FORMAT]}"><v>{serial}</v></c>'
+    elif isinstance(value, Enum):
+        value = value.value
+    return f'<c r="{ref}"{s} t="inlineStr">{_text(str(value))}</c>'
+
+
+class XlsxSheet:
+    """
+    One worksheet being written; rows are serialized as they are appended
+
+    A sheet that reaches MAX_SHEET_ROWS continues on a new worksheet (with the
+    headers repeated) opened by continuation; without one, appending past the
+    limit raises ValueError.
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        headers: Sequence[str],
+        formats: Sequence[Optional[str]],
+        continuation: Optional[Callable[[], BinaryIO]] = None,
+    ):
+        self._headers = headers
+        self._header_count = len(headers)
+        self._styles = [_FORMAT_STYLES[fmt] for fmt in formats]
+        self._continuation = continuation
+        self._buffer: List[str] = []
+        self.rows = 0
+        self._start(stream)
+
+    def _start(self, stream: BinaryIO) -> None:
+        self._stream = stream
+        self._letters = [column_letter(i) for i in range(self._header_count)]
+        self._row_index = 0
+        self._stream.write(
+            (
+                _XML_HEADER + f'<worksheet xmlns="{_NS}">'
+                # Keep the header row visible while scrolling
+                '<sheetViews><sheetView workbookViewId="0">'
+                '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+                "</sheetView></sheetViews><sheetData>"
+            ).encode()
+        )
+        self._write_row(self._headers, [_BOLD_STYLE] * self._header_count)
+
+    def _write_row(self, values: Sequence[Any], styles: List[int]) -> None:
+        # Columns past the headers are written unformatted; short rows leave the rest empty
+        while len(self._letters) < len(values):
+            self._letters.append(column_letter(len(self._letters)))
+        if len(styles) < len(values):
+            styles = styles + [0] * (len(values) - len(styles))
+        self._row_index += 1
+        row = self._row_index
+        cells = [
+            _cell(f"{letter}{row}", value, style)
+            for value, letter, style in zip(values, self._letters, styles, strict=False)
+            if value is not None
+        ]
+        self._buffer.append(f'<row r="{row}">{"".join(cells)}</row>')
+        if len(self._buffer) >= _ROW_BUFFER:
+            self._flush()
+
+    def append(self, values: Sequence[Any]) -> None:
+        if self._row_index >= MAX_SHEET_ROWS:
+            if self._continuation is None:
+                raise ValueError(
+                    f"A worksheet holds at most {MAX_SHEET_ROWS - 1} rows below its headers"
+                )
+            self._end()
+            self._start(self._continuation())
+        self._write_row(values, self._styles)
+        self.rows += 1
+
+    def _flush(self) -> None:
+        self._stream.write("".join(self._buffer).encode("utf-8"))
+        self._buffer.clear()
+
+    def _end(self) -> None:
+        self._flush()
+        self._stream.write(b"</sheetData></worksheet>")
+        self._stream.close()
+
+    def close(self) -> None:
+        self._end()
+
+
+class XlsxStreamWriter:
+    """
+    Writes an XLSX workbook sheet by sheet into out.
+
+    Only one sheet is open at a time (opening the next closes the previous).
+    A sheet added with first=True is listed first in the workbook regardless
+    of when it is written, e.g. a summary computed from the other sheets.
+    """
+
+    def __init__(self, out: BinaryIO):
+        self._zip = zipfile.ZipFile(
+            out, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6
+        )
+        self._sheets: List[Dict[str, Any]] = []
+        self._current: Optional[XlsxSheet] = None
+        self._names: set = set()
+
+    def _sheet_name(self, title: str) -> str:
+        name = _INVALID_SHEET_CHARS.sub("_", title)[:31] or "Sheet"
+        base, n = name, 2
+        while name.lower() in self._names:
+            suffix = f" ({n})"
+            name = base[: 31 - len(suffix)] + suffix
+            n += 1
+        self._names.add(name.lower())
+        return name
+
+    def add_sheet(
+        self,
+        title: str,
+        headers: Sequence[str],
+        formats: Optional[Sequence[Optional[str]]] = None,
+        first: bool = False,
+    ) -> XlsxSheet:
+        if self._current is not None:
+            self._current.close()
+        entry = self._new_entry(title)
+        if first:
+            self._sheets.insert(0, entry)
+        else:
+            self._sheets.append(entry)
+        last = [entry]
+
+        def continuation() -> BinaryIO:
+            # Listed right after the part it continues, e.g. "Framing (2)"
+            following = self._new_entry(title)
+            self._sheets.insert(self._sheets.index(last[0]) + 1, following)
+            last[0] = following
+            return self._zip.open(following["part"], "w", force_zip64=True)
+
+        formats = formats or [None] * len(headers)
+        self._current = XlsxSheet(
+            self._zip.open(entry["part"], "w", force_zip64=True),
+            headers,
+            formats,
+            continuation,
+        )
+        return self._current
+
+    def _new_entry(self, title: str) -> Dict[str, Any]:
+        return {
+            "name": self._sheet_name(title),
+            "part": f"xl/worksheets/sheet{len(self._sheets) + 1}.xml",
+        }
+
+    def close(self) -> None:
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+        if not self._sheets:
+            self.add_sheet("Sheet", [])
+            self._current.close()
+            self._current = None
+
+        overrides = "".join(
+            f'<Override PartName="/{s["part"]}" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for s in self._sheets
+        )
+        self._zip.writestr(
+            "[Content_Types].xml",
+            _XML_HEADER
+            + (
+                '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                '<Default Extension="xml" ContentType="application/xml"/>'
+                '<Override PartName="/xl/workbook.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                '<Override PartName="/xl/styles.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+                f"{overrides}</Types>"
+            ),
+        )
+        self._zip.writestr(
+            "_rels/.rels",
+            _XML_HEADER
+            + (
+                '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+                "</Relationships>"
+            ),
+        )
+        sheets = "".join(
+            f'<sheet name={quoteattr(s["name"])} sheetId="{i}" r:id="rId{i}"/>'
+            for i, s in enumerate(self._sheets, start=1)
+        )
+        self._zip.writestr(
+            "xl/workbook.xml",
+            _XML_HEADER
+            + (
+                f'<workbook xmlns="{_NS}" xmlns:r="{_REL_NS}"><sheets>{sheets}</sheets></workbook>'
+            ),
+        )
+        rels = "".join(
+            f'<Relationship Id="rId{i}" Type="{_REL_NS}/worksheet" Target="{s["part"][3:]}"/>'
+            for i, s in enumerate(self._sheets, start=1)
+        )
+        rels += f'<Relationship Id="rId{len(self._sheets) + 1}" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+        self._zip.writestr(
+            "xl/_rels/workbook.xml.rels",
+            _XML_HEADER
+            + (
+                f'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{rels}</Relationships>'
+            ),
+        )
+        self._zip.writestr("xl/styles.xml", _STYLES)
+        self._zip.close()
@@ -0,0 +1,73 @@
+"""
+Benchmark: RS256 token verification throughput with and without the
+verified-token cache.
+
+A pool of distinct tokens (one per simulated user session) is verified in
+round-robin, the way an SPA resends the same token on every call.
+
+Usage:
+    python scripts/bench_jwt_cache.py [--verifications 20000] [--tokens 50]
+"""
+import argparse
+import time
+
+import asgi_bench  # noqa: F401  (sets up sys.path and settings env)
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwt
+
+from app.auth.jwt import ClerkAuth
+from app.core.config import settings
+
+
+def make_tokens(n: int) -> list[str]:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    settings.CLERK_PEM_PUBLIC_KEY = (
+        key.public_key()
+        .public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        .decode()
+    )
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    exp = int(time.time()) + 3600
+    return [
+        jwt.encode(
+            {"sub": f"user_{i}", "tenant_id": "t1", "role": "PM", "exp": exp},
+            private_pem,
+            algorithm="RS256",
+        )
+        for i in range(n)
+    ]
+
+
+def run(auth: ClerkAuth, tokens: list[str], n: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        auth.verify_token(tokens[i % len(tokens)])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--verifications", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, default=50)
+    args = parser.parse_args()
+    tokens = make_tokens(args.tokens)
+
+    print(f"{'cache':<10} {'verif/s':>10} {'us/verif':>10}")
+    for label, size in (("off", 0), ("on", settings.JWT_CACHE_MAX_SIZE)):
+        settings.JWT_CACHE_MAX_SIZE = size
+        auth = ClerkAuth()
+        elapsed = run(auth, tokens, args.verifications)
+        print(
+            f"{label:<10} {args.verifications / elapsed:>10.0f} {elapsed / args.verifications * 1e6:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
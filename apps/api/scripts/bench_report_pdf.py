@@ -0,0 +1,202 @@
+"""
+Benchmark: TAKEOFF_SUMMARY PDF rendering speed and peak memory.
+
+For each size a project with that many material line items is seeded, then a
+fresh child process renders the report so its peak RSS is measured in
+isolation. `--renderer platypus` renders the same rows with ReportLab's
+platypus (the whole story kept in memory) for comparison.
+
+Usage:
+    python scripts/bench_report_pdf.py [--rows 10000 50000 200000] [--renderer streaming|platypus]
+        [--database-url postgresql://...]   (default: a temporary SQLite file)
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from decimal import Decimal
+
+import asgi_bench  # noqa: F401  (sets up sys.path and settings env)
+from sqlalchemy import create_engine, insert
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.material import MaterialCategory, MaterialLineItem, UnitOfMeasure
+from app.models.project import BuildProject
+from app.models.report import Report, ReportFormat, ReportType
+from app.models.tenant import Tenant
+from app.reports.datasets import build_dataset
+from app.reports.engine import SPOOL_MAX_MEMORY
+from app.reports.pdf import format_pdf_cell
+from app.reports.renderers import render_pdf
+
+TABLES = [
+    Tenant.__table__,
+    BuildProject.__table__,
+    MaterialLineItem.__table__,
+    Report.__table__,
+]
+
+
+# The SQLite default lacks the Postgres column types
+@compiles(UUID, "sqlite")
+def _compile_uuid_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+def seed(url: str, rows: int) -> str:
+    engine = create_engine(url)
+    Base.metadata.create_all(engine, tables=TABLES)
+    db = sessionmaker(bind=engine)()
+    tenant = Tenant(name="Bench", slug=f"bench-{uuid.uuid4().hex[:8]}")
+    db.add(tenant)
+    db.flush()
+    project = BuildProject(
+        tenant_id=tenant.id, title=f"Bench {rows}", budget=Decimal("5000000")
+    )
+    db.add(project)
+    db.flush()
+    categories = list(MaterialCategory)
+    batch = []
+    for i in range(rows):
+        batch.append(
+            {
+                "id": uuid.uuid4(),
+                "project_id": project.id,
+                "category": categories[i % len(categories)],
+                "description": f"Line item {i:07d} - 2x6 SPF #2 kiln dried stud, precut 92-5/8 in",
+                "quantity": Decimal(i % 500 + 1),
+                "unit": UnitOfMeasure.EA,
+                "wastage_factor": Decimal("0.1"),
+                "total_qty": Decimal(i % 500 + 1) * Decimal("1.1"),
+                "unit_cost": Decimal("7.25"),
+                "total_cost": Decimal(i % 500 + 1) * Decimal("7.975"),
+            }
+        )
+        if len(batch) == 5000:
+            db.execute(insert(MaterialLineItem), batch)
+            batch = []
+    if batch:
+        db.execute(insert(MaterialLineItem), batch)
+    report = Report(
+        tenant_id=tenant.id,
+        project_id=project.id,
+        type=ReportType.TAKEOFF_SUMMARY,
+        format=ReportFormat.PDF,
+    )
+    db.add(report)
+    db.commit()
+    report_id = str(report.id)
+    db.close()
+    engine.dispose()
+    return report_id
+
+
+def render_platypus(dataset, out) -> int:
+    from reportlab.lib.pagesizes import landscape, letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Table
+
+    styles = getSampleStyleSheet()
+    doc = SimpleDocTemplate(out, pagesize=landscape(letter))
+    story = [Paragraph(dataset.title, styles["Title"])]
+    for table in dataset.tables:
+        data = [table.headers] + [
+            [format_pdf_cell(v) for v in row] for row in table.rows
+        ]
+        story.append(Table(data, repeatRows=1))
+    doc.build(story)
+    return doc.page
+
+
+def child(url: str, report_id: str, renderer: str) -> None:
+    engine = create_engine(url)
+    db = sessionmaker(bind=engine)()
+    report = db.get(Report, uuid.UUID(report_id))
+    project = db.get(BuildProject, report.project_id)
+
+    start = time.perf_counter()
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as out:
+        dataset = build_dataset(db, report, project)
+        if renderer == "platypus":
+            pages = render_platypus(dataset, out)
+        else:
+            render_pdf(dataset, out)
+            out.seek(0)
+            pages = out.read().count(b"/Type /Page ")
+        size = out.tell()
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(
+        json.dumps(
+            {
+                "pages": pages,
+                "seconds": elapsed,
+                "peak_mb": peak_kb / 1024,
+                "bytes": size,
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 50000, 200000])
+    parser.add_argument(
+        "--renderer", choices=["streaming", "platypus"], default="streaming"
+    )
+    parser.add_argument("--database-url")
+    parser.add_argument(
+        "--child", nargs=2, metavar=("URL", "REPORT_ID"), help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child, args.renderer)
+        return
+
+    print(
+        f"{'rows':>8} {'pages':>7} {'seconds':>8} {'pages/s':>8} {'peak MB':>8} {'PDF MB':>7}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            url = (
+                args.database_url
+                or f"sqlite:///{os.path.join(tmp, f'bench_{rows}.db')}"
+            )
+            report_id = seed(url, rows)
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--renderer",
+                    args.renderer,
+                    "--child",
+                    url,
+                    report_id,
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            r = json.loads(result.stdout.strip().splitlines()[-1])
+            print(
+                f"{rows:>8} {r['pages']:>7} {r['seconds']:>8.2f} {r['pages'] / r['seconds']:>8.0f} "
+                f"{r['peak_mb']:>8.0f} {r['bytes'] / 1e6:>7.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
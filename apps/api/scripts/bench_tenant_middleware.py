@@ -0,0 +1,136 @@
+"""
+Benchmark: TenantContextMiddleware as BaseHTTPMiddleware (previous
+implementation, reproduced below) versus the pure ASGI version.
+
+Reports per-request overhead on a trivial route and the peak Python heap
+while streaming a large CSV export through a slow client.
+
+Usage:
+    python scripts/bench_tenant_middleware.py [--requests 5000] [--export-mb 50]
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+import uuid
+
+from asgi_bench import drive
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from jose import jwt
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.config import settings
+from app.middleware.tenant import TenantContextMiddleware
+
+CHUNK = b"FRAMING,2x4 Lumber - 8ft,500,EA,0.10,8.50,ABC Lumber,Premium grade\n" * 256
+
+
+class LegacyTenantContextMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation this benchmark compares against"""
+
+    async def dispatch(self, request: Request, call_next):
+        public_paths = ["/", "/health", "/docs", "/redoc", "/openapi.json", "/metrics"]
+        if request.url.path in public_paths:
+            return await call_next(request)
+
+        request.state.tenant_id = getattr(request.state, "tenant_id", None)
+        request.state.user_id = getattr(request.state, "user_id", None)
+        request.state.user_role = getattr(request.state, "user_role", None)
+        request.state.request_id = str(uuid.uuid4())
+
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request.state.request_id
+        return response
+
+
+def build_app(middleware, export_bytes: int) -> FastAPI:
+    app = FastAPI()
+    if middleware:
+        app.add_middleware(middleware)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/export")
+    async def export():
+        def rows():
+            for _ in range(export_bytes // len(CHUNK)):
+                yield CHUNK
+
+        return StreamingResponse(rows(), media_type="text/csv")
+
+    return app
+
+
+async def stream_export(app) -> tuple[float, int]:
+    """Stream /export into a client that yields to the loop per chunk; return (seconds, peak heap)"""
+
+    async def slow_send(message):
+        await asyncio.sleep(0)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    await drive(app, 1, path=lambda i: "/export", send=slow_send)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def configure_token() -> str:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    settings.CLERK_PEM_PUBLIC_KEY = (
+        key.public_key()
+        .public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        .decode()
+    )
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    claims = {
+        "sub": "user_1",
+        "tenant_id": "tenant_1",
+        "role": "PM",
+        "exp": int(time.time()) + 3600,
+    }
+    return jwt.encode(claims, private_pem, algorithm="RS256")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--export-mb", type=int, default=50)
+    args = parser.parse_args()
+    export_bytes = args.export_mb * 1024 * 1024
+    token = configure_token()
+    auth = [(b"authorization", f"Bearer {token}".encode())]
+
+    cases = [
+        ("none", None, []),
+        ("BaseHTTPMiddleware", LegacyTenantContextMiddleware, []),
+        ("pure ASGI", TenantContextMiddleware, []),
+        ("pure ASGI + JWT", TenantContextMiddleware, auth),
+    ]
+    print(f"{'middleware':<20} {'us/req':>8} {'export s':>9} {'peak heap MB':>13}")
+    for label, middleware, headers in cases:
+        app = build_app(middleware, export_bytes)
+        asyncio.run(drive(app, 200, headers=headers))  # warm up
+        elapsed = asyncio.run(drive(app, args.requests, headers=headers))
+        asyncio.run(stream_export(app))  # warm up
+        export_s, peak = asyncio.run(stream_export(app))
+        print(
+            f"{label:<20} {elapsed / args.requests * 1e6:>8.1f} "
+            f"{export_s:>9.2f} {peak / 1024 / 1024:>13.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark: per-request tracing overhead at different sampling ratios.
+
+Drives a small FastAPI app through the ASGI interface (no network) with one
+request span plus a handful of child spans per request, which mirrors a typical
+route doing a few SQL statements and an audit write.
+
+Usage:
+    python scripts/bench_tracing.py [--requests 5000]
+"""
+import argparse
+import asyncio
+
+from asgi_bench import drive
+from fastapi import FastAPI
+from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+CHILD_SPANS = 5
+
+
+class DiscardingExporter(SpanExporter):
+    """Exporter that drops spans, so only in-process overhead is measured"""
+
+    def export(self, spans):
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def build_app(ratio: float | None) -> FastAPI:
+    app = FastAPI()
+    provider = None
+    if ratio is not None:
+        provider = TracerProvider(sampler=ParentBased(TraceIdRatioBased(ratio)))
+        provider.add_span_processor(BatchSpanProcessor(DiscardingExporter()))
+        FastAPIInstrumentor.instrument_app(app, tracer_provider=provider)
+    tracer = provider.get_tracer("bench") if provider else None
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        if tracer:
+            for i in range(CHILD_SPANS):
+                with tracer.start_as_current_span(f"db.query.{i}"):
+                    pass
+        return {"id": item_id}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    cases = [
+        ("disabled", None),
+        ("ratio=0.0", 0.0),
+        ("ratio=0.01", 0.01),
+        ("ratio=1.0", 1.0),
+    ]
+    baseline = None
+    print(f"{'case':<12} {'req/s':>10} {'us/req':>10} {'overhead':>10}")
+    for label, ratio in cases:
+        app = build_app(ratio)
+        asyncio.run(drive(app, 200))  # warm up
+        elapsed = asyncio.run(drive(app, args.requests))
+        per_req = elapsed / args.requests * 1e6
+        if baseline is None:
+            baseline = per_req
+        overhead = (per_req - baseline) / baseline * 100
+        print(
+            f"{label:<12} {args.requests / elapsed:>10.0f} {per_req:>10.1f} {overhead:>9.1f}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from jose import jwk, jwt
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.db.base import Base, get_db
+from app.models.project import BuildProject
+from app.models.tenant import Tenant
+from app.models.user import Membership, User, UserRole
+from app.storage import LocalStorage
+
+
+# Unit tests run models against SQLite; render the Postgres-only types it lacks
+@compiles(UUID, "sqlite")
+def _compile_uuid_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@compiles(TSVECTOR, "sqlite")
+def _compile_tsvector_sqlite(type_, compiler, **kw):
+    return "TEXT"
+
+
+def _register_sqlite_functions(connection, _):
+    # The generated FileText.search_vector column calls to_tsvector
+    connection.create_function(
+        "to_tsvector", 2, lambda config, content: content, deterministic=True
+    )
+
+
+# The user every make_client request runs as
+USER_ID = uuid.UUID(int=99)
+
+
+@pytest.fixture
+def make_client(tmp_path, monkeypatch):
+    """
+    Build a TestClient for some routers over a fresh SQLite database
+
+    The database holds the given models' tables plus a seeded tenant and
+    project ("Lot 7", or project_title); requests run as that tenant. seed
+    (db, project) may add rows before the first commit. Modules listed in
+    storage_modules get a LocalStorage under tmp_path as their get_storage;
+    modules in task_modules get the test database as their SessionLocal, with
+    Celery tasks run eagerly. database_url swaps SQLite for a server database
+    (for Postgres-only features); its tables are dropped afterwards. role
+    makes the client's user a member of the tenant with that role, for
+    endpoints behind require_role. The client exposes tenant_id, project_id,
+    session_factory and storage.
+    """
+    engines = []
+
+    def _make_client(
+        routers,
+        models=(),
+        storage_modules=(),
+        task_modules=(),
+        seed=None,
+        project_title="Lot 7",
+        database_url=None,
+        role=None,
+    ) -> TestClient:
+        engine = create_engine(
+            database_url or f"sqlite:///{tmp_path / f'api{len(engines)}.db'}"
+        )
+        if engine.dialect.name == "sqlite":
+            event.listen(engine, "connect", _register_sqlite_functions)
+        if role:
+            models = [User, Membership, *models]
+        tables = [
+            Tenant.__table__,
+            BuildProject.__table__,
+            *(model.__table__ for model in models),
+        ]
+        Base.metadata.create_all(engine, tables=tables)
+        engines.append((engine, tables))
+        session_factory = sessionmaker(bind=engine)
+        db = session_factory()
+        tenant = Tenant(name="Acme Homes", slug="acme")
+        db.add(tenant)
+        db.flush()
+        project = BuildProject(tenant_id=tenant.id, title=project_title)
+        db.add(project)
+        db.flush()
+        if role:
+            user = User(
+                id=USER_ID,
+                email="user@acme.test",
+                first_name="Pat",
+                last_name="Builder",
+            )
+            db.add(user)
+            db.flush()
+            db.add(
+                Membership(tenant_id=tenant.id, user_id=user.id, role=UserRole(role))
+            )
+        if seed:
+            seed(db, project)
+        db.commit()
+        tenant_id, project_id = tenant.id, project.id
+        db.close()
+
+        storage = LocalStorage(str(tmp_path / "storage"))
+        for module in storage_modules:
+            monkeypatch.setattr(module, "get_storage", lambda: storage)
+        if task_modules:
+            # Background jobs run inline, against the test database
+            for module in task_modules:
+                monkeypatch.setattr(module, "SessionLocal", session_factory)
+            monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+
+        app = FastAPI()
+
+        @app.middleware("http")
+        async def fake_auth(request: Request, call_next):
+            request.state.tenant_id = tenant_id
+            request.state.user_id = USER_ID
+            return await call_next(request)
+
+        def override_get_db():
+            session = session_factory()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        for prefix, router in routers.items():
+            app.include_router(router, prefix=prefix)
+        client = TestClient(app)
+        client.tenant_id = tenant_id
+        client.project_id = project_id
+        client.session_factory = session_factory
+        client.storage = storage
+        return client
+
+    yield _make_client
+    for engine, tables in engines:
+        if engine.dialect.name != "sqlite":
+            # A shared server database: leave it as it was found
+            Base.metadata.drop_all(engine, tables=tables)
+        engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def rsa_private_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture(scope="session")
+def rsa_private_pem(rsa_private_key) -> str:
+    return rsa_private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+@pytest.fixture(scope="session")
+def rsa_public_pem(rsa_private_key) -> str:
+    return (
+        rsa_private_key.public_key()
+        .public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        .decode()
+    )
+
+
+@pytest.fixture
+def clerk_pem(monkeypatch, rsa_public_pem):
+    """Configure Clerk verification with the test key pair"""
+    monkeypatch.setattr(settings, "CLERK_PEM_PUBLIC_KEY", rsa_public_pem)
+    return rsa_public_pem
+
+
+@pytest.fixture
+def make_token(rsa_private_pem):
+    """Sign an RS256 token with the test key"""
+
+    def _make_token(headers=None, **claims) -> str:
+        payload = {
+            "sub": "user_123",
+            "tenant_id": "tenant_abc",
+            "role": "PM",
+            "exp": int(time.time()) + 300,
+        }
+        payload.update(claims)
+        return jwt.encode(payload, rsa_private_pem, algorithm="RS256", headers=headers)
+
+    return _make_token
+
+
+class JwksStandIn:
+    """State of the local JWKS server: the served keys and a request counter"""
+
+    def __init__(self):
+        self.keys: list[dict] = []
+        self.requests = 0
+        self.fail = False
+        self.url = ""
+
+    def add_key(self, private_key, kid: str) -> None:
+        public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        key = jwk.construct(public_pem, "RS256").to_dict()
+        key.update({"kid": kid, "use": "sig"})
+        self.keys.append(key)
+
+
+@pytest.fixture
+def jwks_server():
+    """Local stand-in for Clerk's /.well-known/jwks.json endpoint"""
+    state = JwksStandIn()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state.requests += 1
+            if state.fail:
+                self.send_response(503)
+                self.end_headers()
+                return
+            body = json.dumps({"keys": state.keys}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state.url = f"http://127.0.0.1:{server.server_port}/.well-known/jwks.json"
+    yield state
+    server.shutdown()
+    server.server_close()
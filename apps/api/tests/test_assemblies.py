@@ -0,0 +1,291 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.api import assemblies as assemblies_api
+from app.assemblies.expansion import AssemblyExpander
+from app.models.assembly import Assembly, AssemblyComponent
+from app.models.audit import AuditLog
+from app.models.material import MaterialLineItem
+from app.models.price_book import PriceBookItem
+from app.schemas.assembly import AssemblyInstance
+
+WALL = {
+    "name": "2x6 exterior wall",
+    "components": [
+        {
+            "category": "FRAMING",
+            "description": "2x6 stud",
+            "unit": "EA",
+            "basis": "SPACING",
+            "spacing_in": "16",
+            "wastage_factor": "0.1",
+            "unit_cost": "6.50",
+        },
+        {
+            "category": "FRAMING",
+            "description": "2x6 plate",
+            "unit": "LF",
+            "basis": "LENGTH",
+            "factor": "3",
+            "unit_cost": "0.80",
+            "sku": "plate-26",
+        },
+        {
+            "category": "SIDING",
+            "description": "OSB sheathing",
+            "unit": "SF",
+            "basis": "AREA",
+            "wastage_factor": "0.05",
+            "unit_cost": "0.95",
+        },
+        {
+            "category": "DRYWALL",
+            "description": "1/2in drywall",
+            "unit": "SF",
+            "basis": "AREA",
+            "unit_cost": "0.55",
+        },
+        {
+            "category": "OTHER",
+            "description": "R-21 batts",
+            "unit": "SF",
+            "basis": "AREA",
+            "factor": "0.9",
+            "unit_cost": "1.10",
+        },
+    ],
+}
+FOOTING = {
+    "name": "Footing",
+    "components": [
+        {
+            "category": "CONCRETE",
+            "description": "Concrete",
+            "unit": "CF",
+            "basis": "VOLUME",
+            "unit_cost": "5.50",
+        },
+        {
+            "category": "CONCRETE",
+            "description": "Form release",
+            "unit": "GAL",
+            "basis": "EACH",
+            "factor": "0.25",
+            "unit_cost": "12",
+        },
+    ],
+}
+
+
+@pytest.fixture
+def client(make_client):
+    client = make_client(
+        {"/assemblies": assemblies_api.router},
+        [Assembly, AssemblyComponent, MaterialLineItem, PriceBookItem, AuditLog],
+        role="PM",
+    )
+    client.wall_id = client.post("/assemblies/", json=WALL).json()["id"]
+    client.footing_id = client.post("/assemblies/", json=FOOTING).json()["id"]
+    return client
+
+
+def wall(client, length, height="9", **extra):
+    return {
+        "assembly_id": client.wall_id,
+        "length_ft": length,
+        "height_ft": height,
+        **extra,
+    }
+
+
+def line_items(client):
+    db = client.session_factory()
+    try:
+        return {m.description: m for m in db.query(MaterialLineItem)}
+    finally:
+        db.close()
+
+
+class TestAssemblies:
+    def test_create_and_list(self, client):
+        (wall_assembly,) = (
+            a for a in client.get("/assemblies/").json() if a["name"] == WALL["name"]
+        )
+        assert [c["description"] for c in wall_assembly["components"]] == [
+            c["description"] for c in WALL["components"]
+        ]
+        assert [c["position"] for c in wall_assembly["components"]] == [0, 1, 2, 3, 4]
+        assert wall_assembly["components"][1]["sku"] == "PLATE-26"
+        assert client.get(f"/assemblies/{client.wall_id}").status_code == 200
+        assert client.get(f"/assemblies/{uuid.uuid4()}").status_code == 404
+
+    def test_duplicate_name_conflicts(self, client):
+        assert client.post("/assemblies/", json=WALL).status_code == 409
+
+    def test_spacing_required_for_spacing_basis(self, client):
+        component = {**WALL["components"][0]}
+        del component["spacing_in"]
+        assert (
+            client.post(
+                "/assemblies/", json={"name": "Bad", "components": [component]}
+            ).status_code
+            == 422
+        )
+
+
+class TestExpand:
+    def test_wall_expands_into_components(self, client):
+        response = client.post(
+            f"/assemblies/expand/{client.project_id}",
+            json={"instances": [wall(client, "100", notes="North wall")]},
+        )
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert body["line_item_count"] == 5
+
+        items = line_items(client)
+        studs = items["2x6 exterior wall: 2x6 stud"]
+        # 1200 in at 16 in on center, plus one
+        assert studs.quantity == Decimal("76")
+        assert studs.total_qty == Decimal("83.600")
+        assert studs.total_cost == Decimal("543.40")
+        assert items["2x6 exterior wall: 2x6 plate"].quantity == Decimal("300")
+        assert items["2x6 exterior wall: OSB sheathing"].quantity == Decimal("900")
+        assert items["2x6 exterior wall: R-21 batts"].quantity == Decimal("810")
+        assert studs.notes == "North wall"
+        assert Decimal(body["total_cost"]) == sum(
+            item.total_cost for item in items.values()
+        )
+
+    def test_volume_and_each(self, client):
+        instance = {
+            "assembly_id": client.footing_id,
+            "length_ft": "40",
+            "width_ft": "2",
+            "height_ft": "1",
+        }
+        client.post(
+            f"/assemblies/expand/{client.project_id}", json={"instances": [instance]}
+        )
+        items = line_items(client)
+        assert items["Footing: Concrete"].quantity == Decimal("80")
+        assert items["Footing: Form release"].quantity == Decimal("0.25")
+
+    def test_repeated_dimensions_expand_once(self, client):
+        instances = [wall(client, "20") for _ in range(300)] + [
+            wall(client, "20.0"),
+            wall(client, "12", "8"),
+        ]
+        response = client.post(
+            f"/assemblies/expand/{client.project_id}", json={"instances": instances}
+        )
+        body = response.json()
+        assert body["instance_count"] == 302
+        assert body["expansion_count"] == 2
+        assert body["line_item_count"] == 302 * 5
+        db = client.session_factory()
+        assert db.query(MaterialLineItem).count() == 302 * 5
+        (log,) = (
+            db.query(AuditLog).filter(AuditLog.entity_type == "MaterialLineItem").all()
+        )
+        db.close()
+        assert log.changes["after"]["bulk_import_count"] == 302 * 5
+
+    def test_errors_insert_nothing(self, client):
+        instances = [
+            wall(client, "10"),
+            {"assembly_id": client.wall_id, "length_ft": "10"},
+        ]
+        path = f"/assemblies/expand/{client.project_id}"
+        preview = client.post(
+            path, json={"instances": instances, "dry_run": True}
+        ).json()
+        assert preview["line_item_count"] == 5
+        assert [e["instance"] for e in preview["errors"]] == [2]
+        assert "height_ft is required" in preview["errors"][0]["error"]
+
+        response = client.post(path, json={"instances": instances})
+        assert response.status_code == 400
+        assert line_items(client) == {}
+
+    def test_unknown_assembly_or_project(self, client):
+        path = f"/assemblies/expand/{client.project_id}"
+        response = client.post(
+            path,
+            json={"instances": [{"assembly_id": str(uuid.uuid4()), "length_ft": "10"}]},
+        )
+        assert response.status_code == 404
+        response = client.post(
+            f"/assemblies/expand/{uuid.uuid4()}",
+            json={"instances": [wall(client, "10")]},
+        )
+        assert response.status_code == 404
+
+    def test_resolve_prices(self, client):
+        db = client.session_factory()
+        db.add(
+            PriceBookItem(
+                tenant_id=client.tenant_id,
+                vendor="ABC Lumber",
+                sku="PLATE-26",
+                description="2x6 plate",
+                unit="LF",
+                price=Decimal("1.05"),
+                effective_from=date(2020, 1, 1),
+            )
+        )
+        db.commit()
+        db.close()
+        client.post(
+            f"/assemblies/expand/{client.project_id}",
+            json={"instances": [wall(client, "10")], "resolve_prices": True},
+        )
+        items = line_items(client)
+        assert items["2x6 exterior wall: 2x6 plate"].unit_cost == Decimal("1.05")
+        assert items["2x6 exterior wall: 2x6 stud"].unit_cost == Decimal("6.50")
+
+    def test_price_in_other_unit_fails(self, client):
+        db = client.session_factory()
+        db.add(
+            PriceBookItem(
+                tenant_id=client.tenant_id,
+                vendor="ABC Lumber",
+                sku="PLATE-26",
+                description="2x6 plate, 16 ft",
+                unit="EA",
+                price=Decimal("14.20"),
+                effective_from=date(2020, 1, 1),
+            )
+        )
+        db.commit()
+        db.close()
+        path = f"/assemblies/expand/{client.project_id}"
+        body = {"instances": [wall(client, "10")], "resolve_prices": True}
+        preview = client.post(path, json={**body, "dry_run": True}).json()
+        assert (
+            "priced per EA, which doesn't convert to LF"
+            in preview["errors"][0]["error"]
+        )
+        assert client.post(path, json=body).status_code == 400
+
+
+def test_expander_memoizes_per_assembly_and_dimensions(client):
+    db = client.session_factory()
+    expander = AssemblyExpander(db, client.tenant_id)
+    assert expander.load([uuid.UUID(client.wall_id)]) == []
+    first = expander.expand(
+        AssemblyInstance(
+            assembly_id=client.wall_id, length_ft=Decimal("8"), height_ft=9
+        )
+    )
+    again = expander.expand(
+        AssemblyInstance(
+            assembly_id=client.wall_id, length_ft=8, height_ft=Decimal("9.00")
+        )
+    )
+    db.close()
+    assert first is again
+    assert expander.expansion_count == 1
@@ -0,0 +1,292 @@
+import io
+import random
+import uuid
+import zipfile
+import zlib
+from datetime import datetime, timezone
+
+import pytest
+
+from app.api import files as files_api
+from app.files import blobs, bundles, text
+from app.files.bundles import BundleEntry, ZipBundle, entry_name, unique_names
+from app.models.blob import Blob
+from app.models.file import File
+from app.models.file_text import FileText
+from app.storage import LocalStorage
+
+MODIFIED = datetime(2024, 3, 5, 14, 30, 12, tzinfo=timezone.utc)
+
+
+def stored_entries(storage, contents):
+    entries = []
+    for name, data in contents.items():
+        key = f"objects/{uuid.uuid4()}"
+        storage.save(key, io.BytesIO(data))
+        entries.append(
+            BundleEntry(
+                name=name,
+                storage_key=key,
+                size=len(data),
+                crc32=zlib.crc32(data),
+                modified=MODIFIED,
+            )
+        )
+    return entries
+
+
+CONTENTS = {
+    "DRAWING/A-101.pdf": random.Random(1).randbytes(300_000),
+    "DRAWING/A-102.pdf": random.Random(2).randbytes(5_000),
+    "PHOTO/site.jpg": b"",
+    "DOCUMENT/spec.docx": b"PK" + b"x" * 1000,
+}
+
+
+class TestZipBundle:
+    def test_stored_archive(self, tmp_path):
+        storage = LocalStorage(str(tmp_path))
+        bundle = ZipBundle(stored_entries(storage, CONTENTS), storage)
+        data = b"".join(bundle)
+        assert len(data) == bundle.size
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            assert archive.testzip() is None
+            assert archive.namelist() == list(CONTENTS)
+            for info in archive.infolist():
+                assert info.compress_type == zipfile.ZIP_STORED
+                assert info.date_time == (2024, 3, 5, 14, 30, 12)
+                assert archive.read(info) == CONTENTS[info.filename]
+
+    def test_ranges_match_the_whole(self, tmp_path):
+        storage = LocalStorage(str(tmp_path))
+        bundle = ZipBundle(stored_entries(storage, CONTENTS), storage)
+        data = b"".join(bundle)
+        rng = random.Random(0)
+        for _ in range(50):
+            start = rng.randrange(len(data))
+            length = rng.randrange(1, len(data) - start + 1)
+            assert (
+                b"".join(bundle.iter_range(start, length))
+                == data[start : start + length]
+            )
+
+    def test_deterministic(self, tmp_path):
+        storage = LocalStorage(str(tmp_path))
+        entries = stored_entries(storage, CONTENTS)
+        first, second = ZipBundle(entries, storage), ZipBundle(list(entries), storage)
+        assert first.etag == second.etag
+        assert b"".join(first) == b"".join(second)
+
+    def test_compressible_entries_are_deflated(self, tmp_path):
+        storage = LocalStorage(str(tmp_path))
+        contents = {**CONTENTS, "DOCUMENT/takeoff.csv": b"category,quantity\n" * 10_000}
+        bundle = ZipBundle(stored_entries(storage, contents), storage)
+        assert bundle.size is None
+        data = b"".join(bundle)
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            assert archive.testzip() is None
+            info = archive.getinfo("DOCUMENT/takeoff.csv")
+            assert info.compress_type == zipfile.ZIP_DEFLATED
+            assert info.compress_size < info.file_size / 50
+            assert (
+                archive.getinfo("DRAWING/A-101.pdf").compress_type == zipfile.ZIP_STORED
+            )
+            assert [archive.read(name) for name in contents] == list(contents.values())
+
+    def test_entries_without_crc(self, tmp_path):
+        storage = LocalStorage(str(tmp_path))
+        entries = stored_entries(storage, CONTENTS)
+        entries[0].crc32 = None
+        bundle = ZipBundle(entries, storage)
+        assert bundle.size is None
+        with zipfile.ZipFile(io.BytesIO(b"".join(bundle))) as archive:
+            assert archive.testzip() is None
+            assert archive.infolist()[0].CRC == zlib.crc32(
+                CONTENTS["DRAWING/A-101.pdf"]
+            )
+            assert [archive.read(name) for name in CONTENTS] == list(CONTENTS.values())
+
+    @pytest.mark.parametrize("compressible", [False, True])
+    def test_zip64(self, tmp_path, monkeypatch, compressible):
+        # Lower the thresholds so small files exercise the ZIP64 records
+        monkeypatch.setattr(bundles, "_ZIP64_LIMIT", 4096)
+        monkeypatch.setattr(bundles, "_ZIP64_COUNT_LIMIT", 3)
+        storage = LocalStorage(str(tmp_path))
+        contents = dict(CONTENTS)
+        if compressible:
+            contents["DOCUMENT/log.txt"] = b"line\n" * 2000
+        bundle = ZipBundle(stored_entries(storage, contents), storage)
+        data = b"".join(bundle)
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            assert archive.testzip() is None
+            assert [archive.read(name) for name in contents] == list(contents.values())
+
+    def test_names(self):
+        assert entry_name("DRAWING", "../../etc/passwd") == "DRAWING/passwd"
+        assert entry_name("DRAWING", "C:\\plans\\A-101.pdf") == "DRAWING/A-101.pdf"
+        assert entry_name("DRAWING", "..") == "DRAWING/file"
+        assert unique_names(["a/plan.pdf", "a/Plan.pdf", "a/plan.pdf"]) == [
+            "a/plan.pdf",
+            "a/Plan (2).pdf",
+            "a/plan (3).pdf",
+        ]
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client(
+        {"/api/files": files_api.router},
+        [Blob, File, FileText],
+        storage_modules=[files_api, blobs, text],
+        task_modules=[blobs, text],
+        project_title="Lot 7 / Closeout",
+    )
+
+
+def upload(client, filename, data, file_type):
+    body = client.post(
+        "/api/files/upload-url",
+        params={"filename": filename, "project_id": str(client.project_id)},
+    ).json()
+    sha256 = client.put(body["upload_url"], content=data).json()["sha256"]
+    response = client.post(
+        "/api/files/",
+        json={
+            "project_id": str(client.project_id),
+            "filename": filename,
+            "file_type": file_type,
+            "sha256": sha256,
+        },
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.fixture
+def project_files(client):
+    return [
+        upload(client, "A-102.pdf", CONTENTS["DRAWING/A-102.pdf"], "DRAWING"),
+        upload(client, "A-101.pdf", CONTENTS["DRAWING/A-101.pdf"], "DRAWING"),
+        upload(client, "spec.docx", CONTENTS["DOCUMENT/spec.docx"], "DOCUMENT"),
+        # Same name in the same folder, and content shared with another file
+        upload(client, "A-101.pdf", CONTENTS["DRAWING/A-101.pdf"], "DRAWING"),
+    ]
+
+
+class TestBundleApi:
+    def test_whole_project(self, client, project_files):
+        response = client.get(
+            "/api/files/bundle", params={"project_id": str(client.project_id)}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["content-length"] == str(len(response.content))
+        assert (
+            'filename="Lot 7 _ Closeout.zip"' in response.headers["content-disposition"]
+        )
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            assert archive.testzip() is None
+            assert sorted(archive.namelist()) == [
+                "DOCUMENT/spec.docx",
+                "DRAWING/A-101 (2).pdf",
+                "DRAWING/A-101.pdf",
+                "DRAWING/A-102.pdf",
+            ]
+            assert (
+                archive.read("DRAWING/A-101 (2).pdf") == CONTENTS["DRAWING/A-101.pdf"]
+            )
+
+    def test_selection(self, client, project_files):
+        params = {"project_id": str(client.project_id), "file_type": "DOCUMENT"}
+        with zipfile.ZipFile(
+            io.BytesIO(client.get("/api/files/bundle", params=params).content)
+        ) as archive:
+            assert archive.namelist() == ["DOCUMENT/spec.docx"]
+        params = {
+            "project_id": str(client.project_id),
+            "file_id": [project_files[0]["id"], project_files[2]["id"]],
+        }
+        with zipfile.ZipFile(
+            io.BytesIO(client.get("/api/files/bundle", params=params).content)
+        ) as archive:
+            assert sorted(archive.namelist()) == [
+                "DOCUMENT/spec.docx",
+                "DRAWING/A-102.pdf",
+            ]
+        params = {"project_id": str(client.project_id), "file_type": "PHOTO"}
+        assert client.get("/api/files/bundle", params=params).status_code == 404
+
+    def test_resume(self, client, project_files):
+        params = {"project_id": str(client.project_id)}
+        full = client.get("/api/files/bundle", params=params)
+        etag = full.headers["etag"]
+        cut = len(full.content) // 3
+        response = client.get(
+            "/api/files/bundle",
+            params=params,
+            headers={"Range": f"bytes={cut}-", "If-Range": etag},
+        )
+        assert response.status_code == 206
+        assert (
+            response.headers["content-range"]
+            == f"bytes {cut}-{len(full.content) - 1}/{len(full.content)}"
+        )
+        assert full.content[:cut] + response.content == full.content
+
+        # The selection changed since the partial download: start over
+        upload(client, "A-103.pdf", b"new sheet", "DRAWING")
+        response = client.get(
+            "/api/files/bundle",
+            params=params,
+            headers={"Range": f"bytes={cut}-", "If-Range": etag},
+        )
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    def test_deflated_bundle_streams_without_ranges(self, client, project_files):
+        upload(client, "takeoff.csv", b"category,quantity\n" * 5000, "DOCUMENT")
+        response = client.get(
+            "/api/files/bundle",
+            params={"project_id": str(client.project_id)},
+            headers={"Range": "bytes=10-"},
+        )
+        assert response.status_code == 200
+        assert response.headers["accept-ranges"] == "none"
+        assert "content-length" not in response.headers
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            assert archive.testzip() is None
+            assert (
+                archive.getinfo("DOCUMENT/takeoff.csv").compress_type
+                == zipfile.ZIP_DEFLATED
+            )
+
+    def test_unknown_project(self, client):
+        assert (
+            client.get(
+                "/api/files/bundle", params={"project_id": str(uuid.uuid4())}
+            ).status_code
+            == 404
+        )
+
+    def test_blobs_without_crc(self, client, project_files):
+        db = client.session_factory()
+        db.query(Blob).update({Blob.crc32: None})
+        db.commit()
+        db.close()
+        response = client.get(
+            "/api/files/bundle", params={"project_id": str(client.project_id)}
+        )
+        # Streamed with CRCs computed on the fly, so no size or ranges up front
+        assert response.headers["accept-ranges"] == "none"
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            assert archive.testzip() is None
+            assert archive.read("DRAWING/A-101.pdf") == CONTENTS["DRAWING/A-101.pdf"]
+        # ...and backfilled by a background task, so the next bundle is resumable again
+        db = client.session_factory()
+        assert db.query(Blob).filter(Blob.crc32 == None).count() == 0
+        db.close()
+        response = client.get(
+            "/api/files/bundle", params={"project_id": str(client.project_id)}
+        )
+        assert response.headers["accept-ranges"] == "bytes"
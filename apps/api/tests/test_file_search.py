@@ -0,0 +1,283 @@
+import io
+import os
+import uuid
+
+import pytest
+from reportlab.pdfgen import canvas
+from sqlalchemy.dialects import postgresql
+
+from app.api import files as files_api
+from app.core.config import settings
+from app.files import text
+from app.files.text import (
+    extract_file_text,
+    extract_pdf_text,
+    extract_plain_text,
+    search_query,
+)
+from app.models.blob import Blob
+from app.models.file import File, FileType
+from app.models.file_text import FileText
+from app.models.project import BuildProject
+from app.models.tenant import Tenant
+
+
+def pdf_bytes(*pages):
+    out = io.BytesIO()
+    pdf = canvas.Canvas(out)
+    for page in pages:
+        pdf.drawString(72, 720, page)
+        pdf.showPage()
+    pdf.save()
+    return out.getvalue()
+
+
+class TestExtraction:
+    def test_pdf_pages_in_order(self):
+        content = extract_pdf_text(
+            io.BytesIO(pdf_bytes("Window Schedule", "Door Hardware")), 10_000
+        )
+        assert content.index("Window Schedule") < content.index("Door Hardware")
+
+    def test_pdf_stops_at_limit(self):
+        content = extract_pdf_text(
+            io.BytesIO(pdf_bytes(*[f"Sheet {i} framing notes" for i in range(50)])), 60
+        )
+        assert len(content) == 60
+        assert "Sheet 49" not in content
+
+    def test_plain_text_encodings(self):
+        assert (
+            extract_plain_text(io.BytesIO("Béton armé\x00".encode()), 100)
+            == "Béton armé"
+        )
+        assert (
+            extract_plain_text(io.BytesIO("Béton armé".encode("cp1252")), 100)
+            == "Béton armé"
+        )
+        # A multi-byte character cut off by the read limit is dropped, not a decoding failure
+        assert extract_plain_text(io.BytesIO("aé".encode()), 1)[:1] == "a"
+
+
+def test_search_query_uses_the_index():
+    sql = str(
+        search_query(uuid.uuid4(), '"window schedule" -draft', uuid.uuid4()).compile(
+            dialect=postgresql.dialect()
+        )
+    )
+    assert "file_texts.search_vector @@ websearch_to_tsquery" in sql
+    assert "file_texts.tenant_id = " in sql and "file_texts.project_id = " in sql
+    # Snippets only for the page of results
+    assert sql.index("ts_headline") < sql.index("FROM files JOIN (SELECT")
+    assert "LIMIT" in sql.split("FROM files JOIN", 1)[1]
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client(
+        {"/api/files": files_api.router},
+        [Blob, File, FileText],
+        storage_modules=[files_api, text],
+        task_modules=[text],
+    )
+
+
+def upload(client, data, filename, file_type="DOCUMENT"):
+    body = client.post(
+        "/api/files/upload-url",
+        params={"filename": filename, "project_id": str(client.project_id)},
+    ).json()
+    sha256 = client.put(body["upload_url"], content=data).json()["sha256"]
+    response = client.post(
+        "/api/files/",
+        json={
+            "project_id": str(client.project_id),
+            "filename": filename,
+            "file_type": file_type,
+            "sha256": sha256,
+        },
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def indexed(client):
+    db = client.session_factory()
+    try:
+        return {str(row.file_id): row for row in db.query(FileText).all()}
+    finally:
+        db.close()
+
+
+class TestIndexing:
+    def test_documents_are_indexed_on_save(self, client):
+        pdf = upload(
+            client,
+            pdf_bytes("Window Schedule", "Type A casement"),
+            "A-601.pdf",
+            "DRAWING",
+        )
+        notes = upload(client, b"Pour footings Tuesday", "site notes.txt")
+        upload(client, b"AC1032 binary", "A-101.dwg", "DRAWING")
+        rows = indexed(client)
+        assert set(rows) == {pdf["id"], notes["id"]}
+        assert "Window Schedule" in rows[pdf["id"]].content
+        assert rows[notes["id"]].content == "Pour footings Tuesday"
+        assert str(rows[pdf["id"]].project_id) == str(client.project_id)
+
+    def test_shared_content_extracted_once(self, client, monkeypatch):
+        calls = []
+        real_extract = text.extract_pdf_text
+        monkeypatch.setattr(
+            text, "extract_pdf_text", lambda f, n: calls.append(1) or real_extract(f, n)
+        )
+        data = pdf_bytes("Window Schedule")
+        first = upload(client, data, "A-601.pdf")
+        second = upload(client, data, "A-601 rev B.pdf")
+        assert len(calls) == 1
+        rows = indexed(client)
+        assert rows[first["id"]].content == rows[second["id"]].content
+
+    def test_files_without_blobs_extracted_separately(self, client):
+        db = client.session_factory()
+        files = []
+        for name, data in [("a.txt", b"Pour footings"), ("b.txt", b"Frame walls")]:
+            key = f"legacy/{name}"
+            client.storage.save(key, io.BytesIO(data))
+            file = File(
+                tenant_id=client.tenant_id,
+                project_id=client.project_id,
+                filename=name,
+                file_type=FileType.DOCUMENT,
+                storage_key=key,
+            )
+            db.add(file)
+            files.append(file)
+        db.commit()
+        file_ids = [str(file.id) for file in files]
+        db.close()
+
+        for file_id in file_ids:
+            extract_file_text(file_id, client.session_factory, client.storage)
+        rows = indexed(client)
+        assert rows[file_ids[0]].content == "Pour footings"
+        assert rows[file_ids[1]].content == "Frame walls"
+
+    def test_unreadable_pdf_is_skipped(self, client):
+        file = upload(client, b"%PDF-1.4 truncated", "broken.pdf")
+        assert file["id"] not in indexed(client)
+
+    def test_redelivery_is_a_no_op(self, client, monkeypatch):
+        file = upload(client, b"Pour footings Tuesday", "notes.txt")
+        monkeypatch.setattr(
+            text, "extract_plain_text", lambda f, n: pytest.fail("extracted twice")
+        )
+        assert extract_file_text(
+            file["id"], client.session_factory, client.storage
+        ) == len("Pour footings Tuesday")
+        assert len(indexed(client)) == 1
+
+    def test_text_is_capped(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "FILE_TEXT_MAX_CHARS", 10)
+        file = upload(client, b"Pour footings Tuesday", "notes.txt")
+        assert indexed(client)[file["id"]].content == "Pour footi"
+
+
+def test_search_requires_a_query(client):
+    assert client.get("/api/files/search", params={"q": ""}).status_code == 422
+
+
+@pytest.fixture
+def pg_client(make_client):
+    # Ranking and snippets are Postgres text search; SQLite has no equivalent
+    database_url = os.environ.get("TEST_DATABASE_URL")
+    if not database_url:
+        pytest.skip("set TEST_DATABASE_URL to a scratch Postgres database")
+    return make_client(
+        {"/api/files": files_api.router},
+        [Blob, File, FileText],
+        storage_modules=[files_api, text],
+        task_modules=[text],
+        database_url=database_url,
+    )
+
+
+class TestSearchEndpoint:
+    def test_ranked_with_snippets(self, pg_client):
+        upload(
+            pg_client, b"General notes. The window schedule is on A-601.", "notes.txt"
+        )
+        schedule = upload(
+            pg_client,
+            pdf_bytes("Window Schedule", "Window types A-C, schedule notes"),
+            "A-601.pdf",
+        )
+        upload(pg_client, b"Pour footings Tuesday", "site.txt")
+
+        response = pg_client.get("/api/files/search", params={"q": "window schedule"})
+        assert response.status_code == 200
+        results = response.json()
+        assert [r["file"]["filename"] for r in results] == ["A-601.pdf", "notes.txt"]
+        assert results[0]["file"]["id"] == schedule["id"]
+        assert results[0]["rank"] >= results[1]["rank"] > 0
+        assert "<mark>window</mark>" in results[1]["snippet"].lower()
+
+    def test_web_query_syntax(self, pg_client):
+        upload(pg_client, b"window schedule draft", "draft.txt")
+        upload(pg_client, b"window schedule issued", "issued.txt")
+        results = pg_client.get(
+            "/api/files/search", params={"q": '"window schedule" -draft'}
+        ).json()
+        assert [r["file"]["filename"] for r in results] == ["issued.txt"]
+
+    def test_snippets_are_escaped(self, pg_client):
+        upload(pg_client, b"<script>alert(1)</script> window", "x.txt")
+        snippet = pg_client.get("/api/files/search", params={"q": "window"}).json()[0][
+            "snippet"
+        ]
+        assert "<script>" not in snippet and "&lt;script&gt;" in snippet
+
+    def test_scoped_to_tenant_and_project(self, pg_client):
+        upload(pg_client, b"window schedule", "ours.txt")
+        db = pg_client.session_factory()
+        other_project = BuildProject(tenant_id=pg_client.tenant_id, title="Lot 8")
+        other_tenant = Tenant(name="Other Builder", slug="other")
+        db.add_all([other_project, other_tenant])
+        db.flush()
+        their_project = BuildProject(tenant_id=other_tenant.id, title="Lot 1")
+        db.add(their_project)
+        db.flush()
+        for tenant_id, project_id, filename in [
+            (pg_client.tenant_id, other_project.id, "lot8.txt"),
+            (other_tenant.id, their_project.id, "theirs.txt"),
+        ]:
+            file = File(
+                tenant_id=tenant_id,
+                project_id=project_id,
+                filename=filename,
+                file_type=FileType.DOCUMENT,
+                storage_key=f"{tenant_id}/{filename}",
+            )
+            db.add(file)
+            db.flush()
+            db.add(
+                FileText(
+                    file_id=file.id,
+                    tenant_id=tenant_id,
+                    project_id=project_id,
+                    content="window schedule",
+                )
+            )
+        db.commit()
+        other_project_id = other_project.id
+        db.close()
+
+        def names(params):
+            results = pg_client.get(
+                "/api/files/search", params={"q": "window", **params}
+            ).json()
+            return sorted(r["file"]["filename"] for r in results)
+
+        assert names({}) == ["lot8.txt", "ours.txt"]
+        assert names({"project_id": str(pg_client.project_id)}) == ["ours.txt"]
+        assert names({"project_id": str(other_project_id)}) == ["lot8.txt"]
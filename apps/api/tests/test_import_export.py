@@ -0,0 +1,421 @@
+import io
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from app.api import materials as materials_api
+from app.models.audit import AuditLog
+from app.models.material import MaterialCategory, MaterialLineItem, UnitOfMeasure
+from app.models.project import BuildProject
+from app.models.schedule import MilestonePhase
+from app.utils import import_export, xlsx
+from app.utils.import_export import (
+    MONEY_FORMAT,
+    PERCENT_FORMAT,
+    MaterialXlsxImporter,
+    export_materials_to_csv,
+    export_materials_to_xlsx,
+    export_schedule_to_csv,
+    export_schedule_to_xlsx,
+    iter_materials_csv,
+    write_materials_csv,
+    write_schedule_csv,
+)
+from app.utils.xlsx import XlsxStreamWriter
+
+
+def material(i, category="FRAMING", cost="10.00"):
+    return {
+        "id": uuid.UUID(int=i),
+        "category": MaterialCategory(category),
+        "description": f"Item {i}",
+        "quantity": Decimal("4.000"),
+        "unit": UnitOfMeasure.EA,
+        "wastage_factor": Decimal("0.1000"),
+        "total_qty": Decimal("4.400"),
+        "unit_cost": Decimal("2.50"),
+        "total_cost": Decimal(cost),
+        "notes": None,
+    }
+
+
+class TestMaterialsXlsxExport:
+    def test_sheet_per_category_with_summary(self):
+        out = io.BytesIO()
+        rows = [material(1, "CONCRETE", "5.00"), material(2), material(3)]
+
+        assert export_materials_to_xlsx(rows, out) == 3
+        workbook = load_workbook(out)
+        assert workbook.sheetnames == ["Summary", "CONCRETE", "FRAMING"]
+        summary = list(workbook["Summary"].values)
+        assert summary[1:] == [("CONCRETE", 1, 5), ("FRAMING", 2, 20), ("TOTAL", 3, 25)]
+
+    def test_typed_numeric_cells(self):
+        out = io.BytesIO()
+        export_materials_to_xlsx([material(1)], out)
+        sheet = load_workbook(out)["FRAMING"]
+
+        headers = [c.value for c in sheet[1]]
+        row = dict(zip(headers, sheet[2], strict=True))
+        assert row["total_cost"].value == 10
+        assert row["total_cost"].data_type == "n"
+        assert row["total_cost"].number_format == MONEY_FORMAT
+        assert row["wastage_factor"].number_format == PERCENT_FORMAT
+        assert row["id"].value == str(uuid.UUID(int=1))
+        assert row["category"].value == "FRAMING"
+        assert row["notes"].value is None
+
+    def test_schedule_date_cells(self):
+        out = io.BytesIO()
+        milestone = {
+            "id": uuid.UUID(int=1),
+            "phase": MilestonePhase.FRAMING,
+            "description": "Walls",
+            "baseline_start_date": date(2030, 1, 1),
+            "baseline_end_date": date(2030, 2, 1),
+        }
+        assert export_schedule_to_xlsx([milestone], out) == 1
+        row = list(load_workbook(out)["Schedule"].iter_rows(min_row=2))[0]
+        assert row[3].is_date
+        assert row[3].value.date() == date(2030, 1, 1)
+
+
+class TestMaterialsCsvExport:
+    def test_streaming_matches_string_export(self):
+        rows = [material(i) for i in range(5)]
+        out = io.BytesIO()
+        assert write_materials_csv(rows, out) == 5
+        assert out.getvalue().decode() == export_materials_to_csv(rows)
+
+    def test_chunks(self, monkeypatch):
+        monkeypatch.setattr(import_export, "CSV_CHUNK_ROWS", 2)
+        chunks = list(iter_materials_csv(material(i) for i in range(5)))
+        assert len(chunks) == 3
+        assert "".join(chunks).count("\n") == 6
+
+    def test_no_rows(self):
+        assert export_materials_to_csv([]) == ""
+
+
+class TestScheduleCsvExport:
+    def test_streaming_matches_string_export(self, monkeypatch):
+        monkeypatch.setattr(import_export, "CSV_CHUNK_ROWS", 2)
+        rows = [
+            {
+                "id": uuid.UUID(int=i),
+                "phase": MilestonePhase.FRAMING,
+                "description": f"Walls {i}",
+                "baseline_start_date": datetime(2030, 1, 1, 8, 30),
+                "baseline_end_date": date(2030, 2, 1),
+            }
+            for i in range(5)
+        ]
+        out = io.BytesIO()
+        assert write_schedule_csv(rows, out) == 5
+        content = out.getvalue().decode()
+        assert content == export_schedule_to_csv(rows)
+        assert content.count("\n") == 6
+        assert "2030-01-01," in content
+
+    def test_no_rows(self):
+        out = io.BytesIO()
+        assert write_schedule_csv([], out) == 0
+        assert out.getvalue() == b""
+
+
+def seed_items(db, project):
+    for i, category in enumerate(["FRAMING", "CONCRETE", "FRAMING"]):
+        db.add(
+            MaterialLineItem(
+                project_id=project.id,
+                category=MaterialCategory(category),
+                description=f"Item {i}",
+                quantity=Decimal("1"),
+                unit=UnitOfMeasure.EA,
+                unit_cost=Decimal("3"),
+                total_cost=Decimal("3"),
+            )
+        )
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client(
+        {"/materials": materials_api.router},
+        [MaterialLineItem, AuditLog],
+        seed=seed_items,
+    )
+
+
+class TestExportEndpoints:
+    def test_xlsx_download(self, client):
+        response = client.get(f"/materials/export-xlsx/{client.project_id}")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == import_export.XLSX_CONTENT_TYPE
+        workbook = load_workbook(io.BytesIO(response.content))
+        assert workbook.sheetnames == ["Summary", "CONCRETE", "FRAMING"]
+
+    def test_csv_download(self, client):
+        response = client.get(f"/materials/export-csv/{client.project_id}")
+        assert response.status_code == 200
+        lines = response.text.strip().splitlines()
+        assert lines[0].startswith("id,category,description")
+        assert len(lines) == 4
+
+    def test_other_tenant_project_not_found(self, client):
+        assert client.get(f"/materials/export-xlsx/{uuid.uuid4()}").status_code == 404
+
+
+class TestXlsxStreamWriter:
+    def test_cell_types_round_trip(self):
+        out = io.BytesIO()
+        workbook = XlsxStreamWriter(out)
+        sheet = workbook.add_sheet(
+            "Values: a/b", ["text", "flag", "when", "kind", "count"]
+        )
+        sheet.append(
+            [
+                " padded\x01",
+                True,
+                datetime(2030, 1, 2, 3, 4, 5),
+                MaterialCategory.FRAMING,
+                7,
+            ]
+        )
+        workbook.close()
+
+        loaded = load_workbook(out)
+        assert loaded.sheetnames == ["Values_ a_b"]
+        assert [c.value for c in loaded.active[2]] == [
+            " padded",
+            True,
+            datetime(2030, 1, 2, 3, 4, 5),
+            "FRAMING",
+            7,
+        ]
+
+    def test_duplicate_sheet_names(self):
+        out = io.BytesIO()
+        workbook = XlsxStreamWriter(out)
+        workbook.add_sheet("Takeoff", ["a"])
+        workbook.add_sheet("takeoff", ["a"])
+        workbook.close()
+        assert load_workbook(out).sheetnames == ["Takeoff", "takeoff (2)"]
+
+    def test_full_sheet_continues_on_next(self, monkeypatch):
+        monkeypatch.setattr(xlsx, "MAX_SHEET_ROWS", 3)
+        out = io.BytesIO()
+        workbook = XlsxStreamWriter(out)
+        workbook.add_sheet("Framing", ["n"])
+        summary = workbook.add_sheet("Summary", ["n"], first=True)
+        for n in range(5):
+            summary.append([n])
+        assert summary.rows == 5
+        workbook.close()
+
+        loaded = load_workbook(out)
+        assert loaded.sheetnames == ["Summary", "Summary (2)", "Summary (3)", "Framing"]
+        assert [
+            [c.value for c in row] for row in loaded["Summary (2)"].iter_rows()
+        ] == [["n"], [2], [3]]
+        assert [
+            [c.value for c in row] for row in loaded["Summary (3)"].iter_rows()
+        ] == [["n"], [4]]
+
+    def test_full_standalone_sheet_raises(self, monkeypatch):
+        monkeypatch.setattr(xlsx, "MAX_SHEET_ROWS", 2)
+        sheet = xlsx.XlsxSheet(io.BytesIO(), ["n"], [None])
+        sheet.append([1])
+        with pytest.raises(ValueError):
+            sheet.append([2])
+
+
+def materials_workbook(
+    rows,
+    headers=(
+        "category",
+        "description",
+        "quantity",
+        "unit",
+        "unit_cost",
+        "wastage_factor",
+    ),
+):
+    out = io.BytesIO()
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "Takeoff"
+    sheet.append(list(headers))
+    for row in rows:
+        sheet.append(list(row))
+    workbook.save(out)
+    out.seek(0)
+    return out
+
+
+class TestMaterialsXlsxImport:
+    def test_batches(self):
+        rows = [("framing", f"Stud {i}", 10, "EA", 2.5, 0.1) for i in range(5)]
+        importer = MaterialXlsxImporter(batch_size=2)
+        batches = list(importer.iter_batches(materials_workbook(rows)))
+
+        assert [len(b) for b in batches] == [2, 2, 1]
+        first = batches[0][0]
+        assert first["category"] == MaterialCategory.FRAMING
+        assert first["quantity"] == Decimal("10")
+        assert first["unit_cost"] == Decimal("2.5")
+        assert first["wastage_factor"] == Decimal("0.1")
+
+    def test_invalid_rows_are_counted(self):
+        rows = [
+            ("FRAMING", "Stud", 10, "EA", 2.5, 0),
+            ("NOPE", "Bad", 1, "EA", 1, 0),
+            (None,) * 6,
+        ]
+        importer = MaterialXlsxImporter()
+        batches = list(importer.iter_batches(materials_workbook(rows)))
+
+        assert sum(len(b) for b in batches) == 1
+        assert importer.row_count == 2
+        assert importer.error_count == 1
+        assert importer.errors[0]["sheet"] == "Takeoff"
+        assert importer.format_error(importer.errors[0]).startswith(
+            "Takeoff row 3: category 'NOPE'"
+        )
+        with pytest.raises(import_export.ImportError):
+            importer.raise_for_errors()
+
+    def test_missing_headers(self):
+        importer = MaterialXlsxImporter()
+        with pytest.raises(import_export.ImportError, match="required headers"):
+            list(importer.iter_batches(materials_workbook([], headers=("category",))))
+
+    def test_not_a_workbook(self):
+        with pytest.raises(import_export.ImportError, match="Invalid XLSX"):
+            list(MaterialXlsxImporter().iter_batches(io.BytesIO(b"a,b\n")))
+
+    def test_export_round_trip(self):
+        out = io.BytesIO()
+        export_materials_to_xlsx(
+            [material(1, "CONCRETE"), material(2), material(3)], out
+        )
+        out.seek(0)
+        batches = list(MaterialXlsxImporter().iter_batches(out))
+        assert sorted(m["description"] for b in batches for m in b) == [
+            "Item 1",
+            "Item 2",
+            "Item 3",
+        ]
+
+
+class TestImportEndpoints:
+    def count(self, client):
+        db = client.session_factory()
+        try:
+            return (
+                db.query(MaterialLineItem).count(),
+                db.get(BuildProject, client.project_id).data_version,
+            )
+        finally:
+            db.close()
+
+    def upload(self, client, path, body, filename):
+        return client.post(
+            f"/materials/{path}/{client.project_id}", files={"file": (filename, body)}
+        )
+
+    def test_xlsx_import(self, client):
+        _, version = self.count(client)
+        body = materials_workbook(
+            [("CONCRETE", "Footing", 4, "CF", 10, 0.25)]
+        ).getvalue()
+        response = self.upload(client, "import-xlsx", body, "takeoff.xlsx")
+
+        assert response.status_code == 200
+        assert response.json()["success_count"] == 1
+        assert self.count(client) == (4, version + 1)
+        db = client.session_factory()
+        footing = db.query(MaterialLineItem).filter_by(description="Footing").one()
+        assert footing.total_qty == Decimal("5")
+        assert footing.total_cost == Decimal("50")
+        db.close()
+
+    def test_xlsx_import_is_all_or_nothing(self, client):
+        before = self.count(client)
+        body = materials_workbook(
+            [
+                ("CONCRETE", "Footing", 4, "CF", 10, 0),
+                ("CONCRETE", "Bad", -1, "CF", 1, 0),
+            ]
+        )
+        response = self.upload(client, "import-xlsx", body.getvalue(), "takeoff.xlsx")
+
+        assert response.status_code == 400
+        assert "Takeoff row 3" in response.json()["detail"]
+        assert self.count(client) == before
+
+    def test_csv_import(self, client):
+        body = "category,description,quantity,unit,unit_cost\nFRAMING,2x4,10,EA,3.50\n"
+        response = self.upload(client, "import-csv", body.encode(), "takeoff.csv")
+
+        assert response.status_code == 200
+        assert response.json()["success_count"] == 1
+        assert self.count(client)[0] == 4
+
+    def test_other_tenant_project_not_found(self, client):
+        body = materials_workbook([]).getvalue()
+        response = client.post(
+            f"/materials/import-xlsx/{uuid.uuid4()}", files={"file": ("t.xlsx", body)}
+        )
+        assert response.status_code == 404
+
+
+class TestImportDryRun:
+    BODY = "category,description,quantity,unit,unit_cost\nFRAMING,2x4,10,EA,3.50\nLUMBER,2x6,0,EA,1\nFRAMING,,1,BOX,1\n"
+
+    def test_csv_dry_run_returns_error_matrix(self, client):
+        response = client.post(
+            f"/materials/import-csv/{client.project_id}",
+            params={"dry_run": "true"},
+            files={"file": ("takeoff.csv", self.BODY.encode())},
+        )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["dry_run"] is True
+        assert (body["success_count"], body["error_count"]) == (1, 2)
+        assert [(e["row"], e["column"]) for e in body["errors"]] == [
+            (3, "category"),
+            (3, "quantity"),
+            (4, "unit"),
+            (4, "description"),
+        ]
+        assert TestImportEndpoints().count(client)[0] == 3
+
+    def test_xlsx_dry_run(self, client):
+        body = materials_workbook(
+            [
+                ("CONCRETE", "Footing", 4, "CF", 10, 0),
+                ("CONCRETE", "Bad", -1, "CF", 1, 0),
+            ]
+        )
+        response = client.post(
+            f"/materials/import-xlsx/{client.project_id}",
+            params={"dry_run": "true"},
+            files={"file": ("takeoff.xlsx", body.getvalue())},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["errors"] == [
+            {
+                "sheet": "Takeoff",
+                "row": 3,
+                "column": "quantity",
+                "value": "-1",
+                "error": "Quantity must be positive",
+            },
+        ]
+        assert TestImportEndpoints().count(client)[0] == 3
@@ -0,0 +1,232 @@
+import hashlib
+import io
+import uuid
+from pathlib import Path
+
+import pytest
+
+from app.api import materials as materials_api
+from app.api import uploads as uploads_api
+from app.imports import engine as import_engine
+from app.imports.engine import run_import
+from app.models.audit import AuditLog
+from app.models.import_job import ImportFormat, ImportJob, ImportJobStatus
+from app.models.material import MaterialLineItem
+from app.models.project import BuildProject
+from app.models.upload import UploadSession
+
+HEADER = "category,description,quantity,unit,wastage_factor,unit_cost,vendor,notes\n"
+
+
+def takeoff_csv(rows=2500, bad_row=None):
+    lines = [f"FRAMING,Stud {i},10,EA,0.1,4.25,,\n" for i in range(rows)]
+    if bad_row is not None:
+        lines[bad_row] = "NOPE,Bad,10,EA,0,1,,\n"
+    return (HEADER + "".join(lines)).encode()
+
+
+@pytest.fixture
+def client(make_client):
+    test_client = make_client(
+        {"/uploads": uploads_api.router, "/materials": materials_api.router},
+        [MaterialLineItem, AuditLog, UploadSession, ImportJob],
+        storage_modules=[uploads_api, materials_api, import_engine],
+        task_modules=[import_engine],
+    )
+    db = test_client.session_factory()
+    other = BuildProject(tenant_id=test_client.tenant_id, title="Lot 8")
+    db.add(other)
+    db.commit()
+    test_client.other_project_id = other.id
+    db.close()
+    return test_client
+
+
+def submit(client, data, project_id=None, filename="takeoff.csv", key=None, **params):
+    headers = {"Idempotency-Key": key} if key else {}
+    return client.post(
+        f"/materials/import-jobs/{project_id or client.project_id}",
+        params=params,
+        files={"file": (filename, data)},
+        headers=headers,
+    )
+
+
+def material_count(client):
+    db = client.session_factory()
+    try:
+        return db.query(MaterialLineItem).count()
+    finally:
+        db.close()
+
+
+def queued_job(client, data, **fields):
+    """A PENDING job whose file is in storage, without running it"""
+    db = client.session_factory()
+    project = db.get(BuildProject, client.project_id)
+    job = ImportJob(
+        tenant_id=project.tenant_id,
+        project_id=project.id,
+        format=ImportFormat.CSV,
+        filename="takeoff.csv",
+        storage_key=f"imports/{uuid.uuid4()}.csv",
+        **fields,
+    )
+    client.storage.save(job.storage_key, io.BytesIO(data))
+    db.add(job)
+    db.commit()
+    job_id = job.id
+    db.close()
+    return job_id
+
+
+def job_state(client, job_id):
+    return client.get(f"/materials/import-jobs/{job_id}").json()
+
+
+class TestImportJobs:
+    def test_job_imports_in_batches(self, client):
+        response = submit(client, takeoff_csv())
+        assert response.status_code == 202
+
+        job = job_state(client, response.json()["id"])
+        assert job["status"] == "COMPLETED"
+        assert job["progress"] == 100
+        assert (
+            job["rows_total"] == job["rows_processed"] == job["rows_imported"] == 2500
+        )
+        assert material_count(client) == 2500
+        # The job's copy of the file is removed once it finishes
+        assert list(Path(client.storage.root, "imports").rglob("*.csv")) == []
+        db = client.session_factory()
+        assert (
+            db.query(MaterialLineItem)
+            .filter(MaterialLineItem.import_job_id == uuid.UUID(job["id"]))
+            .count()
+            == 2500
+        )
+        assert db.get(BuildProject, client.project_id).data_version > 1
+        db.close()
+
+    def test_invalid_rows_fail_without_writing(self, client):
+        job = submit(client, takeoff_csv(bad_row=2200)).json()
+        assert job["status"] == "FAILED"
+        assert job["error_count"] == 1
+        assert job["errors"][0]["row"] == 2202
+        assert material_count(client) == 0
+
+    def test_dry_run(self, client):
+        job = submit(client, takeoff_csv(bad_row=5), dry_run=True).json()
+        assert job["status"] == "COMPLETED"
+        assert job["dry_run"] is True
+        assert job["rows_processed"] == 2500
+        assert job["error_count"] == 1
+        assert material_count(client) == 0
+
+    def test_idempotency_key(self, client):
+        first = submit(client, takeoff_csv(100), key="takeoff-v1")
+        second = submit(client, takeoff_csv(100), key="takeoff-v1")
+        assert second.status_code == 200
+        assert second.json()["id"] == first.json()["id"]
+        assert material_count(client) == 100
+
+        reused = submit(
+            client,
+            takeoff_csv(100),
+            project_id=client.other_project_id,
+            key="takeoff-v1",
+        )
+        assert reused.status_code == 409
+
+    def test_unsupported_file(self, client):
+        assert submit(client, b"%PDF", filename="takeoff.pdf").status_code == 400
+
+    def test_from_upload(self, client):
+        data = takeoff_csv(300)
+        upload = client.post(
+            "/uploads/",
+            json={
+                "project_id": str(client.project_id),
+                "filename": "takeoff.csv",
+                "total_size": len(data),
+            },
+        ).json()
+        client.put(
+            f"/uploads/{upload['id']}",
+            params={"offset": 0},
+            content=data,
+            headers={"X-Chunk-SHA256": hashlib.sha256(data).hexdigest()},
+        )
+        client.post(f"/uploads/{upload['id']}/complete")
+
+        job = client.post(f"/materials/import-jobs/from-upload/{upload['id']}").json()
+        assert job["status"] == "COMPLETED"
+        assert job["upload_id"] == upload["id"]
+        assert material_count(client) == 300
+
+
+class TestCancellation:
+    def test_cancel_queued_job(self, client):
+        job_id = queued_job(client, takeoff_csv(10))
+        response = client.post(f"/materials/import-jobs/{job_id}/cancel")
+        assert response.json()["status"] == "CANCELLED"
+
+        # The worker skips it when the message arrives
+        assert (
+            run_import(str(job_id), client.session_factory, client.storage)
+            == ImportJobStatus.CANCELLED
+        )
+        assert material_count(client) == 0
+        assert client.post(f"/materials/import-jobs/{job_id}/cancel").status_code == 409
+
+    def test_cancel_running_job_removes_its_rows(self, client, monkeypatch):
+        job_id = queued_job(client, takeoff_csv())
+        real_insert = import_engine.insert_material_records
+
+        calls = []
+
+        def cancel_after_first_batch(db, project_id, records, import_job_id=None):
+            calls.append(len(records))
+            if len(calls) == 2:
+                # The user cancels once the first batch is committed
+                client.post(f"/materials/import-jobs/{job_id}/cancel")
+            return real_insert(db, project_id, records, import_job_id)
+
+        monkeypatch.setattr(
+            import_engine, "insert_material_records", cancel_after_first_batch
+        )
+        status = run_import(str(job_id), client.session_factory, client.storage)
+
+        assert status == ImportJobStatus.CANCELLED
+        assert len(calls) == 2
+        assert material_count(client) == 0
+        assert job_state(client, job_id)["rows_imported"] == 0
+
+    def test_redelivered_job_starts_over(self, client):
+        job_id = queued_job(client, takeoff_csv(50), status=ImportJobStatus.PROCESSING)
+        db = client.session_factory()
+        # Rows left by a worker that died mid-job
+        import_engine.insert_material_records(
+            db,
+            client.project_id,
+            [
+                {
+                    "category": "FRAMING",
+                    "description": "Partial",
+                    "quantity": 1,
+                    "unit": "EA",
+                    "wastage_factor": 0,
+                    "unit_cost": 1,
+                    "notes": None,
+                }
+            ],
+            job_id,
+        )
+        db.commit()
+        db.close()
+
+        assert (
+            run_import(str(job_id), client.session_factory, client.storage)
+            == ImportJobStatus.COMPLETED
+        )
+        assert material_count(client) == 50
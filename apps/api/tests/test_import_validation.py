@@ -0,0 +1,109 @@
+from decimal import Decimal
+
+import pandas as pd
+
+from app.models.material import MaterialCategory, UnitOfMeasure
+from app.utils.import_validation import INVALID_CATEGORY, validate_material_frame
+
+
+def frame(*rows):
+    columns = [
+        "category",
+        "description",
+        "quantity",
+        "unit",
+        "wastage_factor",
+        "unit_cost",
+        "notes",
+    ]
+    return pd.DataFrame(list(rows), columns=columns)
+
+
+class TestValidateMaterialFrame:
+    def test_valid_rows_are_typed(self):
+        result = validate_material_frame(
+            frame([" framing ", " Studs ", "10", "ea", "", "2.50", " "])
+        )
+
+        assert result.errors == []
+        assert result.records == [
+            {
+                "category": MaterialCategory.FRAMING,
+                "description": "Studs",
+                "quantity": Decimal("10"),
+                "unit": UnitOfMeasure.EA,
+                "wastage_factor": Decimal("0"),
+                "unit_cost": Decimal("2.50"),
+                "notes": None,
+            }
+        ]
+
+    def test_error_matrix_reports_every_cell(self):
+        result = validate_material_frame(
+            frame(
+                ["FRAMING", "Studs", "10", "EA", "0.1", "2.50", ""],
+                ["LUMBER", "", "-1", "EA", "1.5", "abc", ""],
+                ["CONCRETE", "Slab", "x", "YD", "0", "1", ""],
+            )
+        )
+
+        assert result.row_count == 3
+        assert result.error_rows == 2
+        assert len(result.records) == 1
+        cells = [(e["row"], e["column"]) for e in result.errors]
+        assert cells == [
+            (3, "category"),
+            (3, "description"),
+            (3, "quantity"),
+            (3, "unit_cost"),
+            (3, "wastage_factor"),
+            (4, "unit"),
+            (4, "quantity"),
+        ]
+        assert result.errors[0] == {
+            "row": 3,
+            "column": "category",
+            "value": "LUMBER",
+            "error": INVALID_CATEGORY,
+        }
+        assert result.errors[2]["error"] == "Quantity must be positive"
+        assert result.errors[6]["error"] == "Invalid quantity value"
+
+    def test_row_numbers_and_dry_run(self):
+        result = validate_material_frame(
+            frame(
+                ["FRAMING", "Studs", "1", "EA", "", "1", ""],
+                ["NOPE", "Studs", "1", "EA", "", "1", ""],
+            ),
+            row_numbers=[10, 12],
+            build_records=False,
+        )
+        assert result.records == []
+        assert [e["row"] for e in result.errors] == [12]
+
+    def test_missing_optional_columns(self):
+        data = pd.DataFrame(
+            [["FRAMING", "Studs", "1", "EA", "1"]],
+            columns=["category", "description", "quantity", "unit", "unit_cost"],
+        )
+        [record] = validate_material_frame(data).records
+        assert record["wastage_factor"] == Decimal("0")
+        assert record["notes"] is None
+
+    def test_values_must_fit_their_columns(self):
+        result = validate_material_frame(
+            frame(
+                ["FRAMING", "Studs", "999999999.999", "EA", "", "1", ""],
+                ["FRAMING", "Studs", "1000000000", "EA", "", "1", ""],
+                ["FRAMING", "Studs", "999999999", "EA", "0.5", "1", ""],
+                ["FRAMING", "Studs", "1", "EA", "", "100000000", ""],
+                ["FRAMING", "Studs", "1000", "EA", "", "99999999.99", ""],
+            )
+        )
+        assert [(e["row"], e["column"], e["error"]) for e in result.errors] == [
+            (3, "quantity", "Quantity exceeds 999999999.999"),
+            (4, "quantity", "Quantity with wastage exceeds 999999999.999"),
+            (5, "unit_cost", "Unit cost exceeds 99999999.99"),
+            (6, "unit_cost", "Total cost exceeds 9999999999.99"),
+        ]
+        assert len(result.records) == 1
@@ -0,0 +1,114 @@
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+
+from app.auth.jwks import JwksKeySet
+from app.auth.jwt import ClerkAuth
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def key_set(jwks_server, rsa_private_key, clock):
+    jwks_server.add_key(rsa_private_key, "key-1")
+    return JwksKeySet(
+        jwks_server.url, ttl_seconds=60, min_refetch_seconds=10, clock=clock
+    )
+
+
+class TestJwksKeySet:
+    def test_first_lookup_fetches(self, key_set, jwks_server):
+        assert key_set.get_key("key-1")["kid"] == "key-1"
+        assert key_set.get_key("key-1") is not None
+        assert jwks_server.requests == 1
+
+    def test_unknown_kid_refetches_after_rotation(self, key_set, jwks_server, clock):
+        key_set.get_key("key-1")
+        jwks_server.add_key(
+            rsa.generate_private_key(public_exponent=65537, key_size=2048), "key-2"
+        )
+        clock.now += 10
+
+        assert key_set.get_key("key-2")["kid"] == "key-2"
+        assert jwks_server.requests == 2
+
+    def test_unknown_kid_refetch_is_rate_limited(self, key_set, jwks_server, clock):
+        key_set.get_key("key-1")
+        for _ in range(5):
+            assert key_set.get_key("bogus") is None
+        clock.now += 5
+        assert key_set.get_key("bogus") is None
+        assert jwks_server.requests == 1
+
+        clock.now += 5
+        key_set.get_key("bogus")
+        assert jwks_server.requests == 2
+
+    def test_ttl_refresh_runs_in_background(self, key_set, jwks_server, clock):
+        key_set.get_key("key-1")
+        clock.now += 60
+
+        # Served from the current keys while the refresh runs
+        assert key_set.get_key("key-1") is not None
+        key_set._background.join(timeout=5)
+        assert jwks_server.requests == 2
+
+    def test_failed_fetch_keeps_previous_keys(self, key_set, jwks_server, clock):
+        key_set.get_key("key-1")
+        jwks_server.fail = True
+        clock.now += 60
+        assert key_set.refresh() is False
+        assert key_set.get_key("key-1") is not None
+
+    def test_lookup_does_not_wait_for_running_fetch(self, key_set, jwks_server, clock):
+        key_set.get_key("key-1")
+        clock.now += 10
+        # Another thread is mid-fetch: the rotation lookup misses at once
+        key_set._fetch_lock.acquire()
+        try:
+            assert key_set.get_key("key-2") is None
+        finally:
+            key_set._fetch_lock.release()
+        assert jwks_server.requests == 1
+        assert key_set.get_key("key-1") is not None
+
+    def test_missing_kid_with_single_key(self, key_set):
+        assert key_set.get_key(None)["kid"] == "key-1"
+
+
+class TestClerkAuthJwks:
+    def test_verifies_with_jwks_key(self, jwks_server, rsa_private_key, make_token):
+        jwks_server.add_key(rsa_private_key, "key-1")
+        auth = ClerkAuth(jwks_url=jwks_server.url)
+
+        claims = auth.verify_token(make_token(headers={"kid": "key-1"}))
+        assert claims["sub"] == "user_123"
+        assert auth.get_jwks()["keys"][0]["kid"] == "key-1"
+
+    def test_unknown_kid_rejected(self, jwks_server, rsa_private_key, make_token):
+        jwks_server.add_key(rsa_private_key, "key-1")
+        auth = ClerkAuth(jwks_url=jwks_server.url)
+
+        with pytest.raises(HTTPException) as exc:
+            auth.verify_token(make_token(headers={"kid": "other"}))
+        assert exc.value.status_code == 401
+
+    def test_wrong_key_rejected(self, jwks_server, make_token):
+        jwks_server.add_key(
+            rsa.generate_private_key(public_exponent=65537, key_size=2048), "key-1"
+        )
+        auth = ClerkAuth(jwks_url=jwks_server.url)
+
+        with pytest.raises(HTTPException):
+            auth.verify_token(make_token(headers={"kid": "key-1"}))
@@ -0,0 +1,258 @@
+import json
+import uuid
+
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.auth import membership as membership_module
+from app.auth.membership import INVALIDATION_CHANNEL, MembershipRoleResolver
+from app.db.base import Base, get_db
+from app.middleware.rbac import require_role
+from app.middleware.tenant import TenantContextMiddleware
+from app.models.tenant import Tenant
+from app.models.user import Membership, User, UserRole
+
+
+class FakeRedis:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, data):
+        self.published.append((channel, data))
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rbac.db'}")
+    Base.metadata.create_all(
+        engine, tables=[Tenant.__table__, User.__table__, Membership.__table__]
+    )
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def resolver(monkeypatch):
+    resolver = MembershipRoleResolver(ttl_seconds=60, redis_client=FakeRedis())
+    monkeypatch.setattr(membership_module, "membership_resolver", resolver)
+    return resolver
+
+
+@pytest.fixture
+def member(session_factory, resolver):
+    db = session_factory()
+    tenant = Tenant(name="Acme Homes", slug="acme")
+    user = User(
+        email="pm@acme.test",
+        first_name="Pat",
+        last_name="Manager",
+        external_id="user_123",
+    )
+    db.add_all([tenant, user])
+    db.flush()
+    membership = Membership(tenant_id=tenant.id, user_id=user.id, role=UserRole.PM)
+    db.add(membership)
+    db.commit()
+    ids = (str(tenant.id), str(user.id), membership.id)
+    db.close()
+    resolver._redis.published.clear()
+    return ids
+
+
+def count_queries(session_factory):
+    counter = {"n": 0}
+    engine = session_factory.kw["bind"]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(*args):
+        counter["n"] += 1
+
+    return counter
+
+
+class TestMembershipRoleResolver:
+    def test_resolves_role_and_caches(self, session_factory, member, resolver):
+        tenant_id, user_id, _ = member
+        queries = count_queries(session_factory)
+        db = session_factory()
+
+        assert resolver.resolve(db, tenant_id, user_id) == UserRole.PM
+        assert resolver.resolve(db, tenant_id, user_id) == UserRole.PM
+        assert queries["n"] == 1
+
+    def test_missing_membership_cached(self, session_factory, member, resolver):
+        tenant_id, _, _ = member
+        queries = count_queries(session_factory)
+        db = session_factory()
+        other = str(uuid.uuid4())
+
+        assert resolver.resolve(db, tenant_id, other) is None
+        assert resolver.resolve(db, tenant_id, other) is None
+        assert queries["n"] == 1
+
+    def test_non_uuid_ids_have_no_membership(self, session_factory, resolver):
+        assert resolver.resolve(session_factory(), "tenant_abc", "user_123") is None
+
+    def test_ttl_expiry(self, session_factory, member):
+        tenant_id, user_id, _ = member
+        now = [0.0]
+        resolver = MembershipRoleResolver(ttl_seconds=10, clock=lambda: now[0])
+        queries = count_queries(session_factory)
+        db = session_factory()
+
+        resolver.resolve(db, tenant_id, user_id)
+        now[0] = 10
+        resolver.resolve(db, tenant_id, user_id)
+        assert queries["n"] == 2
+
+    def test_commit_invalidates_and_publishes(self, session_factory, member, resolver):
+        tenant_id, user_id, membership_id = member
+        db = session_factory()
+        assert resolver.resolve(db, tenant_id, user_id) == UserRole.PM
+
+        membership = db.get(Membership, membership_id)
+        membership.role = UserRole.ADMIN
+        db.commit()
+
+        assert resolver.resolve(db, tenant_id, user_id) == UserRole.ADMIN
+        assert sorted(resolver._redis.published) == [
+            (INVALIDATION_CHANNEL, json.dumps([tenant_id, user_id])),
+            (INVALIDATION_CHANNEL, json.dumps([tenant_id, "user_123"])),
+        ]
+
+    def test_rollback_does_not_invalidate(self, session_factory, member, resolver):
+        tenant_id, user_id, membership_id = member
+        db = session_factory()
+        membership = db.get(Membership, membership_id)
+        membership.role = UserRole.SUB
+        db.flush()
+        db.rollback()
+        assert resolver._redis.published == []
+
+    def test_resolves_by_external_id(self, session_factory, member, resolver):
+        tenant_id, _, membership_id = member
+        db = session_factory()
+        assert resolver.resolve(db, tenant_id, "user_123") == UserRole.PM
+        assert resolver.resolve(db, tenant_id, "user_456") is None
+
+        membership = db.get(Membership, membership_id)
+        membership.role = UserRole.ADMIN
+        db.commit()
+        assert resolver.resolve(db, tenant_id, "user_123") == UserRole.ADMIN
+
+    def test_remote_invalidation_message(self, session_factory, member, resolver):
+        tenant_id, user_id, _ = member
+        queries = count_queries(session_factory)
+        db = session_factory()
+        resolver.resolve(db, tenant_id, user_id)
+
+        resolver.handle_message(
+            {"type": "message", "data": json.dumps([tenant_id, user_id]).encode()}
+        )
+        resolver.resolve(db, tenant_id, user_id)
+        assert queries["n"] == 2
+
+    def test_invalidation_during_lookup_not_cached(
+        self, session_factory, member, resolver
+    ):
+        tenant_id, user_id, _ = member
+        queries = count_queries(session_factory)
+
+        # A membership write commits while the lookup's query is in flight
+        @event.listens_for(session_factory.kw["bind"], "after_cursor_execute")
+        def _invalidate(*args):
+            if queries["n"] == 1:
+                resolver.invalidate(tenant_id, user_id)
+
+        db = session_factory()
+        resolver.resolve(db, tenant_id, user_id)
+        resolver.resolve(db, tenant_id, user_id)
+        resolver.resolve(db, tenant_id, user_id)
+        assert queries["n"] == 2
+
+    def test_clear_during_lookup_not_cached(self, session_factory, member, resolver):
+        tenant_id, user_id, _ = member
+        queries = count_queries(session_factory)
+
+        @event.listens_for(session_factory.kw["bind"], "after_cursor_execute")
+        def _clear(*args):
+            if queries["n"] == 1:
+                resolver.clear()
+
+        db = session_factory()
+        resolver.resolve(db, tenant_id, user_id)
+        resolver.resolve(db, tenant_id, user_id)
+        assert queries["n"] == 2
+
+
+class TestRequireRole:
+    @pytest.fixture
+    def client(self, session_factory, member, resolver):
+        tenant_id, user_id, _ = member
+        app = FastAPI()
+
+        @app.middleware("http")
+        async def fake_auth(request: Request, call_next):
+            request.state.tenant_id = tenant_id
+            request.state.user_id = request.headers.get("x-user", user_id)
+            # The JWT role claim must not be trusted
+            request.state.user_role = "OWNER"
+            return await call_next(request)
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+
+        @app.get("/pm-only")
+        async def pm_only(role: UserRole = Depends(require_role(UserRole.PM))):
+            return {"role": role.value}
+
+        @app.get("/admin-only")
+        async def admin_only(role: UserRole = Depends(require_role(UserRole.ADMIN))):
+            return {"role": role.value}
+
+        return TestClient(app)
+
+    def test_database_role_enforced(self, client):
+        assert client.get("/pm-only").json() == {"role": "PM"}
+        assert client.get("/admin-only").status_code == 403
+
+    def test_no_membership_forbidden(self, client):
+        response = client.get("/pm-only", headers={"x-user": str(uuid.uuid4())})
+        assert response.status_code == 403
+
+    def test_clerk_subject_authorized(
+        self, session_factory, member, clerk_pem, make_token
+    ):
+        tenant_id, _, _ = member
+        app = FastAPI()
+        app.add_middleware(TenantContextMiddleware)
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+
+        @app.get("/pm-only")
+        async def pm_only(role: UserRole = Depends(require_role(UserRole.PM))):
+            return {"role": role.value}
+
+        client = TestClient(app)
+        token = make_token(sub="user_123", tenant_id=tenant_id, role="OWNER")
+        response = client.get("/pm-only", headers={"Authorization": f"Bearer {token}"})
+        assert response.json() == {"role": "PM"}
+        token = make_token(sub="user_456", tenant_id=tenant_id)
+        response = client.get("/pm-only", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 403
@@ -0,0 +1,81 @@
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from app.core.metrics import InstrumentedQueuePool, record_cache_lookup
+from app.main import app
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+class TestMetricsEndpoint:
+    def test_exposes_prometheus_text(self, client):
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "buildpro_http_requests_in_flight" in response.text
+
+    def test_latency_labelled_by_route_template(self, client):
+        labels = {
+            "method": "GET",
+            "route": "/api/materials/{material_id}",
+            "status": "401",
+        }
+        before = sample("buildpro_http_request_duration_seconds_count", **labels)
+
+        client.get("/api/materials/7f0c1a9e-2f43-4a4c-9d6f-3b1e6f2d9a11")
+
+        after = sample("buildpro_http_request_duration_seconds_count", **labels)
+        assert after == before + 1
+
+    def test_unmatched_routes_share_one_label(self, client):
+        labels = {"method": "GET", "route": "unmatched", "status": "404"}
+        before = sample("buildpro_http_request_duration_seconds_count", **labels)
+
+        client.get("/no-such-path/1")
+        client.get("/no-such-path/2")
+
+        assert (
+            sample("buildpro_http_request_duration_seconds_count", **labels)
+            == before + 2
+        )
+
+
+class TestPoolMetrics:
+    def test_checkout_and_wait_recorded(self, tmp_path):
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=InstrumentedQueuePool,
+            pool_size=1,
+            max_overflow=1,
+        )
+        waits_before = sample("buildpro_db_pool_wait_seconds_count")
+
+        with engine.connect() as first:
+            first.execute(text("SELECT 1"))
+            assert sample("buildpro_db_pool_checked_out") == 1
+            with engine.connect() as second:
+                second.execute(text("SELECT 1"))
+                assert sample("buildpro_db_pool_checked_out") == 2
+                assert sample("buildpro_db_pool_overflow") == 1
+
+        assert sample("buildpro_db_pool_checked_out") == 0
+        assert sample("buildpro_db_pool_wait_seconds_count") == waits_before + 2
+        engine.dispose()
+
+
+def test_cache_lookup_counter():
+    before = sample("buildpro_cache_requests_total", cache="test", result="hit")
+    record_cache_lookup("test", hit=True)
+    assert (
+        sample("buildpro_cache_requests_total", cache="test", result="hit")
+        == before + 1
+    )
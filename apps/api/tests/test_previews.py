@@ -0,0 +1,194 @@
+import base64
+import io
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from app.api import files as files_api
+from app.core.config import settings
+from app.files import previews, tasks, text
+from app.files.blobs import purge_orphan_blobs
+from app.files.previews import derive_previews, render_previews
+from app.models.blob import Blob, PreviewStatus
+from app.models.file import File
+from app.models.file_text import FileText
+
+
+def image_bytes(
+    size=(3000, 2000), fmt="JPEG", mode="RGB", orientation=None, color="orange"
+):
+    image = Image.new(mode, size, color)
+    out = io.BytesIO()
+    if orientation:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        image.save(out, fmt, exif=exif)
+    else:
+        image.save(out, fmt)
+    return out.getvalue()
+
+
+class TestRenderPreviews:
+    def test_sizes_largest_first(self):
+        metadata, rendered = render_previews(io.BytesIO(image_bytes()))
+        assert (metadata["width"], metadata["height"]) == (3000, 2000)
+        assert [
+            (t["size"], t["width"], t["height"]) for t in metadata["thumbnails"]
+        ] == [
+            (1280, 1280, 853),
+            (480, 480, 320),
+            (160, 160, 107),
+        ]
+        for thumbnail, (size, data) in zip(
+            metadata["thumbnails"], rendered, strict=True
+        ):
+            assert thumbnail["size"] == size and thumbnail["size_bytes"] == len(data)
+            assert Image.open(io.BytesIO(data)).format == "WEBP"
+
+    def test_exif_orientation(self):
+        metadata, _ = render_previews(io.BytesIO(image_bytes(orientation=6)))
+        assert (metadata["width"], metadata["height"]) == (2000, 3000)
+        assert (
+            metadata["thumbnails"][0]["width"],
+            metadata["thumbnails"][0]["height"],
+        ) == (853, 1280)
+
+    def test_small_images_are_not_upscaled(self):
+        metadata, rendered = render_previews(
+            io.BytesIO(image_bytes((100, 80), "PNG", "RGBA", color=(255, 165, 0, 128)))
+        )
+        assert [
+            (t["size"], t["width"], t["height"]) for t in metadata["thumbnails"]
+        ] == [(160, 100, 80)]
+        assert Image.open(io.BytesIO(rendered[0][1])).mode == "RGBA"
+
+    def test_placeholder(self):
+        metadata, _ = render_previews(io.BytesIO(image_bytes(mode="L")))
+        prefix = "data:image/webp;base64,"
+        assert metadata["placeholder"].startswith(prefix)
+        placeholder = Image.open(
+            io.BytesIO(base64.b64decode(metadata["placeholder"][len(prefix) :]))
+        )
+        assert max(placeholder.size) == 16
+        assert len(metadata["placeholder"]) < 500
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client(
+        {"/api/files": files_api.router},
+        [Blob, File, FileText],
+        storage_modules=[files_api, previews, text],
+        task_modules=[previews, text],
+    )
+
+
+def upload(client, data, filename="site.jpg", file_type="PHOTO"):
+    body = client.post(
+        "/api/files/upload-url",
+        params={"filename": filename, "project_id": str(client.project_id)},
+    ).json()
+    sha256 = client.put(body["upload_url"], content=data).json()["sha256"]
+    response = client.post(
+        "/api/files/",
+        json={
+            "project_id": str(client.project_id),
+            "filename": filename,
+            "file_type": file_type,
+            "sha256": sha256,
+        },
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestPhotoPreviews:
+    def test_photo_gets_thumbnails(self, client):
+        file = upload(client, image_bytes())
+        assert file["preview_status"] == "READY"
+        assert [(t["width"], t["height"]) for t in file["thumbnails"]] == [
+            (160, 107),
+            (480, 320),
+            (1280, 853),
+        ]
+        assert file["placeholder"].startswith("data:image/webp;base64,")
+
+        response = client.get(file["thumbnails"][0]["url"])
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/webp"
+        assert Image.open(io.BytesIO(response.content)).size == (160, 107)
+        assert int(response.headers["content-length"]) < file["size_bytes"] / 10
+
+        listed = client.get(
+            "/api/files/", params={"project_id": str(client.project_id)}
+        ).json()
+        assert listed[0]["thumbnails"][1]["width"] == 480
+
+    def test_shared_photo_rendered_once(self, client, monkeypatch):
+        calls = []
+        real_render = previews.render_previews
+        monkeypatch.setattr(
+            previews, "render_previews", lambda f: calls.append(1) or real_render(f)
+        )
+        data = image_bytes()
+        first = upload(client, data, "a.jpg")
+        second = upload(client, data, "b.jpg")
+        assert len(calls) == 1
+        assert [t["width"] for t in second["thumbnails"]] == [
+            t["width"] for t in first["thumbnails"]
+        ]
+
+    def test_documents_have_no_previews(self, client):
+        file = upload(client, image_bytes(), "scan.jpg", file_type="DOCUMENT")
+        assert file["preview_status"] is None
+        assert file["thumbnails"] == []
+
+    def test_unreadable_photo(self, client):
+        file = upload(client, b"not an image", "broken.jpg")
+        assert file["preview_status"] == "FAILED"
+        assert file["thumbnails"] == []
+
+    def test_redelivery_is_a_no_op(self, client, monkeypatch):
+        upload(client, image_bytes())
+        db = client.session_factory()
+        blob_id = db.query(Blob.id).scalar()
+        db.close()
+        calls = []
+        monkeypatch.setattr(previews, "render_previews", lambda f: calls.append(1))
+        assert (
+            derive_previews(blob_id, client.session_factory, client.storage)
+            == PreviewStatus.READY
+        )
+        assert calls == []
+
+    def test_stale_claim_is_requested_again(self, client, monkeypatch):
+        # The first task is lost: the blob stays PENDING
+        data = image_bytes()
+        with monkeypatch.context() as lost:
+            lost.setattr(tasks.derive_previews_task, "delay", lambda blob_id: None)
+            assert upload(client, data, "a.jpg")["preview_status"] == "PENDING"
+        assert upload(client, data, "b.jpg")["preview_status"] == "PENDING"
+        assert tasks.retry_stale_previews() == 0
+
+        monkeypatch.setattr(settings, "PREVIEW_CLAIM_TIMEOUT_MINUTES", -1)
+        assert upload(client, data, "c.jpg")["preview_status"] == "READY"
+
+    def test_beat_requeues_stale_claims(self, client, monkeypatch):
+        with monkeypatch.context() as lost:
+            lost.setattr(tasks.derive_previews_task, "delay", lambda blob_id: None)
+            file = upload(client, image_bytes())
+        monkeypatch.setattr(settings, "PREVIEW_CLAIM_TIMEOUT_MINUTES", -1)
+        assert tasks.retry_stale_previews() == 1
+        listed = client.get(
+            "/api/files/", params={"project_id": str(client.project_id)}
+        ).json()
+        assert listed[0]["id"] == file["id"]
+        assert listed[0]["preview_status"] == "READY"
+
+    def test_purge_deletes_previews(self, client, monkeypatch):
+        file = upload(client, image_bytes())
+        assert client.delete(f"/api/files/{file['id']}").status_code == 204
+        monkeypatch.setattr(settings, "BLOB_ORPHAN_TTL_HOURS", -1)
+        assert purge_orphan_blobs(client.session_factory, client.storage) == 1
+        assert [p for p in Path(client.storage.root).rglob("*") if p.is_file()] == []
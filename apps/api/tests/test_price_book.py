@@ -0,0 +1,340 @@
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.api import materials as materials_api
+from app.api import price_book as price_book_api
+from app.models.audit import AuditLog
+from app.models.material import MaterialLineItem
+from app.models.price_book import PriceBookItem
+from app.models.tenant import Tenant
+from app.pricing.price_book import PriceBookResolver, autocomplete
+
+TODAY = date.today()
+TWO_YEARS_AGO = (TODAY - timedelta(days=730)).isoformat()
+LAST_YEAR = (TODAY - timedelta(days=365)).isoformat()
+LAST_MONTH = (TODAY - timedelta(days=30)).isoformat()
+NEXT_MONTH = (TODAY + timedelta(days=30)).isoformat()
+
+
+def entry(
+    sku,
+    description,
+    price,
+    vendor="ABC Lumber",
+    unit="EA",
+    effective_from=LAST_YEAR,
+    effective_to=None,
+):
+    return {
+        "vendor": vendor,
+        "sku": sku,
+        "description": description,
+        "unit": unit,
+        "price": price,
+        "effective_from": effective_from,
+        "effective_to": effective_to,
+    }
+
+
+ENTRIES = [
+    entry("2X4-08", "Stud 2x4 8ft SPF", "4.37", effective_to=NEXT_MONTH),
+    entry("2x4-10", "Stud 2x4 10ft SPF", "5.89"),
+    entry("LVL-1134", "LVL beam 1-3/4 x 11-7/8", "212.50"),
+    entry("PLY-34", "Plywood 3/4 in CDX, 2x4 ft panel", "24.10"),
+    entry("SHG-3T", "Shingles 3-tab", "120.00", unit="SQ"),
+    # Superseded, and not yet in effect
+    entry(
+        "2X4-08",
+        "Stud 2x4 8ft SPF",
+        "3.99",
+        effective_from=TWO_YEARS_AGO,
+        effective_to=LAST_YEAR,
+    ),
+    entry("2X4-08", "Stud 2x4 8ft SPF", "4.99", effective_from=NEXT_MONTH),
+    # Another vendor's newer, higher price for the same SKU
+    entry(
+        "2X4-08",
+        "Stud 2x4 8ft SPF (KD)",
+        "4.55",
+        vendor="Coast Supply",
+        effective_from=LAST_MONTH,
+    ),
+]
+
+
+@pytest.fixture
+def client(make_client):
+    client = make_client(
+        {"/price-book": price_book_api.router, "/materials": materials_api.router},
+        [PriceBookItem, MaterialLineItem, AuditLog],
+        role="PM",
+    )
+    response = client.post("/price-book/", json=ENTRIES)
+    assert response.status_code == 201
+    assert response.json() == {"created_count": len(ENTRIES)}
+    return client
+
+
+def suggest(client, q, **params):
+    response = client.get("/price-book/autocomplete", params={"q": q, **params})
+    assert response.status_code == 200
+    return [(item["vendor"], item["sku"], item["price"]) for item in response.json()]
+
+
+class TestAutocomplete:
+    def test_sku_prefix_ranks_first(self, client):
+        assert suggest(client, "2x4") == [
+            ("ABC Lumber", "2X4-08", "4.37"),
+            ("Coast Supply", "2X4-08", "4.55"),
+            ("ABC Lumber", "2X4-10", "5.89"),
+            # Description match
+            ("ABC Lumber", "PLY-34", "24.10"),
+        ]
+
+    def test_description_matches(self, client):
+        assert suggest(client, "lvl b") == [("ABC Lumber", "LVL-1134", "212.50")]
+        assert suggest(client, "beam") == [("ABC Lumber", "LVL-1134", "212.50")]
+        # Too short for the trigram index: prefixes only
+        assert suggest(client, "ea") == []
+        assert suggest(client, "pl") == [("ABC Lumber", "PLY-34", "24.10")]
+
+    def test_filters(self, client):
+        assert suggest(client, "2x4-08", vendor="ABC Lumber") == [
+            ("ABC Lumber", "2X4-08", "4.37")
+        ]
+        assert suggest(client, "2x4-08", vendor="ABC Lumber", on=NEXT_MONTH) == [
+            ("ABC Lumber", "2X4-08", "4.99")
+        ]
+        assert len(suggest(client, "2x4", limit=2)) == 2
+
+    def test_wildcards_are_literal(self, client):
+        assert suggest(client, "%") == []
+        assert suggest(client, "2_4") == []
+
+    def test_other_tenants_entries_hidden(self, client):
+        db = client.session_factory()
+        other = Tenant(name="Other Builder", slug="other")
+        db.add(other)
+        db.flush()
+        db.add(
+            PriceBookItem(
+                tenant_id=other.id,
+                vendor="Theirs",
+                sku="2X4-99",
+                description="Stud",
+                unit="EA",
+                price=Decimal("1"),
+                effective_from=TODAY,
+            )
+        )
+        db.commit()
+        db.close()
+        assert "2X4-99" not in [sku for _, sku, _ in suggest(client, "2x4")]
+
+
+class TestAddEntries:
+    def test_duplicate_conflicts(self, client):
+        response = client.post("/price-book/", json=[entry("2x4-08 ", "Stud", "1.00")])
+        assert response.status_code == 409
+
+    def test_dates_checked(self, client):
+        response = client.post(
+            "/price-book/", json=[entry("X", "Y", "1", effective_to=LAST_YEAR)]
+        )
+        assert response.status_code == 422
+
+
+class TestResolver:
+    def test_latest_then_lowest(self, client):
+        db = client.session_factory()
+        resolver = PriceBookResolver(db, client.tenant_id)
+        assert resolver.prices(
+            [("2X4-08", "EA"), ("2X4-10", "EA"), ("NOPE", "EA")]
+        ) == {
+            ("2X4-08", "EA"): Decimal("4.55"),
+            ("2X4-10", "EA"): Decimal("5.89"),
+        }
+        assert PriceBookResolver(db, client.tenant_id, vendor="ABC Lumber").price(
+            " 2x4-08", "EA"
+        ) == Decimal("4.37")
+        db.close()
+
+    def test_units(self, client):
+        db = client.session_factory()
+        resolver = PriceBookResolver(db, client.tenant_id)
+        # Priced per square (100 SF): converted for an SF row
+        assert resolver.price("SHG-3T", "SQ") == Decimal("120.00")
+        assert resolver.price("SHG-3T", "SF") == Decimal("1.20")
+        # A per-EA price never applies to LF
+        assert resolver.price("LVL-1134", "LF") is None
+        assert resolver.unit_mismatches([("LVL-1134", "LF"), ("NOPE", "LF")]) == {
+            ("LVL-1134", "LF"): ["EA"]
+        }
+        assert resolver.mismatch_message("lvl-1134", "LF") == (
+            "SKU LVL-1134 is priced per EA, which doesn't convert to LF"
+        )
+        db.close()
+
+    def test_fill_unit_costs(self, client):
+        db = client.session_factory()
+        frame = pd.DataFrame(
+            {
+                "sku": ["2x4-10", "", "NOPE", "shg-3t", "LVL-1134"],
+                "unit": ["EA", "EA", "EA", "sf", "LF"],
+                "unit_cost": ["", "3.00", "7.00", "", "9.00"],
+            }
+        )
+        filled, errors = PriceBookResolver(db, client.tenant_id).fill_unit_costs(frame)
+        db.close()
+        assert list(filled["unit_cost"]) == ["5.89", "3.00", "7.00", "1.20", "9.00"]
+        assert list(errors) == [
+            "",
+            "",
+            "",
+            "",
+            "SKU LVL-1134 is priced per EA, which doesn't convert to LF",
+        ]
+
+
+MATERIAL = {
+    "category": "FRAMING",
+    "description": "Studs",
+    "quantity": "100",
+    "unit": "EA",
+    "wastage_factor": "0.1",
+}
+
+
+class TestMaterialPricing:
+    def test_create_resolves_unit_cost(self, client):
+        body = {
+            **MATERIAL,
+            "project_id": str(client.project_id),
+            "sku": "2x4-10",
+            "unit_cost": "1.00",
+        }
+        response = client.post(
+            "/materials/", params={"resolve_prices": True}, json=body
+        )
+        assert response.status_code == 201
+        assert response.json()["unit_cost"] == "5.89"
+        assert response.json()["total_cost"] == "647.90"
+        # Without the option the given cost stands
+        assert client.post("/materials/", json=body).json()["unit_cost"] == "1.00"
+
+    def test_create_unknown_sku(self, client):
+        body = {**MATERIAL, "project_id": str(client.project_id), "sku": "NOPE"}
+        assert (
+            client.post(
+                "/materials/", params={"resolve_prices": True}, json=body
+            ).status_code
+            == 400
+        )
+        del body["sku"]
+        assert (
+            client.post(
+                "/materials/", params={"resolve_prices": True}, json=body
+            ).status_code
+            == 400
+        )
+
+    def test_csv_import_resolves_in_bulk(self, client):
+        csv = (
+            "category,description,quantity,unit,sku\n"
+            "FRAMING,Studs,100,EA,2x4-10\n"
+            "FRAMING,Beam,2,EA,LVL-1134\n"
+        )
+        response = client.post(
+            f"/materials/import-csv/{client.project_id}",
+            params={"resolve_prices": True},
+            files={"file": ("takeoff.csv", io.BytesIO(csv.encode()), "text/csv")},
+        )
+        assert response.status_code == 200, response.text
+        assert response.json()["success_count"] == 2
+        db = client.session_factory()
+        costs = sorted((m.description, m.unit_cost) for m in db.query(MaterialLineItem))
+        db.close()
+        assert costs == [("Beam", Decimal("212.50")), ("Studs", Decimal("5.89"))]
+
+    def test_csv_import_unknown_sku_needs_unit_cost(self, client):
+        csv = "category,description,quantity,unit,sku\nFRAMING,Studs,100,EA,NOPE\n"
+        response = client.post(
+            f"/materials/import-csv/{client.project_id}",
+            params={"resolve_prices": True, "dry_run": True},
+            files={"file": ("takeoff.csv", io.BytesIO(csv.encode()), "text/csv")},
+        )
+        assert [e["column"] for e in response.json()["errors"]] == ["unit_cost"]
+
+    def test_json_import(self, client):
+        rows = [
+            {**MATERIAL, "quantity": 10, "wastage_factor": 0, "sku": "lvl-1134"},
+            {**MATERIAL, "quantity": 10, "wastage_factor": 0, "unit_cost": 2},
+        ]
+        response = client.post(
+            "/materials/import",
+            params={"resolve_prices": True},
+            json={"project_id": str(client.project_id), "materials": rows},
+        )
+        assert response.json()["success_count"] == 2
+        db = client.session_factory()
+        assert sorted(m.unit_cost for m in db.query(MaterialLineItem)) == [
+            Decimal("2"),
+            Decimal("212.50"),
+        ]
+        db.close()
+
+
+def test_autocomplete_sql_uses_indexed_predicates(client):
+    db = client.session_factory()
+    statements = []
+    original = db.execute
+
+    def capture(statement, *args, **kwargs):
+        statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        return original(statement, *args, **kwargs)
+
+    db.execute = capture
+    autocomplete(db, client.tenant_id, "beam")
+    db.close()
+    (sql,) = statements
+    assert "price_book_items.sku LIKE " in sql
+    assert "lower(price_book_items.description) LIKE " in sql
+    assert "price_book_items.description ILIKE " in sql
+
+    def test_unit_mismatch_rejected(self, client):
+        body = {**MATERIAL, "project_id": str(client.project_id), "unit": "LF"}
+        response = client.post(
+            "/materials/",
+            params={"resolve_prices": True},
+            json={**body, "sku": "LVL-1134"},
+        )
+        assert response.status_code == 400
+        assert "priced per EA" in response.json()["detail"]
+
+        csv = (
+            "category,description,quantity,unit,sku,unit_cost\n"
+            "FRAMING,Beam,20,LF,LVL-1134,9.00\n"
+            "ROOFING,Shingles,1500,SF,SHG-3T,\n"
+        )
+        response = client.post(
+            f"/materials/import-csv/{client.project_id}",
+            params={"resolve_prices": True, "dry_run": True},
+            files={"file": ("takeoff.csv", io.BytesIO(csv.encode()), "text/csv")},
+        )
+        assert [(e["row"], e["column"]) for e in response.json()["errors"]] == [
+            (2, "unit")
+        ]
+
+        rows = [{**MATERIAL, "unit": "LF", "sku": "LVL-1134", "unit_cost": 9}]
+        response = client.post(
+            "/materials/import",
+            params={"resolve_prices": True},
+            json={"project_id": str(client.project_id), "materials": rows},
+        )
+        assert response.json()["error_count"] == 1
+        assert "priced per EA" in response.json()["errors"][0]["error"]
@@ -0,0 +1,249 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.data_version import bump_data_version
+from app.models.file import File
+from app.models.material import MaterialCategory, MaterialLineItem, UnitOfMeasure
+from app.models.project import BuildProject
+from app.models.report import Report, ReportFormat, ReportStatus, ReportType
+from app.models.schedule import MilestonePhase, ScheduleMilestone
+from app.models.tenant import Tenant
+from app.reports import cache as cache_module
+from app.reports import renderers
+from app.reports.cache import get_or_create_report, report_cache_key
+from app.reports.datasets import build_dataset
+from app.reports.engine import run_report
+from app.storage import LocalStorage
+
+TABLES = [
+    Tenant.__table__,
+    BuildProject.__table__,
+    MaterialLineItem.__table__,
+    ScheduleMilestone.__table__,
+    File.__table__,
+    Report.__table__,
+]
+
+OPTIONS = {"include_photos": False, "include_materials": True, "include_schedule": True}
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    Base.metadata.create_all(engine, tables=TABLES)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def project_ids(session_factory):
+    db = session_factory()
+    tenant = Tenant(name="Acme Homes", slug="acme")
+    db.add(tenant)
+    db.flush()
+    project = BuildProject(tenant_id=tenant.id, title="Lot 7", budget=Decimal("100000"))
+    db.add(project)
+    db.commit()
+    ids = (tenant.id, project.id)
+    db.close()
+    return ids
+
+
+def version(session_factory, project_id):
+    db = session_factory()
+    value = db.get(BuildProject, project_id).data_version
+    db.close()
+    return value
+
+
+def add_material(db, project_id):
+    material = MaterialLineItem(
+        project_id=project_id,
+        category=MaterialCategory.FRAMING,
+        description="Studs",
+        quantity=Decimal("1"),
+        unit=UnitOfMeasure.EA,
+        unit_cost=Decimal("5"),
+    )
+    db.add(material)
+    db.commit()
+    return material
+
+
+class TestDataVersion:
+    def test_new_project_starts_at_one(self, session_factory, project_ids):
+        assert version(session_factory, project_ids[1]) == 1
+
+    def test_material_insert_update_delete_bump(self, session_factory, project_ids):
+        _, project_id = project_ids
+        db = session_factory()
+        material = add_material(db, project_id)
+        assert version(session_factory, project_id) == 2
+
+        material.quantity = Decimal("3")
+        db.commit()
+        assert version(session_factory, project_id) == 3
+
+        db.delete(material)
+        db.commit()
+        assert version(session_factory, project_id) == 4
+
+    def test_unchanged_write_does_not_bump(self, session_factory, project_ids):
+        _, project_id = project_ids
+        db = session_factory()
+        material = add_material(db, project_id)
+        material.quantity = material.quantity
+        db.commit()
+        assert version(session_factory, project_id) == 2
+
+    def test_loaded_project_bumped_once(self, session_factory, project_ids):
+        _, project_id = project_ids
+        db = session_factory()
+        project = db.get(BuildProject, project_id)
+        project.budget = Decimal("200000")
+        db.add(
+            ScheduleMilestone(
+                project_id=project_id,
+                phase=MilestonePhase.FRAMING,
+                baseline_start_date=date(2030, 1, 1),
+                baseline_end_date=date(2030, 2, 1),
+            )
+        )
+        db.commit()
+        assert project.data_version == 2
+
+    def test_bulk_helper(self, session_factory, project_ids):
+        _, project_id = project_ids
+        db = session_factory()
+        bump_data_version(db, [project_id, project_id])
+        db.commit()
+        assert version(session_factory, project_id) == 2
+
+
+class TestReportCache:
+    def get_or_create(self, db, project_ids, report_format=ReportFormat.CSV):
+        tenant_id, project_id = project_ids
+        project = db.get(BuildProject, project_id)
+        return get_or_create_report(
+            db, tenant_id, project, ReportType.BUDGET_VS_ACTUAL, report_format, OPTIONS
+        )
+
+    def test_identical_request_reuses_report(self, session_factory, project_ids):
+        db = session_factory()
+        first, created = self.get_or_create(db, project_ids)
+        assert created
+        second, created = self.get_or_create(db, project_ids)
+        assert not created
+        assert second.id == first.id
+
+    def test_different_format_is_new_report(self, session_factory, project_ids):
+        db = session_factory()
+        first, _ = self.get_or_create(db, project_ids)
+        second, created = self.get_or_create(db, project_ids, ReportFormat.PDF)
+        assert created and second.id != first.id
+
+    def test_data_change_invalidates(self, session_factory, project_ids):
+        db = session_factory()
+        first, _ = self.get_or_create(db, project_ids)
+        add_material(db, project_ids[1])
+        second, created = self.get_or_create(db, project_ids)
+        assert created and second.id != first.id
+
+    def test_concurrent_requests_coalesce(
+        self, session_factory, project_ids, monkeypatch
+    ):
+        winner_db, loser_db = session_factory(), session_factory()
+        winner, _ = self.get_or_create(winner_db, project_ids)
+
+        # The losing request looked before the winner committed
+        real_find = cache_module._find
+        calls = []
+
+        def find_after_race(db, tenant_id, cache_key):
+            calls.append(cache_key)
+            return None if len(calls) == 1 else real_find(db, tenant_id, cache_key)
+
+        monkeypatch.setattr(cache_module, "_find", find_after_race)
+        loser, created = self.get_or_create(loser_db, project_ids)
+        assert not created
+        assert loser.id == winner.id
+
+    def test_failed_report_releases_key(
+        self, session_factory, project_ids, tmp_path, monkeypatch
+    ):
+        def broken(dataset, out, progress=None):
+            raise RuntimeError("renderer exploded")
+
+        monkeypatch.setitem(renderers.RENDERERS, ReportFormat.CSV, broken)
+        db = session_factory()
+        report, _ = self.get_or_create(db, project_ids)
+        assert (
+            run_report(str(report.id), session_factory, LocalStorage(str(tmp_path)))
+            == ReportStatus.FAILED
+        )
+
+        retry_db = session_factory()
+        retry, created = self.get_or_create(retry_db, project_ids)
+        assert created and retry.id != report.id
+
+    def test_key_depends_on_options(self, session_factory, project_ids):
+        db = session_factory()
+        project = db.get(BuildProject, project_ids[1])
+        base = report_cache_key(project, ReportType.PROGRESS, ReportFormat.PDF, OPTIONS)
+        other = report_cache_key(
+            project,
+            ReportType.PROGRESS,
+            ReportFormat.PDF,
+            {**OPTIONS, "include_photos": True},
+        )
+        assert base != other
+
+    def test_date_dependent_key_includes_as_of(self, session_factory, project_ids):
+        tenant_id, project_id = project_ids
+        db = session_factory()
+        project = db.get(BuildProject, project_id)
+
+        def request(report_type, as_of):
+            return get_or_create_report(
+                db,
+                tenant_id,
+                project,
+                report_type,
+                ReportFormat.CSV,
+                OPTIONS,
+                as_of=as_of,
+            )
+
+        monday, _ = request(ReportType.PROGRESS, date(2030, 3, 4))
+        tuesday, created = request(ReportType.PROGRESS, date(2030, 3, 5))
+        assert created and tuesday.id != monday.id
+        assert tuesday.options["as_of"] == "2030-03-05"
+        assert request(ReportType.PROGRESS, date(2030, 3, 5)) == (tuesday, False)
+
+        # Other types don't change with the date
+        budget, _ = request(ReportType.BUDGET_VS_ACTUAL, date(2030, 3, 4))
+        assert request(ReportType.BUDGET_VS_ACTUAL, date(2030, 3, 5)) == (budget, False)
+        assert "as_of" not in budget.options
+
+    def test_progress_dataset_uses_requested_date(self, session_factory, project_ids):
+        tenant_id, project_id = project_ids
+        db = session_factory()
+        project = db.get(BuildProject, project_id)
+        project.baseline_end_date = date(2030, 3, 10)
+        db.commit()
+        report, _ = get_or_create_report(
+            db,
+            tenant_id,
+            project,
+            ReportType.PROGRESS,
+            ReportFormat.CSV,
+            OPTIONS,
+            as_of=date(2030, 3, 4),
+        )
+        summary = dict(build_dataset(db, report, project).summary)
+        assert summary["Schedule Variance (days)"] == 6
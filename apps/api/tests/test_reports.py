@@ -0,0 +1,442 @@
+import csv
+import io
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from openpyxl import load_workbook
+from PIL import Image
+from pypdf import PdfReader
+from reportlab.pdfgen import canvas
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.celery_app import celery_app
+from app.db.base import Base
+from app.models.file import File, FileType
+from app.models.material import MaterialCategory, MaterialLineItem, UnitOfMeasure
+from app.models.project import BuildProject
+from app.models.report import Report, ReportFormat, ReportStatus, ReportType
+from app.models.schedule import MilestonePhase, ScheduleMilestone
+from app.models.tenant import Tenant
+from app.reports import engine as report_engine
+from app.reports import renderers
+from app.reports.engine import run_report
+from app.reports.pdf import PdfTableLayout, StreamingPdfWriter
+from app.reports.tasks import generate_report
+from app.storage import LocalStorage
+
+TABLES = [
+    Tenant.__table__,
+    BuildProject.__table__,
+    MaterialLineItem.__table__,
+    ScheduleMilestone.__table__,
+    File.__table__,
+    Report.__table__,
+]
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'reports.db'}")
+    Base.metadata.create_all(engine, tables=TABLES)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage(str(tmp_path / "storage"))
+
+
+@pytest.fixture
+def project(session_factory):
+    db = session_factory()
+    tenant = Tenant(name="Acme Homes", slug="acme")
+    db.add(tenant)
+    db.flush()
+    project = BuildProject(
+        tenant_id=tenant.id,
+        title="Lot 7",
+        city="Austin",
+        state="TX",
+        home_area_sqft=Decimal("2000"),
+        budget=Decimal("100000"),
+        baseline_end_date=date(2030, 1, 1),
+    )
+    db.add(project)
+    db.flush()
+    db.add_all(
+        [
+            MaterialLineItem(
+                project_id=project.id,
+                category=MaterialCategory.FRAMING,
+                description="2x4 studs",
+                quantity=Decimal("100"),
+                unit=UnitOfMeasure.EA,
+                wastage_factor=Decimal("0.1"),
+                total_qty=Decimal("110"),
+                unit_cost=Decimal("5"),
+                total_cost=Decimal("550"),
+            ),
+            MaterialLineItem(
+                project_id=project.id,
+                category=MaterialCategory.CONCRETE,
+                description="Slab",
+                quantity=Decimal("10"),
+                unit=UnitOfMeasure.CF,
+                wastage_factor=Decimal("0"),
+                total_qty=Decimal("10"),
+                unit_cost=Decimal("45"),
+                total_cost=Decimal("450"),
+            ),
+            ScheduleMilestone(
+                project_id=project.id,
+                phase=MilestonePhase.FOUNDATION,
+                baseline_start_date=date(2029, 1, 1),
+                baseline_end_date=date(2029, 2, 1),
+                percent_complete=Decimal("50"),
+            ),
+        ]
+    )
+    db.commit()
+    ids = (tenant.id, project.id)
+    db.close()
+    return ids
+
+
+def make_report(session_factory, project, type_, format_):
+    tenant_id, project_id = project
+    db = session_factory()
+    report = Report(
+        tenant_id=tenant_id,
+        project_id=project_id,
+        type=type_,
+        format=format_,
+        options={},
+    )
+    db.add(report)
+    db.commit()
+    report_id = report.id
+    db.close()
+    return report_id
+
+
+def load_report(session_factory, report_id):
+    db = session_factory()
+    report = db.get(Report, report_id)
+    db.close()
+    return report
+
+
+class TestRunReport:
+    @pytest.mark.parametrize("type_", list(ReportType))
+    def test_every_type_completes(self, session_factory, storage, project, type_):
+        report_id = make_report(session_factory, project, type_, ReportFormat.CSV)
+
+        assert (
+            run_report(str(report_id), session_factory, storage)
+            == ReportStatus.COMPLETED
+        )
+        report = load_report(session_factory, report_id)
+        assert report.progress == 100
+        assert report.download_url == f"/api/reports/{report_id}/download"
+        assert storage.exists(report.storage_key)
+
+    def test_takeoff_csv_rows(self, session_factory, storage, project):
+        report_id = make_report(
+            session_factory, project, ReportType.TAKEOFF_SUMMARY, ReportFormat.CSV
+        )
+        run_report(str(report_id), session_factory, storage)
+
+        report = load_report(session_factory, report_id)
+        with storage.open(report.storage_key) as f:
+            rows = list(csv.reader(io.TextIOWrapper(f, encoding="utf-8")))
+        assert ["Total Cost", "1000.00"] in rows
+        assert [
+            "FRAMING",
+            "2x4 studs",
+            "100.000",
+            "EA",
+            "0.1000",
+            "110.000",
+            "5.00",
+            "550.00",
+        ] in rows
+
+    def test_xlsx_output(self, session_factory, storage, project):
+        report_id = make_report(
+            session_factory, project, ReportType.BUDGET_VS_ACTUAL, ReportFormat.XLSX
+        )
+        run_report(str(report_id), session_factory, storage)
+
+        report = load_report(session_factory, report_id)
+        with storage.open(report.storage_key) as f:
+            workbook = load_workbook(f, read_only=True)
+            assert workbook.sheetnames == ["Summary", "Cost by Category"]
+            rows = list(workbook["Cost by Category"].values)
+        assert rows[0] == ("Category", "Line Items", "Total Cost", "% of Budget")
+        assert ("CONCRETE", 1, 450, 0.45) in rows
+
+    def test_pdf_output(self, session_factory, storage, project):
+        report_id = make_report(
+            session_factory, project, ReportType.PROGRESS, ReportFormat.PDF
+        )
+        run_report(str(report_id), session_factory, storage)
+
+        report = load_report(session_factory, report_id)
+        with storage.open(report.storage_key) as f:
+            assert f.read(5) == b"%PDF-"
+
+    def test_failure_marks_report_failed(
+        self, session_factory, storage, project, monkeypatch
+    ):
+        def broken(dataset, out, progress=None):
+            raise RuntimeError("renderer exploded")
+
+        monkeypatch.setitem(renderers.RENDERERS, ReportFormat.CSV, broken)
+        report_id = make_report(
+            session_factory, project, ReportType.PROGRESS, ReportFormat.CSV
+        )
+
+        assert (
+            run_report(str(report_id), session_factory, storage) == ReportStatus.FAILED
+        )
+        report = load_report(session_factory, report_id)
+        assert report.error_message == "renderer exploded"
+        assert report.storage_key is None
+
+
+class TestGenerateReportTask:
+    def test_eager_task_uses_own_session(
+        self, session_factory, storage, project, monkeypatch
+    ):
+        monkeypatch.setattr(report_engine, "SessionLocal", session_factory)
+        monkeypatch.setattr(report_engine, "get_storage", lambda: storage)
+        monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+        report_id = make_report(
+            session_factory, project, ReportType.PROGRESS, ReportFormat.CSV
+        )
+
+        result = generate_report.delay(str(report_id))
+        assert result.get() == "COMPLETED"
+        assert load_report(session_factory, report_id).status == ReportStatus.COMPLETED
+
+
+def parse_xref(data: bytes):
+    xref_pos = int(data.rsplit(b"startxref\n", 1)[1].split(b"\n", 1)[0])
+    lines = data[xref_pos:].split(b"\n")
+    count = int(lines[1].split()[1])
+    return [int(line.split()[0]) for line in lines[3 : 2 + count]]
+
+
+class TestStreamingPdfWriter:
+    def test_xref_offsets_point_at_objects(self):
+        out = io.BytesIO()
+        writer = StreamingPdfWriter(out, title="Takeoff (draft)")
+        layout = PdfTableLayout(writer)
+        layout.heading("Takeoff")
+        layout.table("Rows", ["A", "B"], ((f"item {i}", Decimal(i)) for i in range(10)))
+        layout.finish()
+        writer.close()
+
+        data = out.getvalue()
+        assert data.startswith(b"%PDF-1.4")
+        assert data.endswith(b"%%EOF\n")
+        for obj_id, offset in enumerate(parse_xref(data), start=1):
+            assert data[offset:].startswith(f"{obj_id} 0 obj".encode())
+
+    def test_pages_flushed_before_close(self):
+        out = io.BytesIO()
+        writer = StreamingPdfWriter(out, compress=False)
+        layout = PdfTableLayout(writer)
+        layout.table(
+            "Rows",
+            ["Description", "Cost"],
+            ((f"item {i}", Decimal(i)) for i in range(500)),
+        )
+
+        assert writer.page_count > 5
+        assert out.getvalue().count(b"/Type /Page ") == writer.page_count
+        # Each page repeats the header row
+        assert out.getvalue().count(b"(Description) Tj") == writer.page_count
+
+    def test_long_cells_truncated(self):
+        layout = PdfTableLayout(StreamingPdfWriter(io.BytesIO()))
+        assert layout._fit("x" * 500, 60, "F1").endswith("…")
+        assert layout._fit("short", 60, "F1") == "short"
+
+
+def pdf_bytes(*pages):
+    out = io.BytesIO()
+    pdf = canvas.Canvas(out)
+    for page in pages:
+        pdf.drawString(72, 720, page)
+        pdf.showPage()
+    pdf.save()
+    return out.getvalue()
+
+
+def jpeg_bytes(size=(120, 80)):
+    out = io.BytesIO()
+    Image.new("RGB", size, (200, 80, 40)).save(out, "JPEG")
+    return out.getvalue()
+
+
+def add_files(session_factory, storage, project, files):
+    tenant_id, project_id = project
+    db = session_factory()
+    for filename, file_type, data in files:
+        key = f"objects/{filename}"
+        storage.save(key, io.BytesIO(data))
+        db.add(
+            File(
+                tenant_id=tenant_id,
+                project_id=project_id,
+                filename=filename,
+                file_type=file_type,
+                storage_key=key,
+                size_bytes=len(data),
+            )
+        )
+    db.commit()
+    db.close()
+
+
+def make_binder(session_factory, storage, project, options):
+    tenant_id, project_id = project
+    db = session_factory()
+    report = Report(
+        tenant_id=tenant_id,
+        project_id=project_id,
+        type=ReportType.OM_BINDER,
+        format=ReportFormat.PDF,
+        options=options,
+    )
+    db.add(report)
+    db.commit()
+    report_id = report.id
+    db.close()
+    assert (
+        run_report(str(report_id), session_factory, storage) == ReportStatus.COMPLETED
+    )
+    with storage.open(load_report(session_factory, report_id).storage_key) as f:
+        return PdfReader(io.BytesIO(f.read()))
+
+
+def outline_titles(items):
+    titles = []
+    for item in items:
+        titles.append([outline_titles(item)] if isinstance(item, list) else item.title)
+    return titles
+
+
+class TestBinder:
+    def test_attachments_merged_with_contents(self, session_factory, storage, project):
+        add_files(
+            session_factory,
+            storage,
+            project,
+            [
+                ("A-101.pdf", FileType.DRAWING, pdf_bytes("Floor plan", "Elevations")),
+                ("Warranty.pdf", FileType.DOCUMENT, pdf_bytes("Roof warranty")),
+                ("site.jpg", FileType.PHOTO, jpeg_bytes()),
+                ("notes.docx", FileType.DOCUMENT, b"PK not a pdf"),
+            ],
+        )
+        reader = make_binder(
+            session_factory, storage, project, {"include_photos": True}
+        )
+        text = [page.extract_text().strip() for page in reader.pages]
+
+        # Cover, contents, 1 + 2 + 1 attached pages, then the generated tables
+        assert "Lot 7" in text[0]
+        assert "Contents" in text[1]
+        assert text[2] == "Roof warranty"
+        assert text[3:5] == ["Floor plan", "Elevations"]
+        assert (
+            reader.pages[5]["/Resources"]["/XObject"]["/Im0"]["/Filter"] == "/DCTDecode"
+        )
+        assert "Documents" in text[6] and "Schedule" in text[-1]
+        assert len(reader.pages) > 7
+
+        contents = text[1]
+        assert "notes.docx  (not included: unsupported format (.docx))" in contents
+        for title in ("Warranty.pdf", "A-101.pdf", "site.jpg"):
+            assert title in contents
+
+        assert outline_titles(reader.outline) == [
+            "Contents",
+            "Documents",
+            [["Warranty.pdf"]],
+            "Drawings",
+            [["A-101.pdf"]],
+            "Photos",
+            [["site.jpg"]],
+            "Documents",
+            "Schedule",
+        ]
+        assert reader.get_destination_page_number(reader.outline[3]) == 3
+
+        # Contents rows link to their pages
+        links = [annot.get_object() for annot in reader.pages[1]["/Annots"]]
+        page_numbers = {
+            page.indirect_reference.idnum: n for n, page in enumerate(reader.pages)
+        }
+        targets = [page_numbers[link["/Dest"][0].idnum] for link in links]
+        assert targets[:5] == [2, 2, 3, 3, 5]
+
+    def test_unreadable_pdf_is_noted(self, session_factory, storage, project):
+        add_files(
+            session_factory,
+            storage,
+            project,
+            [
+                ("broken.pdf", FileType.DOCUMENT, b"%PDF-1.4 truncated"),
+                ("ok.pdf", FileType.DOCUMENT, pdf_bytes("Manual")),
+            ],
+        )
+        reader = make_binder(session_factory, storage, project, {})
+        contents = reader.pages[1].extract_text()
+        assert "broken.pdf  (not included:" in contents
+        assert reader.pages[2].extract_text().strip() == "Manual"
+
+    def test_no_attachments_uses_table_renderer(
+        self, session_factory, storage, project
+    ):
+        reader = make_binder(session_factory, storage, project, {})
+        assert reader.outline == []
+
+
+class TestPdfOutline:
+    def test_reserved_pages_and_outline(self):
+        out = io.BytesIO()
+        writer = StreamingPdfWriter(out)
+        writer.add_page(b"")
+        (toc,) = writer.reserve_pages(1)
+        chapter = writer.add_page(b"")
+        writer.add_outline("Contents", toc)
+        parent = writer.add_outline("Chapter ü", chapter)
+        writer.add_outline("Section", chapter, parent=parent)
+        writer.add_page(b"", page_number=toc, links=[(0, 0, 10, 10, chapter)])
+        writer.reserve()  # never written: a free xref entry
+        writer.close()
+
+        reader = PdfReader(io.BytesIO(out.getvalue()))
+        assert len(reader.pages) == 3
+        assert outline_titles(reader.outline) == [
+            "Contents",
+            "Chapter ü",
+            [["Section"]],
+        ]
+        assert reader.get_destination_page_number(reader.outline[1]) == 2
+        assert (
+            reader.pages[1]["/Annots"][0].get_object()["/Dest"][0]
+            == reader.pages[2].indirect_reference
+        )
+
+    def test_unwritten_reserved_page(self):
+        writer = StreamingPdfWriter(io.BytesIO())
+        writer.reserve_pages(1)
+        with pytest.raises(ValueError):
+            writer.close()
@@ -0,0 +1,193 @@
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from app.api import materials as materials_api
+from app.models.audit import AuditAction, AuditLog
+from app.models.material import MaterialCategory, MaterialLineItem, UnitOfMeasure
+from app.models.project import BuildProject
+from app.models.tenant import Tenant
+from app.utils.calculations import ConstructionCalculator
+
+ITEMS = [
+    (MaterialCategory.FRAMING, "2x4 studs 8ft", "120", "0.1", "4.37"),
+    (MaterialCategory.FRAMING, "2x6 studs 10% grade", "33.333", "0.05", "7.15"),
+    (MaterialCategory.FRAMING, "LVL beam", "3", "0", "212.50"),
+    (MaterialCategory.CONCRETE, "2x4 form boards", "40", "0", "3.99"),
+]
+
+
+def add_items(db, project_id, items=ITEMS):
+    for category, description, quantity, wastage, unit_cost in items:
+        item = MaterialLineItem(
+            project_id=project_id,
+            category=category,
+            description=description,
+            quantity=Decimal(quantity),
+            unit=UnitOfMeasure.EA,
+            wastage_factor=Decimal(wastage),
+            unit_cost=Decimal(unit_cost),
+        )
+        materials_api.compute_material_totals(item)
+        db.add(item)
+
+
+def seed(db, project):
+    add_items(db, project.id)
+    second = BuildProject(tenant_id=project.tenant_id, title="Lot 8")
+    other_tenant = Tenant(name="Other Builder", slug="other")
+    db.add_all([second, other_tenant])
+    db.flush()
+    add_items(db, second.id, ITEMS[:1])
+    theirs = BuildProject(tenant_id=other_tenant.id, title="Lot 1")
+    db.add(theirs)
+    db.flush()
+    add_items(db, theirs.id, ITEMS[:1])
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client(
+        {"/materials": materials_api.router},
+        [MaterialLineItem, AuditLog],
+        seed=seed,
+        role="PM",
+    )
+
+
+def items(client):
+    db = client.session_factory()
+    try:
+        return (
+            db.query(MaterialLineItem, BuildProject.tenant_id).join(BuildProject).all()
+        )
+    finally:
+        db.close()
+
+
+def python_total(item, unit_cost):
+    return ConstructionCalculator.total_cost(float(item.total_qty), float(unit_cost))
+
+
+class TestReprice:
+    def test_percent_change_matches_python_rounding(self, client):
+        before = {item.id: item for item, _ in items(client)}
+        response = client.post(
+            "/materials/reprice",
+            json={"categories": ["FRAMING"], "percent_change": "12.5"},
+        )
+        assert response.status_code == 200
+        body = response.json()
+        assert body["matched_count"] == body["updated_count"] == 4
+        assert len(body["project_ids"]) == 2
+
+        for item, tenant_id in items(client):
+            old = before[item.id]
+            if (
+                tenant_id != client.tenant_id
+                or item.category != MaterialCategory.FRAMING
+            ):
+                assert item.unit_cost == old.unit_cost
+                continue
+            expected_unit = ConstructionCalculator._round(
+                old.unit_cost * Decimal("1.125")
+            )
+            assert item.unit_cost == expected_unit
+            assert item.total_cost == python_total(item, expected_unit)
+        after = sum(
+            i.total_cost
+            for i, t in items(client)
+            if t == client.tenant_id and i.category == "FRAMING"
+        )
+        assert Decimal(body["total_cost_after"]) == after
+        assert Decimal(body["cost_delta"]) == after - Decimal(body["total_cost_before"])
+
+    def test_dry_run_changes_nothing(self, client):
+        before = {item.id: item.unit_cost for item, _ in items(client)}
+        params = {
+            "project_ids": [str(client.project_id)],
+            "description_pattern": "2x4*",
+            "unit_cost": "5.00",
+        }
+        preview = client.post(
+            "/materials/reprice", json={**params, "dry_run": True}
+        ).json()
+        assert (
+            preview["dry_run"]
+            and preview["matched_count"] == 2
+            and preview["updated_count"] == 0
+        )
+        assert {item.id: item.unit_cost for item, _ in items(client)} == before
+
+        applied = client.post("/materials/reprice", json=params).json()
+        assert applied["cost_delta"] == preview["cost_delta"]
+        assert applied["total_cost_after"] == preview["total_cost_after"]
+        assert sorted(
+            i.description for i, _ in items(client) if i.unit_cost == Decimal("5.00")
+        ) == [
+            "2x4 form boards",
+            "2x4 studs 8ft",
+        ]
+
+    def test_pattern_wildcards_are_literal(self, client):
+        body = client.post(
+            "/materials/reprice",
+            json={"description_pattern": "*10%*", "unit_cost": "1", "dry_run": True},
+        ).json()
+        assert body["matched_count"] == 1
+        body = client.post(
+            "/materials/reprice",
+            json={"description_pattern": "2_4*", "unit_cost": "1", "dry_run": True},
+        ).json()
+        assert body["matched_count"] == 0
+
+    def test_one_audit_entry_per_project(self, client):
+        body = client.post(
+            "/materials/reprice",
+            json={"categories": ["FRAMING"], "percent_change": "-10"},
+        ).json()
+        db = client.session_factory()
+        logs = db.query(AuditLog).all()
+        db.close()
+        assert sorted(str(log.entity_id) for log in logs) == sorted(body["project_ids"])
+        assert all(log.action == AuditAction.UPDATE for log in logs)
+        assert sum(log.changes["updated_count"] for log in logs) == 4
+        assert sum(Decimal(log.changes["total_cost_after"]) for log in logs) == Decimal(
+            body["total_cost_after"]
+        )
+        assert sum(
+            Decimal(log.changes["total_cost_before"]) for log in logs
+        ) == Decimal(body["total_cost_before"])
+        assert logs[0].changes["bulk_reprice"] == {
+            "categories": ["FRAMING"],
+            "percent_change": "-10",
+        }
+
+    def test_overflow_is_rejected(self, client):
+        response = client.post(
+            "/materials/reprice",
+            json={"categories": ["FRAMING"], "percent_change": "10000"},
+        )
+        assert response.status_code == 200
+        response = client.post(
+            "/materials/reprice",
+            json={"categories": ["FRAMING"], "unit_cost": "99999999.99"},
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            {"unit_cost": "5"},
+            {"categories": ["FRAMING"]},
+            {"categories": ["FRAMING"], "unit_cost": "5", "percent_change": "5"},
+            {"categories": ["FRAMING"], "percent_change": "-101"},
+        ],
+    )
+    def test_invalid_requests(self, client, body):
+        assert client.post("/materials/reprice", json=body).status_code == 422
+
+    def test_other_tenant_project_not_found(self, client):
+        body = {"project_ids": [str(uuid.uuid4())], "unit_cost": "5"}
+        assert client.post("/materials/reprice", json=body).status_code == 404
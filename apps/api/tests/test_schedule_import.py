@@ -0,0 +1,171 @@
+import io
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.api import schedule as schedule_api
+from app.models.audit import AuditLog
+from app.models.project import BuildProject
+from app.models.schedule import MilestonePhase, ScheduleMilestone
+from app.utils import import_export
+from app.utils.import_export import ScheduleCsvImporter
+
+HEADER = "phase,description,baseline_start_date,baseline_end_date"
+
+
+def seed_milestone(db, project):
+    db.add(
+        ScheduleMilestone(
+            project_id=project.id,
+            phase=MilestonePhase.FOUNDATION,
+            description="Footings",
+            baseline_start_date=date(2030, 1, 1),
+            baseline_end_date=date(2030, 1, 15),
+            percent_complete=Decimal("40"),
+        )
+    )
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client(
+        {"/schedule": schedule_api.router},
+        [ScheduleMilestone, AuditLog],
+        seed=seed_milestone,
+    )
+
+
+def milestones(client):
+    db = client.session_factory()
+    try:
+        rows = (
+            db.query(ScheduleMilestone)
+            .order_by(ScheduleMilestone.baseline_start_date)
+            .all()
+        )
+        version = db.get(BuildProject, client.project_id).data_version
+        return {m.phase.value: m for m in rows}, version
+    finally:
+        db.close()
+
+
+def upload(client, body, **params):
+    return client.post(
+        f"/schedule/import-csv/{client.project_id}",
+        params=params,
+        files={"file": ("schedule.csv", body.encode())},
+    )
+
+
+class TestScheduleCsvImporter:
+    def test_parse_stream(self):
+        body = f"{HEADER},percent_complete\nframing,Walls,2030-02-01,2030-03-01,25%\n"
+        importer = ScheduleCsvImporter()
+        [milestone] = importer.parse_stream(io.StringIO(body), str(uuid.uuid4()))
+        assert milestone.phase == MilestonePhase.FRAMING
+        assert milestone.baseline_start_date == date(2030, 2, 1)
+        assert milestone.percent_complete == Decimal("25")
+        assert importer.columns == [
+            "phase",
+            "description",
+            "baseline_start_date",
+            "baseline_end_date",
+            "percent_complete",
+        ]
+
+    def test_batch_validation(self):
+        body = (
+            f"{HEADER},actual_start_date,actual_end_date\n"
+            "FRAMING,Walls,2030-02-01,2030-03-01,,\n"
+            "FRAMING,Again,2030-02-01,2030-03-01,,\n"
+            "DRYWALL,Backwards,2030-03-01,2030-02-01,,\n"
+            "FINAL,Actuals,2030-04-01,2030-05-01,2030-04-10,2030-04-02\n"
+        )
+        importer = ScheduleCsvImporter()
+        with pytest.raises(import_export.ImportError):
+            importer.parse_csv(body, str(uuid.uuid4()))
+        assert [e.split(":")[0] for e in importer.errors] == ["Row 3", "Row 4", "Row 5"]
+        assert "Duplicate phase FRAMING" in importer.errors[0]
+
+
+class TestScheduleImportEndpoint:
+    def test_insert(self, client):
+        _, version = milestones(client)
+        body = f"{HEADER}\nFRAMING,Walls,2030-02-01,2030-03-01\nDRYWALL,Board,2030-03-01,2030-04-01\n"
+        response = upload(client, body)
+
+        assert response.status_code == 200
+        assert response.json()["success_count"] == 2
+        rows, new_version = milestones(client)
+        assert set(rows) == {"FOUNDATION", "FRAMING", "DRYWALL"}
+        assert {str(rows[p].id) for p in ("FRAMING", "DRYWALL")} == set(
+            response.json()["milestone_ids"]
+        )
+        assert new_version == version + 1
+
+    def test_existing_phase_conflicts_without_upsert(self, client):
+        body = f"{HEADER}\nFRAMING,Walls,2030-02-01,2030-03-01\nFOUNDATION,Slab,2030-01-02,2030-01-20\n"
+        response = upload(client, body)
+
+        assert response.status_code == 409
+        assert set(milestones(client)[0]) == {"FOUNDATION"}
+
+    def test_upsert_updates_columns_in_file(self, client):
+        before = milestones(client)[0]["FOUNDATION"]
+        body = f"{HEADER}\nFOUNDATION,Slab,2030-01-02,2030-01-20\nFRAMING,Walls,2030-02-01,2030-03-01\n"
+        response = upload(client, body, upsert="true")
+
+        assert response.status_code == 200
+        rows, _ = milestones(client)
+        assert rows["FOUNDATION"].id == before.id
+        assert rows["FOUNDATION"].description == "Slab"
+        assert rows["FOUNDATION"].baseline_end_date == date(2030, 1, 20)
+        # Not in the file, so left alone
+        assert rows["FOUNDATION"].percent_complete == Decimal("40")
+        assert "FRAMING" in rows
+
+    def test_invalid_file(self, client):
+        response = upload(client, "phase,description\nFRAMING,Walls\n")
+        assert response.status_code == 400
+        assert "Missing required headers" in response.json()["detail"]
+
+    def test_export_round_trip(self, client):
+        exported = client.get(f"/schedule/export-csv/{client.project_id}")
+        assert exported.status_code == 200
+        assert exported.text.splitlines()[1].split(",")[1:5] == [
+            "FOUNDATION",
+            "Footings",
+            "2030-01-01",
+            "2030-01-15",
+        ]
+
+        response = upload(client, exported.text, upsert="true")
+        assert response.status_code == 200
+        assert milestones(client)[0]["FOUNDATION"].percent_complete == Decimal("40")
+
+    def test_create_duplicate_phase_conflicts(self, client):
+        response = client.post(
+            "/schedule/",
+            json={
+                "project_id": str(client.project_id),
+                "phase": "FOUNDATION",
+                "baseline_start_date": "2030-01-01",
+                "baseline_end_date": "2030-01-10",
+            },
+        )
+        assert response.status_code == 409
+
+    def test_dry_run(self, client):
+        body = f"{HEADER}\nFRAMING,Walls,2030-02-01,2030-03-01\nDRYWALL,Board,2030-04-01,2030-03-01\n"
+        response = upload(client, body, dry_run="true")
+
+        assert response.status_code == 200
+        assert response.json()["dry_run"] is True
+        assert (response.json()["success_count"], response.json()["error_count"]) == (
+            1,
+            1,
+        )
+        assert response.json()["errors"][0].startswith("Row 3:")
+        assert set(milestones(client)[0]) == {"FOUNDATION"}
@@ -0,0 +1,398 @@
+import hashlib
+import io
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+
+from app.api import files as files_api
+from app.core.config import settings
+from app.files import text
+from app.files.blobs import purge_orphan_blobs
+from app.models.blob import Blob
+from app.models.file import File
+from app.models.file_text import FileText
+from app.storage import LocalStorage, StorageError
+from app.storage.responses import RangeNotSatisfiable, parse_range
+from app.storage.s3 import S3Storage
+from app.storage.signing import signed_url, verify_signature
+
+BLOB = bytes(range(256)) * 4096  # 1 MB
+
+
+class TestParseRange:
+    def test_no_header(self):
+        assert parse_range(None, 100) is None
+
+    def test_closed_range(self):
+        assert parse_range("bytes=10-19", 100) == (10, 19)
+
+    def test_open_ended_range(self):
+        assert parse_range("bytes=90-", 100) == (90, 99)
+
+    def test_end_clamped_to_size(self):
+        assert parse_range("bytes=50-500", 100) == (50, 99)
+
+    def test_suffix_range(self):
+        assert parse_range("bytes=-10", 100) == (90, 99)
+        assert parse_range("bytes=-500", 100) == (0, 99)
+
+    def test_ignored_headers(self):
+        assert parse_range("bytes=0-1,5-6", 100) is None
+        assert parse_range("items=0-1", 100) is None
+        assert parse_range("bytes=abc-", 100) is None
+        assert parse_range("bytes=20-10", 100) is None
+
+    def test_unsatisfiable(self):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range("bytes=100-", 100)
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range("bytes=-5", 0)
+
+
+class TestSigning:
+    def _query(self, url):
+        query = dict(part.split("=") for part in url.split("?", 1)[1].split("&"))
+        return int(query["expires"]), query["signature"]
+
+    def test_round_trip(self):
+        expires, signature = self._query(signed_url("t/p/u/plan.pdf", "GET", 60))
+        assert verify_signature("t/p/u/plan.pdf", "GET", expires, signature)
+
+    def test_bound_to_key_and_method(self):
+        expires, signature = self._query(signed_url("t/p/u/plan.pdf", "GET", 60))
+        assert not verify_signature("t/p/u/other.pdf", "GET", expires, signature)
+        assert not verify_signature("t/p/u/plan.pdf", "PUT", expires, signature)
+
+    def test_expired(self):
+        expires, signature = self._query(
+            signed_url("k", "GET", 60, now=time.time() - 120)
+        )
+        assert not verify_signature("k", "GET", expires, signature)
+
+
+class TestLocalStorage:
+    def test_iter_range(self, tmp_path):
+        storage = LocalStorage(str(tmp_path))
+        storage.save("a/b.bin", io.BytesIO(BLOB))
+        chunks = list(storage.iter_range("a/b.bin", 1000, 300_000, chunk_size=65536))
+        assert b"".join(chunks) == BLOB[1000:301000]
+        assert max(len(c) for c in chunks) == 65536
+
+    def test_open_write_is_atomic(self, tmp_path):
+        storage = LocalStorage(str(tmp_path))
+        with pytest.raises(RuntimeError):
+            with storage.open_write("a/b.bin") as out:
+                out.write(b"partial")
+                raise RuntimeError()
+        assert not storage.exists("a/b.bin")
+        assert list((tmp_path / "a").iterdir()) == []
+
+    def test_rejects_escaping_keys(self, tmp_path):
+        storage = LocalStorage(str(tmp_path / "root"))
+        with pytest.raises(StorageError):
+            storage.save("../outside.bin", io.BytesIO(b"x"))
+
+
+class _FakeBody:
+    def __init__(self, data):
+        self.data = data
+        self.closed = False
+
+    def iter_chunks(self, chunk_size):
+        for i in range(0, len(self.data), chunk_size):
+            yield self.data[i : i + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeS3Client:
+    def __init__(self):
+        self.calls = []
+
+    def get_object(self, Bucket, Key, Range=None):
+        self.calls.append(("get_object", Bucket, Key, Range))
+        start, end = (int(v) for v in Range.split("=")[1].split("-"))
+        return {"Body": _FakeBody(BLOB[start : end + 1])}
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://minio.local/{Params['Bucket']}/{Params['Key']}?op={operation}&ttl={ExpiresIn}"
+
+
+class TestS3Storage:
+    def test_iter_range_requests_only_the_range(self):
+        client = _FakeS3Client()
+        storage = S3Storage("drawings", client=client)
+        data = b"".join(storage.iter_range("k", 10, 100, chunk_size=64))
+        assert data == BLOB[10:110]
+        assert client.calls == [("get_object", "drawings", "k", "bytes=10-109")]
+
+    def test_presigned_url(self):
+        storage = S3Storage("drawings", client=_FakeS3Client())
+        assert (
+            storage.presigned_url("k", "PUT", 60)
+            == "https://minio.local/drawings/k?op=put_object&ttl=60"
+        )
+
+    def test_bucket_required(self):
+        with pytest.raises(StorageError):
+            S3Storage("", client=_FakeS3Client())
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client(
+        {"/api/files": files_api.router},
+        [Blob, File, FileText],
+        storage_modules=[files_api, text],
+        task_modules=[text],
+    )
+
+
+def upload(client, filename="A-101 plan.pdf", data=BLOB):
+    response = client.post(
+        "/api/files/upload-url",
+        params={"filename": filename, "project_id": str(client.project_id)},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["expires_in"] == settings.STORAGE_URL_TTL_SECONDS
+    response = client.put(body["upload_url"], content=data)
+    assert response.status_code == 200
+    sha256 = response.json()["sha256"]
+    assert sha256 == hashlib.sha256(data).hexdigest()
+    response = client.post(
+        "/api/files/",
+        json={
+            "project_id": str(client.project_id),
+            "filename": filename,
+            "file_type": "DRAWING",
+            "sha256": sha256,
+        },
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestFilesApi:
+    def test_upload_and_download(self, client):
+        file = upload(client)
+        assert file["size_bytes"] == len(BLOB)
+        assert file["sha256"] == hashlib.sha256(BLOB).hexdigest()
+        assert file["storage_key"].endswith("/A-101 plan.pdf")
+        url = client.get(f"/api/files/{file['id']}/download-url").json()["download_url"]
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.content == BLOB
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["content-length"] == str(len(BLOB))
+
+    def test_range_download(self, client):
+        file = upload(client)
+        url = client.get(f"/api/files/{file['id']}/download-url").json()["download_url"]
+        response = client.get(url, headers={"Range": "bytes=1000-1999"})
+        assert response.status_code == 206
+        assert response.content == BLOB[1000:2000]
+        assert response.headers["content-range"] == f"bytes 1000-1999/{len(BLOB)}"
+
+        # Resuming with the current ETag gets the range; a stale one gets everything
+        etag = response.headers["etag"]
+        response = client.get(url, headers={"Range": "bytes=-10", "If-Range": etag})
+        assert response.status_code == 206
+        assert response.content == BLOB[-10:]
+        response = client.get(
+            url, headers={"Range": "bytes=-10", "If-Range": '"stale"'}
+        )
+        assert response.status_code == 200
+        assert response.content == BLOB
+
+    def test_unsatisfiable_range(self, client):
+        file = upload(client)
+        url = client.get(f"/api/files/{file['id']}/download-url").json()["download_url"]
+        response = client.get(url, headers={"Range": f"bytes={len(BLOB)}-"})
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{len(BLOB)}"
+
+    def test_head(self, client):
+        file = upload(client)
+        url = client.get(f"/api/files/{file['id']}/download-url").json()["download_url"]
+        response = client.head(url)
+        assert response.status_code == 200
+        assert response.headers["content-length"] == str(len(BLOB))
+        assert response.content == b""
+
+    def test_bad_signature(self, client):
+        file = upload(client)
+        url = client.get(f"/api/files/{file['id']}/download-url").json()["download_url"]
+        assert client.get(url[:-4] + "0000").status_code == 403
+        # A download URL cannot be used to overwrite the object
+        assert client.put(url, content=b"evil").status_code == 403
+
+    def test_accel_redirect(self, client, monkeypatch):
+        monkeypatch.setattr(
+            settings, "STORAGE_LOCAL_ACCEL_REDIRECT_PREFIX", "/protected/"
+        )
+        file = upload(client)
+        url = client.get(f"/api/files/{file['id']}/download-url").json()["download_url"]
+        response = client.get(url, headers={"Range": "bytes=0-9"})
+        assert response.status_code == 200
+        assert (
+            response.headers["x-accel-redirect"]
+            == "/protected/" + url.split("/blob/", 1)[1].split("?")[0]
+        )
+        assert response.content == b""
+
+    def test_create_requires_uploaded_object(self, client):
+        payload = {
+            "project_id": str(client.project_id),
+            "filename": "x.pdf",
+            "file_type": "DRAWING",
+        }
+        key = f"{client.tenant_id}/{client.project_id}/{uuid.uuid4()}/x.pdf"
+        response = client.post("/api/files/", json={**payload, "storage_key": key})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "File has not been uploaded"
+
+        other_tenant_key = f"{uuid.uuid4()}/{client.project_id}/{uuid.uuid4()}/x.pdf"
+        response = client.post(
+            "/api/files/", json={**payload, "storage_key": other_tenant_key}
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid storage key"
+
+    def test_filename_is_sanitised(self, client):
+        response = client.post(
+            "/api/files/upload-url",
+            params={
+                "filename": "../../etc/pass?wd",
+                "project_id": str(client.project_id),
+            },
+        )
+        assert response.json()["storage_key"].endswith("/pass_wd")
+
+
+def blobs(client):
+    db = client.session_factory()
+    try:
+        return [
+            (blob.sha256, blob.storage_key, blob.ref_count)
+            for blob in db.query(Blob).all()
+        ]
+    finally:
+        db.close()
+
+
+def stored_files(client):
+    return sorted(p for p in Path(client.storage.root).rglob("*") if p.is_file())
+
+
+class TestDeduplication:
+    def test_duplicate_upload_is_discarded(self, client):
+        first = upload(client, "A-101.pdf")
+        body = client.post(
+            "/api/files/upload-url",
+            params={"filename": "copy.pdf", "project_id": str(client.project_id)},
+        ).json()
+        response = client.put(body["upload_url"], content=BLOB)
+        assert response.json() == {
+            "sha256": first["sha256"],
+            "size_bytes": len(BLOB),
+            "duplicate": True,
+        }
+        assert not client.storage.exists(body["storage_key"])
+
+        response = client.post(
+            "/api/files/",
+            json={
+                "project_id": str(client.project_id),
+                "filename": "copy.pdf",
+                "file_type": "DRAWING",
+                "sha256": first["sha256"],
+            },
+        )
+        assert response.status_code == 200
+        assert response.json()["storage_key"] == first["storage_key"]
+        assert blobs(client) == [(first["sha256"], first["storage_key"], 2)]
+        assert len(stored_files(client)) == 1
+
+    def test_upload_url_reports_existing_content(self, client):
+        digest = hashlib.sha256(BLOB).hexdigest()
+        params = {
+            "filename": "x.pdf",
+            "project_id": str(client.project_id),
+            "sha256": digest,
+        }
+        assert (
+            client.post("/api/files/upload-url", params=params).json()["blob_exists"]
+            is False
+        )
+        upload(client)
+        assert (
+            client.post("/api/files/upload-url", params=params).json()["blob_exists"]
+            is True
+        )
+
+    def test_unknown_sha256(self, client):
+        response = client.post(
+            "/api/files/",
+            json={
+                "project_id": str(client.project_id),
+                "filename": "x.pdf",
+                "file_type": "DRAWING",
+                "sha256": "0" * 64,
+            },
+        )
+        assert response.status_code == 400
+
+    def test_direct_uploads_are_hashed_on_save(self, client):
+        # Objects PUT straight to the backend (S3 presigned URLs) never pass through the API
+        keys = [
+            f"{client.tenant_id}/{client.project_id}/{uuid.uuid4()}/plan.pdf"
+            for _ in range(2)
+        ]
+        files = []
+        for key in keys:
+            client.storage.save(key, io.BytesIO(BLOB))
+            payload = {
+                "project_id": str(client.project_id),
+                "filename": "plan.pdf",
+                "file_type": "DRAWING",
+            }
+            files.append(
+                client.post("/api/files/", json={**payload, "storage_key": key}).json()
+            )
+        assert (
+            files[0]["sha256"] == files[1]["sha256"] == hashlib.sha256(BLOB).hexdigest()
+        )
+        assert files[1]["storage_key"] == keys[0]
+        assert not client.storage.exists(keys[1])
+        assert blobs(client) == [(files[0]["sha256"], keys[0], 2)]
+
+    def test_stored_content_is_never_replaced(self, client):
+        body = client.post(
+            "/api/files/upload-url",
+            params={"filename": "x.pdf", "project_id": str(client.project_id)},
+        ).json()
+        assert client.put(body["upload_url"], content=BLOB).json()["duplicate"] is False
+        assert client.put(body["upload_url"], content=BLOB).json()["duplicate"] is True
+        assert client.put(body["upload_url"], content=b"other").status_code == 409
+        assert client.storage.open(body["storage_key"]).read() == BLOB
+
+    def test_delete_and_purge(self, client, monkeypatch):
+        first = upload(client, "a.pdf")
+        second = upload(client, "b.pdf")
+        assert first["storage_key"] == second["storage_key"]
+
+        assert client.delete(f"/api/files/{first['id']}").status_code == 204
+        assert blobs(client)[0][2] == 1
+        assert purge_orphan_blobs(client.session_factory, client.storage) == 0
+
+        assert client.delete(f"/api/files/{second['id']}").status_code == 204
+        assert client.delete(f"/api/files/{second['id']}").status_code == 404
+        assert blobs(client)[0][2] == 0
+        monkeypatch.setattr(settings, "BLOB_ORPHAN_TTL_HOURS", -1)
+        assert purge_orphan_blobs(client.session_factory, client.storage) == 1
+        assert blobs(client) == []
+        assert stored_files(client) == []
@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.auth.jwt import clerk_auth
+from app.middleware.tenant import TenantContextMiddleware
+
+
+@pytest.fixture
+def client(clerk_pem):
+    app = FastAPI()
+    app.add_middleware(TenantContextMiddleware)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.get("/whoami")
+    async def whoami(request: Request):
+        return {
+            "tenant_id": request.state.tenant_id,
+            "user_id": request.state.user_id,
+            "user_role": request.state.user_role,
+            "request_id": request.state.request_id,
+            "loop_thread": threading.get_ident(),
+        }
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse(
+            iter([b"a,b\n", b"1,2\n", b"3,4\n"]), media_type="text/csv"
+        )
+
+    return TestClient(app)
+
+
+def test_valid_token_populates_state(client, make_token):
+    response = client.get(
+        "/whoami", headers={"Authorization": f"Bearer {make_token()}"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["tenant_id"] == "tenant_abc"
+    assert data["user_id"] == "user_123"
+    assert data["user_role"] == "PM"
+    assert response.headers["X-Request-ID"] == data["request_id"]
+
+
+def test_invalid_token_leaves_state_empty(client, make_token):
+    token = make_token() + "tampered"
+    response = client.get("/whoami", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json()["tenant_id"] is None
+    assert response.json()["user_id"] is None
+
+
+def test_token_without_subject_is_ignored(client, make_token):
+    response = client.get(
+        "/whoami", headers={"Authorization": f"Bearer {make_token(sub=None)}"}
+    )
+    assert response.json()["user_id"] is None
+
+
+def test_verification_runs_off_the_event_loop(client, make_token, monkeypatch):
+    # A cache miss may fetch the JWKS, which must not block the loop
+    threads = []
+    verify = clerk_auth.verify_token
+
+    def recording_verify(token):
+        threads.append(threading.get_ident())
+        return verify(token)
+
+    monkeypatch.setattr(clerk_auth, "verify_token", recording_verify)
+    token = make_token(sub="user_fresh")
+    first = client.get("/whoami", headers={"Authorization": f"Bearer {token}"}).json()
+    assert first["user_id"] == "user_fresh"
+    assert threads and threads[0] != first["loop_thread"]
+
+    # Verified tokens are then served from the cache without a thread hop
+    assert (
+        client.get("/whoami", headers={"Authorization": f"Bearer {token}"}).json()[
+            "user_id"
+        ]
+        == "user_fresh"
+    )
+    assert len(threads) == 1
+
+
+def test_missing_header(client):
+    response = client.get("/whoami")
+    assert response.json()["tenant_id"] is None
+    assert "X-Request-ID" in response.headers
+
+
+def test_public_path_skipped(client):
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert "X-Request-ID" not in response.headers
+
+
+def test_streaming_response_passes_through(client):
+    response = client.get("/stream")
+    assert response.content == b"a,b\n1,2\n3,4\n"
+    assert "X-Request-ID" in response.headers
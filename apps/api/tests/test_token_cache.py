@@ -0,0 +1,127 @@
+import pytest
+from fastapi import HTTPException
+from prometheus_client import REGISTRY
+
+from app.auth import jwt as auth_jwt
+from app.auth.token_cache import VerifiedTokenCache
+
+
+def lookups(cache: str, result: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "buildpro_cache_requests_total", {"cache": cache, "result": result}
+        )
+        or 0.0
+    )
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_700_000_000):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestVerifiedTokenCache:
+    def test_miss_then_hit(self, clock):
+        cache = VerifiedTokenCache(clock=clock)
+        assert cache.get("token") is None
+        cache.put("token", {"sub": "u1", "exp": clock.now + 60})
+        assert cache.get("token")["sub"] == "u1"
+
+    def test_expires_at_token_exp(self, clock):
+        cache = VerifiedTokenCache(ttl_seconds=300, clock=clock)
+        cache.put("token", {"sub": "u1", "exp": clock.now + 10})
+        clock.now += 10
+        assert cache.get("token") is None
+        assert len(cache) == 0
+
+    def test_expires_at_ttl(self, clock):
+        cache = VerifiedTokenCache(ttl_seconds=30, clock=clock)
+        cache.put("token", {"sub": "u1", "exp": clock.now + 3600})
+        clock.now += 29
+        assert cache.get("token") is not None
+        clock.now += 1
+        assert cache.get("token") is None
+
+    def test_not_served_before_nbf(self, clock):
+        cache = VerifiedTokenCache(clock=clock)
+        cache.put("token", {"sub": "u1", "nbf": clock.now + 5, "exp": clock.now + 60})
+        assert cache.get("token") is None
+        clock.now += 5
+        assert cache.get("token") is not None
+
+    def test_already_expired_not_cached(self, clock):
+        cache = VerifiedTokenCache(clock=clock)
+        cache.put("token", {"sub": "u1", "exp": clock.now - 1})
+        assert len(cache) == 0
+
+    def test_lru_eviction(self, clock):
+        cache = VerifiedTokenCache(max_size=2, clock=clock)
+        cache.put("a", {"sub": "a"})
+        cache.put("b", {"sub": "b"})
+        cache.get("a")  # a is now most recently used
+        cache.put("c", {"sub": "c"})
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+    def test_disabled_when_size_zero(self, clock):
+        cache = VerifiedTokenCache(max_size=0, clock=clock)
+        cache.put("token", {"sub": "u1"})
+        assert cache.get("token") is None
+
+    def test_returns_copy(self, clock):
+        cache = VerifiedTokenCache(clock=clock)
+        cache.put("token", {"sub": "u1"})
+        cache.get("token")["sub"] = "mutated"
+        assert cache.get("token")["sub"] == "u1"
+
+
+class TestClerkAuthCaching:
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self):
+        auth_jwt.clerk_auth.token_cache.clear()
+        yield
+        auth_jwt.clerk_auth.token_cache.clear()
+
+    def test_signature_verified_once(self, clerk_pem, make_token, monkeypatch):
+        calls = []
+        real_decode = auth_jwt.jwt.decode
+
+        def counting_decode(*args, **kwargs):
+            calls.append(1)
+            return real_decode(*args, **kwargs)
+
+        monkeypatch.setattr(auth_jwt.jwt, "decode", counting_decode)
+        token = make_token()
+
+        for _ in range(3):
+            assert auth_jwt.clerk_auth.verify_token(token)["sub"] == "user_123"
+        assert len(calls) == 1
+
+    def test_lookup_counted_once(self, clerk_pem, make_token):
+        token = make_token()
+        clerk_auth = auth_jwt.clerk_auth
+        misses, hits = lookups("jwt_claims", "miss"), lookups("jwt_claims", "hit")
+
+        # As the middleware does: a cache miss, then a verification
+        assert clerk_auth.cached_claims(token) is None
+        clerk_auth.verify_token(token)
+        assert clerk_auth.cached_claims(token)["sub"] == "user_123"
+
+        assert lookups("jwt_claims", "miss") == misses + 1
+        assert lookups("jwt_claims", "hit") == hits + 1
+
+    def test_invalid_token_not_cached(self, clerk_pem, make_token):
+        token = make_token() + "x"
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                auth_jwt.clerk_auth.verify_token(token)
+        assert len(auth_jwt.clerk_auth.token_cache) == 0
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import ConsoleSpanExporter, SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import SpanKind
+
+from app.core import celery_app, tracing
+from app.core.config import settings
+from app.db.base import engine
+
+
+class TestSetupTracing:
+    def test_disabled_returns_none(self, monkeypatch):
+        monkeypatch.setattr(settings, "OTEL_ENABLED", False)
+        assert tracing.setup_tracing(FastAPI(), engine) is None
+
+    def test_worker_process_installs_provider(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(
+            tracing, "setup_tracing", lambda app, engine: calls.append(app) or "p"
+        )
+        monkeypatch.setattr(celery_app, "_tracer_provider", None)
+        celery_app.worker_process_init.send(sender=None)
+        assert calls == [None]
+        assert celery_app._tracer_provider == "p"
+
+    def test_unknown_exporter(self):
+        with pytest.raises(ValueError):
+            tracing.build_exporter("zipkin")
+
+    def test_console_exporter(self):
+        assert isinstance(tracing.build_exporter("console"), ConsoleSpanExporter)
+
+    def test_file_exporter_writes_json_lines(self, monkeypatch, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        monkeypatch.setattr(settings, "OTEL_EXPORT_FILE", str(path))
+        provider = TracerProvider()
+        exporter = tracing.build_exporter("file")
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+
+        with provider.get_tracer("test").start_as_current_span("report.generate"):
+            pass
+        provider.shutdown()
+        assert exporter._file.closed
+
+        lines = path.read_text().strip().splitlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0])["name"] == "report.generate"
+
+
+class TestSampler:
+    def _sampled_count(self, ratio: float, n: int = 2000) -> int:
+        exporter = InMemorySpanExporter()
+        provider = TracerProvider(sampler=tracing.build_sampler(ratio))
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        tracer = provider.get_tracer("test")
+        for _ in range(n):
+            with tracer.start_as_current_span("req", kind=SpanKind.SERVER):
+                with tracer.start_as_current_span("child"):
+                    pass
+        return len(exporter.get_finished_spans())
+
+    def test_zero_ratio_samples_nothing(self):
+        assert self._sampled_count(0.0) == 0
+
+    def test_full_ratio_samples_everything(self):
+        assert self._sampled_count(1.0, n=10) == 20
+
+    def test_children_follow_parent_decision(self):
+        # Children are only recorded together with their root span
+        assert self._sampled_count(0.5) % 2 == 0
@@ -0,0 +1,270 @@
+import hashlib
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from app.api import materials as materials_api
+from app.api import uploads as uploads_api
+from app.core.config import settings
+from app.models.audit import AuditLog
+from app.models.import_job import ImportFormat, ImportJob, ImportJobStatus
+from app.models.material import MaterialLineItem
+from app.models.upload import UploadSession, UploadStatus
+from app.uploads.sessions import purge_expired_uploads
+
+CSV = (
+    "category,description,quantity,unit,wastage_factor,unit_cost,vendor,notes\n"
+    + "".join(f"FRAMING,Stud {i},10,EA,0.1,4.25,,\n" for i in range(200))
+).encode()
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client(
+        {"/uploads": uploads_api.router, "/materials": materials_api.router},
+        [MaterialLineItem, AuditLog, UploadSession, ImportJob],
+        storage_modules=[uploads_api, materials_api],
+    )
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def start(client, data, filename="takeoff.csv", **extra):
+    response = client.post(
+        "/uploads/",
+        json={
+            "project_id": str(client.project_id),
+            "filename": filename,
+            "total_size": len(data),
+            **extra,
+        },
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def put_chunk(client, upload_id, offset, chunk, digest=None):
+    return client.put(
+        f"/uploads/{upload_id}",
+        params={"offset": offset},
+        content=chunk,
+        headers={"X-Chunk-SHA256": digest or sha256(chunk)},
+    )
+
+
+def part_files(client):
+    return [p for p in Path(client.storage.root).rglob("*") if p.parent.name == "parts"]
+
+
+def upload_all(client, data, chunk_size=1000, **extra):
+    upload_id = start(client, data, sha256=sha256(data), **extra)
+    for offset in range(0, len(data), chunk_size):
+        assert (
+            put_chunk(
+                client, upload_id, offset, data[offset : offset + chunk_size]
+            ).status_code
+            == 200
+        )
+    return upload_id
+
+
+class TestChunkedUpload:
+    def test_upload_and_complete(self, client):
+        upload_id = upload_all(client, CSV)
+        response = client.post(f"/uploads/{upload_id}/complete")
+        assert response.status_code == 200
+        assert response.json()["status"] == "COMPLETED"
+
+        db = client.session_factory()
+        session = db.get(UploadSession, uuid.UUID(upload_id))
+        with client.storage.open(session.storage_key) as f:
+            assert f.read() == CSV
+        db.close()
+        # Parts are removed once assembled
+        assert part_files(client) == []
+
+    def test_resume_from_received_size(self, client):
+        upload_id = start(client, CSV)
+        put_chunk(client, upload_id, 0, CSV[:1000])
+
+        state = client.get(f"/uploads/{upload_id}").json()
+        assert state["received_size"] == 1000
+
+        # Skipping ahead is rejected
+        response = put_chunk(client, upload_id, 2000, CSV[2000:3000])
+        assert response.status_code == 409
+        assert "offset 1000" in response.json()["detail"]
+
+        assert put_chunk(client, upload_id, 1000, CSV[1000:]).status_code == 200
+        assert client.post(f"/uploads/{upload_id}/complete").status_code == 200
+
+    def test_retried_chunk_is_noop(self, client):
+        upload_id = start(client, CSV)
+        put_chunk(client, upload_id, 0, CSV[:1000])
+        response = put_chunk(client, upload_id, 0, CSV[:1000])
+        assert response.status_code == 200
+        assert response.json()["received_size"] == 1000
+
+        # A different chunk at an accepted offset conflicts
+        assert put_chunk(client, upload_id, 0, CSV[1:1001]).status_code == 409
+
+    def test_chunk_checksum_mismatch(self, client):
+        upload_id = start(client, CSV)
+        response = put_chunk(client, upload_id, 0, CSV[:1000], digest=sha256(b"other"))
+        assert response.status_code == 422
+        assert client.get(f"/uploads/{upload_id}").json()["received_size"] == 0
+
+    def test_chunk_size_limit(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "UPLOAD_MAX_CHUNK_SIZE", 500)
+        upload_id = start(client, CSV)
+        assert put_chunk(client, upload_id, 0, CSV[:1000]).status_code == 413
+
+    def test_chunk_past_total_size(self, client):
+        upload_id = start(client, CSV[:100])
+        assert put_chunk(client, upload_id, 0, CSV[:200]).status_code == 400
+
+    def test_complete_requires_all_bytes(self, client):
+        upload_id = start(client, CSV)
+        put_chunk(client, upload_id, 0, CSV[:1000])
+        response = client.post(f"/uploads/{upload_id}/complete")
+        assert response.status_code == 409
+        assert "incomplete" in response.json()["detail"]
+
+    def test_file_checksum_mismatch(self, client):
+        upload_id = start(client, CSV, sha256=sha256(b"something else"))
+        put_chunk(client, upload_id, 0, CSV)
+        assert client.post(f"/uploads/{upload_id}/complete").status_code == 422
+        assert client.get(f"/uploads/{upload_id}").json()["status"] == "FAILED"
+        assert part_files(client) == []
+        assert client.post(f"/uploads/{upload_id}/complete").status_code == 409
+
+    def test_abort_deletes_parts(self, client):
+        upload_id = start(client, CSV)
+        put_chunk(client, upload_id, 0, CSV[:1000])
+        assert client.delete(f"/uploads/{upload_id}").status_code == 204
+
+        assert part_files(client) == []
+        assert put_chunk(client, upload_id, 1000, CSV[1000:2000]).status_code == 409
+
+    def test_abort_refused_while_import_job_reads_upload(self, client):
+        upload_id = upload_all(client, CSV)
+        client.post(f"/uploads/{upload_id}/complete")
+        db = client.session_factory()
+        job = ImportJob(
+            tenant_id=client.tenant_id,
+            project_id=client.project_id,
+            format=ImportFormat.CSV,
+            filename="takeoff.csv",
+            storage_key="unused",
+            upload_id=uuid.UUID(upload_id),
+        )
+        db.add(job)
+        db.commit()
+        assert client.delete(f"/uploads/{upload_id}").status_code == 409
+        assert client.get(f"/uploads/{upload_id}").json()["status"] == "COMPLETED"
+
+        job.status = ImportJobStatus.COMPLETED
+        db.commit()
+        db.close()
+        assert client.delete(f"/uploads/{upload_id}").status_code == 204
+
+    def test_expired_session(self, client):
+        upload_id = start(client, CSV)
+        put_chunk(client, upload_id, 0, CSV[:1000])
+        db = client.session_factory()
+        session = db.get(UploadSession, uuid.UUID(upload_id))
+        session.expires_at = datetime.now(timezone.utc) - timedelta(minutes=1)
+        db.commit()
+        db.close()
+
+        assert put_chunk(client, upload_id, 1000, CSV[1000:2000]).status_code == 410
+        assert purge_expired_uploads(client.session_factory, client.storage) == 1
+        assert (
+            client.get(f"/uploads/{upload_id}").json()["status"]
+            == UploadStatus.ABORTED.value
+        )
+        assert part_files(client) == []
+
+    def test_completed_upload_purged_after_ttl(self, client):
+        upload_id = upload_all(client, CSV)
+        session = client.post(f"/uploads/{upload_id}/complete").json()
+        assert session["status"] == "COMPLETED"
+        assert purge_expired_uploads(client.session_factory, client.storage) == 0
+
+        db = client.session_factory()
+        session = db.get(UploadSession, uuid.UUID(upload_id))
+        storage_key = session.storage_key
+        session.expires_at = datetime.now(timezone.utc) - timedelta(minutes=1)
+        job = ImportJob(
+            tenant_id=client.tenant_id,
+            project_id=client.project_id,
+            format=ImportFormat.CSV,
+            filename="takeoff.csv",
+            storage_key="unused",
+            upload_id=session.id,
+        )
+        db.add(job)
+        db.commit()
+        # Still being read by an import job
+        assert purge_expired_uploads(client.session_factory, client.storage) == 0
+        assert client.storage.exists(storage_key)
+
+        job.status = ImportJobStatus.COMPLETED
+        db.commit()
+        db.close()
+        assert purge_expired_uploads(client.session_factory, client.storage) == 1
+        assert not client.storage.exists(storage_key)
+        assert client.get(f"/uploads/{upload_id}").json()["status"] == "ABORTED"
+
+    def test_unknown_project(self, client):
+        response = client.post(
+            "/uploads/",
+            json={
+                "project_id": str(uuid.uuid4()),
+                "filename": "a.csv",
+                "total_size": 10,
+            },
+        )
+        assert response.status_code == 404
+
+
+class TestImportFromUpload:
+    def test_csv_import(self, client):
+        upload_id = upload_all(client, CSV)
+        client.post(f"/uploads/{upload_id}/complete")
+
+        response = client.post(f"/materials/import-upload/{upload_id}")
+        assert response.status_code == 200
+        assert response.json()["success_count"] == 200
+
+        db = client.session_factory()
+        assert (
+            db.query(MaterialLineItem).filter_by(project_id=client.project_id).count()
+            == 200
+        )
+        db.close()
+
+    def test_dry_run(self, client):
+        data = CSV + b"NOPE,Bad,10,EA,0,1,,\n"
+        upload_id = upload_all(client, data)
+        client.post(f"/uploads/{upload_id}/complete")
+
+        body = client.post(
+            f"/materials/import-upload/{upload_id}", params={"dry_run": True}
+        ).json()
+        assert body["dry_run"] is True
+        assert body["error_count"] == 1
+        assert body["errors"][0]["row"] == 202
+
+    def test_requires_completed_upload(self, client):
+        upload_id = start(client, CSV)
+        assert client.post(f"/materials/import-upload/{upload_id}").status_code == 409
+
+    def test_unsupported_extension(self, client):
+        upload_id = upload_all(client, CSV, filename="takeoff.pdf")
+        client.post(f"/uploads/{upload_id}/complete")
+        assert client.post(f"/materials/import-upload/{upload_id}").status_code == 400